@@ -1,5 +1,6 @@
 # core/command_builder.py
 
+import os
 import shlex
 import re
 import subprocess
@@ -70,9 +71,9 @@ class CommandBuilder:
         return parts
 
     @staticmethod
-    def build(parameters: list[Parameter]) -> str:
+    def build_args(parameters: list[Parameter]) -> list[str]:
         """
-        Reconstructs a command string from a list of Parameter tuples.
+        Returns the argument vector for a list of Parameter tuples, executable first.
         """
         args_list = []
         executable = ""
@@ -88,5 +89,62 @@ class CommandBuilder:
         # Prepend the executable to the argument list for proper command line generation
         if executable:
             args_list.insert(0, executable)
+        return args_list
+
+    @staticmethod
+    def resolve_executable(executable: str, base_dir: str) -> str:
+        """
+        Resolves a relative executable against the llama.cpp directory the way a shell
+        started there would, including the implicit '.exe' on Windows. Bare names that
+        are not found there are returned unchanged so they can be looked up on PATH.
+        """
+        if not executable or os.path.isabs(executable) or not base_dir:
+            return executable
+        candidates = [executable]
+        if os.name == 'nt' and not os.path.splitext(executable)[1]:
+            candidates.append(executable + '.exe')
+        for candidate in candidates:
+            path = os.path.join(base_dir, candidate)
+            if os.path.isfile(path):
+                return path
+        return executable if os.path.basename(executable) == executable else os.path.join(base_dir, executable)
+
+    @staticmethod
+    def launch_args(parameters: list[Parameter], base_dir: str = '') -> list[str]:
+        """
+        Returns the argument vector to execute directly, without a shell: quotes kept by
+        the Windows-style parsing of paths are removed and the executable is resolved
+        against base_dir.
+        """
+        args_list = [_unquote(arg) for arg in CommandBuilder.build_args(parameters)]
+        if args_list:
+            args_list[0] = CommandBuilder.resolve_executable(args_list[0], base_dir)
+        return args_list
+
+    @staticmethod
+    def build(parameters: list[Parameter]) -> str:
+        """
+        Reconstructs a command string from a list of Parameter tuples.
+        """
+        args_list = CommandBuilder.build_args(parameters)
+        return subprocess.list2cmdline(args_list) if args_list else ""
+
+    @staticmethod
+    def apply_updates(parameters: list[Parameter], updates: dict) -> list[Parameter]:
+        """
+        Applies a tuning wizard 'update_params' dictionary to a parameter list.
+        A value of 'REMOVE' deletes the flag; any other value adds or replaces it.
+        """
+        params_dict = {p.key: p.value for p in parameters}
+        for key, value in updates.items():
+            if value == 'REMOVE':
+                params_dict.pop(key, None)
+            else:
+                params_dict[key] = value
+        return [Parameter(k, v) for k, v in params_dict.items()]
+
 
-        return subprocess.list2cmdline(args_list) if args_list else ""
\ No newline at end of file
+def _unquote(token):
+    if len(token) >= 2 and token[0] == token[-1] and token[0] in '"\'':
+        return token[1:-1]
+    return token
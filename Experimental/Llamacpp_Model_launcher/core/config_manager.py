@@ -4,6 +4,32 @@ import configparser
 import os
 
 
+def _path(text):
+    return text.strip().strip('"')
+
+
+def _name_list(text):
+    """A comma-separated list, e.g. of configuration names."""
+    return [n.strip() for n in text.split(',') if n.strip()]
+
+
+def _path_list(text):
+    """Paths separated by ';' or newlines."""
+    return [_path(p) for p in text.replace('\n', ';').split(';') if p.strip()]
+
+
+def _port_range(text):
+    first, _, last = text.partition('-')
+    return int(first), int(last or first)
+
+
+def _prefetch_method(text):
+    method = text.strip().lower()
+    if method not in ('read', 'advise'):
+        raise ValueError(f"unknown Method '{method}'")
+    return method
+
+
 class ConfigManager:
     """Manages loading and saving of the application configuration file (config.ini)."""
 
@@ -34,6 +60,213 @@ class ConfigManager:
             models_file (str): Path to the models command file.
         """
         config = configparser.ConfigParser()
+        if os.path.exists(self.config_file):
+            config.read(self.config_file)  # Keep any other sections, e.g. [Exporter].
         config['Paths'] = {'LlamaCppDir': llamacpp_dir, 'ModelsFile': models_file}
         with open(self.config_file, 'w') as cf:
             config.write(cf)
+
+    def _read_section(self, name, schema, other_type=None):
+        """
+        Reads an optional section against a schema.
+        Args:
+            name (str): The section, e.g. 'Proxy'.
+            schema (dict): {option: (type, default)}. type is bool, int, float, str or a function
+                that parses the raw text and raises ValueError on bad input.
+            other_type: Type of the options not in the schema, which are configuration names
+                (case-insensitive, so returned in lower case). Ignored when None.
+        Returns:
+            A tuple ({option: value}, {other option: value}). Missing options get their default;
+            a section with an invalid value is reported and read as all defaults.
+        """
+        values = {option: default for option, (_, default) in schema.items()}
+        config = configparser.ConfigParser()
+        if os.path.exists(self.config_file):
+            config.read(self.config_file)
+        if name not in config:
+            return values, {}
+        section = config[name]
+        known = {option.lower() for option in schema}
+        try:
+            read = {option: self._get(section, option, kind) for option, (kind, _) in schema.items()
+                    if option in section}
+            others = {option: self._get(section, option, other_type) for option in section
+                      if option not in known} if other_type else {}
+        except ValueError as e:
+            print(f"[DIAGNOSTICS] Invalid [{name}] settings in {self.config_file}: {e}")
+            return values, {}
+        values.update(read)
+        return values, others
+
+    @staticmethod
+    def _get(section, option, kind):
+        if kind is bool:
+            return section.getboolean(option)
+        if kind is int:
+            return section.getint(option)
+        if kind is float:
+            return section.getfloat(option)
+        return kind(section.get(option))
+
+    def load_exporter_settings(self):
+        """
+        Reads the optional [Exporter] section, e.g.:
+            [Exporter]
+            Enabled = true
+            Host = 127.0.0.1
+            Port = 9464
+        Returns:
+            A tuple (enabled, host, port). The exporter is off unless enabled here.
+        """
+        values, _ = self._read_section('Exporter', {'Enabled': (bool, False), 'Host': (str, '127.0.0.1'),
+                                                    'Port': (int, 9464)})
+        return values['Enabled'], values['Host'], values['Port']
+
+    def load_pool_settings(self):
+        """
+        Reads the optional [Pool] section, e.g.:
+            [Pool]
+            ApiEnabled = true
+            ApiHost = 127.0.0.1
+            ApiPort = 9465
+            PortRange = 8080-8179
+        Returns:
+            A tuple (api_enabled, api_host, api_port, (first_port, last_port)). The API is off
+            unless enabled here.
+        """
+        values, _ = self._read_section('Pool', {'ApiEnabled': (bool, False), 'ApiHost': (str, '127.0.0.1'),
+                                                'ApiPort': (int, 9465), 'PortRange': (_port_range, (8080, 8179))})
+        return values['ApiEnabled'], values['ApiHost'], values['ApiPort'], values['PortRange']
+
+    def load_proxy_settings(self):
+        """
+        Reads the optional [Proxy] section, e.g.:
+            [Proxy]
+            Enabled = true
+            Host = 127.0.0.1
+            Port = 8000
+            VramBudgetGB = 44
+            RamBudgetGB = 96
+            MaxInstances = 0
+        Budgets of 0 mean no limit.
+        Returns:
+            A dict with 'enabled', 'host', 'port', 'vram_budget_gb', 'ram_budget_gb' and
+            'max_instances'. The proxy is off unless enabled here.
+        """
+        values, _ = self._read_section('Proxy', {
+            'Enabled': (bool, False), 'Host': (str, '127.0.0.1'), 'Port': (int, 8000),
+            'VramBudgetGB': (float, 0.0), 'RamBudgetGB': (float, 0.0), 'MaxInstances': (int, 0)})
+        return {'enabled': values['Enabled'], 'host': values['Host'], 'port': values['Port'],
+                'vram_budget_gb': values['VramBudgetGB'], 'ram_budget_gb': values['RamBudgetGB'],
+                'max_instances': values['MaxInstances']}
+
+    def load_idle_settings(self):
+        """
+        Reads the optional [IdleUnload] section, e.g.:
+            [IdleUnload]
+            Minutes = 60
+            CheckSeconds = 15
+            Big MoE Q4 = 20
+            Small Draft = 0
+        Minutes is the timeout of every configuration; any other key is a configuration name
+        (case-insensitive) with its own timeout. 0 means never unload.
+        Returns:
+            A dict with 'default_minutes', 'check_seconds' and 'per_config_minutes'. Nothing is
+            unloaded unless a timeout is set here.
+        """
+        values, per_config = self._read_section('IdleUnload', {'Minutes': (float, 0.0), 'CheckSeconds': (float, 15.0)},
+                                                other_type=float)
+        return {'default_minutes': values['Minutes'], 'check_seconds': values['CheckSeconds'],
+                'per_config_minutes': per_config}
+
+    def load_restart_settings(self):
+        """
+        Reads the optional [AutoRestart] section, e.g.:
+            [AutoRestart]
+            Enabled = false
+            MaxCrashes = 3
+            WindowMinutes = 10
+            InitialDelaySeconds = 2
+            MaxDelaySeconds = 60
+            OomFallback = true
+            Big MoE Q4 = true
+        Enabled applies to every configuration; any other key is a configuration name
+        (case-insensitive) that opts in or out on its own.
+        Returns:
+            A dict of RestartPolicy arguments. Nothing is restarted unless enabled here.
+        """
+        values, per_config = self._read_section('AutoRestart', {
+            'Enabled': (bool, False), 'MaxCrashes': (int, 3), 'WindowMinutes': (float, 10.0),
+            'InitialDelaySeconds': (float, 2.0), 'MaxDelaySeconds': (float, 60.0), 'OomFallback': (bool, True)},
+            other_type=bool)
+        return {'default_enabled': values['Enabled'], 'per_config': per_config, 'max_crashes': values['MaxCrashes'],
+                'window_seconds': values['WindowMinutes'] * 60, 'initial_delay': values['InitialDelaySeconds'],
+                'max_delay': values['MaxDelaySeconds'], 'oom_fallback': values['OomFallback']}
+
+    def load_prefetch_settings(self):
+        """
+        Reads the optional [Prefetch] section, e.g.:
+            [Prefetch]
+            Enabled = true
+            Method = read
+            ChunkMB = 16
+        Method 'read' streams the model files into the page cache before the server starts;
+        'advise' only hints the kernel (posix_fadvise) and starts the server at once.
+        Returns:
+            A dict with 'enabled', 'method' and 'chunk_mb'. Prewarming is off unless enabled here.
+        """
+        values, _ = self._read_section('Prefetch', {'Enabled': (bool, False), 'Method': (_prefetch_method, 'read'),
+                                                    'ChunkMB': (int, 16)})
+        return {'enabled': values['Enabled'], 'method': values['Method'], 'chunk_mb': values['ChunkMB']}
+
+    def load_model_cache_settings(self):
+        """
+        Reads the optional [ModelCache] section, e.g.:
+            [ModelCache]
+            Directory = D:\\model-cache
+            BudgetGB = 200
+            MinLaunches = 2
+        Models launched MinLaunches times are copied to Directory (on a fast disk) and later
+        launches use the copy; the least recently launched copies are deleted to stay in BudgetGB.
+        Returns:
+            A dict with 'directory', 'budget_gb' and 'min_launches'; the cache is off without a Directory.
+        """
+        values, _ = self._read_section('ModelCache', {'Directory': (_path, ''), 'BudgetGB': (float, 0.0),
+                                                      'MinLaunches': (int, 2)})
+        return {'directory': values['Directory'], 'budget_gb': values['BudgetGB'],
+                'min_launches': values['MinLaunches']}
+
+    def load_launch_queue_settings(self):
+        """
+        Reads the optional [LaunchQueue] section, e.g.:
+            [LaunchQueue]
+            Enabled = true
+            LoadsPerDevice = 1
+            Preload = Big MoE Q4, small-a
+            Big MoE Q4 = 10
+        Pool loads from the same disk wait for each other (LoadsPerDevice at a time); Preload
+        lists configurations the pool loads at startup. Any other key is a configuration name
+        (case-insensitive) with its priority; higher loads first, the default is 0.
+        Returns:
+            A dict with 'enabled', 'per_device', 'preload' and 'priorities'. Loads are not queued
+            unless enabled here.
+        """
+        values, priorities = self._read_section('LaunchQueue', {
+            'Enabled': (bool, False), 'LoadsPerDevice': (int, 1), 'Preload': (_name_list, [])}, other_type=int)
+        return {'enabled': values['Enabled'], 'per_device': values['LoadsPerDevice'],
+                'preload': values['Preload'], 'priorities': priorities}
+
+    def load_library_settings(self):
+        """
+        Reads the optional [Library] section, e.g.:
+            [Library]
+            Directories = D:\\models; E:\\more-models
+            Catalog = model_catalog.json
+            Workers = 8
+        Directories are scanned recursively for GGUF models (see scan_models.py).
+        Returns:
+            A dict with 'directories', 'catalog' and 'workers'.
+        """
+        values, _ = self._read_section('Library', {'Directories': (_path_list, []),
+                                                   'Catalog': (_path, 'model_catalog.json'), 'Workers': (int, 8)})
+        return {'directories': values['Directories'], 'catalog': values['Catalog'], 'workers': values['Workers']}
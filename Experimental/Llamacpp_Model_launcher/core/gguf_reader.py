@@ -0,0 +1,276 @@
+# core/gguf_reader.py
+
+import mmap
+import os
+import re
+import struct
+from collections import namedtuple
+
+GGUF_MAGIC = b'GGUF'
+
+# Matches the shard suffix of multi-part models, e.g. 'model-00001-of-00003.gguf'.
+MULTI_PART_PATTERN = re.compile(r'-(\d{5})-of-(\d{5})\.gguf$', re.IGNORECASE)
+
+# Routed expert tensors, e.g. 'blk.3.ffn_up_exps.weight'. Shared experts ('_shexp') are dense.
+EXPERT_TENSOR_PATTERN = re.compile(r'_exps\.')
+
+GGUFTensor = namedtuple('GGUFTensor', ['name', 'shape', 'ggml_type', 'n_bytes'])
+
+# Fixed-size GGUF metadata value types -> struct format.
+_VALUE_FORMATS = {
+    0: '<B', 1: '<b', 2: '<H', 3: '<h', 4: '<I', 5: '<i',
+    6: '<f', 7: '<?', 10: '<Q', 11: '<q', 12: '<d',
+}
+_TYPE_STRING = 8
+_TYPE_ARRAY = 9
+_UINT64 = struct.Struct('<Q')
+
+# Numeric arrays longer than this (token scores, token types) are skipped rather than unpacked.
+_MAX_ARRAY_ITEMS = 4096
+
+# ggml tensor types -> (elements per block, bytes per block).
+GGML_TYPE_SIZES = {
+    0: (1, 4),       # F32
+    1: (1, 2),       # F16
+    2: (32, 18),     # Q4_0
+    3: (32, 20),     # Q4_1
+    6: (32, 22),     # Q5_0
+    7: (32, 24),     # Q5_1
+    8: (32, 34),     # Q8_0
+    9: (32, 36),     # Q8_1
+    10: (256, 84),   # Q2_K
+    11: (256, 110),  # Q3_K
+    12: (256, 144),  # Q4_K
+    13: (256, 176),  # Q5_K
+    14: (256, 210),  # Q6_K
+    15: (256, 292),  # Q8_K
+    16: (256, 66),   # IQ2_XXS
+    17: (256, 74),   # IQ2_XS
+    18: (256, 98),   # IQ3_XXS
+    19: (256, 50),   # IQ1_S
+    20: (32, 18),    # IQ4_NL
+    21: (256, 110),  # IQ3_S
+    22: (256, 82),   # IQ2_S
+    23: (256, 136),  # IQ4_XS
+    24: (1, 1),      # I8
+    25: (1, 2),      # I16
+    26: (1, 4),      # I32
+    27: (1, 8),      # I64
+    28: (1, 8),      # F64
+    29: (256, 56),   # IQ1_M
+    30: (1, 2),      # BF16
+    34: (256, 54),   # TQ1_0
+    35: (256, 66),   # TQ2_0
+    39: (32, 17),    # MXFP4
+}
+
+# llama_ftype ('general.file_type') -> the quantization name used in model file names.
+FILE_TYPE_NAMES = {
+    0: 'F32', 1: 'F16', 2: 'Q4_0', 3: 'Q4_1', 7: 'Q8_0', 8: 'Q5_0', 9: 'Q5_1',
+    10: 'Q2_K', 11: 'Q3_K_S', 12: 'Q3_K_M', 13: 'Q3_K_L', 14: 'Q4_K_S', 15: 'Q4_K_M',
+    16: 'Q5_K_S', 17: 'Q5_K_M', 18: 'Q6_K', 19: 'IQ2_XXS', 20: 'IQ2_XS', 21: 'Q2_K_S',
+    22: 'IQ3_XS', 23: 'IQ3_XXS', 24: 'IQ1_S', 25: 'IQ4_NL', 26: 'IQ3_S', 27: 'IQ3_M',
+    28: 'IQ2_S', 29: 'IQ2_M', 30: 'IQ4_XS', 31: 'IQ1_M', 32: 'BF16', 36: 'TQ1_0',
+    37: 'TQ2_0', 38: 'MXFP4_MOE',
+}
+
+# A quantization name inside a file name, e.g. 'Qwen3-30B-A3B-Q4_K_M.gguf' or '...-UD-IQ2_XXS-00001-of-00003.gguf'.
+QUANT_NAME_PATTERN = re.compile(r'(?<![A-Za-z0-9])(I?Q\d_[A-Z0-9_]+?|Q\d_\d|[BF]F?16|F32|MXFP4)(?=[.-]|$)', re.IGNORECASE)
+
+
+def quant_name(file_type, filename=''):
+    """Names a model's quantization from 'general.file_type', falling back to the file name."""
+    if file_type in FILE_TYPE_NAMES:
+        return FILE_TYPE_NAMES[file_type]
+    match = QUANT_NAME_PATTERN.search(MULTI_PART_PATTERN.sub('.gguf', os.path.basename(filename)))
+    return match.group(1).upper() if match else ''
+
+
+def is_expert_tensor(tensor_name):
+    """True if the tensor holds routed MoE expert weights (what -ncmoe/-cmoe move to the CPU)."""
+    return EXPERT_TENSOR_PATTERN.search(tensor_name) is not None
+
+
+def find_shard_paths(model_path):
+    """
+    Returns the list of files that make up a model. For multi-part models any shard
+    may be passed in; all existing sibling shards are returned in order.
+    """
+    filename = os.path.basename(model_path)
+    match = MULTI_PART_PATTERN.search(filename)
+    if not match:
+        return [model_path]
+
+    directory = os.path.dirname(model_path)
+    total = int(match.group(2))
+    prefix = filename[:match.start()]
+    shard_paths = []
+    for index in range(1, total + 1):
+        shard_path = os.path.join(directory, f"{prefix}-{index:05d}-of-{total:05d}.gguf")
+        if os.path.exists(shard_path):
+            shard_paths.append(shard_path)
+    return shard_paths
+
+
+class GGUFReader:
+    """
+    Reads the header, key/value metadata and tensor table of a GGUF model through
+    a read-only memory map. Tensor data is never touched, so even very large models
+    are inspected in milliseconds.
+    """
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+        self.shard_paths = []
+        self.version = None
+        self.metadata = {}
+        self.tensors = []
+
+    def read(self):
+        """
+        Parses every shard of the model.
+        Returns:
+            The reader itself, so calls can be chained.
+        Raises:
+            ValueError: If a file is not a valid GGUF file.
+            OSError: If a file cannot be opened.
+        """
+        self.shard_paths = find_shard_paths(self.model_path)
+        if not self.shard_paths:
+            raise FileNotFoundError(f"No model files found for '{self.model_path}'.")
+
+        self.metadata = {}
+        self.tensors = []
+        for index, shard_path in enumerate(self.shard_paths):
+            metadata, tensors = self._read_file(shard_path)
+            if index == 0:
+                self.metadata = metadata
+            self.tensors.extend(tensors)
+        return self
+
+    def _read_file(self, path):
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < 24:
+                raise ValueError(f"'{os.path.basename(path)}' is too small to be a GGUF file.")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                return self._parse(buf, path)
+
+    def _parse(self, buf, path):
+        if buf[:4] != GGUF_MAGIC:
+            raise ValueError(f"'{os.path.basename(path)}' is not a GGUF file.")
+
+        version, = struct.unpack_from('<I', buf, 4)
+        if version < 2:
+            raise ValueError(f"GGUF version {version} is not supported.")
+        self.version = version
+        tensor_count, kv_count = struct.unpack_from('<QQ', buf, 8)
+        offset = 24
+
+        metadata = {}
+        for _ in range(kv_count):
+            key, offset = self._read_string(buf, offset)
+            value_type, = struct.unpack_from('<I', buf, offset)
+            value, offset = self._read_value(buf, offset + 4, value_type)
+            if value is not None:
+                metadata[key] = value
+
+        tensors = []
+        for _ in range(tensor_count):
+            name, offset = self._read_string(buf, offset)
+            n_dims, = struct.unpack_from('<I', buf, offset)
+            shape = struct.unpack_from(f'<{n_dims}Q', buf, offset + 4)
+            offset += 4 + 8 * n_dims
+            ggml_type, _data_offset = struct.unpack_from('<IQ', buf, offset)
+            offset += 12
+            tensors.append(GGUFTensor(name, shape, ggml_type, self._tensor_bytes(shape, ggml_type)))
+
+        return metadata, tensors
+
+    @staticmethod
+    def _read_string(buf, offset):
+        length, = struct.unpack_from('<Q', buf, offset)
+        start = offset + 8
+        return buf[start:start + length].decode('utf-8', errors='replace'), start + length
+
+    def _read_value(self, buf, offset, value_type):
+        """Returns (value, new_offset). String arrays and very long arrays are skipped and returned as None."""
+        if value_type in _VALUE_FORMATS:
+            fmt = _VALUE_FORMATS[value_type]
+            return struct.unpack_from(fmt, buf, offset)[0], offset + struct.calcsize(fmt)
+        if value_type == _TYPE_STRING:
+            return self._read_string(buf, offset)
+        if value_type == _TYPE_ARRAY:
+            item_type, count = struct.unpack_from('<IQ', buf, offset)
+            offset += 12
+            if item_type in _VALUE_FORMATS:
+                fmt = _VALUE_FORMATS[item_type]
+                end = offset + count * struct.calcsize(fmt)
+                if count > _MAX_ARRAY_ITEMS:
+                    return None, end
+                return struct.unpack_from(f'<{count}{fmt[1]}', buf, offset), end
+            # Tokenizer vocabularies are large string arrays; walk past them without decoding.
+            # This loop dominates the parse time of a real model, hence the prebound unpack.
+            if item_type == _TYPE_STRING:
+                unpack = _UINT64.unpack_from
+                for _ in range(count):
+                    offset += 8 + unpack(buf, offset)[0]
+                return None, offset
+            for _ in range(count):
+                _, offset = self._read_value(buf, offset, item_type)
+            return None, offset
+        raise ValueError(f"Unknown GGUF metadata value type: {value_type}")
+
+    @staticmethod
+    def _tensor_bytes(shape, ggml_type):
+        block_size, type_size = GGML_TYPE_SIZES.get(ggml_type, (1, 0))
+        n_elements = 1
+        for dim in shape:
+            n_elements *= dim
+        return (n_elements // block_size) * type_size
+
+    # --- Convenience accessors ---
+
+    @property
+    def architecture(self):
+        return self.metadata.get('general.architecture', 'unknown')
+
+    def arch_value(self, suffix, default=None):
+        """Returns an architecture-scoped key, e.g. arch_value('block_count') -> 'llama.block_count'."""
+        return self.metadata.get(f"{self.architecture}.{suffix}", default)
+
+    def tensor_bytes_by_kind(self):
+        """Returns (expert_bytes, dense_bytes) summed over the whole tensor table."""
+        expert_bytes = sum(t.n_bytes for t in self.tensors if is_expert_tensor(t.name))
+        dense_bytes = sum(t.n_bytes for t in self.tensors) - expert_bytes
+        return expert_bytes, dense_bytes
+
+    def summary(self):
+        """
+        Returns the hyperparameters the launcher cares about as a plain dictionary.
+        Per-layer array values (e.g. head_count_kv on some architectures) are reduced
+        to their maximum.
+        """
+        def scalar(value):
+            if isinstance(value, tuple):
+                return max(value) if value else None
+            return value
+
+        return {
+            'architecture': self.architecture,
+            'name': self.metadata.get('general.name'),
+            'file_type': self.metadata.get('general.file_type'),
+            'block_count': scalar(self.arch_value('block_count')),
+            'context_length': scalar(self.arch_value('context_length')),
+            'embedding_length': scalar(self.arch_value('embedding_length')),
+            'head_count': scalar(self.arch_value('attention.head_count')),
+            'head_count_kv': scalar(self.arch_value('attention.head_count_kv')),
+            'expert_count': scalar(self.arch_value('expert_count', 0)) or 0,
+            'expert_used_count': scalar(self.arch_value('expert_used_count', 0)) or 0,
+            'tensor_count': len(self.tensors),
+            'shard_count': len(self.shard_paths),
+        }
+
+
+def read_gguf_metadata(model_path):
+    """Convenience wrapper returning GGUFReader(model_path).read().summary()."""
+    return GGUFReader(model_path).read().summary()
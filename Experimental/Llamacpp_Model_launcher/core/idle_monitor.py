@@ -0,0 +1,174 @@
+# core/idle_monitor.py
+
+import http.client
+import json
+import threading
+import time
+from collections import namedtuple
+
+from Llamacpp_Model_launcher.core.readiness import probe_address
+
+# What a server reports about its work. busy is None when /slots is disabled (--no-slots);
+# counter (tokens processed so far) is None unless the server runs with --metrics.
+Activity = namedtuple('Activity', ['busy', 'counter'])
+
+METRIC_COUNTERS = ('llamacpp:prompt_tokens_total', 'llamacpp:tokens_predicted_total')
+
+
+def _get(host, port, path, timeout):
+    """Returns (status, body) or None if the server cannot be reached."""
+    connection = http.client.HTTPConnection(probe_address(host), int(port), timeout=timeout)
+    try:
+        connection.request('GET', path)
+        response = connection.getresponse()
+        return response.status, response.read()
+    except (OSError, http.client.HTTPException):
+        return None
+    finally:
+        connection.close()
+
+
+def probe_activity(host, port, timeout=2.0):
+    """
+    Asks llama-server whether it is working, via /slots (any slot processing) and, when
+    enabled, /metrics (the token counters move between probes).
+    Returns:
+        An Activity tuple, or None if the server does not answer.
+    """
+    slots = _get(host, port, '/slots', timeout)
+    if slots is None:
+        return None
+    busy = None
+    if slots[0] == 200:
+        try:
+            busy = any(slot.get('is_processing', slot.get('state', 0) != 0) for slot in json.loads(slots[1]))
+        except (ValueError, AttributeError, TypeError):
+            busy = None
+    counter = None
+    metrics = _get(host, port, '/metrics', timeout)
+    if metrics and metrics[0] == 200:
+        for line in metrics[1].decode('utf-8', 'replace').splitlines():
+            name, _, value = line.partition(' ')
+            try:
+                if name in METRIC_COUNTERS:
+                    counter = (counter or 0) + float(value)
+                elif name == 'llamacpp:requests_processing' and float(value) > 0:
+                    busy = True
+            except ValueError:
+                continue
+    return Activity(busy, counter)
+
+
+class IdleMonitor:
+    """
+    Unloads models nobody has used for a while. Every watched server is probed each
+    `check_seconds`; a busy slot or moving token counters count as use, as does `touch`
+    (the routing proxy calls it per request, the launcher per timing block in the log).
+    Once a model has been idle longer than its timeout, `on_idle(name, idle_seconds)` is
+    called from the monitor thread and the model is no longer watched.
+    """
+
+    def __init__(self, on_idle, default_minutes=0.0, per_config_minutes=None, check_seconds=15.0,
+                 probe=probe_activity):
+        """
+        Args:
+            on_idle (callable): Called with (name, idle_seconds) to hibernate a model.
+            default_minutes (float): Idle timeout of configurations without their own; 0 never unloads.
+            per_config_minutes (dict): Timeouts by configuration name (case-insensitive).
+            check_seconds (float): Interval between probes.
+            probe (callable): Maps (host, port) to an Activity or None.
+        """
+        self.on_idle = on_idle
+        self.default_minutes = default_minutes
+        self.per_config_minutes = {k.casefold(): v for k, v in (per_config_minutes or {}).items()}
+        self.check_seconds = check_seconds
+        self.probe = probe
+        self._watched = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def enabled(self):
+        return self.default_minutes > 0 or any(v > 0 for v in self.per_config_minutes.values())
+
+    def timeout_for(self, name):
+        """Returns the idle timeout of a configuration in seconds, 0 if it is never unloaded."""
+        return max(0.0, self.per_config_minutes.get(name.casefold(), self.default_minutes)) * 60
+
+    def watch(self, name, host, port):
+        """Starts the idle clock of a model that has just loaded; does nothing if its timeout is 0."""
+        timeout = self.timeout_for(name)
+        if not timeout:
+            return
+        with self._lock:
+            self._watched[name] = {'host': host, 'port': port, 'timeout': timeout,
+                                   'last_active': time.monotonic(), 'counter': None}
+
+    def forget(self, name):
+        with self._lock:
+            self._watched.pop(name, None)
+
+    def touch(self, name):
+        """Records use of a model, e.g. a request routed to it."""
+        with self._lock:
+            if name in self._watched:
+                self._watched[name]['last_active'] = time.monotonic()
+
+    def status(self):
+        """{name: {'idle_seconds', 'timeout_seconds'}} of the watched models."""
+        now = time.monotonic()
+        with self._lock:
+            return {name: {'idle_seconds': now - entry['last_active'], 'timeout_seconds': entry['timeout']}
+                    for name, entry in self._watched.items()}
+
+    def check(self):
+        """
+        Probes every watched model once and hibernates those past their timeout.
+        Returns:
+            The names handed to on_idle.
+        """
+        with self._lock:
+            watched = list(self._watched.items())
+        expired = []
+        for name, entry in watched:
+            activity = self.probe(entry['host'], entry['port'])
+            now = time.monotonic()
+            with self._lock:
+                if self._watched.get(name) is not entry:
+                    continue  # Forgotten or reloaded meanwhile.
+                if activity is not None:
+                    moved = activity.counter is not None and entry['counter'] not in (None, activity.counter)
+                    if activity.busy or moved:
+                        entry['last_active'] = now
+                    entry['counter'] = activity.counter
+                idle_seconds = now - entry['last_active']
+                if idle_seconds < entry['timeout']:
+                    continue
+                del self._watched[name]
+            print(f"[DIAGNOSTICS] '{name}' has been idle for {idle_seconds / 60:.1f} min; hibernating it.")
+            expired.append(name)
+            self.on_idle(name, idle_seconds)
+        return expired
+
+    # --- Background thread ---
+
+    def start(self):
+        if self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='idle-monitor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.check_seconds):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"[DIAGNOSTICS] Idle check failed: {e!r}")
@@ -0,0 +1,98 @@
+# core/kv_cache.py
+
+from Llamacpp_Model_launcher.core.gguf_reader import GGUFReader
+
+# Bytes per element of the cache types accepted by -ctk/-ctv.
+KV_CACHE_TYPE_SIZES = {
+    'f32': 4.0, 'f16': 2.0, 'bf16': 2.0,
+    'q8_0': 34 / 32, 'q5_1': 24 / 32, 'q5_0': 22 / 32,
+    'q4_1': 20 / 32, 'q4_0': 18 / 32, 'iq4_nl': 18 / 32,
+}
+
+# llama.cpp hardcodes the local/global layer pattern for these architectures when the
+# GGUF does not carry one: every n-th layer is global, the others use the sliding window.
+SWA_PATTERN_DEFAULTS = {
+    'gemma2': 2,
+    'gemma3': 6,
+    'gemma3n': 5,
+    'cohere2': 4,
+    'gpt-oss': 2,
+}
+
+# KV cells are allocated in multiples of this.
+KV_CELL_PADDING = 256
+
+
+def _pad(value, multiple):
+    return ((value + multiple - 1) // multiple) * multiple
+
+
+class KVCacheCalculator:
+    """
+    Computes KV-cache size per layer from GGUF hyperparameters: layer count, KV head count
+    (scalar or per-layer), key/value head dimensions and sliding-window attention layers.
+    """
+
+    def __init__(self, reader):
+        self.reader = reader
+        meta = reader.summary()
+        self.architecture = meta['architecture']
+        self.n_layer = meta['block_count'] or 0
+        self.context_length = meta['context_length'] or 0
+        n_embd = meta['embedding_length'] or 0
+        self.n_head = meta['head_count'] or 0
+        head_dim = n_embd // self.n_head if self.n_head else 0
+        self.head_dim_k = reader.arch_value('attention.key_length', head_dim)
+        self.head_dim_v = reader.arch_value('attention.value_length', head_dim)
+        self.n_swa = reader.arch_value('attention.sliding_window', 0) or 0
+        self._swa_layers = self._resolve_swa_layers()
+
+    @classmethod
+    def from_model(cls, model_path):
+        return cls(GGUFReader(model_path).read())
+
+    def _resolve_swa_layers(self):
+        """Returns the set of layer indices that use sliding-window attention."""
+        if not self.n_swa:
+            return set()
+        pattern = self.reader.arch_value('attention.sliding_window_pattern')
+        if isinstance(pattern, tuple):
+            return {il for il, is_swa in enumerate(pattern) if is_swa}
+        period = pattern if isinstance(pattern, int) and pattern > 0 else SWA_PATTERN_DEFAULTS.get(self.architecture, 0)
+        if period <= 1:
+            return set()
+        return {il for il in range(self.n_layer) if il % period < period - 1}
+
+    def head_count_kv(self, il):
+        value = self.reader.arch_value('attention.head_count_kv', self.n_head)
+        if isinstance(value, tuple):
+            return value[il] if il < len(value) else 0
+        return value
+
+    def is_swa_layer(self, il):
+        return il in self._swa_layers
+
+    @property
+    def swa_layer_count(self):
+        return len(self._swa_layers)
+
+    def layer_cells(self, il, n_ctx, n_seq=1, n_ubatch=512, swa_full=False):
+        """
+        Number of KV cells allocated for a layer. Sliding-window layers only keep
+        n_swa tokens per sequence plus one ubatch, unless --swa-full is set.
+        """
+        if self.is_swa_layer(il) and not swa_full:
+            return min(n_ctx, _pad(self.n_swa * n_seq + n_ubatch, KV_CELL_PADDING))
+        return n_ctx
+
+    def layer_bytes(self, il, n_ctx, cache_type_k='f16', cache_type_v='f16', n_seq=1, n_ubatch=512, swa_full=False):
+        """KV-cache bytes for a single layer."""
+        cells = self.layer_cells(il, n_ctx, n_seq, n_ubatch, swa_full)
+        k_size = KV_CACHE_TYPE_SIZES.get(cache_type_k, 2.0)
+        v_size = KV_CACHE_TYPE_SIZES.get(cache_type_v, 2.0)
+        return int(cells * self.head_count_kv(il) * (self.head_dim_k * k_size + self.head_dim_v * v_size))
+
+    def total_bytes(self, n_ctx, cache_type_k='f16', cache_type_v='f16', n_seq=1, n_ubatch=512, swa_full=False):
+        """KV-cache bytes summed over all layers."""
+        return sum(self.layer_bytes(il, n_ctx, cache_type_k, cache_type_v, n_seq, n_ubatch, swa_full)
+                   for il in range(self.n_layer))
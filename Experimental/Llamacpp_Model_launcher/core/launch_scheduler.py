@@ -0,0 +1,129 @@
+# core/launch_scheduler.py
+
+import itertools
+import os
+import sys
+import threading
+
+
+def device_key(path):
+    """
+    Identifies the physical device a file lives on. On Linux, partitions are mapped to their
+    disk through /sys (so 'sda1' and 'sda2' share 'sda'); elsewhere, and for network or
+    virtual file systems, the file system's device number stands in for the disk.
+    Returns:
+        A hashable key, or None if the file does not exist.
+    """
+    try:
+        dev = os.stat(path).st_dev
+    except OSError:
+        return None
+    if sys.platform.startswith('linux'):
+        sys_path = f"/sys/dev/block/{os.major(dev)}:{os.minor(dev)}"
+        if os.path.exists(sys_path):
+            sys_path = os.path.realpath(sys_path)
+            if os.path.exists(os.path.join(sys_path, 'partition')):
+                sys_path = os.path.dirname(sys_path)
+            return os.path.basename(sys_path)
+    return dev
+
+
+class LaunchScheduler:
+    """
+    Orders server launches so models on the same disk do not load at the same time, where
+    they would slow each other down; launches whose files are on different disks run in
+    parallel. A launch holds a slot on every device its model files are on from its start
+    until `release` (the server is ready or has failed). Waiting launches start by priority
+    (higher first), then in submission order, so the most important model is ready first.
+    """
+
+    def __init__(self, per_device=1, priorities=None, device_of=device_key):
+        """
+        Args:
+            per_device (int): Launches that may load from one device at a time.
+            priorities (dict): {configuration name: priority} (case-insensitive); default 0.
+            device_of (callable): Maps a file path to its device key.
+        """
+        self.per_device = max(1, per_device)
+        self.priorities = {k.casefold(): v for k, v in (priorities or {}).items()}
+        self.device_of = device_of
+        self._lock = threading.Lock()
+        self._order = itertools.count()
+        self._waiting = []
+        self._active = {}
+
+    def priority_of(self, name):
+        return self.priorities.get(name.casefold(), 0)
+
+    def submit(self, name, files, start, priority=None):
+        """
+        Queues a launch; `start` is called (on this or a releasing thread) once its devices are free.
+        Args:
+            name (str): The configuration, used by release() and cancel().
+            files (list): The model files the launch reads.
+            start (callable): Starts the server. The caller must call release(name) once
+                the load has finished or failed.
+            priority (int): Overrides the configured priority.
+        Returns:
+            True if the launch started at once, False if it waits.
+        """
+        devices = {d for d in (self.device_of(f) for f in files) if d is not None}
+        priority = self.priority_of(name) if priority is None else priority
+        with self._lock:
+            self._waiting.append((-priority, next(self._order), name, devices, start))
+            self._waiting.sort(key=lambda entry: entry[:2])
+        started = self._dispatch()
+        return name in started
+
+    def release(self, name):
+        """Frees the device slots of a launch that has finished loading and starts the next ones."""
+        with self._lock:
+            if self._active.pop(name, None) is None:
+                return
+        self._dispatch()
+
+    def cancel(self, name):
+        """Removes a waiting launch. Returns True if it was waiting."""
+        with self._lock:
+            count = len(self._waiting)
+            self._waiting = [entry for entry in self._waiting if entry[2] != name]
+            return len(self._waiting) != count
+
+    def waiting(self):
+        """Names of the waiting launches, in the order they will start."""
+        with self._lock:
+            return [entry[2] for entry in self._waiting]
+
+    def blocking(self, name):
+        """Names of the loads a waiting launch is queued behind (those holding its devices)."""
+        with self._lock:
+            devices = next((entry[3] for entry in self._waiting if entry[2] == name), set())
+            return [other for other, held in self._active.items() if held & devices]
+
+    def _busy(self, device):
+        """Call with the lock held."""
+        return sum(device in held for held in self._active.values()) >= self.per_device
+
+    def _dispatch(self):
+        """
+        Starts every waiting launch whose devices have a free slot. A launch whose start()
+        raises is released, so its devices do not stay blocked.
+        Returns:
+            The names of the launches that were started.
+        """
+        to_start = []
+        with self._lock:
+            for entry in list(self._waiting):
+                _, _, name, devices, start = entry
+                if any(self._busy(d) for d in devices):
+                    continue
+                self._waiting.remove(entry)
+                self._active[name] = devices
+                to_start.append((name, start))
+        for name, start in to_start:
+            try:
+                start()
+            except Exception as e:
+                print(f"[DIAGNOSTICS] Launch queue: starting '{name}' failed: {e!r}")
+                self.release(name)
+        return [name for name, _ in to_start]
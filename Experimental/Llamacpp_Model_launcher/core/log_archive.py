@@ -0,0 +1,312 @@
+# core/log_archive.py
+
+import gzip
+import json
+import os
+import re
+import threading
+import time
+
+from Llamacpp_Model_launcher.core.log_scanner import LogEventKind
+
+MIB = 1024 * 1024
+
+# Events worth finding again later. Timing and idle lines are too frequent to index.
+INDEXED_EVENTS = (LogEventKind.MODEL_LOADED, LogEventKind.OOM, LogEventKind.SOFT_FAILURE)
+
+
+def _slug(name):
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', name or '').strip('._') or 'server'
+
+
+class LogArchive:
+    """
+    On-disk archive of llama-server output. Each session (one server process) is
+    written as gzip segments under <directory>/<model>/, rotated once a segment holds
+    `segment_bytes` of output; the oldest segments are deleted when the archive grows
+    past `max_total_bytes`. An append-only index.jsonl records every session and
+    segment, plus the time and uncompressed offset of notable events (model loaded,
+    OOM, soft failure) so a crash can be found without reading the logs.
+    """
+
+    INDEX_FILE = 'index.jsonl'
+
+    def __init__(self, directory='logs/archive', segment_bytes=16 * MIB, max_total_bytes=1024 * MIB):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_total_bytes = max_total_bytes
+        self._lock = threading.Lock()
+        self._open_segments = set()
+
+    @property
+    def index_path(self):
+        return os.path.join(self.directory, self.INDEX_FILE)
+
+    def start_session(self, model_name, command=''):
+        """
+        Args:
+            model_name (str): Name the session is filed under.
+            command (str): The command line that started the server.
+        Returns:
+            An ArchiveSession to feed the server's output into.
+        """
+        slug = _slug(model_name)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        session_id = f"{slug}-{stamp}"
+        with self._lock:
+            os.makedirs(os.path.join(self.directory, slug), exist_ok=True)
+            suffix = 1
+            while os.path.exists(os.path.join(self.directory, slug, f"{stamp}.000.log.gz")):
+                stamp = f"{time.strftime('%Y%m%d-%H%M%S')}-{suffix}"
+                session_id = f"{slug}-{stamp}"
+                suffix += 1
+        session = ArchiveSession(self, session_id, model_name, os.path.join(slug, stamp))
+        self._append_index({'record': 'session', 'session': session_id, 'model': model_name,
+                            'command': command, 'time': time.time()})
+        session.open_segment()
+        return session
+
+    # --- Index ---
+
+    def _append_index(self, record):
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
+
+    def read_index(self):
+        """Returns every index record, oldest first; unreadable lines are skipped."""
+        records = []
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except OSError:
+            pass
+        return records
+
+    def sessions(self, model=None):
+        """
+        Returns:
+            A list of session dicts ('session', 'model', 'command', 'time', 'ended',
+            'exit_code', 'reason', 'bytes', 'segments'), newest first.
+        """
+        sessions = {}
+        for record in self.read_index():
+            kind = record.get('record')
+            session = sessions.get(record.get('session'))
+            if kind == 'session':
+                sessions[record['session']] = {**record, 'ended': None, 'exit_code': None, 'reason': '',
+                                               'bytes': 0, 'segments': []}
+            elif session is None:
+                continue
+            elif kind == 'segment':
+                session['segments'].append(record['file'])
+            elif kind == 'end':
+                session.update(ended=record['time'], exit_code=record.get('exit_code'), reason=record.get('reason', ''),
+                               bytes=record.get('bytes', 0))
+        result = [s for s in sessions.values() if model is None or s['model'] == model]
+        return sorted(result, key=lambda s: s['time'], reverse=True)
+
+    def events(self, kind=None, model=None, session=None, since=None):
+        """
+        Args:
+            kind (str): Only events of this LogEventKind value, e.g. 'oom'.
+            model (str): Only events from sessions of this model.
+            session (str): Only events from this session id.
+            since (float): Only events at or after this Unix time.
+        Returns:
+            The matching event records, oldest first.
+        """
+        models = {}
+        matches = []
+        for record in self.read_index():
+            if record.get('record') == 'session':
+                models[record['session']] = record.get('model')
+                continue
+            if record.get('record') != 'event':
+                continue
+            if kind and record['kind'] != kind: continue
+            if session and record['session'] != session: continue
+            if model and models.get(record['session']) != model: continue
+            if since and record['time'] < since: continue
+            matches.append({**record, 'model': models.get(record['session'])})
+        return matches
+
+    def read_segment(self, relative_path, offset=0, length=None):
+        """Returns decoded text from an archived segment, starting at an uncompressed byte offset."""
+        path = os.path.join(self.directory, relative_path)
+        try:
+            with gzip.open(path, 'rb') as f:
+                f.seek(offset)
+                data = f.read() if length is None else f.read(length)
+        except (OSError, EOFError) as e:
+            return f"--- Could not read {relative_path}: {e} ---"
+        return data.decode('utf-8', errors='replace')
+
+    def context(self, event, before=4096, after=1024):
+        """Returns the archived output surrounding an indexed event."""
+        start = max(0, event['offset'] - before)
+        return self.read_segment(event['file'], start, event['offset'] - start + after)
+
+    # --- Retention ---
+
+    def prune(self):
+        """Deletes the oldest closed segments until the archive fits in max_total_bytes."""
+        with self._lock:
+            segments = []
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if name.endswith('.log.gz'):
+                        path = os.path.join(root, name)
+                        try:
+                            stat = os.stat(path)
+                        except OSError:
+                            continue
+                        segments.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in segments)
+            removed = set()
+            for _, size, path in sorted(segments):
+                if total <= self.max_total_bytes:
+                    break
+                relative = os.path.relpath(path, self.directory).replace(os.sep, '/')
+                if relative in self._open_segments:
+                    continue
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                removed.add(relative)
+            if removed:
+                self._drop_from_index(removed)
+        return len(removed)
+
+    def _drop_from_index(self, removed_files):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except OSError:
+            return
+        kept = []
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get('file') not in removed_files:
+                kept.append(line)
+        temp_path = self.index_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.writelines(kept)
+        os.replace(temp_path, self.index_path)
+
+
+class ArchiveSession:
+    """
+    Writes one server session into its LogArchive. Feed it the (text, events) pairs
+    produced by a LogScanner. Not thread-safe: use it from the thread reading the output.
+    """
+
+    def __init__(self, archive, session_id, model_name, file_stem, flush_interval=5.0):
+        self.archive = archive
+        self.session_id = session_id
+        self.model_name = model_name
+        self.flush_interval = flush_interval
+        self._file_stem = file_stem
+        self._segment_index = -1
+        self._file = None
+        self._segment_name = None
+        self._segment_bytes = 0
+        self._last_flush = time.monotonic()
+        self.bytes_written = 0
+        self.closed = False
+
+    def open_segment(self):
+        self._close_segment()
+        self._segment_index += 1
+        self._segment_name = f"{self._file_stem}.{self._segment_index:03d}.log.gz".replace(os.sep, '/')
+        self._file = gzip.open(os.path.join(self.archive.directory, self._segment_name), 'wb')
+        self._segment_bytes = 0
+        with self.archive._lock:
+            self.archive._open_segments.add(self._segment_name)
+        self.archive._append_index({'record': 'segment', 'session': self.session_id, 'file': self._segment_name,
+                                    'time': time.time()})
+
+    def _close_segment(self):
+        if self._file is None:
+            return
+        try:
+            self._file.close()
+        except OSError as e:
+            print(f"[DIAGNOSTICS] Could not close log segment: {e}")
+        with self.archive._lock:
+            self.archive._open_segments.discard(self._segment_name)
+        self._file = None
+
+    def write(self, text, events=()):
+        """
+        Args:
+            text (str): Decoded server output.
+            events (list): The LogEvents the scanner found in that text.
+        """
+        if self.closed or (not text and not events):
+            return
+        if self._segment_bytes >= self.archive.segment_bytes:
+            self.open_segment()
+            self.archive.prune()
+
+        data = text.encode('utf-8')
+        chunk_start = self._segment_bytes
+        cursor = 0
+        indexed = False
+        for event in events:
+            if event.kind not in INDEXED_EVENTS:
+                continue
+            cursor, offset = self._locate(text, event.line, cursor)
+            self.archive._append_index({'record': 'event', 'session': self.session_id, 'kind': event.kind.value,
+                                        'time': time.time(), 'file': self._segment_name,
+                                        'offset': max(0, chunk_start + offset), 'line': event.line,
+                                        'value': event.value})
+            indexed = True
+
+        try:
+            self._file.write(data)
+            # Flushing a gzip stream costs compression ratio; do it only when something
+            # was indexed or every few seconds, so a crash of the launcher loses little.
+            if indexed or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._file.flush()
+                self._last_flush = time.monotonic()
+        except OSError as e:
+            print(f"[DIAGNOSTICS] Could not write log archive: {e}")
+        self._segment_bytes += len(data)
+        self.bytes_written += len(data)
+
+    @staticmethod
+    def _locate(text, line, cursor):
+        """Returns (new cursor, byte offset of the line start relative to this chunk)."""
+        position = text.find(line, cursor) if line else -1
+        if position >= 0:
+            return position, len(text[:position].encode('utf-8'))
+        # The line began in an earlier chunk; count back from where it ends in this one.
+        end = text.find('\n', cursor)
+        end = len(text) if end < 0 else end
+        return end, len(text[:end].encode('utf-8')) - len(line.encode('utf-8'))
+
+    def end(self, exit_code=None, reason=''):
+        """
+        Closes the session and records how it ended.
+        Args:
+            exit_code (int): The server's exit code, if known.
+            reason (str): Short free-form description, e.g. 'error' when it died while loading.
+        """
+        if self.closed:
+            return
+        self._close_segment()
+        self.closed = True
+        self.archive._append_index({'record': 'end', 'session': self.session_id, 'time': time.time(),
+                                    'exit_code': exit_code, 'reason': reason, 'bytes': self.bytes_written})
+        self.archive.prune()
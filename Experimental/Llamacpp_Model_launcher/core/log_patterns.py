@@ -0,0 +1,35 @@
+# core/log_patterns.py
+
+import re
+
+# Patterns for the llama-server output lines the launcher and the tuning wizard react to.
+# Each one is matched against a single line of output (see core/log_scanner.py).
+
+# The timing block llama-server prints after each request. Groups: milliseconds, tokens[, tokens per second].
+TPS_REGEX = re.compile(
+    r"^\s*eval time\s*=\s*([\d.]+)\s*ms\s*/\s*(\d+)\s*tokens\s*\([\s\d.]+\s*ms per token,\s*([\d.]+)\s*tokens per second\)",
+    re.MULTILINE
+)
+PROMPT_TPS_REGEX = re.compile(
+    r"prompt eval time\s*=\s*([\d.]+)\s*ms\s*/\s*(\d+)\s*tokens\s*\([^,]*,\s*([\d.]+|inf|-?nan)\s*tokens per second\)",
+    re.IGNORECASE
+)
+TOTAL_TIME_REGEX = re.compile(r"^\s*total time\s*=\s*([\d.]+)\s*ms\s*/\s*(\d+)\s*tokens", re.MULTILINE)
+IDLE_REGEX = re.compile(r"all slots are idle", re.IGNORECASE)
+MODEL_LOADED_REGEX = re.compile(r"model loaded", re.IGNORECASE)
+LAYER_COUNT_REGEX = re.compile(r"n_layer\s*=\s*(\d+)", re.IGNORECASE)
+CUDA_OOM_ALLOC_REGEX = re.compile(
+    r"allocating\s+([\d.]+)\s+MiB\s+on\s+device\s+(\d+):\s+cudaMalloc\s+failed:\s+out\s+of\s+memory",
+    re.IGNORECASE
+)
+# 'CUDA error: out of memory' is followed by 'current device: N', on the same or the next line.
+CUDA_ERROR_OOM_REGEX = re.compile(
+    r"CUDA error:\s+(?:out of memory|the\s+resource\s+allocation\s+failed)",
+    re.IGNORECASE
+)
+CURRENT_DEVICE_REGEX = re.compile(r"current device:\s*(\d+)", re.IGNORECASE)
+CUDA_DEVICE_REGEX = re.compile(r"Device\s+(\d+):\s+([^,]+),", re.IGNORECASE)
+SOFT_FAILURE_REGEX = re.compile(r"eval time\s*=\s*0\.00\s*ms\s*/\s*1\s*tokens", re.IGNORECASE)
+
+# Benchmark throughput above this is a parsing artifact, not a real measurement.
+MAX_REALISTIC_TPS = 5000
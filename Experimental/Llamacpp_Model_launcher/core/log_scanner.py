@@ -0,0 +1,152 @@
+# core/log_scanner.py
+
+import codecs
+from collections import namedtuple
+from enum import Enum
+
+from Llamacpp_Model_launcher.core import log_patterns
+
+
+class LogEventKind(Enum):
+    """The llama-server output events the launcher reacts to."""
+    LAYER_COUNT = "layer_count"      # value: int
+    DEVICE = "device"                # value: {'id': int, 'name': str}
+    OOM = "oom"                      # value: {'type': 'oom', 'size_mib': float, 'device_id': int}
+    MODEL_LOADED = "model_loaded"    # value: None
+    IDLE = "idle"                    # value: None
+    PROMPT_TIMING = "prompt_timing"  # value: Timing
+    EVAL_TIMING = "eval_timing"      # value: Timing
+    TOTAL_TIMING = "total_timing"    # value: Timing (tps is overall tokens per second)
+    SOFT_FAILURE = "soft_failure"    # value: None
+
+
+LogEvent = namedtuple('LogEvent', ['kind', 'value', 'line'])
+Timing = namedtuple('Timing', ['ms', 'tokens', 'tps'])
+
+
+def _device(match):
+    return {'id': int(match.group(1)), 'name': match.group(2).strip()}
+
+
+def _timing(match):
+    return Timing(float(match.group(1)), int(match.group(2)), float(match.group(3)))
+
+
+def _total_timing(match):
+    ms, tokens = float(match.group(1)), int(match.group(2))
+    return Timing(ms, tokens, tokens / ms * 1000 if ms > 0 else 0.0)
+
+
+def _alloc_oom(match):
+    return {'type': 'oom', 'size_mib': float(match.group(1)), 'device_id': int(match.group(2))}
+
+
+# Dispatch table: (lower-case keyword, pattern, event kind, value factory). The keyword is a
+# cheap substring pre-check so most lines never reach a regex.
+_LINE_RULES = [
+    ('n_layer', log_patterns.LAYER_COUNT_REGEX, LogEventKind.LAYER_COUNT, lambda m: int(m.group(1))),
+    ('device', log_patterns.CUDA_DEVICE_REGEX, LogEventKind.DEVICE, _device),
+    ('cudamalloc failed', log_patterns.CUDA_OOM_ALLOC_REGEX, LogEventKind.OOM, _alloc_oom),
+    ('model loaded', log_patterns.MODEL_LOADED_REGEX, LogEventKind.MODEL_LOADED, None),
+    ('all slots are idle', log_patterns.IDLE_REGEX, LogEventKind.IDLE, None),
+    ('prompt eval time', log_patterns.PROMPT_TPS_REGEX, LogEventKind.PROMPT_TIMING, _timing),
+    ('eval time', log_patterns.TPS_REGEX, LogEventKind.EVAL_TIMING, _timing),
+    ('total time', log_patterns.TOTAL_TIME_REGEX, LogEventKind.TOTAL_TIMING, _total_timing),
+    ('eval time', log_patterns.SOFT_FAILURE_REGEX, LogEventKind.SOFT_FAILURE, None),
+]
+
+
+class LogScanner:
+    """
+    Incremental, line-oriented parser for llama-server output. Raw bytes go through an
+    incremental UTF-8 decoder, so characters split across reads stay intact; complete
+    lines are matched once against the dispatch table and turned into LogEvents. Text is
+    never rescanned, so the cost is linear in the amount of output.
+    """
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._partial_line = ''
+        self._oom_waiting_for_device = False
+
+    def feed(self, data):
+        """
+        Args:
+            data (bytes or str): The next chunk of server output.
+        Returns:
+            A tuple (decoded_text, events) for the complete lines in this chunk.
+        """
+        text = self._decoder.decode(data) if isinstance(data, (bytes, bytearray)) else data
+        if not text:
+            return '', []
+        lines = (self._partial_line + text).split('\n')
+        self._partial_line = lines.pop()
+        events = []
+        for line in lines:
+            self._scan_line(line.rstrip('\r'), events)
+        return text, events
+
+    def flush(self):
+        """Scans the unterminated last line, if any. Call once the process has exited."""
+        text = self._decoder.decode(b'', final=True)
+        line, self._partial_line = self._partial_line + text, ''
+        events = []
+        if line:
+            self._scan_line(line.rstrip('\r'), events)
+        return text, events
+
+    def _scan_line(self, line, events):
+        lowered = line.lower()
+        for keyword, pattern, kind, make_value in _LINE_RULES:
+            if keyword in lowered:
+                match = pattern.search(line)
+                if match:
+                    events.append(LogEvent(kind, make_value(match) if make_value else None, line))
+
+        if 'cuda error' in lowered and log_patterns.CUDA_ERROR_OOM_REGEX.search(line):
+            self._oom_waiting_for_device = True
+        if self._oom_waiting_for_device and 'current device' in lowered:
+            match = log_patterns.CURRENT_DEVICE_REGEX.search(line)
+            if match:
+                self._oom_waiting_for_device = False
+                events.append(LogEvent(LogEventKind.OOM,
+                                       {'type': 'oom', 'size_mib': 0.0, 'device_id': int(match.group(1))}, line))
+
+
+def scan_text(text):
+    """Returns the LogEvents in a complete piece of output."""
+    scanner = LogScanner()
+    _, events = scanner.feed(text)
+    return events + scanner.flush()[1]
+
+
+def unique_devices(devices):
+    """Drops repeated DEVICE event values, keeping the first report of each id."""
+    gpus = []
+    for device in devices:
+        if not any(g['id'] == device['id'] for g in gpus):
+            gpus.append(device)
+    return gpus
+
+
+def pick_oom_error(errors):
+    """
+    Chooses the most informative OOM event value: a failed allocation (which carries its
+    size) wins over a bare 'CUDA error: out of memory'.
+    Returns:
+        A dict {'type': 'oom', 'size_mib': float, 'device_id': int}, or None.
+    """
+    for error in errors:
+        if error['size_mib']:
+            return error
+    return errors[0] if errors else None
+
+
+def find_devices(text):
+    """Returns the [{'id': int, 'name': str}] list of devices reported in the output."""
+    return unique_devices(event.value for event in scan_text(text) if event.kind == LogEventKind.DEVICE)
+
+
+def find_oom_error(text):
+    """Searches complete server output for a CUDA out-of-memory error (see pick_oom_error)."""
+    return pick_oom_error([event.value for event in scan_text(text) if event.kind == LogEventKind.OOM])
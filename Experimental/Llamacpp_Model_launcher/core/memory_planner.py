@@ -0,0 +1,345 @@
+# core/memory_planner.py
+
+import re
+
+from Llamacpp_Model_launcher.core.gguf_reader import GGUFReader, is_expert_tensor
+from Llamacpp_Model_launcher.core.kv_cache import KVCacheCalculator
+
+MIB = 1024 ** 2
+GIB = 1024 ** 3
+
+BLOCK_TENSOR_PATTERN = re.compile(r'^blk\.(\d+)\.')
+
+# Fixed per-device cost of the CUDA context, cuBLAS workspace and allocator slack.
+DEVICE_OVERHEAD_BYTES = 384 * MIB
+
+# llama-server defaults used when a flag is absent from the command.
+DEFAULT_CONTEXT = 4096
+DEFAULT_UBATCH = 512
+
+
+class PlanError(ValueError):
+    """A configuration the planner cannot evaluate, e.g. a malformed -ts value."""
+
+
+def _first_present(params, *keys, default=None):
+    for key in keys:
+        if key in params and params[key] not in (None, 'REMOVE'):
+            return params[key]
+    return default
+
+
+def _int_option(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class MemoryPlanner:
+    """
+    Predicts per-device memory use of a llama-server launch from the GGUF tensor table,
+    so tuning can start next to the answer instead of discovering it by trial loads.
+
+    All sizes are estimates: weights are exact, KV-cache is exact for standard attention,
+    and compute buffers use a conservative approximation.
+    """
+
+    def __init__(self, reader):
+        self.reader = reader
+        meta = reader.summary()
+        self.architecture = meta['architecture']
+        self.n_layer = meta['block_count'] or 0
+        self.n_embd = meta['embedding_length'] or 0
+        self.n_head = meta['head_count'] or 0
+        self.context_length = meta['context_length'] or DEFAULT_CONTEXT
+        self.n_ff = self._scalar(reader.arch_value('feed_forward_length', 0)) or 4 * self.n_embd
+        self.n_vocab = 0
+        self.kv = KVCacheCalculator(reader)
+
+        self.block_dense_bytes = [0] * self.n_layer
+        self.block_expert_bytes = [0] * self.n_layer
+        self.output_bytes = 0
+        self.input_bytes = 0
+        self._build_inventory()
+
+    @classmethod
+    def from_model(cls, model_path):
+        """Reads the model's GGUF header(s) and returns a planner for it."""
+        return cls(GGUFReader(model_path).read())
+
+    @staticmethod
+    def _scalar(value):
+        if isinstance(value, tuple):
+            return max(value) if value else 0
+        return value
+
+    def _build_inventory(self):
+        """Sums tensor bytes per block (dense vs. routed experts), output layer and input layer."""
+        token_embd_bytes = 0
+        has_output_weight = False
+        for tensor in self.reader.tensors:
+            match = BLOCK_TENSOR_PATTERN.match(tensor.name)
+            if match:
+                il = int(match.group(1))
+                if il >= self.n_layer:
+                    continue
+                if is_expert_tensor(tensor.name):
+                    self.block_expert_bytes[il] += tensor.n_bytes
+                else:
+                    self.block_dense_bytes[il] += tensor.n_bytes
+            elif tensor.name.startswith('output'):
+                self.output_bytes += tensor.n_bytes
+                if tensor.name == 'output.weight':
+                    has_output_weight = True
+                    self.n_vocab = tensor.shape[-1]
+            elif tensor.name == 'token_embd.weight':
+                token_embd_bytes = tensor.n_bytes
+                self.n_vocab = self.n_vocab or tensor.shape[-1]
+                self.input_bytes += tensor.n_bytes
+            else:
+                self.input_bytes += tensor.n_bytes
+
+        # Tied embeddings: llama.cpp duplicates token_embd onto the output device.
+        if not has_output_weight:
+            self.output_bytes += token_embd_bytes
+
+    # --- KV cache and compute buffers ---
+
+    def kv_bytes_per_layer(self, il, options):
+        """KV-cache bytes for one layer under the given options (see options_from_params)."""
+        return self.kv.layer_bytes(il, options['n_ctx'], options['cache_type_k'], options['cache_type_v'],
+                                   options['n_seq'], options['n_ubatch'], options['swa_full'])
+
+    def compute_buffer_bytes(self, n_ctx, n_ubatch, flash_attn, holds_output):
+        """Rough size of one device's compute buffer for a single ubatch."""
+        activations = n_ubatch * (4 * self.n_embd + 2 * self.n_ff) * 4
+        attention = 0 if flash_attn else n_ubatch * n_ctx * self.n_head * 4
+        logits = n_ubatch * self.n_vocab * 4 if holds_output else 0
+        return activations + attention + logits
+
+    # --- Parameter handling ---
+
+    def options_from_params(self, params, gpu_offload=None):
+        """
+        Extracts the memory-relevant llama-server options from a {flag: value} dictionary.
+        Args:
+            gpu_offload (bool): Whether layers go to a GPU; taken from -ngl when None. Decides
+                flash attention under llama.cpp's default '-fa auto', which enables it on GPUs.
+        """
+        n_ctx = _int_option(_first_present(params, '-c', '--ctx-size'), DEFAULT_CONTEXT)
+        if n_ctx <= 0:
+            n_ctx = self.context_length
+        if gpu_offload is None:
+            gpu_offload = self._n_gpu_layers(params) > 0
+        flash_attn = _first_present(params, '-fa', '--flash-attn')
+        if flash_attn is None:
+            # A bare '-fa' (the older boolean form) turns it on; absent means 'auto'.
+            flash_attn = any(key in params and params[key] is None for key in ('-fa', '--flash-attn')) or gpu_offload
+        elif str(flash_attn).lower() == 'auto':
+            flash_attn = gpu_offload
+        else:
+            flash_attn = str(flash_attn).lower() not in ('off', '0', 'false')
+        return {
+            'n_ctx': n_ctx,
+            'cache_type_k': _first_present(params, '-ctk', '--cache-type-k', default='f16'),
+            'cache_type_v': _first_present(params, '-ctv', '--cache-type-v', default='f16'),
+            'n_ubatch': _int_option(_first_present(params, '-ub', '--ubatch-size'), DEFAULT_UBATCH),
+            'flash_attn': flash_attn,
+            'n_seq': max(1, _int_option(_first_present(params, '-np', '--parallel'), 1)),
+            'swa_full': '--swa-full' in params,
+            'kv_offload': '-nkvo' not in params and '--no-kv-offload' not in params,
+        }
+
+    def _n_gpu_layers(self, params):
+        # Non-numeric values such as 'all' mean every layer is offloaded.
+        return _int_option(_first_present(params, '-ngl', '--n-gpu-layers', '--gpu-layers', default=0), self.n_layer + 1)
+
+    # --- Prediction ---
+
+    def _layer_devices(self, ngl, tensor_split, split_mode, main_gpu, n_devices):
+        """
+        Maps every layer index (0..n_layer, where n_layer is the output layer) to a device
+        id, or None for the CPU, following llama.cpp's offload rules.
+        """
+        act_gpu_layers = max(0, min(ngl, self.n_layer + 1))
+        i_gpu_start = max(self.n_layer - act_gpu_layers, 0)
+
+        if split_mode == 'none' or n_devices <= 1:
+            splits = None
+        else:
+            weights = list(tensor_split) if tensor_split else [1.0] * n_devices
+            weights = (weights + [0.0] * n_devices)[:n_devices]
+            total = sum(weights) or 1.0
+            splits, running = [], 0.0
+            for weight in weights:
+                running += weight / total
+                splits.append(running)
+
+        devices = []
+        for il in range(self.n_layer + 1):
+            if il < i_gpu_start or il - i_gpu_start >= act_gpu_layers:
+                devices.append(None)
+            elif splits is None:
+                devices.append(main_gpu if n_devices > 1 else 0)
+            else:
+                position = (il - i_gpu_start) / act_gpu_layers
+                devices.append(next((d for d, s in enumerate(splits) if s > position), n_devices - 1))
+        return devices
+
+    def _layer_costs(self, il, ncmoe, options):
+        """Returns (gpu_bytes, cpu_bytes) for a layer if it is assigned to a GPU."""
+        if il == self.n_layer:
+            return self.output_bytes, 0
+        kv = self.kv_bytes_per_layer(il, options)
+        gpu_kv, cpu_kv = (kv, 0) if options['kv_offload'] else (0, kv)
+        experts = self.block_expert_bytes[il]
+        if il < ncmoe:
+            return self.block_dense_bytes[il] + gpu_kv, experts + cpu_kv
+        return self.block_dense_bytes[il] + experts + gpu_kv, cpu_kv
+
+    def place(self, params, n_devices=1, free_bytes=None):
+        """
+        Places weights and KV cache on the devices following llama.cpp's offload rules,
+        without the per-device overhead and compute buffers that predict() adds on top.
+        Args:
+            See predict().
+        Returns:
+            A dict like predict()'s, plus 'options' (see options_from_params) and
+            'output_device' (the device holding the output layer, or None for the CPU).
+        Raises:
+            PlanError: If -ts is not a list of numbers (e.g. '3,' while it is being typed).
+        """
+        options = self.options_from_params(params)
+        ngl = self._n_gpu_layers(params)
+        ncmoe = _int_option(_first_present(params, '-ncmoe', '--n-cpu-moe'), 0)
+        if '-cmoe' in params or '--cpu-moe' in params:
+            ncmoe = self.n_layer
+        split_mode = _first_present(params, '-sm', '--split-mode', default='layer')
+        main_gpu = _int_option(_first_present(params, '-mg', '--main-gpu'), 0)
+        ts_value = _first_present(params, '-ts', '--tensor-split')
+        if ts_value:
+            try:
+                tensor_split = [float(x) for x in re.split(r'[,/]', ts_value)]
+            except ValueError:
+                raise PlanError(f"Invalid tensor split '{ts_value}'.") from None
+        elif free_bytes:
+            tensor_split = [free_bytes.get(d, 0) for d in range(n_devices)]
+        else:
+            tensor_split = None
+
+        layer_devices = self._layer_devices(ngl, tensor_split, split_mode, main_gpu, n_devices)
+        usage = {d: 0 for d in range(n_devices)}
+        kv_usage = {d: 0 for d in range(n_devices)}
+        host, kv_host = self.input_bytes, 0
+        for il, device in enumerate(layer_devices):
+            kv = self.kv_bytes_per_layer(il, options) if il < self.n_layer else 0
+            if device is None:
+                if il < self.n_layer:
+                    host += self.block_dense_bytes[il] + self.block_expert_bytes[il] + kv
+                else:
+                    host += self.output_bytes
+                kv_host += kv
+                continue
+            gpu_bytes, cpu_bytes = self._layer_costs(il, ncmoe, options)
+            usage[device] += gpu_bytes
+            host += cpu_bytes
+            if options['kv_offload']:
+                kv_usage[device] += kv
+            else:
+                kv_host += kv
+
+        return {'devices': usage, 'host': host, 'kv_devices': kv_usage, 'kv_host': kv_host,
+                'options': options, 'output_device': layer_devices[self.n_layer]}
+
+    def predict(self, params, n_devices=1, free_bytes=None):
+        """
+        Predicts memory use for a candidate configuration.
+        Args:
+            params (dict): llama-server flags, e.g. {'-ngl': '99', '-ts': '3,1', '-c': '8192'}.
+            n_devices (int): Number of GPUs visible to llama.cpp.
+            free_bytes (dict): Optional {device_id: free bytes}; without -ts llama.cpp splits
+                layers in proportion to free memory.
+        Returns:
+            A dict {'devices': {device_id: bytes}, 'host': bytes,
+                    'kv_devices': {device_id: bytes}, 'kv_host': bytes}.
+            The kv_* entries are the KV-cache share of the totals.
+        Raises:
+            PlanError: If -ts is not a list of numbers (e.g. '3,' while it is being typed).
+        """
+        placement = self.place(params, n_devices, free_bytes)
+        options, output_device = placement['options'], placement['output_device']
+        usage = dict(placement['devices'])
+        for device in usage:
+            if usage[device] or device == output_device:
+                usage[device] += DEVICE_OVERHEAD_BYTES + self.compute_buffer_bytes(
+                    options['n_ctx'], options['n_ubatch'], options['flash_attn'], device == output_device)
+        return {'devices': usage, 'host': placement['host'], 'kv_devices': placement['kv_devices'],
+                'kv_host': placement['kv_host']}
+
+    @staticmethod
+    def overflowing_devices(prediction, free_bytes, headroom_bytes=256 * MIB):
+        """Returns the device ids whose predicted use exceeds their free memory minus headroom."""
+        return [d for d, used in prediction['devices'].items()
+                if used > free_bytes.get(d, 0) - headroom_bytes]
+
+    def fits(self, params, free_bytes, headroom_bytes=256 * MIB):
+        """True if the configuration is predicted to fit on every device."""
+        prediction = self.predict(params, n_devices=len(free_bytes), free_bytes=free_bytes)
+        return not self.overflowing_devices(prediction, free_bytes, headroom_bytes)
+
+    # --- Search helpers ---
+
+    def plan_layer_split(self, params, free_bytes, ngl, ncmoe=0, headroom_bytes=256 * MIB):
+        """
+        Greedily fills devices in llama.cpp order with contiguous layers and returns the
+        resulting per-device layer counts (usable directly as -ts), or None if they don't fit.
+        """
+        options = self.options_from_params(params, gpu_offload=ngl > 0)
+        n_devices = len(free_bytes)
+        act_gpu_layers = max(0, min(ngl, self.n_layer + 1))
+        first_layer = max(self.n_layer - act_gpu_layers, 0)
+        layers = list(range(first_layer, first_layer + act_gpu_layers))
+
+        counts = [0] * n_devices
+        device, used = 0, 0
+        for il in layers:
+            cost, _ = self._layer_costs(il, ncmoe, options)
+            while device < n_devices:
+                holds_output = il == self.n_layer
+                fixed = DEVICE_OVERHEAD_BYTES + self.compute_buffer_bytes(
+                    options['n_ctx'], options['n_ubatch'], options['flash_attn'], holds_output)
+                if used + cost + fixed <= free_bytes.get(device, 0) - headroom_bytes:
+                    used += cost
+                    counts[device] += 1
+                    break
+                device, used = device + 1, 0
+            else:
+                return None
+        return counts
+
+    def max_ngl(self, params, free_bytes, headroom_bytes=256 * MIB):
+        """Largest -ngl predicted to fit with the configuration's own split settings."""
+        for ngl in range(self.n_layer + 1, 0, -1):
+            if self.fits({**params, '-ngl': str(ngl)}, free_bytes, headroom_bytes):
+                return ngl
+        return 0
+
+    def min_ncmoe(self, params, free_bytes, headroom_bytes=256 * MIB):
+        """
+        Smallest -ncmoe for a full (-ngl 99) offload, together with a layer split that fits.
+        Returns (ncmoe, layer_counts) or (None, None) if even -ncmoe n_layer doesn't fit.
+        """
+        for ncmoe in range(0, self.n_layer + 1):
+            counts = self.plan_layer_split(params, free_bytes, self.n_layer + 1, ncmoe, headroom_bytes)
+            if counts is not None:
+                return ncmoe, counts
+        return None, None
+
+    def max_ngl_split(self, params, free_bytes, headroom_bytes=256 * MIB):
+        """Largest -ngl for which a multi-GPU layer split fits. Returns (ngl, layer_counts)."""
+        for ngl in range(self.n_layer + 1, 0, -1):
+            counts = self.plan_layer_split(params, free_bytes, ngl, 0, headroom_bytes)
+            if counts is not None:
+                return ngl, counts
+        return 0, None
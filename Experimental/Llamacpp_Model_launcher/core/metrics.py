@@ -0,0 +1,235 @@
+# core/metrics.py
+
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+from Llamacpp_Model_launcher.core.log_scanner import LogEventKind
+
+# One completed request, assembled from a server timing block.
+RequestSample = namedtuple('RequestSample', ['time', 'model', 'prompt_tokens', 'prompt_tps',
+                                             'gen_tokens', 'gen_tps', 'latency_ms'])
+
+# One successful model load; source is how readiness was detected ('health' or 'log').
+LoadSample = namedtuple('LoadSample', ['time', 'model', 'seconds', 'source'])
+
+LOAD_TIME_COLUMNS = ['time', 'model', 'seconds', 'source']
+
+HISTORY_COLUMNS = ['bucket_start', 'model', 'requests', 'prompt_tokens', 'gen_tokens',
+                   'avg_prompt_tps', 'avg_gen_tps', 'avg_latency_ms', 'max_latency_ms']
+
+
+class MetricsCollector:
+    """
+    Turns the timing block llama-server prints after every request ('prompt eval time',
+    'eval time', 'total time') into RequestSamples. The most recent samples are kept in
+    a ring buffer for the live view; older data survives on disk as one CSV row per
+    model per `bucket_seconds`.
+    """
+
+    def __init__(self, capacity=2000, history_path='logs/metrics.csv', bucket_seconds=60):
+        """
+        Args:
+            capacity (int): Samples kept in memory.
+            history_path (str): CSV file the downsampled history is appended to; None disables it.
+            bucket_seconds (int): Width of one downsampled history row.
+        """
+        self.samples = deque(maxlen=capacity)
+        self.history_path = history_path
+        self.bucket_seconds = bucket_seconds
+        self.model = ''
+        self._prompt = None
+        self._eval = None
+        self._bucket = None
+
+    def start_session(self, model_name):
+        """Samples from now on are attributed to this model."""
+        self.end_session()
+        self.model = model_name
+
+    def end_session(self):
+        """Drops an incomplete timing block and writes out the open history bucket."""
+        self._prompt = self._eval = None
+        self._write_bucket()
+
+    def feed(self, events):
+        """
+        Args:
+            events (list): LogEvents from a LogScanner.
+        Returns:
+            The RequestSamples completed by these events.
+        """
+        completed = []
+        for event in events:
+            if event.kind in (LogEventKind.PROMPT_TIMING, LogEventKind.EVAL_TIMING) and self._eval is not None:
+                # The previous block never printed its 'total time' line.
+                completed.append(self._complete(None))
+            if event.kind == LogEventKind.PROMPT_TIMING:
+                self._prompt = event.value
+            elif event.kind == LogEventKind.EVAL_TIMING:
+                self._eval = event.value
+            elif event.kind == LogEventKind.TOTAL_TIMING:
+                completed.append(self._complete(event.value))
+        return completed
+
+    def _complete(self, total):
+        prompt, generation = self._prompt, self._eval
+        self._prompt = self._eval = None
+        latency_ms = total.ms if total else (prompt.ms if prompt else 0.0) + (generation.ms if generation else 0.0)
+        sample = RequestSample(time.time(), self.model,
+                               prompt.tokens if prompt else 0, _finite(prompt.tps) if prompt else 0.0,
+                               generation.tokens if generation else 0, _finite(generation.tps) if generation else 0.0,
+                               latency_ms)
+        self.samples.append(sample)
+        self._add_to_bucket(sample)
+        return sample
+
+    def recent(self, seconds=None, model=None):
+        """Returns the in-memory samples, optionally only those of one model or from the last `seconds`."""
+        cutoff = time.time() - seconds if seconds is not None else None
+        return [s for s in self.samples
+                if (cutoff is None or s.time >= cutoff) and (model is None or s.model == model)]
+
+    def summary(self, seconds=None, model=None):
+        """
+        Returns:
+            A dict with 'requests', 'avg_prompt_tps', 'avg_gen_tps', 'avg_latency_ms' and
+            'last' (the newest RequestSample or None) over the selected samples.
+        """
+        samples = self.recent(seconds, model)
+        count = len(samples)
+        return {
+            'requests': count,
+            'avg_prompt_tps': sum(s.prompt_tps for s in samples) / count if count else 0.0,
+            'avg_gen_tps': sum(s.gen_tps for s in samples) / count if count else 0.0,
+            'avg_latency_ms': sum(s.latency_ms for s in samples) / count if count else 0.0,
+            'last': samples[-1] if samples else None,
+        }
+
+    # --- Downsampled history ---
+
+    def _add_to_bucket(self, sample):
+        bucket_start = int(sample.time // self.bucket_seconds * self.bucket_seconds)
+        if self._bucket and (self._bucket['bucket_start'] != bucket_start or self._bucket['model'] != sample.model):
+            self._write_bucket()
+        if not self._bucket:
+            self._bucket = {'bucket_start': bucket_start, 'model': sample.model, 'requests': 0,
+                            'prompt_tokens': 0, 'gen_tokens': 0, 'prompt_tps': 0.0, 'gen_tps': 0.0,
+                            'latency_ms': 0.0, 'max_latency_ms': 0.0}
+        bucket = self._bucket
+        bucket['requests'] += 1
+        bucket['prompt_tokens'] += sample.prompt_tokens
+        bucket['gen_tokens'] += sample.gen_tokens
+        bucket['prompt_tps'] += sample.prompt_tps
+        bucket['gen_tps'] += sample.gen_tps
+        bucket['latency_ms'] += sample.latency_ms
+        bucket['max_latency_ms'] = max(bucket['max_latency_ms'], sample.latency_ms)
+
+    def _write_bucket(self):
+        bucket, self._bucket = self._bucket, None
+        if not bucket or not self.history_path:
+            return
+        count = bucket['requests']
+        row = [bucket['bucket_start'], bucket['model'].replace(',', ' '), count, bucket['prompt_tokens'],
+               bucket['gen_tokens'], f"{bucket['prompt_tps'] / count:.2f}", f"{bucket['gen_tps'] / count:.2f}",
+               f"{bucket['latency_ms'] / count:.1f}", f"{bucket['max_latency_ms']:.1f}"]
+        try:
+            directory = os.path.dirname(self.history_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            is_new = not os.path.exists(self.history_path)
+            with open(self.history_path, 'a', encoding='utf-8') as f:
+                if is_new:
+                    f.write(",".join(HISTORY_COLUMNS) + "\n")
+                f.write(",".join(str(v) for v in row) + "\n")
+        except OSError as e:
+            print(f"[DIAGNOSTICS] Could not write metrics history: {e}")
+
+
+class LoadTimeLog:
+    """
+    Remembers how long each configuration took to become ready, so load times can be
+    compared across runs. Every load is appended to a CSV file; the newest `per_model`
+    samples of each configuration are kept in memory (and read back from the file on start).
+    Safe to use from the pool's watcher threads.
+    """
+
+    def __init__(self, path='logs/load_times.csv', per_model=50):
+        """
+        Args:
+            path (str): CSV file every load is appended to; None keeps the samples in memory only.
+            per_model (int): Samples kept in memory per configuration.
+        """
+        self.path = path
+        self.per_model = per_model
+        self._samples = {}
+        self._lock = threading.Lock()
+        self._read_history()
+
+    def record(self, model_name, seconds, source='health'):
+        """Stores one load and returns its LoadSample."""
+        sample = LoadSample(time.time(), model_name, seconds, source)
+        with self._lock:
+            self._remember(sample)
+            self._append(sample)
+        return sample
+
+    def history(self, model_name):
+        """Returns the remembered LoadSamples of one configuration, oldest first."""
+        with self._lock:
+            return list(self._samples.get(model_name, ()))
+
+    def summary(self, model_name):
+        """
+        Returns:
+            A dict with 'loads', 'last', 'avg', 'min' and 'max' (seconds, None without samples).
+        """
+        seconds = [s.seconds for s in self.history(model_name)]
+        return {
+            'loads': len(seconds),
+            'last': seconds[-1] if seconds else None,
+            'avg': sum(seconds) / len(seconds) if seconds else None,
+            'min': min(seconds) if seconds else None,
+            'max': max(seconds) if seconds else None,
+        }
+
+    def _remember(self, sample):
+        self._samples.setdefault(sample.model, deque(maxlen=self.per_model)).append(sample)
+
+    def _append(self, sample):
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            is_new = not os.path.exists(self.path)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                if is_new:
+                    f.write(",".join(LOAD_TIME_COLUMNS) + "\n")
+                f.write(f"{sample.time:.0f},{sample.model.replace(',', ' ')},{sample.seconds:.3f},{sample.source}\n")
+        except OSError as e:
+            print(f"[DIAGNOSTICS] Could not write load times: {e}")
+
+    def _read_history(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()[1:]
+        except OSError as e:
+            print(f"[DIAGNOSTICS] Could not read load times: {e}")
+            return
+        for line in lines:
+            parts = line.split(',')
+            if len(parts) != len(LOAD_TIME_COLUMNS):
+                continue
+            try:
+                self._remember(LoadSample(float(parts[0]), parts[1], float(parts[2]), parts[3]))
+            except ValueError:
+                continue
+
+
+def _finite(value):
+    return value if value == value and value != float('inf') else 0.0
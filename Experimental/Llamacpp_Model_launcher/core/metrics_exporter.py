@@ -0,0 +1,329 @@
+# core/metrics_exporter.py
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from Llamacpp_Model_launcher.core.status import ServerStatus
+
+# --- Optional Dependencies ---
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+GIB = 1024 ** 3
+
+TPS_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 200, 500, 1000, 2000, 5000)
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+
+class Histogram:
+    """A Prometheus histogram with fixed upper bounds. Not locked; the exporter holds its lock."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': bound})} {cumulative}")
+        lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {self.count}")
+        lines.append(f"{name}_sum{_labels(labels)} {self.sum:.6f}")
+        lines.append(f"{name}_count{_labels(labels)} {self.count}")
+        return lines
+
+
+class MetricsExporter:
+    """
+    Publishes launcher and server metrics in the Prometheus text format on a local
+    HTTP endpoint (/metrics). The GUI thread only pushes small updates under a lock;
+    the HTTP server runs on its own daemon thread and samples process and VRAM figures
+    at scrape time, caching them for `sample_ttl` seconds so frequent scrapes stay cheap.
+    """
+
+    def __init__(self, host='127.0.0.1', port=9464, vram_source=None, sample_ttl=0.5, resource_source=None):
+        """
+        Args:
+            host (str): Interface to bind; keep it on localhost unless the network is trusted.
+            port (int): TCP port for /metrics.
+            vram_source (callable): Returns {gpu_index: {'used_gb', 'total_gb'}} or None,
+                e.g. SystemAnalyzer().get_live_vram_usage.
+            sample_ttl (float): Seconds a process/VRAM sample is reused between scrapes.
+            resource_source (callable): Returns the latest ResourceSample of the server or None,
+                e.g. ResourceSampler.latest; adds thread and disk-read figures.
+        """
+        self.host = host
+        self.port = port
+        self.vram_source = vram_source
+        self.sample_ttl = sample_ttl
+        self.resource_source = resource_source
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+        self._status = ServerStatus.UNLOADED
+        self._model = ''
+        self._pid = None
+        self._process = None
+        self._last_load_seconds = 0.0
+        self._last_unload_seconds = 0.0
+        self._starts = {}
+        self._restarts = {}
+        self._pool_status = {}
+        self._pool_load_seconds = {}
+        self._prompt_tokens = {}
+        self._gen_tokens = {}
+        self._histograms = {}
+        self._sample_lock = threading.Lock()
+        self._sample_time = 0.0
+        self._sample_lines = []
+        self._tree = {}
+
+    # --- Updates from the launcher ---
+
+    def set_status(self, status):
+        with self._lock:
+            self._status = status
+
+    def record_start(self, model_name, pid=None, restart=False):
+        """
+        The launcher's own server was started.
+        Args:
+            restart (bool): Started by the restart policy after a crash; loads by hand are not restarts.
+        """
+        with self._lock:
+            self._count_start(model_name, restart)
+            self._model = model_name
+            self._set_pid(pid)
+
+    def record_pool_start(self, model_name, restart=False):
+        """A pool instance was started; counted with the launcher's own starts."""
+        with self._lock:
+            self._count_start(model_name, restart)
+
+    def set_pool_status(self, model_name, status):
+        with self._lock:
+            self._pool_status[model_name] = status
+
+    def record_pool_load(self, model_name, seconds):
+        with self._lock:
+            self._pool_load_seconds[model_name] = seconds
+
+    def _count_start(self, model_name, restart):
+        """Call with the lock held."""
+        self._starts[model_name] = self._starts.get(model_name, 0) + 1
+        if restart:
+            self._restarts[model_name] = self._restarts.get(model_name, 0) + 1
+
+    def record_exit(self):
+        with self._lock:
+            self._set_pid(None)
+
+    def record_load(self, seconds):
+        with self._lock:
+            self._last_load_seconds = seconds
+
+    def record_unload(self, seconds):
+        with self._lock:
+            self._last_unload_seconds = seconds
+
+    def observe(self, sample):
+        """Adds a RequestSample from the MetricsCollector."""
+        with self._lock:
+            model = sample.model
+            if model not in self._histograms:
+                self._histograms[model] = {
+                    'generation_tokens_per_second': Histogram(TPS_BUCKETS),
+                    'prompt_tokens_per_second': Histogram(TPS_BUCKETS),
+                    'request_latency_seconds': Histogram(LATENCY_BUCKETS),
+                }
+            histograms = self._histograms[model]
+            histograms['generation_tokens_per_second'].observe(sample.gen_tps)
+            histograms['prompt_tokens_per_second'].observe(sample.prompt_tps)
+            histograms['request_latency_seconds'].observe(sample.latency_ms / 1000)
+            self._prompt_tokens[model] = self._prompt_tokens.get(model, 0) + sample.prompt_tokens
+            self._gen_tokens[model] = self._gen_tokens.get(model, 0) + sample.gen_tokens
+
+    def _set_pid(self, pid):
+        self._pid = pid
+        self._process = None
+        if pid and PSUTIL_AVAILABLE:
+            try:
+                self._process = psutil.Process(pid)
+                self._process.cpu_percent(None)  # The first call only sets the baseline.
+            except psutil.Error:
+                self._process = None
+
+    # --- HTTP server ---
+
+    def start(self):
+        """
+        Starts serving /metrics on a background thread.
+        Returns:
+            A tuple (success, message).
+        """
+        if self._server:
+            return True, f"Metrics exporter already running on http://{self.host}:{self.port}/metrics"
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        except OSError as e:
+            return False, f"Could not start metrics exporter on {self.host}:{self.port}: {e}"
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name='metrics-exporter', daemon=True)
+        self._thread.start()
+        return True, f"Metrics exporter listening on http://{self.host}:{self.port}/metrics"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self._thread = None
+
+    # --- Rendering ---
+
+    def render(self):
+        """Returns the current metrics in the Prometheus text exposition format."""
+        with self._lock:
+            lines = self._render_state()
+            process = self._process
+        with self._sample_lock:
+            lines += self._sampled_lines(process)
+        return "\n".join(lines) + "\n"
+
+    def _render_state(self):
+        lines = ["# HELP llamacpp_launcher_server_status Current server state (1 for the active state).",
+                 "# TYPE llamacpp_launcher_server_status gauge"]
+        for status in ServerStatus:
+            lines.append(f"llamacpp_launcher_server_status{_labels({'state': status.key})} "
+                         f"{1 if status == self._status else 0}")
+        lines += ["# HELP llamacpp_launcher_server_info The model configuration most recently started.",
+                  "# TYPE llamacpp_launcher_server_info gauge",
+                  f"llamacpp_launcher_server_info{_labels({'model': self._model})} 1",
+                  "# HELP llamacpp_launcher_load_duration_seconds Time from launch to 'model loaded' of the last load.",
+                  "# TYPE llamacpp_launcher_load_duration_seconds gauge",
+                  f"llamacpp_launcher_load_duration_seconds {self._last_load_seconds:.3f}",
+                  "# HELP llamacpp_launcher_unload_duration_seconds Time from the stop request to process exit of the last unload.",
+                  "# TYPE llamacpp_launcher_unload_duration_seconds gauge",
+                  f"llamacpp_launcher_unload_duration_seconds {self._last_unload_seconds:.3f}"]
+        if self._pool_status:
+            lines += ["# HELP llamacpp_launcher_pool_instance_status Current state of each pool instance (1 for the active state).",
+                      "# TYPE llamacpp_launcher_pool_instance_status gauge"]
+            for model, current in self._pool_status.items():
+                lines += [f"llamacpp_launcher_pool_instance_status{_labels({'model': model, 'state': status.key})} "
+                          f"{1 if status == current else 0}" for status in ServerStatus]
+        if self._pool_load_seconds:
+            lines += ["# HELP llamacpp_launcher_pool_load_duration_seconds Time from launch to ready of each pool instance's last load.",
+                      "# TYPE llamacpp_launcher_pool_load_duration_seconds gauge"]
+            lines += [f"llamacpp_launcher_pool_load_duration_seconds{_labels({'model': m})} {v:.3f}"
+                      for m, v in self._pool_load_seconds.items()]
+
+        counters = [('server_starts_total', "Servers started, including pool instances.", self._starts),
+                    ('server_restarts_total', "Servers started again by the restart policy after a crash.", self._restarts),
+                    ('prompt_tokens_total', "Prompt tokens processed.", self._prompt_tokens),
+                    ('generated_tokens_total', "Tokens generated.", self._gen_tokens)]
+        for name, help_text, values in counters:
+            lines += [f"# HELP llamacpp_launcher_{name} {help_text}", f"# TYPE llamacpp_launcher_{name} counter"]
+            lines += [f"llamacpp_launcher_{name}{_labels({'model': m})} {v}" for m, v in values.items()]
+
+        for name, help_text in (('generation_tokens_per_second', "Generation speed per request."),
+                                ('prompt_tokens_per_second', "Prompt processing speed per request."),
+                                ('request_latency_seconds', "Total time per request.")):
+            lines += [f"# HELP llamacpp_launcher_{name} {help_text}", f"# TYPE llamacpp_launcher_{name} histogram"]
+            for model, histograms in self._histograms.items():
+                lines += histograms[name].render(f"llamacpp_launcher_{name}", {'model': model})
+        return lines
+
+    def _sampled_lines(self, process):
+        now = time.monotonic()
+        if now - self._sample_time < self.sample_ttl:
+            return self._sample_lines
+        lines = []
+        if process is not None:
+            rss, cpu = self._process_usage(process)
+            lines += ["# HELP llamacpp_launcher_process_resident_memory_bytes RSS of the server and its children.",
+                      "# TYPE llamacpp_launcher_process_resident_memory_bytes gauge",
+                      f"llamacpp_launcher_process_resident_memory_bytes {rss}",
+                      "# HELP llamacpp_launcher_process_cpu_percent CPU use of the server and its children since the last scrape.",
+                      "# TYPE llamacpp_launcher_process_cpu_percent gauge",
+                      f"llamacpp_launcher_process_cpu_percent {cpu:.1f}"]
+            sample = self.resource_source() if self.resource_source else None
+            if sample:
+                lines += ["# HELP llamacpp_launcher_process_threads Threads of the server and its children.",
+                          "# TYPE llamacpp_launcher_process_threads gauge",
+                          f"llamacpp_launcher_process_threads {sample.threads}"]
+                if sample.read_bytes is not None:
+                    lines += ["# HELP llamacpp_launcher_process_read_bytes_total Bytes the server and its children read from storage.",
+                              "# TYPE llamacpp_launcher_process_read_bytes_total counter",
+                              f"llamacpp_launcher_process_read_bytes_total {sample.read_bytes}"]
+        vram = self.vram_source() if self.vram_source else None
+        if vram:
+            lines += ["# HELP llamacpp_launcher_gpu_memory_used_bytes VRAM in use per GPU.",
+                      "# TYPE llamacpp_launcher_gpu_memory_used_bytes gauge"]
+            lines += [f"llamacpp_launcher_gpu_memory_used_bytes{_labels({'gpu': i})} {int(v['used_gb'] * GIB)}"
+                      for i, v in sorted(vram.items())]
+            lines += ["# HELP llamacpp_launcher_gpu_memory_total_bytes VRAM per GPU.",
+                      "# TYPE llamacpp_launcher_gpu_memory_total_bytes gauge"]
+            lines += [f"llamacpp_launcher_gpu_memory_total_bytes{_labels({'gpu': i})} {int(v['total_gb'] * GIB)}"
+                      for i, v in sorted(vram.items())]
+        self._sample_time, self._sample_lines = now, lines
+        return lines
+
+    def _process_usage(self, process):
+        """Returns (rss_bytes, cpu_percent) summed over the process tree; the launched process may be a wrapper."""
+        rss, cpu = 0, 0.0
+        try:
+            tree = [process] + process.children(recursive=True)
+        except psutil.Error:
+            return rss, cpu
+        # Reuse Process objects across scrapes: cpu_percent measures since the previous call on the same object.
+        self._tree = {proc.pid: self._tree.get(proc.pid, proc) for proc in tree}
+        for proc in self._tree.values():
+            try:
+                rss += proc.memory_info().rss
+                cpu += proc.cpu_percent(None)
+            except psutil.Error:
+                continue
+        return rss, cpu
@@ -0,0 +1,263 @@
+# core/model_cache.py
+
+import hashlib
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+
+from Llamacpp_Model_launcher.core.gguf_reader import find_shard_paths
+from Llamacpp_Model_launcher.core.prefetch import MODEL_KEYS, rate_mib
+
+GIB = 1024 ** 3
+INDEX_FILE = 'index.json'
+COPY_BUFFER_BYTES = 16 * 1024 ** 2
+
+
+def _stamp(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class ModelCache:
+    """
+    Keeps copies of frequently launched models on fast storage. resolve() rewrites the model
+    paths of a launch ('-m', '-md', '--mmproj') to their cached copies when those are valid,
+    i.e. the source still has the size and modification time it had when it was copied.
+    A model launched `min_launches` times is copied in the background (all its shards, into a
+    directory of its own so llama.cpp still finds them); its launches until then use the
+    original. When the copies would exceed `budget_bytes`, the least recently launched are
+    deleted first. The index of copies and launch counts is kept in the cache directory.
+    """
+
+    def __init__(self, cache_dir, budget_bytes, min_launches=2):
+        """
+        Args:
+            cache_dir (str): Directory on the fast disk; created if missing.
+            budget_bytes (int): Space the copies may take together.
+            min_launches (int): Launches after which a model is copied.
+        """
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.budget_bytes = budget_bytes
+        self.min_launches = max(1, min_launches)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._queued = set()
+        self._thread = None
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._index = self._load_index()
+
+    # --- Index ---
+
+    def _load_index(self):
+        path = os.path.join(self.cache_dir, INDEX_FILE)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            return index if isinstance(index, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"[DIAGNOSTICS] Model cache index '{path}' is unreadable, starting empty: {e}")
+            return {}
+
+    def _save_index(self):
+        """Writes the index atomically. Call with the lock held."""
+        path = os.path.join(self.cache_dir, INDEX_FILE)
+        try:
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(self._index, f, indent=1)
+            os.replace(path + '.tmp', path)
+        except OSError as e:
+            print(f"[DIAGNOSTICS] Could not save the model cache index: {e}")
+
+    def entries(self):
+        """A copy of the index: {first shard of the source: {'files', 'dir', 'bytes', 'launches', 'last_launch', 'cached'}}."""
+        with self._lock:
+            return {key: dict(entry) for key, entry in self._index.items()}
+
+    def used_bytes(self):
+        with self._lock:
+            return sum(e['bytes'] for e in self._index.values() if e.get('cached'))
+
+    # --- Launches ---
+
+    def resolve(self, params, base_dir='', record=True):
+        """
+        Maps the model files of a launch to valid cached copies and counts the launch.
+        Args:
+            params (dict): The configuration's {flag: value} dictionary.
+            base_dir (str): The server's working directory, for relative paths.
+            record (bool): Count this as a launch (and copy the model once it is hot).
+        Returns:
+            An 'update_params' dict (see CommandBuilder.apply_updates) with the cached paths;
+            {} if nothing is cached yet.
+        """
+        updates = {}
+        for key in MODEL_KEYS:
+            value = (params.get(key) or '').strip('"')
+            if not value:
+                continue
+            path = os.path.abspath(value if os.path.isabs(value) else os.path.join(base_dir, value))
+            if path.startswith(self.cache_dir + os.sep):
+                continue  # Already a cached copy, e.g. a restart of a rewritten command.
+            shards = find_shard_paths(path)
+            if not shards or not all(os.path.isfile(s) for s in shards):
+                continue
+            cached = self._lookup(shards, path, record)
+            if cached:
+                updates[key] = cached
+        return updates
+
+    def _lookup(self, shards, path, record):
+        key = shards[0]
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                entry = {'files': shards, 'dir': hashlib.sha1(key.encode('utf-8')).hexdigest()[:16],
+                         'bytes': 0, 'launches': 0, 'last_launch': 0.0, 'cached': False, 'stamps': []}
+                self._index[key] = entry
+            if record:
+                entry['launches'] += 1
+                entry['last_launch'] = time.time()
+            valid = entry['cached'] and self._is_valid(entry, shards)
+            if entry['cached'] and not valid:
+                print(f"[DIAGNOSTICS] Model cache: '{key}' changed since it was copied; dropping the copy.")
+                self._delete(key)
+            if not valid:
+                entry['files'] = shards
+            hot = entry['launches'] >= self.min_launches
+            self._save_index()
+        if valid:
+            return os.path.join(self.cache_dir, entry['dir'], os.path.basename(path))
+        if hot and record:
+            self._enqueue(key)
+        return None
+
+    def _is_valid(self, entry, shards):
+        """Call with the lock held."""
+        if entry['files'] != shards:
+            return False
+        try:
+            for source, stamp in zip(shards, entry['stamps']):
+                cached = os.path.join(self.cache_dir, entry['dir'], os.path.basename(source))
+                if _stamp(source) != stamp or os.path.getsize(cached) != stamp[0]:
+                    return False
+        except OSError:
+            return False
+        return len(entry['stamps']) == len(shards)
+
+    # --- Copying and eviction ---
+
+    def _enqueue(self, key):
+        with self._lock:
+            if key in self._queued:
+                return
+            self._queued.add(key)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name='model-cache', daemon=True)
+                self._thread.start()
+        self._queue.put(key)
+
+    def wait_idle(self, timeout=None):
+        """Blocks until queued copies are done. Returns False on timeout."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            with self._lock:
+                if not self._queued:
+                    return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+
+    def _worker(self):
+        while True:
+            key = self._queue.get()
+            try:
+                self._copy(key)
+            except Exception as e:
+                print(f"[DIAGNOSTICS] Model cache: copying '{key}' failed: {e!r}")
+            finally:
+                with self._lock:
+                    self._queued.discard(key)
+
+    def _copy(self, key):
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None or entry['cached']:
+                return
+            shards = list(entry['files'])
+        stamps = [_stamp(s) for s in shards]
+        size = sum(s[0] for s in stamps)
+        if size > self.budget_bytes:
+            print(f"[DIAGNOSTICS] Model cache: '{key}' ({size / GIB:.1f} GB) is larger than the budget; not copying.")
+            return
+        with self._lock:
+            self._evict(size, keep=key)
+        free = shutil.disk_usage(self.cache_dir).free
+        if size > free:
+            print(f"[DIAGNOSTICS] Model cache: not enough free space for '{key}' ({free / GIB:.1f} GB free).")
+            return
+
+        directory = os.path.join(self.cache_dir, entry['dir'])
+        os.makedirs(directory, exist_ok=True)
+        started = time.monotonic()
+        for source in shards:
+            target = os.path.join(directory, os.path.basename(source))
+            try:
+                with open(source, 'rb') as src, open(target + '.part', 'wb') as dst:
+                    shutil.copyfileobj(src, dst, COPY_BUFFER_BYTES)
+                os.replace(target + '.part', target)
+            except OSError as e:
+                print(f"[DIAGNOSTICS] Model cache: could not copy '{source}': {e}")
+                for leftover in (target + '.part', target):
+                    if os.path.exists(leftover):
+                        os.remove(leftover)
+                return
+        seconds = time.monotonic() - started
+        if [_stamp(s) for s in shards] != stamps:
+            print(f"[DIAGNOSTICS] Model cache: '{key}' changed while it was copied; discarding the copy.")
+            shutil.rmtree(directory, ignore_errors=True)
+            return
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return
+            entry.update(cached=True, bytes=size, stamps=stamps)
+            self._save_index()
+        print(f"[DIAGNOSTICS] Model cache: copied '{key}' ({size / GIB:.1f} GB) in {seconds:.1f} s "
+              f"({rate_mib(size, seconds):,.0f} MiB/s).")
+
+    def _evict(self, needed, keep=None):
+        """Deletes the least recently launched copies until `needed` more bytes fit the budget. Call with the lock held."""
+        cached = sorted((e['last_launch'], k) for k, e in self._index.items() if e.get('cached') and k != keep)
+        used = sum(e['bytes'] for e in self._index.values() if e.get('cached'))
+        for _, key in cached:
+            if used + needed <= self.budget_bytes:
+                break
+            freed = self._delete(key)
+            if freed is None:
+                continue  # In use (Windows); try the next one.
+            used -= freed
+            print(f"[DIAGNOSTICS] Model cache: evicted '{key}' ({freed / GIB:.1f} GB).")
+        self._save_index()
+
+    def _delete(self, key):
+        """
+        Removes a copy from disk and marks it uncached. Call with the lock held.
+        Returns:
+            The bytes freed, or None if the files could not be deleted.
+        """
+        entry = self._index[key]
+        directory = os.path.join(self.cache_dir, entry['dir'])
+        try:
+            if os.path.isdir(directory):
+                shutil.rmtree(directory)
+        except OSError as e:
+            print(f"[DIAGNOSTICS] Model cache: could not delete the copy of '{key}': {e}")
+            return None
+        freed = entry['bytes'] if entry['cached'] else 0
+        entry.update(cached=False, bytes=0, stamps=[])
+        return freed
@@ -0,0 +1,219 @@
+# core/model_library.py
+
+import json
+import os
+import struct
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from Llamacpp_Model_launcher.core.gguf_reader import MULTI_PART_PATTERN, GGUFReader, quant_name
+
+CATALOG_VERSION = 1
+
+# Read ahead of parsing, enough for the metadata and tensor table of large-vocabulary models.
+HEADER_READ_BYTES = 8 * 1024 ** 2
+
+# One model of the library. path is its first shard; stamps holds (size, mtime_ns) per shard and
+# decides whether a rescan has to read the file again. error is '' for a readable model.
+CatalogEntry = namedtuple('CatalogEntry', [
+    'path', 'name', 'shards', 'size_bytes', 'stamps', 'architecture', 'quant', 'block_count',
+    'expert_count', 'expert_used_count', 'context_length', 'error'])
+
+# Counts of one scan; failed is the number of catalog entries that could not be read.
+ScanResult = namedtuple('ScanResult', ['models', 'added', 'updated', 'removed', 'unchanged', 'failed', 'seconds'])
+
+
+def find_models(directories, recursive=True):
+    """
+    Walks directories for GGUF files and groups the shards of multi-part models.
+    Overlapping directories (e.g. '/lib' and '/lib/sub') and symlinks list each file once.
+    Returns:
+        A list of shard lists, one per model, each in shard order. A multi-part model with
+        missing shards is still returned with the shards that exist.
+    """
+    singles, groups, seen = [], {}, set()
+    for directory in directories:
+        for root, dirs, files in os.walk(directory):
+            if not recursive:
+                dirs.clear()
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for filename in files:
+                if not filename.lower().endswith('.gguf'):
+                    continue
+                path = os.path.abspath(os.path.join(root, filename))
+                real_path = os.path.realpath(path)
+                if real_path in seen:
+                    continue
+                seen.add(real_path)
+                match = MULTI_PART_PATTERN.search(filename)
+                if match:
+                    key = (root, filename[:match.start()].casefold(), int(match.group(2)))
+                    groups.setdefault(key, []).append((int(match.group(1)), path))
+                else:
+                    singles.append([path])
+    models = singles + [[path for _, path in sorted(shards)] for shards in groups.values()]
+    return sorted(models, key=lambda shards: shards[0].casefold())
+
+
+def _stamps(shards):
+    stamps = []
+    for shard in shards:
+        stat = os.stat(shard)
+        stamps.append([stat.st_size, stat.st_mtime_ns])
+    return stamps
+
+
+def _read_headers(shards):
+    """
+    Pulls the start of each shard into the page cache with a plain read, which releases the
+    GIL while it waits for the disk. The parser then works from memory; it runs in Python and
+    holds the GIL, so without this the workers' disk reads would not overlap.
+    """
+    for shard in shards:
+        with open(shard, 'rb', buffering=0) as f:
+            f.read(HEADER_READ_BYTES)
+
+
+def read_entry(shards):
+    """Reads one model's GGUF header. Returns a CatalogEntry; unreadable files get an error instead of metadata."""
+    path = shards[0]
+    name = MULTI_PART_PATTERN.sub('', os.path.basename(path))
+    if name.lower().endswith('.gguf'):
+        name = name[:-5]
+    stamps = _stamps(shards)
+    size = sum(s[0] for s in stamps)
+    match = MULTI_PART_PATTERN.search(os.path.basename(path))
+    expected = int(match.group(2)) if match else 1
+    if len(shards) != expected:
+        return CatalogEntry(path, name, shards, size, stamps, '', quant_name(None, path), None, 0, 0, None,
+                            f"Found {len(shards)} of {expected} shards")
+    try:
+        _read_headers(shards)
+        summary = GGUFReader(path).read().summary()
+    except (OSError, ValueError, struct.error) as e:
+        error = f"Truncated or corrupt GGUF header ({e})" if isinstance(e, struct.error) else str(e)
+        return CatalogEntry(path, name, shards, size, stamps, '', quant_name(None, path), None, 0, 0, None, error)
+    return CatalogEntry(path, name, shards, size, stamps, summary['architecture'],
+                        quant_name(summary['file_type'], path), summary['block_count'], summary['expert_count'],
+                        summary['expert_used_count'], summary['context_length'], '')
+
+
+class ModelLibrary:
+    """
+    A local catalog of the GGUF models in a set of directories. scan() walks the directories,
+    reads the headers of new and changed models on a thread pool (reading a header touches a
+    few MB at most, so the time goes into file system latency rather than CPU) and reuses the
+    catalog entry of every model whose shards kept their size and modification time. The
+    catalog is saved as JSON after each scan.
+    """
+
+    def __init__(self, catalog_path='model_catalog.json', workers=8):
+        """
+        Args:
+            catalog_path (str): Where the catalog is kept.
+            workers (int): Headers read in parallel.
+        """
+        self.catalog_path = catalog_path
+        self.workers = max(1, workers)
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.catalog_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"[DIAGNOSTICS] Model catalog '{self.catalog_path}' is unreadable, rebuilding it: {e}")
+            return {}
+        if data.get('version') != CATALOG_VERSION:
+            return {}
+        try:
+            return {path: CatalogEntry(**entry) for path, entry in data.get('models', {}).items()}
+        except TypeError:
+            return {}
+
+    def save(self):
+        """
+        Writes the catalog atomically.
+        Returns:
+            A tuple (success, message).
+        """
+        with self._lock:
+            data = {'version': CATALOG_VERSION, 'models': {p: e._asdict() for p, e in self._entries.items()}}
+        temp_path = self.catalog_path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=1)
+            os.replace(temp_path, self.catalog_path)
+        except OSError as e:
+            return False, f"Could not save the model catalog: {e}"
+        return True, f"Saved {len(data['models'])} models to '{self.catalog_path}'."
+
+    def entries(self):
+        """The catalog, sorted by model name."""
+        with self._lock:
+            return sorted(self._entries.values(), key=lambda e: (e.name.casefold(), e.path))
+
+    def get(self, path):
+        """The entry of a model by any of its shard paths, or None."""
+        path = os.path.abspath(path)
+        with self._lock:
+            if path in self._entries:
+                return self._entries[path]
+            return next((e for e in self._entries.values() if path in e.shards), None)
+
+    def scan(self, directories, recursive=True, on_progress=None):
+        """
+        Brings the catalog up to date with the models in `directories`.
+        Args:
+            on_progress (callable): Called with (done, total) as headers are read.
+        Returns:
+            A ScanResult; `models` is the number of models now in the catalog.
+        """
+        started = time.monotonic()
+        found = find_models([d for d in directories if os.path.isdir(d)], recursive)
+        with self._lock:
+            previous = dict(self._entries)
+        entries, to_read, unchanged = {}, [], 0
+        for shards in found:
+            entry = previous.get(shards[0])
+            try:
+                stamps = _stamps(shards)
+            except OSError:
+                continue  # Deleted while we were walking.
+            if entry and entry.shards == shards and entry.stamps == stamps:
+                entries[shards[0]] = entry
+                unchanged += 1
+            else:
+                to_read.append(shards)
+
+        added = updated = 0
+        if to_read:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(to_read)),
+                                    thread_name_prefix='model-scan') as executor:
+                futures = [executor.submit(read_entry, shards) for shards in to_read]
+                for done, future in enumerate(as_completed(futures), 1):
+                    try:
+                        entry = future.result()
+                    except OSError:
+                        continue
+                    entries[entry.path] = entry
+                    if entry.path in previous:
+                        updated += 1
+                    else:
+                        added += 1
+                    if on_progress:
+                        on_progress(done, len(to_read))
+
+        removed = len(set(previous) - set(entries))
+        failed = sum(bool(e.error) for e in entries.values())
+        with self._lock:
+            self._entries = entries
+        success, message = self.save()
+        if not success:
+            print(f"[DIAGNOSTICS] {message}")
+        return ScanResult(len(entries), added, updated, removed, unchanged, failed, time.monotonic() - started)
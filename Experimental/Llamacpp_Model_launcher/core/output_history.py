@@ -0,0 +1,63 @@
+# core/output_history.py
+
+import os
+import time
+
+
+class OutputHistory:
+    """
+    Append-only on-disk copy of everything written to the output console. The console
+    itself only keeps the most recent lines; this file keeps the rest of the session.
+    A new file is started for every session (each model load or wizard run).
+    """
+
+    def __init__(self, directory='logs', prefix='server-output'):
+        """
+        Args:
+            directory (str): Folder the history files are written to; created on first use.
+            prefix (str): File name prefix; a timestamp and '.log' are appended.
+        """
+        self.directory = directory
+        self.prefix = prefix
+        self.path = None
+        self._file = None
+
+    def start_session(self):
+        """Closes the current file; the next write opens a fresh one."""
+        self.close()
+        self.path = None
+
+    def write(self, text):
+        if self._file is None and not self._open():
+            return
+        try:
+            self._file.write(text)
+            self._file.flush()
+        except OSError as e:
+            print(f"[DIAGNOSTICS] Could not write output history: {e}")
+            self.close()
+
+    def _open(self):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            stamp = time.strftime('%Y%m%d-%H%M%S')
+            path = os.path.join(self.directory, f"{self.prefix}-{stamp}.log")
+            suffix = 1
+            while os.path.exists(path):
+                path = os.path.join(self.directory, f"{self.prefix}-{stamp}-{suffix}.log")
+                suffix += 1
+            self._file = open(path, 'w', encoding='utf-8')
+            self.path = os.path.abspath(path)
+            return True
+        except OSError as e:
+            print(f"[DIAGNOSTICS] Could not open output history file: {e}")
+            self._file = None
+            return False
+
+    def close(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
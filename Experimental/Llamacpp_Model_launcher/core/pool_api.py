@@ -0,0 +1,119 @@
+# core/pool_api.py
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+
+class PoolApiServer:
+    """
+    A small JSON API to drive a ServerPool from scripts:
+
+        GET  /instances                  all instances and their status
+        GET  /instances/<name>           one instance
+        GET  /instances/<name>/log?tail=N  the instance's recent output
+        POST /instances/<name>/load
+        POST /instances/<name>/unload
+
+    Names are URL-encoded. Only configurations the pool can look up by name are loaded; the API
+    never runs a command from the request, since any local web page can send it a POST.
+    Runs on a daemon thread like the MetricsExporter.
+    """
+
+    def __init__(self, pool, host='127.0.0.1', port=9465):
+        """
+        Args:
+            pool (ServerPool): The pool to control.
+            host (str): Interface to bind; anyone who can reach it can start servers.
+            port (int): TCP port.
+        """
+        self.pool = pool
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """
+        Starts serving on a background thread.
+        Returns:
+            A tuple (success, message).
+        """
+        if self._server:
+            return True, f"Pool API already running on http://{self.host}:{self.port}"
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                api._handle(self, 'GET')
+
+            def do_POST(self):
+                api._handle(self, 'POST')
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        except OSError as e:
+            return False, f"Could not start the pool API on {self.host}:{self.port}: {e}"
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name='pool-api', daemon=True)
+        self._thread.start()
+        return True, f"Pool API listening on http://{self.host}:{self.port}/instances"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self._thread = None
+
+    def _handle(self, request, method):
+        url = urlsplit(request.path)
+        parts = [unquote(p) for p in url.path.strip('/').split('/') if p]
+        if not parts or parts[0] != 'instances' or len(parts) > 3:
+            return self._send(request, 404, {'error': 'Not found'})
+
+        if method == 'GET' and len(parts) == 1:
+            return self._send(request, 200, {'instances': [i.to_dict() for i in self.pool.instances()]})
+        name = parts[1] if len(parts) > 1 else ''
+        action = parts[2] if len(parts) > 2 else ''
+
+        if method == 'GET':
+            instance = self.pool.get(name)
+            if not instance:
+                return self._send(request, 404, {'error': f"Unknown instance '{name}'"})
+            if action == 'log':
+                try:
+                    tail = int(parse_qs(url.query).get('tail', ['200'])[0])
+                except ValueError:
+                    tail = 0
+                if tail <= 0:
+                    return self._send(request, 400, {'error': "'tail' must be a positive number of lines"})
+                lines = instance.log_text().splitlines()[-tail:]
+                return self._send(request, 200, {'name': name, 'lines': lines})
+            if not action:
+                return self._send(request, 200, instance.to_dict())
+            return self._send(request, 404, {'error': 'Not found'})
+
+        if action == 'load':
+            success, message = self.pool.load(name)
+        elif action == 'unload':
+            success, message = self.pool.unload(name)
+        else:
+            return self._send(request, 404, {'error': 'Not found'})
+        instance = self.pool.get(name)
+        return self._send(request, 200 if success else 409,
+                          {'success': success, 'message': message,
+                           'instance': instance.to_dict() if instance else None})
+
+    @staticmethod
+    def _send(request, code, payload):
+        body = json.dumps(payload).encode('utf-8')
+        request.send_response(code)
+        request.send_header('Content-Type', 'application/json')
+        request.send_header('Content-Length', str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
@@ -0,0 +1,220 @@
+# core/prefetch.py
+
+import os
+import threading
+import time
+from collections import namedtuple
+
+from Llamacpp_Model_launcher.core.gguf_reader import find_shard_paths
+
+# --- Optional Dependencies ---
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+# Parameters that name files the server reads at load time.
+MODEL_KEYS = ('-m', '--model', '-md', '--model-draft', '--mmproj')
+CHUNK_BYTES = 16 * 1024 ** 2
+MIB = 1024 ** 2
+FADVISE_AVAILABLE = hasattr(os, 'posix_fadvise')
+
+PrefetchProgress = namedtuple('PrefetchProgress', ['path', 'done_bytes', 'total_bytes', 'seconds'])
+
+# How a prewarm ended. completed is False when it was cancelled or a file could not be read.
+PrefetchResult = namedtuple('PrefetchResult', ['completed', 'files', 'bytes', 'seconds', 'message'])
+
+
+def rate_mib(n_bytes, seconds):
+    return n_bytes / MIB / seconds if seconds > 0 else 0.0
+
+
+def model_files(params, base_dir=''):
+    """
+    Lists the files a configuration loads: every shard of the model, the draft model and the
+    multimodal projector. Relative paths are resolved against `base_dir`, the server's
+    working directory; files that do not exist are left out.
+    Args:
+        params (dict): The configuration's {flag: value} dictionary.
+    """
+    files = []
+    for key in MODEL_KEYS:
+        value = (params.get(key) or '').strip('"')
+        if not value:
+            continue
+        path = value if os.path.isabs(value) else os.path.join(base_dir, value)
+        files += [p for p in find_shard_paths(path) if os.path.isfile(p) and p not in files]
+    return files
+
+
+def advise(paths, advice='willneed'):
+    """
+    Passes a page-cache hint for whole files to the kernel: 'willneed' starts an asynchronous
+    read-ahead, 'dontneed' drops their clean pages (used to measure cold loads).
+    Returns:
+        False where posix_fadvise is not available (Windows, macOS).
+    """
+    if not FADVISE_AVAILABLE:
+        return False
+    flag = os.POSIX_FADV_WILLNEED if advice == 'willneed' else os.POSIX_FADV_DONTNEED
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, flag)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+    return True
+
+
+def prewarm(paths, chunk_bytes=CHUNK_BYTES, on_progress=None, should_stop=None, progress_interval=0.5):
+    """
+    Streams files through the page cache with large sequential reads, so the server that
+    maps them next finds the pages in RAM instead of faulting them in from disk.
+    Args:
+        paths (list): Files to read, in order.
+        chunk_bytes (int): Size of each read.
+        on_progress (callable): Called with a PrefetchProgress at most every `progress_interval` s.
+        should_stop (callable): Returns True to cancel.
+    Returns:
+        A PrefetchResult.
+    """
+    sizes = {}
+    for path in paths:
+        try:
+            sizes[path] = os.path.getsize(path)
+        except OSError as e:
+            return PrefetchResult(False, [], 0, 0.0, f"Cannot read '{path}': {e}")
+    total = sum(sizes.values())
+    buffer = bytearray(chunk_bytes)
+    view = memoryview(buffer)
+    done, started = 0, time.monotonic()
+    last_report = started
+    for path in paths:
+        try:
+            with open(path, 'rb', buffering=0) as f:
+                if FADVISE_AVAILABLE:
+                    # Sequential access doubles the kernel's read-ahead window for this file.
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                while True:
+                    if should_stop and should_stop():
+                        seconds = time.monotonic() - started
+                        return PrefetchResult(False, list(paths), done, seconds, "Prewarm cancelled.")
+                    n = f.readinto(view)
+                    if not n:
+                        break
+                    done += n
+                    now = time.monotonic()
+                    if on_progress and now - last_report >= progress_interval:
+                        last_report = now
+                        on_progress(PrefetchProgress(path, done, total, now - started))
+        except OSError as e:
+            return PrefetchResult(False, list(paths), done, time.monotonic() - started, f"Cannot read '{path}': {e}")
+    seconds = time.monotonic() - started
+    if on_progress:
+        on_progress(PrefetchProgress(paths[-1] if paths else '', done, total, seconds))
+    return PrefetchResult(True, list(paths), done, seconds,
+                          f"Prewarmed {len(paths)} file(s), {done / MIB:,.0f} MiB in {seconds:.1f} s "
+                          f"({rate_mib(done, seconds):,.0f} MiB/s).")
+
+
+class Prefetcher:
+    """
+    Prewarms a configuration's model files on a background thread before the server starts.
+    Files that were prewarmed earlier in the session (same size and modification time) are
+    skipped, so the wizard's repeated trial loads only pay for the first one. Models larger
+    than the available RAM are not prewarmed: the tail of the read would evict its head.
+    """
+
+    def __init__(self, method='read', chunk_mb=16):
+        """
+        Args:
+            method (str): 'read' streams the files with sequential reads and reports progress;
+                'advise' only asks the kernel to read ahead (posix_fadvise WILLNEED) and
+                returns at once. 'advise' falls back to 'read' where fadvise is unavailable.
+            chunk_mb (int): Size of each read in MiB.
+        """
+        self.method = method if method == 'read' or FADVISE_AVAILABLE else 'read'
+        self.chunk_bytes = max(1, chunk_mb) * MIB
+        self._warm = {}
+        self._cancel = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def pending(self, paths):
+        """The files among `paths` not prewarmed in this session, or changed since."""
+        return [p for p in paths if self._warm.get(p) != self._stamp(p)]
+
+    @staticmethod
+    def _stamp(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def check_memory(self, paths):
+        """
+        Returns:
+            A tuple (fits, message); without psutil the files are assumed to fit.
+        """
+        if not PSUTIL_AVAILABLE:
+            return True, ''
+        total = sum(os.path.getsize(p) for p in paths if os.path.isfile(p))
+        available = psutil.virtual_memory().available
+        if total > available:
+            return False, (f"Skipping prewarm: the model files ({total / 1024 ** 3:.1f} GB) are larger than the "
+                           f"available RAM ({available / 1024 ** 3:.1f} GB).")
+        return True, ''
+
+    def start(self, paths, on_progress=None, on_done=None):
+        """
+        Starts prewarming `paths` in the background; on_done receives the PrefetchResult on
+        the prefetch thread.
+        Returns:
+            A tuple (started, message). Nothing starts if another prewarm is running, if all
+            files are already warm or if they do not fit in RAM.
+        """
+        if self.running:
+            return False, "A prewarm is already running."
+        paths = self.pending(paths)
+        if not paths:
+            return False, ''
+        fits, message = self.check_memory(paths)
+        if not fits:
+            return False, message
+        self._cancel.clear()
+        self._thread = threading.Thread(target=self._run, args=(paths, on_progress, on_done),
+                                        name='prefetch', daemon=True)
+        self._thread.start()
+        return True, f"Prewarming {len(paths)} file(s) into the page cache."
+
+    def cancel(self):
+        self._cancel.set()
+
+    def wait(self, timeout=None):
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self, paths, on_progress, on_done):
+        stamps = {p: self._stamp(p) for p in paths}
+        if self.method == 'advise':
+            started = time.monotonic()
+            advise(paths)
+            result = PrefetchResult(True, paths, 0, time.monotonic() - started,
+                                    f"Asked the OS to read ahead {len(paths)} file(s).")
+        else:
+            result = prewarm(paths, self.chunk_bytes, on_progress, self._cancel.is_set)
+        if result.completed:
+            self._warm.update(stamps)
+        print(f"[DIAGNOSTICS] {result.message}")
+        if on_done:
+            on_done(result)
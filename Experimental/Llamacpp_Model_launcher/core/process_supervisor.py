@@ -0,0 +1,136 @@
+# core/process_supervisor.py
+
+import os
+import signal
+import subprocess
+import time
+from collections import deque, namedtuple
+
+IS_WINDOWS = os.name == 'nt'
+
+
+def _has_console():
+    """CTRL_BREAK only reaches children that share our console; a GUI launcher has none."""
+    if not IS_WINDOWS:
+        return False
+    import ctypes
+    return bool(ctypes.windll.kernel32.GetConsoleWindow())
+
+
+# One unload. outcome is 'graceful' (exited after the stop request), 'killed' (the group
+# had to be killed) or 'gone' (had already exited).
+UnloadRecord = namedtuple('UnloadRecord', ['pid', 'seconds', 'outcome'])
+
+
+class ProcessSupervisor:
+    """
+    Starts servers in a process group of their own (a new session on POSIX,
+    CREATE_NEW_PROCESS_GROUP on Windows) so they can be stopped as a unit: first a stop
+    request the server can handle (SIGTERM / CTRL_BREAK), then, once the grace period is
+    over, a kill of the whole group. Every unload is timed and kept in `unloads`.
+
+    The supervisor works on PIDs, so the GUI can drive a QProcess with request_stop()
+    and kill() without blocking, while stop() does the whole sequence for a Popen.
+    """
+
+    def __init__(self, grace_period=10.0, history=200):
+        """
+        Args:
+            grace_period (float): Seconds a server gets to exit after the stop request.
+            history (int): Number of UnloadRecords kept.
+        """
+        self.grace_period = grace_period
+        self.unloads = deque(maxlen=history)
+
+    @staticmethod
+    def popen_options():
+        """Keyword arguments for subprocess.Popen that start the child in its own group, without a console window."""
+        if IS_WINDOWS:
+            # With a console the child shares it (its output is piped anyway) so CTRL_BREAK can reach it.
+            flags = subprocess.CREATE_NEW_PROCESS_GROUP
+            return {'creationflags': flags if _has_console() else flags | subprocess.CREATE_NO_WINDOW}
+        return {'start_new_session': True}
+
+    def spawn(self, args, cwd=None, env=None, **kwargs):
+        """Starts `args` with subprocess.Popen in a new process group. Extra kwargs go to Popen."""
+        return subprocess.Popen(args, cwd=cwd or None, env=env, **self.popen_options(), **kwargs)
+
+    def request_stop(self, pid, own_group=True):
+        """
+        Asks the server to shut down.
+        Args:
+            pid (int): The server process, which leads its group if own_group is set.
+            own_group (bool): Whether the process was started in its own group. On Windows
+                CTRL_BREAK can only be sent to such a group, and only if it shares our console.
+        Returns:
+            True if the request was delivered; False means only a kill() will stop it.
+        """
+        try:
+            if IS_WINDOWS:
+                if not own_group or not _has_console():
+                    return False
+                os.kill(pid, signal.CTRL_BREAK_EVENT)
+            elif own_group:
+                os.killpg(pid, signal.SIGTERM)
+            else:
+                os.kill(pid, signal.SIGTERM)
+            return True
+        except OSError as e:
+            print(f"[DIAGNOSTICS] Could not send stop request to PID {pid}: {e}")
+            return False
+
+    def kill(self, pid, own_group=True):
+        """Kills the server together with everything it started."""
+        if IS_WINDOWS:
+            subprocess.run(['taskkill', '/F', '/T', '/PID', str(pid)], capture_output=True,
+                           creationflags=subprocess.CREATE_NO_WINDOW)
+            return
+        try:
+            if own_group:
+                os.killpg(pid, signal.SIGKILL)
+            else:
+                os.kill(pid, signal.SIGKILL)
+        except OSError:
+            pass  # Already gone.
+
+    def stop(self, process, grace_period=None, own_group=True):
+        """
+        Stops a subprocess.Popen: stop request, wait up to the grace period, then kill the group.
+        Returns:
+            The UnloadRecord.
+        """
+        started = time.monotonic()
+        if process.poll() is not None:
+            return self.record(process.pid, started, 'gone')
+        grace_period = self.grace_period if grace_period is None else grace_period
+        outcome = 'killed'
+        if self.request_stop(process.pid, own_group):
+            try:
+                process.wait(timeout=grace_period)
+                outcome = 'graceful'
+            except subprocess.TimeoutExpired:
+                pass
+        if outcome == 'killed':
+            self.kill(process.pid, own_group)
+            process.wait()
+        return self.record(process.pid, started, outcome)
+
+    def record(self, pid, started, outcome):
+        """Stores an unload that began at time.monotonic() value `started` and has just finished."""
+        record = UnloadRecord(pid, time.monotonic() - started, outcome)
+        self.unloads.append(record)
+        print(f"[DIAGNOSTICS] Unloaded PID {pid} in {record.seconds:.2f} s ({outcome}).")
+        return record
+
+    def summary(self):
+        """
+        Returns:
+            A dict with 'unloads', 'avg_seconds', 'max_seconds' and 'killed' over the recorded unloads.
+        """
+        count = len(self.unloads)
+        return {
+            'unloads': count,
+            'avg_seconds': sum(r.seconds for r in self.unloads) / count if count else 0.0,
+            'max_seconds': max((r.seconds for r in self.unloads), default=0.0),
+            'killed': sum(1 for r in self.unloads if r.outcome == 'killed'),
+        }
@@ -0,0 +1,84 @@
+# core/readiness.py
+
+import http.client
+import json
+import time
+from collections import namedtuple
+
+# How a wait for readiness ended. source is 'health' (the /health endpoint answered 'ok'),
+# 'log' (only the 'model loaded' output line was seen) or '' when the server never became ready.
+Readiness = namedtuple('Readiness', ['ready', 'source', 'seconds'])
+
+INITIAL_INTERVAL = 0.01
+MAX_INTERVAL = 0.2
+PROBE_TIMEOUT = 0.5  # Socket timeout of one /health probe; a server busy loading can be slow to answer.
+LOG_FALLBACK_GRACE = 1.0
+
+
+def probe_address(host):
+    """The address to connect to for a server bound to `host`."""
+    return '127.0.0.1' if host in ('', '0.0.0.0', 'localhost') else ('::1' if host == '::' else host)
+
+
+def probe_health(host, port, timeout=PROBE_TIMEOUT):
+    """
+    Asks llama-server's /health endpoint whether the model is ready.
+    Returns:
+        'ready' (200 with status ok), 'loading' (any other HTTP answer, e.g. 503 while the
+        model loads) or 'unreachable' (nothing is listening yet).
+    """
+    connection = http.client.HTTPConnection(probe_address(host), int(port), timeout=timeout)
+    try:
+        connection.request('GET', '/health')
+        response = connection.getresponse()
+        body = response.read()
+    except (OSError, http.client.HTTPException):
+        return 'unreachable'
+    finally:
+        connection.close()
+    if response.status != 200:
+        return 'loading'
+    try:
+        status = json.loads(body or b'{}').get('status', 'ok')
+    except (ValueError, AttributeError):
+        status = 'ok'
+    return 'ready' if status in ('ok', 'no slot available') else 'loading'
+
+
+def wait_until_ready(host, port, timeout, started=None, is_alive=None, log_says_loaded=None,
+                     should_stop=None, log_fallback_grace=LOG_FALLBACK_GRACE):
+    """
+    Polls /health with exponential backoff (10 ms doubling up to 200 ms) until the server
+    reports ready. The 'model loaded' output line is only a fallback: once it has been seen,
+    /health gets `log_fallback_grace` more seconds before the log is believed, which covers
+    servers whose HTTP endpoint the launcher cannot reach.
+
+    Args:
+        host (str), port (int|str): Where the server listens.
+        timeout (float): Seconds to wait in total; None waits as long as the server runs.
+        started (float): time.monotonic() of the launch; load time is measured from here.
+        is_alive (callable): Returns False once the process has exited.
+        log_says_loaded (callable): Returns the time.monotonic() at which 'model loaded' was
+            seen, or None.
+        should_stop (callable): Returns True to abandon the wait (e.g. the load was cancelled).
+    Returns:
+        A Readiness tuple; `seconds` is the time from `started` to readiness.
+    """
+    started = time.monotonic() if started is None else started
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    interval = INITIAL_INTERVAL
+    while deadline is None or time.monotonic() < deadline:
+        if should_stop and should_stop():
+            break
+        state = probe_health(host, port, timeout=PROBE_TIMEOUT)
+        now = time.monotonic()
+        if state == 'ready':
+            return Readiness(True, 'health', now - started)
+        if is_alive and not is_alive():
+            break
+        logged_at = log_says_loaded() if log_says_loaded else None
+        if logged_at is not None and now - logged_at >= log_fallback_grace:
+            return Readiness(True, 'log', logged_at - started)
+        time.sleep(interval)
+        interval = min(interval * 2, MAX_INTERVAL)
+    return Readiness(False, '', time.monotonic() - started)
@@ -0,0 +1,206 @@
+# core/resource_sampler.py
+
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+# --- Optional Dependencies ---
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+# One sample of a server's process tree. cpu_percent is 100 per fully used core; read_bytes is
+# None where the platform does not report I/O counters (e.g. macOS).
+ResourceSample = namedtuple('ResourceSample', ['time', 'label', 'pid', 'rss_bytes', 'cpu_percent', 'threads',
+                                               'read_bytes', 'read_rate', 'host_cpu_percent'])
+
+CSV_COLUMNS = ['time', 'label', 'pid', 'rss_bytes', 'cpu_percent', 'threads', 'read_bytes',
+               'read_bytes_per_second', 'host_cpu_percent']
+
+MIB = 1024 ** 2
+
+
+class ResourceSampler:
+    """
+    Samples the CPU, memory, thread count and disk reads of a running server (summed over
+    its process tree, since the launched process may be a wrapper) on a background thread.
+    Samples go into a ring buffer that outlives the server, so the history of earlier runs
+    can still be exported. Without psutil, attach() does nothing.
+    """
+
+    def __init__(self, interval=1.0, capacity=3600, on_sample=None):
+        """
+        Args:
+            interval (float): Seconds between samples.
+            capacity (int): Samples kept (one hour at the default interval).
+            on_sample (callable): Called with each ResourceSample from the sampler thread.
+        """
+        self.interval = interval
+        self.on_sample = on_sample
+        self.pid = None
+        self.label = ''
+        self._samples = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._process = None
+        self._tree = {}
+        self._last_read = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def available(self):
+        return PSUTIL_AVAILABLE
+
+    def attach(self, pid, label=''):
+        """
+        Starts sampling the process `pid` (and its children) until it exits or detach() is called.
+        Returns:
+            True if sampling started.
+        """
+        self.detach()
+        if not pid or not PSUTIL_AVAILABLE:
+            return False
+        try:
+            self._process = psutil.Process(pid)
+        except psutil.Error:
+            return False
+        self.pid, self.label = pid, label
+        self._tree, self._last_read = {}, None
+        self._sample_tree(record=False)  # The first cpu_percent calls only set the baselines.
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='resource-sampler', daemon=True)
+        self._thread.start()
+        return True
+
+    def detach(self):
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self._thread = None
+        self._process = None
+
+    def samples(self, seconds=None, pid=None):
+        """Returns the buffered samples, optionally only those of one process or from the last `seconds`."""
+        cutoff = time.time() - seconds if seconds is not None else None
+        with self._lock:
+            return [s for s in self._samples
+                    if (cutoff is None or s.time >= cutoff) and (pid is None or s.pid == pid)]
+
+    def latest(self):
+        """The newest sample of the attached process, or None."""
+        with self._lock:
+            sample = self._samples[-1] if self._samples else None
+        return sample if sample and self._process and sample.pid == self.pid else None
+
+    def summary(self, seconds=600, pid=None):
+        """
+        Summarises the recent samples of one process (the attached one by default).
+        Returns:
+            A dict with 'samples', 'span_seconds', 'rss_bytes', 'peak_rss_bytes', 'rss_slope_bytes_per_min' (least
+            squares over the window, the sign of memory creep), 'avg_cpu_percent', 'cores_used',
+            'logical_cores', 'threads', 'read_rate' and 'avg_host_cpu_percent'; None without samples.
+        """
+        samples = self.samples(seconds, pid if pid is not None else self.pid)
+        if not samples:
+            return None
+        count = len(samples)
+        avg_cpu = sum(s.cpu_percent for s in samples) / count
+        return {
+            'samples': count,
+            'span_seconds': samples[-1].time - samples[0].time,
+            'rss_bytes': samples[-1].rss_bytes,
+            'peak_rss_bytes': max(s.rss_bytes for s in samples),
+            'rss_slope_bytes_per_min': _slope([(s.time, s.rss_bytes) for s in samples]) * 60,
+            'avg_cpu_percent': avg_cpu,
+            'cores_used': avg_cpu / 100,
+            'logical_cores': (psutil.cpu_count(logical=True) if PSUTIL_AVAILABLE else None) or os.cpu_count(),
+            'threads': samples[-1].threads,
+            'read_rate': samples[-1].read_rate,
+            'avg_host_cpu_percent': sum(s.host_cpu_percent for s in samples) / count,
+        }
+
+    def export_csv(self, path):
+        """
+        Writes every buffered sample to a CSV file.
+        Returns:
+            A tuple (success, message).
+        """
+        samples = self.samples()
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(",".join(CSV_COLUMNS) + "\n")
+                for s in samples:
+                    f.write(f"{s.time:.3f},{s.label.replace(',', ' ')},{s.pid},{s.rss_bytes},{s.cpu_percent:.1f},"
+                            f"{s.threads},{'' if s.read_bytes is None else s.read_bytes},"
+                            f"{'' if s.read_rate is None else f'{s.read_rate:.0f}'},{s.host_cpu_percent:.1f}\n")
+        except OSError as e:
+            return False, f"Could not write '{path}': {e}"
+        return True, f"Exported {len(samples)} samples to '{path}'."
+
+    # --- Sampling ---
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if not self._sample_tree():
+                self._process = None  # The server is gone.
+                break
+
+    def _sample_tree(self, record=True):
+        process = self._process
+        if process is None:
+            return False
+        try:
+            tree = [process] + process.children(recursive=True)
+        except psutil.Error:
+            return False
+        # Reuse Process objects between samples: cpu_percent measures since the previous call on the same object.
+        self._tree = {proc.pid: self._tree.get(proc.pid, proc) for proc in tree}
+        rss, cpu, threads, read_bytes = 0, 0.0, 0, 0
+        for proc in self._tree.values():
+            try:
+                with proc.oneshot():
+                    rss += proc.memory_info().rss
+                    cpu += proc.cpu_percent(None)
+                    threads += proc.num_threads()
+                    if read_bytes is not None:
+                        try:
+                            read_bytes += proc.io_counters().read_bytes
+                        except (AttributeError, psutil.AccessDenied):
+                            read_bytes = None
+            except psutil.NoSuchProcess:
+                if proc.pid == process.pid:
+                    return False  # The server exited mid-sample; its partial totals would read as a drop in RSS.
+                continue  # A child that exited since children() was listed.
+            except psutil.Error:
+                return True  # Unreadable this time (e.g. access denied); skip the sample rather than record part of it.
+        host_cpu = psutil.cpu_percent(None)
+        now = time.time()
+        read_rate = None
+        if read_bytes is not None and self._last_read:
+            elapsed = now - self._last_read[0]
+            read_rate = max(0.0, (read_bytes - self._last_read[1]) / elapsed) if elapsed > 0 else 0.0
+        self._last_read = (now, read_bytes) if read_bytes is not None else None
+        if not record:
+            return True
+        sample = ResourceSample(now, self.label, self.pid, rss, cpu, threads, read_bytes, read_rate, host_cpu)
+        with self._lock:
+            self._samples.append(sample)
+        if self.on_sample:
+            self.on_sample(sample)
+        return True
+
+
+def _slope(points):
+    """Least-squares slope of [(x, y)] in y per x; 0 for fewer than two distinct x."""
+    n = len(points)
+    if n < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    var_x = sum((x - mean_x) ** 2 for x, _ in points)
+    if not var_x:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x
@@ -0,0 +1,147 @@
+# core/restart_policy.py
+
+import threading
+import time
+from collections import namedtuple
+
+NGL_KEYS = ('-ngl', '--n-gpu-layers', '--gpu-layers')
+CTX_KEYS = ('-c', '--ctx-size')
+MIN_FALLBACK_CTX = 2048
+
+# One unexpected exit. signature is a short description of the cause, e.g. 'OOM on device 1'.
+CrashRecord = namedtuple('CrashRecord', ['time', 'exit_code', 'signature', 'oom'])
+
+# What to do about a crash. updates is an 'update_params' dict (see CommandBuilder.apply_updates)
+# with a more conservative configuration, or {} to restart unchanged.
+RestartDecision = namedtuple('RestartDecision', ['restart', 'delay', 'crashes', 'updates', 'message'])
+
+
+def crash_signature(exit_code, oom=None):
+    """Describes a crash from its exit code and the OOM event value of its log (see pick_oom_error)."""
+    if oom:
+        size = f" ({oom['size_mib']:.0f} MiB allocation)" if oom.get('size_mib') else ''
+        return f"OOM on device {oom['device_id']}{size}"
+    if exit_code is None:
+        return "Crashed"
+    if exit_code < 0:
+        return f"Killed by signal {-exit_code}"
+    return f"Exited with code {exit_code}"
+
+
+def conservative_updates(params, layer_count=None, step=0.1, min_ctx=MIN_FALLBACK_CTX):
+    """
+    Proposes a configuration that needs less memory: about `step` of the offloaded layers
+    move back to the CPU, or, once nothing is offloaded, the context size is halved.
+    Args:
+        params (dict): The {flag: value} dictionary of the configuration that ran out of memory.
+        layer_count (int): n_layer reported by the server; needed to lower '-ngl 99'-style values.
+    Returns:
+        An 'update_params' dict, or {} if the configuration cannot be made smaller.
+    """
+    ngl_key = next((k for k in NGL_KEYS if k in params), None)
+    ngl = _int(params.get(ngl_key)) if ngl_key else None
+    if ngl_key and layer_count and (params.get(ngl_key) in ('all', 'auto') or ngl == -1):
+        ngl = layer_count + 1
+    if ngl and ngl > 0:
+        if layer_count:
+            ngl = min(ngl, layer_count + 1)  # The output layer counts as one more.
+        return {ngl_key: str(max(0, ngl - max(1, round(ngl * step))))}
+
+    ctx_key = next((k for k in CTX_KEYS if k in params), None)
+    ctx = _int(params.get(ctx_key)) if ctx_key else None
+    if ctx and ctx > min_ctx:
+        return {ctx_key: str(max(min_ctx, ctx // 2 // 256 * 256))}
+    return {}
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class RestartPolicy:
+    """
+    Decides whether a server that exited unexpectedly is started again. Restarts back off
+    exponentially (initial_delay, doubling up to max_delay); after `max_crashes` crashes within
+    `window_seconds` the configuration is left down as a crash loop. A crash caused by an
+    out-of-memory error is retried with a more conservative configuration when
+    `oom_fallback` is on. Crash histories are kept per configuration name.
+    """
+
+    def __init__(self, default_enabled=False, per_config=None, max_crashes=3, window_seconds=600.0,
+                 initial_delay=2.0, max_delay=60.0, oom_fallback=True):
+        """
+        Args:
+            default_enabled (bool): Whether configurations without their own setting restart.
+            per_config (dict): {configuration name: bool} overrides (case-insensitive).
+            max_crashes (int): Crashes within the window after which restarting stops.
+            window_seconds (float): Length of the crash-loop window.
+            initial_delay (float): Seconds before the first restart.
+            max_delay (float): Upper bound of the backoff.
+            oom_fallback (bool): Restart OOM crashes with lower '-ngl' / '-c'.
+        """
+        self.default_enabled = default_enabled
+        self.per_config = {k.casefold(): v for k, v in (per_config or {}).items()}
+        self.max_crashes = max_crashes
+        self.window_seconds = window_seconds
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.oom_fallback = oom_fallback
+        self._history = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.default_enabled or any(self.per_config.values())
+
+    def enabled_for(self, name):
+        return self.per_config.get(name.casefold(), self.default_enabled)
+
+    def history(self, name):
+        """The CrashRecords of a configuration within the current window, oldest first."""
+        cutoff = time.time() - self.window_seconds
+        with self._lock:
+            return [c for c in self._history.get(name, []) if c.time >= cutoff]
+
+    def last_crash(self, name):
+        with self._lock:
+            crashes = self._history.get(name)
+            return crashes[-1] if crashes else None
+
+    def reset(self, name):
+        """Forgets the crashes of a configuration, e.g. after the user loaded it by hand."""
+        with self._lock:
+            self._history.pop(name, None)
+
+    def on_crash(self, name, exit_code, oom=None, params=None, layer_count=None):
+        """
+        Records a crash and decides what happens next.
+        Args:
+            name (str): The configuration that crashed.
+            exit_code (int): The process exit code.
+            oom (dict): The OOM event value from its log, if any.
+            params (dict): Its {flag: value} dictionary, used for the OOM fallback.
+            layer_count (int): n_layer from its log, if known.
+        Returns:
+            A RestartDecision.
+        """
+        record = CrashRecord(time.time(), exit_code, crash_signature(exit_code, oom), oom)
+        cutoff = record.time - self.window_seconds
+        with self._lock:
+            crashes = [c for c in self._history.get(name, []) if c.time >= cutoff] + [record]
+            self._history[name] = crashes
+        count = len(crashes)
+        if count >= self.max_crashes:
+            message = (f"{record.signature}. Crash loop: {count} crashes within {self.window_seconds / 60:g} min; "
+                       f"not restarting.")
+            return RestartDecision(False, 0.0, count, {}, message)
+
+        delay = min(self.max_delay, self.initial_delay * 2 ** (count - 1))
+        updates = conservative_updates(params or {}, layer_count) if oom and self.oom_fallback else {}
+        change = ''
+        if updates:
+            change = " with " + " ".join(f"{key} {value}" for key, value in updates.items())
+        message = f"{record.signature}. Restarting in {delay:g} s{change} (crash {count} of {self.max_crashes})."
+        return RestartDecision(True, delay, count, updates, message)
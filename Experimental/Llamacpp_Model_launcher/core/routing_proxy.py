@@ -0,0 +1,373 @@
+# core/routing_proxy.py
+
+import asyncio
+import json
+import os
+import struct
+import threading
+import time
+
+from Llamacpp_Model_launcher.core.command_builder import CommandBuilder
+from Llamacpp_Model_launcher.core.memory_planner import MemoryPlanner, GIB
+from Llamacpp_Model_launcher.core.status import ServerStatus
+
+MAX_HEAD_BYTES = 64 * 1024
+# pool.unload(wait=True) returns once the process has exited; its watcher thread marks the
+# instance unloaded a moment later.
+UNLOAD_STATUS_TIMEOUT = 10.0
+# Hop-by-hop headers are not forwarded; the proxy sets its own framing for the upstream request.
+HOP_HEADERS = {'connection', 'keep-alive', 'proxy-connection', 'proxy-authorization', 'te', 'trailer',
+               'transfer-encoding', 'upgrade', 'content-length', 'host'}
+
+
+class ProxyError(Exception):
+    """A request that cannot be routed; carries the HTTP status for the client."""
+
+    def __init__(self, status, message, code=None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+def estimate_footprint(command, n_devices=1):
+    """
+    Predicts the memory a configuration holds once loaded, from its GGUF header.
+    Args:
+        n_devices (int): GPUs visible to llama.cpp; a longer -ts counts as more.
+    Returns:
+        A tuple (vram_bytes, ram_bytes); the model file size counts as RAM when it cannot be planned.
+    """
+    params = {p.key: p.value for p in CommandBuilder.parse(command)}
+    model_path = (params.get('-m') or params.get('--model') or '').strip('"')
+    ts_value = params.get('-ts') or params.get('--tensor-split')
+    n_devices = max(1, n_devices, len(ts_value.replace('/', ',').split(',')) if ts_value else 0)
+    try:
+        prediction = MemoryPlanner.from_model(model_path).predict(params, n_devices=n_devices)
+        return sum(prediction['devices'].values()), prediction['host']
+    except (OSError, ValueError, KeyError, IndexError, struct.error) as e:
+        print(f"[DIAGNOSTICS] Proxy: could not plan memory for '{model_path}': {e}")
+        try:
+            return 0, os.path.getsize(model_path)
+        except OSError:
+            return 0, 0
+
+
+class RoutingProxy:
+    """
+    One OpenAI-compatible endpoint in front of the ServerPool. Requests are routed by their
+    JSON 'model' field to the configuration of that name; a model that is not running is
+    started on demand and its requests wait until it has loaded. Before a load, the least
+    recently used idle instances are unloaded until the predicted VRAM / RAM of everything
+    running fits the budgets.
+
+    The proxy runs its own asyncio loop on a daemon thread. The upstream connection is
+    opened per request and closed after the response, so streamed (SSE) replies are
+    relayed as they arrive.
+    """
+
+    def __init__(self, pool, model_names, host='127.0.0.1', port=8000, vram_budget_gb=0, ram_budget_gb=0,
+                 max_instances=0, load_timeout=600, estimate=estimate_footprint, on_request=None, n_devices=1):
+        """
+        Args:
+            pool (ServerPool): Runs the servers; its resolve_command maps model names to commands.
+            model_names (callable): Returns the names that can be served, e.g. list of ModelManager.models.
+            host (str): Interface to bind.
+            port (int): TCP port of the /v1 endpoint.
+            vram_budget_gb (float): Predicted GPU memory all instances may use together; 0 for no limit.
+            ram_budget_gb (float): Predicted system memory all instances may use together; 0 for no limit.
+            max_instances (int): Instances running at once; 0 for no limit.
+            load_timeout (float): Seconds a request waits for its model to load.
+            estimate (callable): Maps a command and n_devices to (vram_bytes, ram_bytes).
+            on_request (callable): Called with the model name when a request starts and ends,
+                e.g. IdleMonitor.touch.
+            n_devices (int): GPUs visible to llama.cpp, which configurations without -ts spread over.
+        """
+        self.pool = pool
+        self.model_names = model_names
+        self.host = host
+        self.port = port
+        self.vram_budget = vram_budget_gb * GIB
+        self.ram_budget = ram_budget_gb * GIB
+        self.max_instances = max_instances
+        self.load_timeout = load_timeout
+        self.estimate = estimate
+        self.on_request = on_request
+        self.n_devices = n_devices
+        self.last_used = {}
+        self.in_flight = {}
+        self._footprints = {}  # {name: (command, (vram_bytes, ram_bytes))}
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._start_error = None
+        self._model_locks = {}
+        self._evict_lock = None
+
+    # --- Lifecycle ---
+
+    def start(self):
+        """
+        Starts serving on a background thread.
+        Returns:
+            A tuple (success, message).
+        """
+        if self._thread:
+            return True, f"Routing proxy already running on http://{self.host}:{self.port}/v1"
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, name='routing-proxy', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._start_error:
+            self._thread = None
+            return False, f"Could not start the routing proxy on {self.host}:{self.port}: {self._start_error}"
+        return True, f"Routing proxy listening on http://{self.host}:{self.port}/v1"
+
+    def stop(self):
+        if self._loop and self._thread:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._evict_lock = asyncio.Lock()
+        try:
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle_client, self.host, self.port, limit=MAX_HEAD_BYTES))
+        except OSError as e:
+            self._start_error = e
+            self._ready.set()
+            return
+        self._start_error = None
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            self._loop.run_until_complete(self._server.wait_closed())
+            self._loop.close()
+            self._loop = None
+
+    # --- HTTP ---
+
+    async def _handle_client(self, reader, writer):
+        try:
+            request = await self._read_request(reader)
+            if request:
+                await self._dispatch(request, writer)
+        except ProxyError as e:
+            await self._send_error(writer, e)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # The client went away.
+        except Exception as e:
+            print(f"[DIAGNOSTICS] Proxy: unexpected error: {e!r}")
+            await self._send_error(writer, ProxyError(500, "Internal proxy error"))
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        """Returns (method, target, headers, body) or None if the client closed the connection."""
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError:
+            raise ProxyError(431, "Request headers too large")
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, _ = lines[0].split(' ', 2)
+        except ValueError:
+            raise ProxyError(400, "Malformed request line")
+        headers = []
+        for line in lines[1:]:
+            if ':' in line:
+                key, value = line.split(':', 1)
+                headers.append((key.strip(), value.strip()))
+        lowered = {k.lower(): v for k, v in headers}
+        if 'chunked' in lowered.get('transfer-encoding', '').lower():
+            body = await self._read_chunked(reader)
+        else:
+            body = await reader.readexactly(int(lowered.get('content-length', 0) or 0))
+        return method, target, headers, body
+
+    @staticmethod
+    async def _read_chunked(reader):
+        body = bytearray()
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';')[0].strip() or b'0', 16)
+            if size == 0:
+                await reader.readuntil(b'\r\n')
+                return bytes(body)
+            body += await reader.readexactly(size)
+            await reader.readexactly(2)
+
+    async def _dispatch(self, request, writer):
+        method, target, headers, body = request
+        path = target.split('?')[0]
+        if method == 'GET' and path in ('/health', '/v1/health'):
+            return await self._send_json(writer, 200, {'status': 'ok'})
+        if method == 'GET' and path == '/v1/models':
+            return await self._send_json(writer, 200, self._models_payload())
+        if not path.startswith('/v1/'):
+            raise ProxyError(404, f"Unknown endpoint {path}; the proxy serves /v1/*")
+
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            raise ProxyError(400, "Request body is not valid JSON")
+        name = payload.get('model') if isinstance(payload, dict) else None
+        if not name:
+            raise ProxyError(400, "The request has no 'model' field", 'model_required')
+        if name not in self.model_names():
+            raise ProxyError(404, f"The model '{name}' does not exist", 'model_not_found')
+
+        self.in_flight[name] = self.in_flight.get(name, 0) + 1
+        self.last_used[name] = time.monotonic()
+        try:
+            instance = await self._ensure_loaded(name)
+            if self.on_request:
+                self.on_request(name)
+            await self._forward(instance, method, target, headers, body, writer)
+        finally:
+            self.in_flight[name] -= 1
+            self.last_used[name] = time.monotonic()
+            if self.on_request:
+                self.on_request(name)
+
+    async def _forward(self, instance, method, target, headers, body, writer):
+        try:
+            upstream_reader, upstream_writer = await asyncio.open_connection(
+                '127.0.0.1' if instance.host in ('0.0.0.0', '', 'localhost') else instance.host, instance.port)
+        except OSError as e:
+            raise ProxyError(502, f"Could not reach '{instance.name}' on port {instance.port}: {e}")
+        try:
+            head = [f"{method} {target} HTTP/1.1", f"Host: {instance.host}:{instance.port}"]
+            head += [f"{k}: {v}" for k, v in headers if k.lower() not in HOP_HEADERS]
+            head += [f"Content-Length: {len(body)}", "Connection: close", "", ""]
+            upstream_writer.write("\r\n".join(head).encode('latin-1') + body)
+            await upstream_writer.drain()
+            while True:
+                chunk = await upstream_reader.read(65536)
+                if not chunk:
+                    break
+                writer.write(chunk)
+                await writer.drain()
+        finally:
+            upstream_writer.close()
+
+    def _models_payload(self):
+        data = []
+        for name in self.model_names():
+            instance = self.pool.get(name)
+            data.append({'id': name, 'object': 'model', 'owned_by': 'llamacpp-launcher',
+                         'status': instance.status.key if instance else ServerStatus.UNLOADED.key})
+        return {'object': 'list', 'data': data}
+
+    @staticmethod
+    async def _send_json(writer, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 431: 'Request Header Fields Too Large',
+                  500: 'Internal Server Error', 502: 'Bad Gateway', 503: 'Service Unavailable',
+                  504: 'Gateway Timeout'}.get(status, 'Error')
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode('latin-1') + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def _send_error(self, writer, error):
+        # Same shape as OpenAI and llama-server errors, so clients surface the message.
+        await self._send_json(writer, error.status, {'error': {
+            'message': str(error), 'type': 'invalid_request_error' if error.status < 500 else 'server_error',
+            'code': error.code or error.status}})
+
+    # --- Loading and eviction ---
+
+    async def _ensure_loaded(self, name):
+        """Returns the loaded PoolInstance for `name`, loading it (and evicting others) if needed."""
+        lock = self._model_locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            instance = self.pool.get(name)
+            while instance and instance.stopping and instance.status in (ServerStatus.LOADING, ServerStatus.LOADED):
+                await asyncio.sleep(0.05)  # Being unloaded (e.g. hibernated); load it again once it is gone.
+            if instance and instance.status == ServerStatus.LOADED and instance.is_running():
+                return instance
+            if not instance or instance.status != ServerStatus.LOADING:
+                # Held until the pool has registered the new instance, so a concurrent load of
+                # another model sees it in the running set and cannot overrun the budgets.
+                async with self._evict_lock:
+                    await self._make_room(name)
+                    success, message = await asyncio.get_running_loop().run_in_executor(None, self.pool.load, name)
+                if not success:
+                    raise ProxyError(503, message)
+            return await self._wait_until_loaded(name)
+
+    async def _wait_until_loaded(self, name):
+        deadline = time.monotonic() + self.load_timeout
+        while time.monotonic() < deadline:
+            instance = self.pool.get(name)
+            if instance and instance.status == ServerStatus.LOADED:
+                return instance
+            if not instance or instance.status in (ServerStatus.ERROR, ServerStatus.UNLOADED, ServerStatus.HIBERNATED):
+                reason = instance.error if instance and instance.error else "the server stopped"
+                raise ProxyError(503, f"Loading '{name}' failed: {reason}")
+            await asyncio.sleep(0.05)
+        raise ProxyError(504, f"'{name}' did not finish loading within {self.load_timeout:.0f} s")
+
+    def footprint(self, name):
+        """
+        The predicted (vram_bytes, ram_bytes) of a configuration. Reads the GGUF header the
+        first time and again after the configuration's command changed, so call it off the
+        event loop.
+        """
+        command = self.pool.resolve_command(name) if self.pool.resolve_command else None
+        cached = self._footprints.get(name)
+        if cached and cached[0] == command:
+            return cached[1]
+        footprint = self.estimate(command, self.n_devices) if command else (0, 0)
+        self._footprints[name] = (command, footprint)
+        return footprint
+
+    async def _make_room(self, name):
+        """Unloads least recently used idle instances until `name` fits the budgets. Call with _evict_lock held."""
+        loop = asyncio.get_running_loop()
+        need_vram, need_ram = await loop.run_in_executor(None, self.footprint, name)
+        while True:
+            running = [i for i in self.pool.instances()
+                       if i.name != name and i.status in (ServerStatus.LOADING, ServerStatus.LOADED)]
+            footprints = await loop.run_in_executor(None, lambda: [self.footprint(i.name) for i in running])
+            used_vram = sum(vram for vram, _ in footprints)
+            used_ram = sum(ram for _, ram in footprints)
+            over = ((self.vram_budget and used_vram + need_vram > self.vram_budget) or
+                    (self.ram_budget and used_ram + need_ram > self.ram_budget) or
+                    (self.max_instances and len(running) + 1 > self.max_instances))
+            if not over:
+                return
+            idle = [i for i in running
+                    if not i.stopping and not self.in_flight.get(i.name) and i.status == ServerStatus.LOADED]
+            if not idle:
+                raise ProxyError(503, f"Not enough memory to load '{name}' and every running model is busy")
+            victim = min(idle, key=lambda i: self.last_used.get(i.name, 0.0))
+            print(f"[DIAGNOSTICS] Proxy: evicting '{victim.name}' (least recently used) to load '{name}'.")
+            await loop.run_in_executor(None, lambda: self.pool.unload(victim.name, wait=True))
+            deadline = time.monotonic() + UNLOAD_STATUS_TIMEOUT
+            while victim.status in (ServerStatus.LOADING, ServerStatus.LOADED) and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+
+    def status(self):
+        """
+        Per-model proxy bookkeeping: {name: {'in_flight', 'idle_seconds', 'vram_gb', 'ram_gb'}}.
+        Safe to call from any thread; the memory figures are None until the proxy has estimated them.
+        """
+        now = time.monotonic()
+        last_used, in_flight, footprints = dict(self.last_used), dict(self.in_flight), dict(self._footprints)
+        status = {}
+        for name, used in last_used.items():
+            vram, ram = footprints[name][1] if name in footprints else (None, None)
+            status[name] = {'in_flight': in_flight.get(name, 0), 'idle_seconds': now - used,
+                            'vram_gb': vram / GIB if vram is not None else None,
+                            'ram_gb': ram / GIB if ram is not None else None}
+        return status
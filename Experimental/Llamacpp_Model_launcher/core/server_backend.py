@@ -0,0 +1,396 @@
+# core/server_backend.py
+
+import os
+import struct
+import subprocess
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+
+import requests
+
+from Llamacpp_Model_launcher.core import log_patterns
+from Llamacpp_Model_launcher.core.log_scanner import (LogEventKind, LogScanner, find_devices, pick_oom_error,
+                                                      unique_devices)
+from Llamacpp_Model_launcher.core.command_builder import CommandBuilder, Parameter
+from Llamacpp_Model_launcher.core.process_supervisor import ProcessSupervisor
+from Llamacpp_Model_launcher.core.readiness import wait_until_ready
+from Llamacpp_Model_launcher.core.server_simulator import ServerSimulator
+from Llamacpp_Model_launcher.parameters_db import BENCHMARK_PROMPT
+
+
+class ServerBackend(ABC):
+    """
+    Executes the server actions requested by the tuning wizard. Every method takes the
+    full parameter dictionary (including 'Executable') and returns the result dictionary
+    the wizard expects for that action. Subclasses decide how a server is actually run
+    and must implement every action; close() is optional.
+    """
+
+    @abstractmethod
+    def list_devices(self, params):
+        """Returns {'success': bool, 'gpus': [{'id', 'name'}], 'error': str}."""
+
+    @abstractmethod
+    def extract_layer_count(self, params):
+        """Returns {'success': bool, 'layers': int, 'gpus': [{'id', 'name'}], 'error': str}."""
+
+    @abstractmethod
+    def test_config(self, params):
+        """Loads the model, runs a short inference and unloads. Returns {'success': bool, 'error_details': dict}."""
+
+    @abstractmethod
+    def benchmark(self, params):
+        """Loads the model, measures generation speed and unloads. Returns {'success': bool, 'avg_tps': float, 'error': str}."""
+
+    def close(self):
+        """Releases anything the backend still holds."""
+        pass
+
+
+class ServerProcess:
+    """
+    A running llama-server whose merged stdout/stderr is parsed on a reader thread. The
+    output is fed through a LogScanner, so callers wait on typed events instead of
+    searching the accumulated text.
+    """
+
+    def __init__(self, args, cwd, on_output=None, env=None, archive_session=None, supervisor=None,
+                 max_chunks=None):
+        self.on_output = on_output
+        self.supervisor = supervisor or ProcessSupervisor()
+        self.archive_session = archive_session
+        # Long-running servers keep only their recent output in memory; the archive has the rest.
+        self._chunks = deque(maxlen=max_chunks)
+        self._events = []
+        self._eof = False
+        self._scanner = LogScanner()
+        self._condition = threading.Condition()
+        self.loaded_logged_at = None
+        self.started = time.monotonic()
+        self.process = self.supervisor.spawn(args, cwd=cwd, env=env, stdin=subprocess.DEVNULL,
+                                             stdout=subprocess.PIPE, stderr=subprocess.STDOUT, bufsize=0)
+        self._reader = threading.Thread(target=self._read_output, daemon=True)
+        self._reader.start()
+
+    def _read_output(self):
+        while True:
+            data = self.process.stdout.read(65536)
+            if not data:
+                break
+            self._publish(*self._scanner.feed(data))
+        self._publish(*self._scanner.flush())
+        if self.archive_session:
+            try:
+                exit_code = self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                exit_code = None
+            self.archive_session.end(exit_code)
+        with self._condition:
+            self._eof = True
+            self._condition.notify_all()
+
+    def _publish(self, text, events):
+        if not text and not events:
+            return
+        if self.archive_session:
+            self.archive_session.write(text, events)
+        if self.loaded_logged_at is None and any(e.kind == LogEventKind.MODEL_LOADED for e in events):
+            self.loaded_logged_at = time.monotonic()
+        with self._condition:
+            self._chunks.append(text)
+            self._events.extend(events)
+            self._condition.notify_all()
+        if self.on_output and text:
+            self.on_output(text)
+
+    @property
+    def text(self):
+        with self._condition:
+            return "".join(self._chunks)
+
+    @property
+    def event_count(self):
+        """The number of events seen so far; pass it as `start` to only look at later events."""
+        with self._condition:
+            return len(self._events)
+
+    def events(self, kind, start=0):
+        """Returns the values of all events of `kind` from index `start` on."""
+        with self._condition:
+            return [event.value for event in self._events[start:] if event.kind == kind]
+
+    def is_running(self):
+        return self.process.poll() is None
+
+    def wait_for(self, kind, timeout, start=0):
+        """
+        Blocks until an event of `kind` arrives at or after index `start`, the output
+        ends or the timeout passes.
+        Returns:
+            The LogEvent, or None.
+        """
+        index = self.wait_for_index((kind,), timeout, start)
+        if index is None:
+            return None
+        with self._condition:
+            return self._events[index]
+
+    def wait_for_index(self, kinds, timeout, start=0):
+        """
+        Like wait_for, for an event of any of `kinds`.
+        Returns:
+            The index of the event, to pass on as a later `start`, or None.
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                for index in range(start, len(self._events)):
+                    if self._events[index].kind in kinds:
+                        return index
+                start = len(self._events)
+                if self._eof:
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+
+    def wait_for_count(self, kind, count, timeout, start=0):
+        """
+        Blocks until `count` events of `kind` arrived at or after index `start`, the output
+        ends or the timeout passes.
+        Returns:
+            The values of the events found, which may be fewer than `count`.
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                values = [event.value for event in self._events[start:] if event.kind == kind]
+                if len(values) >= count or self._eof:
+                    return values[:count]
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return values
+                self._condition.wait(remaining)
+
+    def wait_until_ready(self, host, port, timeout, should_stop=None):
+        """
+        Waits for the server's /health endpoint to report the model ready, falling back to the
+        'model loaded' output line when the endpoint cannot be reached.
+        Returns:
+            A Readiness tuple; `seconds` is measured from the launch.
+        """
+        return wait_until_ready(host, port, timeout, started=self.started, is_alive=self.is_running,
+                                log_says_loaded=lambda: self.loaded_logged_at, should_stop=should_stop)
+
+    def stop(self, timeout=None):
+        """
+        Asks the server to exit and kills its process group if it has not within `timeout`
+        seconds (the supervisor's grace period by default).
+        Returns:
+            The supervisor's UnloadRecord.
+        """
+        record = self.supervisor.stop(self.process, timeout)
+        self._reader.join(timeout=10)
+        return record
+
+
+class SubprocessBackend(ServerBackend):
+    """Runs llama-server as a child process and talks to it over its HTTP API."""
+
+    def __init__(self, llamacpp_dir, on_output=None, load_timeout=120, idle_timeout=60, request_timeout=120,
+                 request_pause=2.0, launcher=None, env=None, log_archive=None, supervisor=None):
+        """
+        Args:
+            llamacpp_dir (str): Working directory; relative executables are resolved against it.
+            on_output (callable): Receives the server's output as it is decoded.
+            load_timeout (float): Seconds to wait for 'model loaded'.
+            idle_timeout (float): Seconds to wait for the stability request to finish.
+            request_timeout (float): Seconds allowed per benchmark request.
+            request_pause (float): Pause between the three benchmark requests.
+            launcher (list): Optional argv prefix the executable is run through, e.g. [sys.executable].
+            env (dict): Extra environment variables for the server.
+            log_archive (LogArchive): Optional archive every server session is recorded in.
+            supervisor (ProcessSupervisor): Starts and stops the servers and times every unload.
+        """
+        self.llamacpp_dir = llamacpp_dir
+        self.on_output = on_output
+        self.load_timeout = load_timeout
+        self.idle_timeout = idle_timeout
+        self.request_timeout = request_timeout
+        self.request_pause = request_pause
+        self.launcher = list(launcher or [])
+        self.env = {**os.environ, **env} if env else None
+        self.log_archive = log_archive
+        self.supervisor = supervisor or ProcessSupervisor()
+        self.server = None
+
+    def _start(self, params):
+        args = self.launcher + CommandBuilder.launch_args([Parameter(k, v) for k, v in params.items()],
+                                                          self.llamacpp_dir)
+        command_line = subprocess.list2cmdline(args)
+        print(f"[DIAGNOSTICS] Starting server: {command_line}")
+        archive_session = None
+        if self.log_archive:
+            model_name = os.path.splitext(os.path.basename(params.get('-m', params.get('--model', ''))))[0]
+            try:
+                archive_session = self.log_archive.start_session(model_name, command_line)
+            except OSError as e:
+                print(f"[DIAGNOSTICS] Could not start log archive session: {e}")
+        self.server = ServerProcess(args, self.llamacpp_dir, self.on_output, self.env, archive_session,
+                                    self.supervisor)
+        return self.server
+
+    def _stop(self):
+        if self.server:
+            self.server.stop()
+            self.server = None
+
+    @staticmethod
+    def _chat_url(params):
+        host = params.get('--host', '127.0.0.1')
+        if host in ('0.0.0.0', '::', ''):
+            host = '127.0.0.1'
+        port = params.get('--port', '8080')
+        return f"http://{host}:{port}/v1/chat/completions"
+
+    def _wait_until_loaded(self, server, params):
+        readiness = server.wait_until_ready(params.get('--host', '127.0.0.1'), params.get('--port', '8080'),
+                                            self.load_timeout)
+        if readiness.ready:
+            print(f"[DIAGNOSTICS] Server ready after {readiness.seconds:.2f} s ({readiness.source}).")
+        return readiness.ready and server.is_running()
+
+    def _send_chat_request(self, params, n_predict, timeout):
+        payload = {
+            "messages": [{"role": "user", "content": BENCHMARK_PROMPT}],
+            "n_predict": n_predict,
+            "temperature": 0.1,
+            "seed": 1
+        }
+        try:
+            requests.post(self._chat_url(params), json=payload, timeout=timeout)
+        except requests.RequestException as e:
+            print(f"[DIAGNOSTICS] API request failed: {e}")
+
+    def list_devices(self, params):
+        executable = CommandBuilder.launch_args([Parameter('Executable', params.get('Executable', ''))],
+                                                self.llamacpp_dir)[0]
+        try:
+            completed = subprocess.run(self.launcher + [executable, '--list-devices'], cwd=self.llamacpp_dir or None,
+                                       capture_output=True, text=True, errors='ignore', timeout=30, env=self.env,
+                                       creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+        except (OSError, subprocess.SubprocessError) as e:
+            return {'success': False, 'gpus': [], 'error': str(e)}
+        gpus = find_devices(completed.stdout + completed.stderr)
+        return {'success': bool(gpus), 'gpus': gpus, 'error': '' if gpus else 'No devices reported'}
+
+    def extract_layer_count(self, params):
+        try:
+            server = self._start(params)
+        except OSError as e:
+            return {'success': False, 'layers': None, 'gpus': [], 'error': str(e)}
+        try:
+            layer_event = server.wait_for(LogEventKind.LAYER_COUNT, 30)
+            gpus = unique_devices(server.events(LogEventKind.DEVICE))
+        finally:
+            self._stop()
+        if not layer_event:
+            return {'success': False, 'layers': None, 'gpus': gpus, 'error': 'Could not find n_layer'}
+        return {'success': True, 'layers': layer_event.value, 'gpus': gpus, 'error': ''}
+
+    def test_config(self, params):
+        try:
+            server = self._start(params)
+        except OSError as e:
+            print(f"[DIAGNOSTICS] Server failed to start: {e}")
+            return {'success': False, 'error_details': None}
+        try:
+            if not self._wait_until_loaded(server, params):
+                return {'success': False, 'error_details': pick_oom_error(server.events(LogEventKind.OOM))}
+
+            # The server also reports idle slots right after loading, possibly after this point;
+            # only an idle line after the test request's timing (or soft-failure) line counts.
+            request_start = server.event_count
+            self._send_chat_request(params, n_predict=10, timeout=self.idle_timeout)
+            answered = server.wait_for_index(
+                (LogEventKind.SOFT_FAILURE, LogEventKind.EVAL_TIMING, LogEventKind.TOTAL_TIMING),
+                self.idle_timeout, start=request_start)
+            idle = answered is not None and server.wait_for(LogEventKind.IDLE, self.idle_timeout, start=answered + 1)
+            soft_failure = bool(server.events(LogEventKind.SOFT_FAILURE, request_start))
+            crashed = not server.is_running()
+            success = bool(idle) and not crashed and not soft_failure
+            print(f"[DIAGNOSTICS] Viability test: idle={bool(idle)}, crashed={crashed}, soft_failure={soft_failure}")
+            return {'success': success, 'error_details': pick_oom_error(server.events(LogEventKind.OOM))}
+        finally:
+            self._stop()
+
+    def benchmark(self, params):
+        try:
+            server = self._start(params)
+        except OSError as e:
+            return {'success': False, 'avg_tps': 0.0, 'error': str(e)}
+        try:
+            if not self._wait_until_loaded(server, params):
+                return {'success': False, 'avg_tps': 0.0, 'error': 'Server crashed during load'}
+
+            benchmark_start = server.event_count
+            for i in range(3):
+                self._send_chat_request(params, n_predict=512, timeout=self.request_timeout)
+                if i < 2: time.sleep(self.request_pause)
+            # Timing lines are printed as each request completes, but the reader thread may not
+            # have parsed the last ones yet when the response arrives.
+            tps_results = []
+            for timing in server.wait_for_count(LogEventKind.EVAL_TIMING, 3, 5, start=benchmark_start):
+                tps_value = timing.tps
+                if tps_value > log_patterns.MAX_REALISTIC_TPS:
+                    print(f"[DIAGNOSTICS] Discarding unrealistic TPS value: {tps_value}")
+                    continue
+                tps_results.append(tps_value)
+            tps_results = tps_results[:3]
+            if len(tps_results) < 3:
+                return {'success': False, 'avg_tps': 0.0, 'error': 'Benchmark timed out'}
+            return {'success': True, 'avg_tps': sum(tps_results) / len(tps_results), 'error': ''}
+        finally:
+            self._stop()
+
+    def close(self):
+        self._stop()
+
+
+class FakeBackend(ServerBackend):
+    """
+    An in-process stand-in for llama-server backed by a ServerSimulator. Useful for
+    exercising the wizard's search logic without a GPU, a server binary or a display.
+    """
+
+    def __init__(self, gpu_vram_gb, gpu_names=None, gpu_tps=100.0, cpu_tps=8.0):
+        """Arguments are passed through to ServerSimulator."""
+        self.simulator = ServerSimulator(gpu_vram_gb, gpu_names, gpu_tps, cpu_tps)
+        self.load_count = 0
+
+    def list_devices(self, params):
+        gpus = self.simulator.gpus()
+        return {'success': bool(gpus), 'gpus': gpus, 'error': ''}
+
+    def extract_layer_count(self, params):
+        self.load_count += 1
+        try:
+            layers = self.simulator.planner(params).n_layer
+        except (OSError, ValueError, struct.error) as e:
+            return {'success': False, 'layers': None, 'gpus': self.simulator.gpus(), 'error': str(e)}
+        return {'success': True, 'layers': layers, 'gpus': self.simulator.gpus(), 'error': ''}
+
+    def test_config(self, params):
+        self.load_count += 1
+        _, error_details = self.simulator.simulate_load(params)
+        return {'success': error_details is None, 'error_details': error_details}
+
+    def benchmark(self, params):
+        self.load_count += 1
+        prediction, error_details = self.simulator.simulate_load(params)
+        if error_details:
+            return {'success': False, 'avg_tps': 0.0, 'error': 'Server crashed during load'}
+        return {'success': True, 'avg_tps': round(self.simulator.tokens_per_second(params, prediction), 2), 'error': ''}
@@ -0,0 +1,403 @@
+# core/server_pool.py
+
+import os
+import socket
+import threading
+import time
+
+from Llamacpp_Model_launcher.core.command_builder import CommandBuilder, Parameter
+from Llamacpp_Model_launcher.core.log_scanner import LogEventKind, pick_oom_error
+from Llamacpp_Model_launcher.core.prefetch import model_files
+from Llamacpp_Model_launcher.core.process_supervisor import ProcessSupervisor
+from Llamacpp_Model_launcher.core.server_backend import ServerProcess
+from Llamacpp_Model_launcher.core.status import ServerStatus
+
+DEFAULT_PORT_RANGE = (8080, 8179)
+
+
+def port_is_free(host, port):
+    """
+    Checks whether a server could listen on host:port right now, by binding to it the way
+    llama-server does (address reuse on POSIX, so connections in TIME_WAIT do not count).
+    """
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        if os.name == 'nt':
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
+        else:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.bind((_bind_host(host), int(port)))
+            return True
+        except OSError:
+            return False
+
+
+def _bind_host(host):
+    return '127.0.0.1' if host in ('', 'localhost') else host
+
+
+class PoolInstance:
+    """One server of the pool and what is known about it."""
+
+    def __init__(self, name, command, host, port):
+        self.name = name
+        self.command = command
+        self.host = host
+        self.port = port
+        self.status = ServerStatus.UNLOADED
+        self.server = None
+        self.started = None
+        self.load_seconds = None
+        self.error = ''
+        self.stopping = False
+        self.hibernate_reason = ''
+        self.restart_timer = None
+        self.restart = False  # Started by the restart policy after a crash.
+
+    @property
+    def pid(self):
+        return self.server.process.pid if self.server and self.is_running() else None
+
+    @property
+    def url(self):
+        host = 'localhost' if self.host in ('0.0.0.0', '::', '') else self.host
+        return f"http://{host}:{self.port}"
+
+    def is_running(self):
+        return bool(self.server) and self.server.is_running()
+
+    def log_text(self):
+        """The most recent output of the server (older output is in the log archive)."""
+        return self.server.text if self.server else ''
+
+    def to_dict(self):
+        return {'name': self.name, 'status': self.status.key, 'host': self.host, 'port': self.port,
+                'url': self.url, 'pid': self.pid, 'load_seconds': self.load_seconds, 'error': self.error,
+                'command': self.command}
+
+
+class ServerPool:
+    """
+    Runs several llama-server configurations side by side. Every instance gets a port that
+    no other instance uses and that is verified to be free before launch; a port taken in
+    the command is kept if it is free, otherwise a free one from `port_range` is assigned.
+    Each instance has its own output stream, archive session and status, tracked by a
+    watcher thread. Callbacks are invoked from those threads.
+    """
+
+    def __init__(self, llamacpp_dir, resolve_command=None, supervisor=None, log_archive=None,
+                 port_range=DEFAULT_PORT_RANGE, load_timeout=600, log_chunks=2000,
+                 on_change=None, on_output=None, load_times=None, idle_monitor=None, restart_policy=None,
+                 model_cache=None, launch_scheduler=None, metrics_exporter=None):
+        """
+        Args:
+            llamacpp_dir (str): Working directory; relative executables are resolved against it.
+            resolve_command (callable): Returns the command string for a configuration name
+                (e.g. ModelManager.models.get), so instances can be loaded by name alone.
+            supervisor (ProcessSupervisor): Starts and stops the servers.
+            log_archive (LogArchive): Optional archive every instance's session is recorded in.
+            port_range (tuple): Inclusive range ports are allocated from.
+            load_timeout (float): Seconds an instance may take to become ready.
+            log_chunks (int): Output chunks kept in memory per instance.
+            on_change (callable): Called with the PoolInstance whenever its status changes.
+            on_output (callable): Called with (name, text) as an instance prints output.
+            load_times (LoadTimeLog): Optional log every instance's load time is recorded in.
+            idle_monitor (IdleMonitor): Optional; watches loaded instances and should call
+                `hibernate` once one has been idle too long.
+            restart_policy (RestartPolicy): Optional; decides whether crashed instances are started again.
+            model_cache (ModelCache): Optional; launches use its copies of hot models on fast storage.
+            launch_scheduler (LaunchScheduler): Optional; queues launches so models on the same disk
+                load one after another.
+            metrics_exporter (MetricsExporter): Optional; receives every instance's starts,
+                restarts, status changes and load times.
+        """
+        self.llamacpp_dir = llamacpp_dir
+        self.resolve_command = resolve_command
+        self.supervisor = supervisor or ProcessSupervisor()
+        self.log_archive = log_archive
+        self.port_range = port_range
+        self.load_timeout = load_timeout
+        self.log_chunks = log_chunks
+        self.on_change = on_change
+        self.on_output = on_output
+        self.load_times = load_times
+        self.idle_monitor = idle_monitor
+        self.restart_policy = restart_policy
+        self.model_cache = model_cache
+        self.launch_scheduler = launch_scheduler
+        self.metrics_exporter = metrics_exporter
+        self.reserved_ports = set()  # Ports used outside the pool, e.g. the launcher's own server.
+        self._instances = {}
+        self._lock = threading.RLock()
+
+    # --- Queries ---
+
+    def instances(self):
+        with self._lock:
+            return list(self._instances.values())
+
+    def get(self, name):
+        with self._lock:
+            return self._instances.get(name)
+
+    def active_ports(self):
+        """Ports of instances that are loading or running."""
+        with self._lock:
+            return {i.port for i in self._instances.values() if i.status in (ServerStatus.LOADING, ServerStatus.LOADED)}
+
+    def allocate_port(self, host, preferred=None):
+        """
+        Returns a port that is neither used by the pool nor bound by anything else, trying
+        `preferred` first, or None if the whole range is taken.
+        """
+        taken = self.active_ports() | self.reserved_ports
+        candidates = ([int(preferred)] if preferred else []) + list(range(self.port_range[0], self.port_range[1] + 1))
+        for port in candidates:
+            if port not in taken and port_is_free(host, port):
+                return port
+        return None
+
+    # --- Load / unload ---
+
+    def load(self, name, command=None, restart=False):
+        """
+        Starts the configuration `name`, looking its command up if none is given.
+        Args:
+            restart (bool): This is the restart policy starting a crashed instance again.
+        Returns:
+            A tuple (success, message).
+        """
+        command = command or (self.resolve_command(name) if self.resolve_command else None)
+        if not command:
+            return False, f"No configuration named '{name}'."
+        params = CommandBuilder.parse(command)
+        params_dict = {p.key: p.value for p in params}
+        if not params_dict.get('Executable'):
+            return False, f"The command for '{name}' has no executable."
+        host = params_dict.get('--host', '127.0.0.1')
+        requested = params_dict.get('--port')
+        if requested:
+            try:
+                requested = int(requested)
+            except ValueError:
+                return False, f"Invalid --port '{requested}' for '{name}'."
+
+        with self._lock:
+            existing = self._instances.get(name)
+            if existing and existing.status in (ServerStatus.LOADING, ServerStatus.LOADED):
+                return False, f"'{name}' is already running on port {existing.port}."
+            if existing and existing.restart_timer:
+                existing.restart_timer.cancel()
+                existing.restart_timer = None
+            port = self.allocate_port(host, requested)
+            if port is None:
+                return False, f"No free port in {self.port_range[0]}-{self.port_range[1]} for '{name}'."
+            message = f"Loading '{name}' on port {port}."
+            if requested and requested != port:
+                message = f"Port {requested} is in use; loading '{name}' on port {port} instead."
+            params = CommandBuilder.apply_updates(params, {'--port': str(port)})
+            instance = PoolInstance(name, CommandBuilder.build(params), host, port)
+            instance.status = ServerStatus.LOADING
+            instance.restart = restart
+            self._instances[name] = instance
+
+        cached = self.model_cache.resolve(params_dict, self.llamacpp_dir) if self.model_cache else {}
+        if cached:
+            params = [Parameter(p.key, cached.get(p.key, p.value)) for p in params]
+            instance.command = CommandBuilder.build(params)
+            print(f"[DIAGNOSTICS] Pool: '{name}' uses its cached model copy ({', '.join(cached.values())}).")
+        args = CommandBuilder.launch_args(params, self.llamacpp_dir)
+        if not self.launch_scheduler:
+            return self._spawn(instance, args, message)
+        results = []
+
+        def start():
+            try:
+                results.append(self._spawn(instance, args, message))
+            except Exception as e:
+                self._set_status(instance, ServerStatus.ERROR, f"Could not start: {e}")
+                results.append((False, f"Could not start '{name}': {e}"))
+                raise  # The scheduler logs it and frees the disk.
+
+        files = model_files({p.key: p.value for p in params}, self.llamacpp_dir)
+        if self.launch_scheduler.submit(name, files, start):
+            return results[0]
+        blockers = self.launch_scheduler.blocking(name)
+        queued = f"Queued behind {', '.join(blockers)} (same disk)" if blockers else "Queued"
+        if instance.server is None:
+            self._set_status(instance, ServerStatus.LOADING, queued)
+        return True, f"{queued}; '{name}' loads on port {port} once the disk is free."
+
+    def preload(self, names):
+        """
+        Loads several configurations, e.g. at startup, most important first (see LaunchScheduler).
+        Returns:
+            A list of (name, success, message).
+        """
+        if self.launch_scheduler:
+            names = sorted(names, key=lambda n: -self.launch_scheduler.priority_of(n))
+        return [(name, *self.load(name)) for name in names]
+
+    def unload(self, name, wait=False):
+        """
+        Stops an instance; without `wait` the stop runs on a background thread.
+        Returns:
+            A tuple (success, message).
+        """
+        instance = self.get(name)
+        if instance and instance.server is None and self.launch_scheduler and self.launch_scheduler.cancel(name):
+            self._set_status(instance, ServerStatus.UNLOADED, "Cancelled before it started")
+            return True, f"Cancelled the queued load of '{name}'."
+        if instance and instance.restart_timer and not instance.is_running():
+            instance.restart_timer.cancel()
+            instance.restart_timer = None
+            self._set_status(instance, ServerStatus.UNLOADED, f"Restart cancelled; {instance.error}")
+            return True, f"Cancelled the pending restart of '{name}'."
+        if not instance or not instance.is_running():
+            return False, f"'{name}' is not running."
+        instance.stopping = True
+        if wait:
+            instance.server.stop()
+        else:
+            threading.Thread(target=instance.server.stop, name=f"pool-stop-{name}", daemon=True).start()
+        return True, f"Unloading '{name}'."
+
+    def hibernate(self, name, idle_seconds=None):
+        """
+        Unloads an idle instance and marks it hibernated; the next load (a click, an API call
+        or a proxied request) starts it again.
+        Returns:
+            A tuple (success, message).
+        """
+        instance = self.get(name)
+        if not instance or instance.status != ServerStatus.LOADED:
+            return False, f"'{name}' is not loaded."
+        idle = f" after {round(idle_seconds / 60, 1):g} min idle" if idle_seconds else ''
+        instance.hibernate_reason = f"Hibernated{idle}; loads again on the next request"
+        return self.unload(name)
+
+    def unload_all(self, wait=True):
+        for instance in self.instances():
+            if instance.is_running() or instance.status == ServerStatus.LOADING:
+                self.unload(instance.name, wait=wait)
+
+    def remove(self, name):
+        """Forgets a stopped instance."""
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance and not instance.is_running():
+                del self._instances[name]
+                return True
+        return False
+
+    # --- Internals ---
+
+    def _spawn(self, instance, args, message):
+        """Starts the server process of a new instance and its watcher thread."""
+        name = instance.name
+        archive_session = None
+        if self.log_archive:
+            try:
+                archive_session = self.log_archive.start_session(name, instance.command)
+            except OSError as e:
+                print(f"[DIAGNOSTICS] Could not start log archive session: {e}")
+        try:
+            instance.server = ServerProcess(args, self.llamacpp_dir, lambda text: self._output(name, text),
+                                            archive_session=archive_session, supervisor=self.supervisor,
+                                            max_chunks=self.log_chunks)
+        except OSError as e:
+            if archive_session:
+                archive_session.end(reason=str(e))
+            self._set_status(instance, ServerStatus.ERROR, f"Could not start: {e}")
+            if self.launch_scheduler:
+                self.launch_scheduler.release(name)
+            return False, f"Could not start '{name}': {e}"
+        instance.started = time.monotonic()
+        instance.error = ''
+        print(f"[DIAGNOSTICS] Pool: {message} (PID {instance.server.process.pid})")
+        if self.metrics_exporter:
+            self.metrics_exporter.record_pool_start(name, instance.restart)
+        self._notify(instance)
+        threading.Thread(target=self._watch, args=(instance,), name=f"pool-{name}", daemon=True).start()
+        return True, message
+
+    def _watch(self, instance):
+        server = instance.server
+        readiness = server.wait_until_ready(instance.host, instance.port, self.load_timeout,
+                                            should_stop=lambda: instance.stopping)
+        if self.launch_scheduler:
+            self.launch_scheduler.release(instance.name)
+        if readiness.ready and server.is_running():
+            instance.load_seconds = readiness.seconds
+            if self.load_times:
+                self.load_times.record(instance.name, readiness.seconds, readiness.source)
+            if self.metrics_exporter:
+                self.metrics_exporter.record_pool_load(instance.name, readiness.seconds)
+            self._set_status(instance, ServerStatus.LOADED)
+            if self.idle_monitor:
+                self.idle_monitor.watch(instance.name, instance.host, instance.port)
+        timed_out = False
+        if not readiness.ready and not instance.stopping:
+            oom = pick_oom_error(server.events(LogEventKind.OOM))
+            reason = f"Out of memory on device {oom['device_id']}" if oom else "Server exited during load"
+            if server.is_running():
+                reason = f"Not loaded after {self.load_timeout:.0f} s"
+                timed_out = True
+                self.supervisor.stop(server.process)
+            self._set_status(instance, ServerStatus.ERROR, reason)
+        exit_code = server.process.wait()
+        if self.idle_monitor:
+            self.idle_monitor.forget(instance.name)
+        if instance.stopping and instance.hibernate_reason:
+            self._set_status(instance, ServerStatus.HIBERNATED, instance.hibernate_reason)
+        elif instance.stopping:
+            self._set_status(instance, ServerStatus.UNLOADED)
+        elif instance.status == ServerStatus.LOADED:
+            self._set_status(instance, ServerStatus.ERROR, f"Server exited with code {exit_code}")
+        if not instance.stopping and not timed_out:
+            self._handle_crash(instance, exit_code)
+
+    def _handle_crash(self, instance, exit_code):
+        """Asks the restart policy about an unexpected exit and schedules the restart it allows."""
+        policy = self.restart_policy
+        if not policy or not policy.enabled_for(instance.name):
+            return
+        server = instance.server
+        params = CommandBuilder.parse(instance.command)
+        layer_counts = server.events(LogEventKind.LAYER_COUNT)
+        decision = policy.on_crash(instance.name, exit_code, pick_oom_error(server.events(LogEventKind.OOM)),
+                                   {p.key: p.value for p in params}, layer_counts[0] if layer_counts else None)
+        self._set_status(instance, ServerStatus.ERROR, decision.message)
+        if not decision.restart:
+            return
+        command = instance.command
+        if decision.updates:
+            command = CommandBuilder.build(CommandBuilder.apply_updates(params, decision.updates))
+        instance.restart_timer = threading.Timer(decision.delay, self._restart, (instance, command))
+        instance.restart_timer.daemon = True
+        instance.restart_timer.start()
+
+    def _restart(self, instance, command):
+        if self.get(instance.name) is not instance or instance.restart_timer is None:
+            return  # Loaded, unloaded or removed by hand in the meantime.
+        instance.restart_timer = None
+        success, message = self.load(instance.name, command, restart=True)
+        if not success:
+            self._set_status(instance, ServerStatus.ERROR, f"Restart failed: {message}")
+
+    def _set_status(self, instance, status, error=''):
+        instance.status = status
+        instance.error = error
+        print(f"[DIAGNOSTICS] Pool: '{instance.name}' is {status.key}{': ' + error if error else ''}")
+        self._notify(instance)
+
+    def _notify(self, instance):
+        if self.metrics_exporter:
+            self.metrics_exporter.set_pool_status(instance.name, instance.status)
+        if self.on_change:
+            self.on_change(instance)
+
+    def _output(self, name, text):
+        if self.on_output:
+            self.on_output(name, text)
@@ -0,0 +1,134 @@
+# core/server_simulator.py
+
+import os
+import zlib
+
+from Llamacpp_Model_launcher.core.memory_planner import MemoryPlanner, GIB, MIB
+
+# The simulator's own account of llama.cpp's per-device allocations. It deliberately does
+# not reuse MemoryPlanner's overhead and compute-buffer estimates (which the tuning wizard
+# searches with), so a wrong estimate costs the benchmark extra loads or an OOM instead of
+# being invisible. Only weights and KV cache, which are exact, come from the planner.
+CUDA_CONTEXT_BYTES = 300 * MIB
+# cuBLAS workspace and the sampling/output buffers on the device holding the output layer.
+OUTPUT_DEVICE_EXTRA_BYTES = 160 * MIB
+# llama.cpp pads the KV cache to a multiple of this many cells.
+KV_PADDING = 256
+# Every buffer is rounded up to the allocator's granularity.
+ALLOC_GRANULARITY = 2 * MIB
+# Compute buffers vary with the graph llama.cpp reserves; the simulated size is scaled by a
+# fixed per-(model, device) factor in this range, in percent.
+COMPUTE_SPREAD_PERCENT = (-10, 30)
+
+
+def _model_path(params):
+    return params.get('-m', params.get('--model', ''))
+
+
+def _round_up(n_bytes, granularity=ALLOC_GRANULARITY):
+    return -(-n_bytes // granularity) * granularity
+
+
+def _flash_attention(params):
+    """llama.cpp's default ('auto') enables flash attention on CUDA devices; only 'off' disables it."""
+    value = params.get('-fa', params.get('--flash-attn'))
+    return str(value).lower() not in ('off', '0', 'false')
+
+
+class ServerSimulator:
+    """
+    Decides how a simulated llama-server behaves for a set of flags. A load fails with an
+    out-of-memory error on the first device whose allocations exceed its simulated VRAM,
+    and throughput falls off with the share of weights left in system RAM. Allocations
+    follow the simulator's own model (see allocate), not the planner's prediction.
+    """
+
+    def __init__(self, gpu_vram_gb, gpu_names=None, gpu_tps=100.0, cpu_tps=8.0):
+        """
+        Args:
+            gpu_vram_gb (list): Free VRAM of each simulated GPU in GB, in llama.cpp device order.
+            gpu_names (list): Optional device names; defaults to 'Fake GPU <n>'.
+            gpu_tps (float): Throughput with the whole model in VRAM.
+            cpu_tps (float): Throughput with the whole model in system RAM.
+        """
+        self.free_bytes = {i: gb * GIB for i, gb in enumerate(gpu_vram_gb)}
+        self.gpu_names = gpu_names or [f"Fake GPU {i}" for i in range(len(gpu_vram_gb))]
+        self.gpu_tps = gpu_tps
+        self.cpu_tps = cpu_tps
+        self._planners = {}
+
+    def planner(self, params):
+        """Returns the (cached) MemoryPlanner for the model in params."""
+        model_path = _model_path(params)
+        if model_path not in self._planners:
+            self._planners[model_path] = MemoryPlanner.from_model(model_path)
+        return self._planners[model_path]
+
+    def gpus(self):
+        return [{'id': i, 'name': name} for i, name in enumerate(self.gpu_names)]
+
+    def compute_buffer_bytes(self, planner, params, n_ctx, device, holds_output):
+        """The simulated compute buffer of one device for a single ubatch."""
+        try:
+            n_ubatch = int(params.get('-ub', params.get('--ubatch-size', 512)))
+        except (TypeError, ValueError):
+            n_ubatch = 512
+        # FFN gate/up/down intermediates plus the residual stream and attention projections.
+        activations = n_ubatch * (3 * planner.n_ff + 6 * planner.n_embd) * 4
+        # Without flash attention the full KQ matrix is materialized in f32.
+        attention = 0 if _flash_attention(params) else n_ubatch * n_ctx * planner.n_head * 4
+        logits = n_ubatch * planner.n_vocab * 4 if holds_output else 0
+        low, high = COMPUTE_SPREAD_PERCENT
+        seed = zlib.crc32(f"{os.path.basename(_model_path(params))}:{device}".encode('utf-8'))
+        factor = 1 + (low + seed % (high - low + 1)) / 100
+        return int((activations + attention + logits) * factor)
+
+    def allocate(self, params):
+        """
+        The bytes llama.cpp would allocate on each device: the planner's weight and KV-cache
+        placement (KV padded to KV_PADDING cells), plus the CUDA context, the output
+        device's extra buffers and a compute buffer, each rounded up to ALLOC_GRANULARITY.
+        Returns:
+            A dict like MemoryPlanner.predict's.
+        """
+        planner = self.planner(params)
+        n_ctx = _round_up(planner.options_from_params(params)['n_ctx'], KV_PADDING)
+        placement = planner.place({**params, '-c': str(n_ctx)}, n_devices=len(self.free_bytes),
+                                  free_bytes=self.free_bytes)
+        output_device = placement['output_device']
+        usage = {}
+        for device, weights_and_kv in placement['devices'].items():
+            if not weights_and_kv and device != output_device:
+                usage[device] = 0
+                continue
+            holds_output = device == output_device
+            used = CUDA_CONTEXT_BYTES + (OUTPUT_DEVICE_EXTRA_BYTES if holds_output else 0)
+            used += _round_up(weights_and_kv - placement['kv_devices'][device])
+            used += _round_up(placement['kv_devices'][device])
+            used += _round_up(self.compute_buffer_bytes(planner, params, n_ctx, device, holds_output))
+            usage[device] = used
+        return {'devices': usage, 'host': placement['host'], 'kv_devices': placement['kv_devices'],
+                'kv_host': placement['kv_host']}
+
+    def simulate_load(self, params):
+        """
+        Returns:
+            A tuple (prediction, error_details). error_details is None when the load fits,
+            otherwise {'type': 'oom', 'size_mib': float, 'device_id': int} for the failing
+            allocation, as llama.cpp would report it.
+        """
+        prediction = self.allocate(params)
+        for device, used in sorted(prediction['devices'].items()):
+            if used > self.free_bytes.get(device, 0):
+                return prediction, {'type': 'oom', 'size_mib': round(used / MIB, 2), 'device_id': device}
+        return prediction, None
+
+    def tokens_per_second(self, params, prediction):
+        """Generation speed for a loaded configuration."""
+        # Token embeddings always stay in system RAM but are only looked up, not multiplied.
+        host_bytes = max(0, prediction['host'] - self.planner(params).input_bytes)
+        gpu_bytes = sum(prediction['devices'].values())
+        total_bytes = (gpu_bytes + host_bytes) or 1
+        host_share = host_bytes / total_bytes
+        # Generation time is the sum of the time spent on each side of the split.
+        return 1.0 / ((1 - host_share) / self.gpu_tps + host_share / self.cpu_tps)
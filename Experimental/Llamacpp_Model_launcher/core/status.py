@@ -9,6 +9,7 @@ class ServerStatus(Enum):
     LOADING = ("loading", "Status: Loading...", "#FFEB3B")
     LOADED = ("loaded", "Status: Loaded", "#4CAF50")
     ERROR = ("error", "Status: Error", "#F44336")
+    HIBERNATED = ("hibernated", "Status: Hibernated (idle)", "#9E9E9E")
 
     def __init__(self, key, label, color):
         self.key = key
@@ -4,6 +4,9 @@ import os
 import re
 import subprocess
 import platform
+import struct
+
+from Llamacpp_Model_launcher.core.gguf_reader import GGUFReader
 
 # --- Optional Dependencies ---
 try:
@@ -62,6 +65,11 @@ class SystemAnalyzer:
             "gpus": [],
             "model_size_gb": None,
             "model_architecture": "Unknown",
+            "model_metadata": None,
+            "expert_count": 0,
+            "expert_used_count": 0,
+            "expert_tensors_gb": None,
+            "dense_tensors_gb": None,
         }
 
     def _get_cpu_info(self):
@@ -155,7 +163,7 @@ class SystemAnalyzer:
             yield "> No compatible GPUs detected on the system."
 
     def _get_model_info(self, model_path):
-        """Gets model file size and architecture from the model's filename."""
+        """Gets model file size, architecture and expert/dense tensor sizes from the GGUF file."""
         yield f"[ANALYSIS] Accessing model file at: {model_path}..."
         try:
             filename = os.path.basename(model_path)
@@ -194,16 +202,17 @@ class SystemAnalyzer:
                 self.results["model_size_gb"] = round(file_size_bytes / (1024 ** 3), 2)
                 yield f"> Model file size is {self.results['model_size_gb']} GB."
 
-            yield "[ANALYSIS] Determining architecture from filename..."
-            lower_filename = filename.lower()
+            yield "[ANALYSIS] Reading architecture and tensor inventory from the GGUF header..."
+            try:
+                reader = GGUFReader(model_path).read()
+            except (OSError, ValueError, struct.error) as e:
+                reader = None
+                yield f"> Could not parse the GGUF header ({e}). Falling back to filename heuristics."
 
-            if ('moe' in lower_filename or
-                    'mixture' in lower_filename or
-                    'gpt-oss' in lower_filename or
-                    re.search(r'a\d+b', lower_filename)):
-                self.results["model_architecture"] = "Mixture of Experts (MoE)"
+            if reader is not None:
+                yield from self._classify_from_gguf(reader)
             else:
-                self.results["model_architecture"] = "Dense"
+                yield from self._classify_from_filename(filename)
 
             yield f"> Model architecture identified as: {self.results['model_architecture']}."
 
@@ -214,6 +223,38 @@ class SystemAnalyzer:
             yield f"> ERROR: Could not read model file. Reason: {e}"
             self.results["model_architecture"] = "Read Error"
 
+    def _classify_from_gguf(self, reader):
+        """Classifies the model using expert metadata and splits its tensors into expert and dense bytes."""
+        metadata = reader.summary()
+        expert_bytes, dense_bytes = reader.tensor_bytes_by_kind()
+        self.results["model_metadata"] = metadata
+        self.results["expert_count"] = metadata['expert_count']
+        self.results["expert_used_count"] = metadata['expert_used_count']
+        self.results["expert_tensors_gb"] = round(expert_bytes / (1024 ** 3), 2)
+        self.results["dense_tensors_gb"] = round(dense_bytes / (1024 ** 3), 2)
+
+        yield (f"> GGUF architecture '{metadata['architecture']}' with {metadata['block_count']} blocks "
+               f"and {len(reader.tensors)} tensors.")
+        if metadata['expert_count'] > 1 or expert_bytes > 0:
+            self.results["model_architecture"] = "Mixture of Experts (MoE)"
+            yield (f"> {metadata['expert_count']} experts ({metadata['expert_used_count']} active per token). "
+                   f"Expert tensors: {self.results['expert_tensors_gb']} GB | "
+                   f"Dense tensors: {self.results['dense_tensors_gb']} GB.")
+        else:
+            self.results["model_architecture"] = "Dense"
+
+    def _classify_from_filename(self, filename):
+        """Legacy heuristic used only when the GGUF header cannot be read."""
+        lower_filename = filename.lower()
+        if ('moe' in lower_filename or
+                'mixture' in lower_filename or
+                'gpt-oss' in lower_filename or
+                re.search(r'a\d+b', lower_filename)):
+            self.results["model_architecture"] = "Mixture of Experts (MoE)"
+        else:
+            self.results["model_architecture"] = "Dense"
+        yield "> Architecture guessed from the filename."
+
     def get_live_vram_usage(self):
         """
         Gets the current VRAM usage for all NVIDIA GPUs using pynvml.
@@ -0,0 +1,116 @@
+# tuning_runner.py
+
+import time
+
+from Llamacpp_Model_launcher.core.command_builder import CommandBuilder, Parameter
+
+
+class TuningRunner:
+    """
+    Drives a TuningWizard generator without Qt. Each action the wizard yields is
+    executed immediately against a ServerBackend and its result is sent straight
+    back into the generator, so tuning can run from a terminal or a CI job.
+    """
+
+    def __init__(self, wizard, backend, on_log=print, confirm=None, confirm_each_step=False):
+        """
+        Args:
+            wizard (TuningWizard): The wizard whose generator is driven.
+            backend (ServerBackend): Executes loads, stability tests and benchmarks.
+            on_log (callable): Receives every log line.
+            confirm (callable): Receives confirm_* actions and returns True to proceed.
+                Defaults to accepting everything.
+            confirm_each_step (bool): Also ask before every benchmark load.
+        """
+        self.wizard = wizard
+        self.backend = backend
+        self.on_log = on_log
+        self.confirm = confirm or (lambda action: True)
+        self.confirm_each_step = confirm_each_step
+        self.params = dict(wizard.initial_params)
+        self.best_params = None
+        self.load_count = 0
+        self.aborted = False
+
+    def _build_command(self, params):
+        return CommandBuilder.build([Parameter(k, v) for k, v in params.items()])
+
+    def _apply_updates(self, updates):
+        parameters = CommandBuilder.apply_updates([Parameter(k, v) for k, v in self.params.items()], updates)
+        self.params = {p.key: p.value for p in parameters}
+
+    def _execute(self, action):
+        """Executes one wizard action. Returns the value to send back into the generator."""
+        kind = action.get('action')
+        if kind == 'log':
+            self.on_log(f"[WIZARD] {action['message']}")
+        elif kind == 'update_params':
+            self.on_log(f"[WIZARD] Applying new parameters: {action['params']}")
+            self._apply_updates(action['params'])
+        elif kind == 'save_best_params':
+            self.on_log("[WIZARD] Saving current configuration as the best so far.")
+            self.best_params = dict(self.params)
+        elif kind == 'restore_best_params':
+            self.on_log("[WIZARD] Restoring the best known configuration.")
+            if self.best_params:
+                self.params = dict(self.best_params)
+        elif kind in ('confirm_warning', 'confirm_context_tradeoff'):
+            return bool(self.confirm(action))
+        elif kind == 'confirm_benchmark':
+            if not self.confirm_each_step:
+                return True
+            return bool(self.confirm({'action': kind, 'title': 'Confirm Benchmark',
+                                      'message': f"Run the next benchmark?\n\nCommand:\n{self._build_command(self.params)}"}))
+        elif kind == 'list_devices':
+            self.on_log("[WIZARD] Probing llama.cpp device order (--list-devices)...")
+            return self.backend.list_devices(dict(self.params))
+        elif kind == 'extract_layer_count':
+            self.load_count += 1
+            return self.backend.extract_layer_count(dict(self.params))
+        elif kind == 'test_ngl_value':
+            self.load_count += 1
+            result = self.backend.test_config(dict(self.params))
+            self.on_log(f"[WIZARD] Inference stability test {'PASSED' if result['success'] else 'FAILED'}.")
+            return result
+        elif kind == 'load_and_benchmark':
+            self.load_count += 1
+            result = self.backend.benchmark(dict(self.params))
+            result['params_used'] = dict(self.params)
+            self.on_log(f"[WIZARD] Benchmark step finished. Average TPS: {result.get('avg_tps', 0.0):.2f}")
+            return result
+        else:
+            print(f"[DIAGNOSTICS] Unknown wizard action ignored: {action}")
+        return None
+
+    def run(self, generator=None):
+        """
+        Runs the wizard to completion.
+        Args:
+            generator: The wizard generator to drive; defaults to wizard.run_tuning_wizard().
+        Returns:
+            A dict with 'best_params' (None if nothing was saved), 'best_command',
+            'final_params', 'loads', 'elapsed_s' and 'aborted'.
+        """
+        if generator is None:
+            generator = self.wizard.run_tuning_wizard()
+        start_time = time.monotonic()
+        try:
+            action = next(generator)
+            while True:
+                result = self._execute(action)
+                if action.get('action') == 'confirm_benchmark' and not result:
+                    self.aborted = True
+                action = generator.send(result)
+        except StopIteration:
+            pass
+        finally:
+            self.backend.close()
+
+        return {
+            'best_params': self.best_params,
+            'best_command': self._build_command(self.best_params) if self.best_params else '',
+            'final_params': self.params,
+            'loads': self.load_count,
+            'elapsed_s': time.monotonic() - start_time,
+            'aborted': self.aborted,
+        }
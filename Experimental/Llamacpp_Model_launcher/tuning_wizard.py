@@ -1,9 +1,13 @@
 # tuning_wizard.py
 
+import math
 import time
 import requests
 import re
+import struct
 from Llamacpp_Model_launcher.parameters_db import BENCHMARK_PROMPT  # Import the centralized prompt
+from Llamacpp_Model_launcher.core.gguf_reader import read_gguf_metadata
+from Llamacpp_Model_launcher.core.memory_planner import MemoryPlanner, GIB
 
 
 class TuningWizard:
@@ -16,6 +20,52 @@ class TuningWizard:
         self.analysis = analysis_results
         self.initial_params = initial_params
         self.best_config = {'params': {}, 'tps': 0.0}
+        self.model_metadata = None
+        self.planner = None
+
+    def _build_planner(self):
+        """Creates a MemoryPlanner from the model's tensor table, or None if it can't be read."""
+        model_path = self.initial_params.get('-m', self.initial_params.get('--model', ''))
+        try:
+            return MemoryPlanner.from_model(model_path)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"[DIAGNOSTICS] Memory planner unavailable: {e}")
+            return None
+
+    def _free_vram_bytes(self):
+        """Free VRAM per llama.cpp device id, in bytes."""
+        return {gpu['id']: gpu.get('vram', {}).get('free_gb', 0) * GIB for gpu in self.analysis.get('gpus', [])}
+
+    def _predicted_not_to_fit(self, params, free_bytes, margin=1.15):
+        """
+        Yields a log line and returns True only when the planner predicts the configuration
+        overflows a device by a wide margin, so the trial load can be skipped safely.
+        """
+        if not self.planner or not free_bytes:
+            return False
+        prediction = self.planner.predict(params, n_devices=len(free_bytes), free_bytes=free_bytes)
+        usage = ", ".join(f"Device {d}: {used / GIB:.2f}/{free_bytes.get(d, 0) / GIB:.2f} GB"
+                          for d, used in sorted(prediction['devices'].items()) if used)
+        yield {'action': 'log', 'message': f"> Predicted VRAM use: {usage or 'none'}"}
+        return any(used > free_bytes.get(d, 0) * margin for d, used in prediction['devices'].items())
+
+    @staticmethod
+    def _split_from_layer_counts(layer_counts):
+        total = sum(layer_counts) or 1
+        return [count / total for count in layer_counts]
+
+    def _read_model_metadata(self):
+        """Reads hyperparameters straight from the GGUF header. Returns None if the file can't be parsed."""
+        if self.analysis.get('model_metadata'):
+            return self.analysis['model_metadata']
+        model_path = self.initial_params.get('-m', self.initial_params.get('--model', ''))
+        if not model_path:
+            return None
+        try:
+            return read_gguf_metadata(model_path)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"[DIAGNOSTICS] GGUF metadata read failed: {e}")
+            return None
 
     def _reorder_gpu_list(self, ground_truth_gpus):
         """
@@ -57,6 +107,146 @@ class TuningWizard:
         else:
             yield {'action': 'log', 'message': "[ERROR] GPU list re-ordering failed. Tensor split may be incorrect."}
 
+    def _estimate_ncmoe_start(self, total_layers, total_free_vram, vram_buffer_gb=1.5):
+        """
+        Uses the expert tensor size reported by the analyzer to guess how many layers'
+        experts must stay on the CPU, so the coarse -ncmoe search starts near the answer.
+        """
+        expert_gb = self.analysis.get('expert_tensors_gb')
+        block_count = total_layers - 1
+        if not expert_gb or block_count <= 0:
+            return 0
+        overflow_gb = self.analysis.get('model_size_gb', 0.0) - (total_free_vram - vram_buffer_gb)
+        if overflow_gb <= 0:
+            return 0
+        layers_to_offload = math.ceil(overflow_gb / (expert_gb / block_count))
+        return max(0, min(layers_to_offload, block_count) - 5)
+
+    def _probe_lower_ncmoe(self, best_config_params, max_probes=3):
+        """
+        After the planned -ncmoe verified on the first try, checks whether fewer CPU expert
+        layers also fit. Updates best_config_params in place with the lowest working value.
+        """
+        for _ in range(max_probes):
+            lower_ncmoe = int(best_config_params['-ncmoe']) - 1
+            if lower_ncmoe < 0:
+                return
+            yield {'action': 'log', 'message': f"> Verifying whether -ncmoe {lower_ncmoe} also fits..."}
+            yield {'action': 'update_params', 'params': {'-ncmoe': str(lower_ncmoe)}}
+            result = yield {'action': 'test_ngl_value'}
+            if not result['success']:
+                yield {'action': 'update_params', 'params': {'-ncmoe': best_config_params['-ncmoe']}}
+                return
+            best_config_params['-ncmoe'] = str(lower_ncmoe)
+
+    @staticmethod
+    def _round_context(n_ctx, granularity):
+        return max(granularity, (int(n_ctx) // granularity) * granularity)
+
+    def _maximize_context(self, base_params, free_vram_bytes, granularity=1024, max_confirm_loads=4):
+        """
+        Finds the largest -c that fits with the offload settings in base_params held fixed.
+        Bisects analytically with the memory planner, then confirms with real loads, moving
+        up or down between the largest verified and smallest failed context.
+        Returns the verified context size, or None.
+        """
+        if not self.planner or not free_vram_bytes:
+            yield {'action': 'log', 'message': "[WARNING] Context maximizer needs GGUF metadata and GPU information."}
+            return None
+
+        upper = self._round_context(self.planner.context_length, granularity)
+        if not self.planner.fits({**base_params, '-c': str(granularity)}, free_vram_bytes):
+            yield {'action': 'log',
+                   'message': f"> Even a {granularity}-token context is predicted not to fit with these offload settings."}
+            return None
+
+        low, high = granularity, upper
+        while low < high:
+            mid = self._round_context((low + high + granularity) // 2, granularity)
+            if mid <= low:
+                break
+            if self.planner.fits({**base_params, '-c': str(mid)}, free_vram_bytes):
+                low = mid
+            else:
+                high = mid - granularity
+        predicted = low
+        options = self.planner.options_from_params({**base_params, '-c': str(predicted)})
+        kv_gb = self.planner.kv.total_bytes(options['n_ctx'], options['cache_type_k'], options['cache_type_v'],
+                                            options['n_seq'], options['n_ubatch'], options['swa_full']) / GIB
+        yield {'action': 'log',
+               'message': f"> Memory model predicts a maximum context of {predicted} tokens "
+                          f"(KV cache {kv_gb:.2f} GB, model limit {upper})."}
+
+        verified, failed = 0, upper + granularity
+        candidate = predicted
+        for attempt in range(max_confirm_loads):
+            yield {'action': 'log', 'message': f"> Confirmation load {attempt + 1}/{max_confirm_loads}: -c {candidate}"}
+            yield {'action': 'update_params', 'params': {'-c': str(candidate)}}
+            result = yield {'action': 'test_ngl_value'}
+            if result['success']:
+                verified = candidate
+                yield {'action': 'log', 'message': f"  > SUCCESS: -c {candidate} is stable."}
+                step = (failed - candidate) // 2 if failed <= upper else max(granularity, candidate // 8)
+                next_candidate = min(upper, self._round_context(candidate + step, granularity))
+            else:
+                failed = candidate
+                yield {'action': 'log', 'message': f"  > FAILED: -c {candidate} does not fit."}
+                if verified:
+                    next_candidate = self._round_context((verified + failed) // 2, granularity)
+                else:
+                    next_candidate = self._round_context(candidate - max(granularity, candidate // 8), granularity)
+            if next_candidate <= verified or next_candidate >= failed or next_candidate == candidate:
+                break
+            candidate = next_candidate
+
+        if verified:
+            yield {'action': 'update_params', 'params': {'-c': str(verified)}}
+        else:
+            # Don't leave the last failed size in the editor.
+            yield {'action': 'update_params', 'params': {'-c': base_params.get('-c', 'REMOVE')}}
+        return verified or None
+
+    def _offer_context_maximizer(self, base_params, free_vram_bytes):
+        """Asks whether to maximize the context instead of giving up, and runs it if accepted."""
+        proceed = yield {'action': 'confirm_warning', 'title': "Maximize Context",
+                         'message': "Would you like the wizard to find the largest context size ('-c') that fits "
+                                    "on the primary GPU with full offload instead?"}
+        if not proceed:
+            return
+        yield {'action': 'log', 'message': "\n[CONTEXT] Searching for the largest context that fits..."}
+        best_ctx = yield from self._maximize_context(base_params, free_vram_bytes)
+        if best_ctx:
+            self.best_config = {'params': {'-c': str(best_ctx)}, 'tps': 0.0}
+            yield {'action': 'save_best_params'}
+            yield {'action': 'log', 'message': f"> Largest verified context: {best_ctx} tokens."}
+
+    def run_context_maximizer(self):
+        """
+        Alternative wizard mode: keeps the current offload settings (-ngl, -ts, -ncmoe, -mg,
+        split mode) and therefore the current throughput fixed, and finds the largest -c that fits.
+        """
+        yield {'action': 'log', 'message': "\n" + "=" * 23 + " Starting Context Maximizer " + "=" * 23}
+        layer_count = yield from self._discover_layers_and_devices(allow_sacrificial_load=False)
+        if layer_count is None:
+            return self.best_config
+
+        self.planner = self._build_planner()
+        held_keys = ('-ngl', '--n-gpu-layers', '-ts', '--tensor-split', '-ncmoe', '--n-cpu-moe',
+                     '-mg', '--main-gpu', '-sm', '--split-mode')
+        held = {k: v for k, v in self.initial_params.items() if k in held_keys}
+        yield {'action': 'log', 'message': f"> Holding offload settings fixed: {held or 'llama.cpp defaults'}"}
+
+        best_ctx = yield from self._maximize_context(dict(self.initial_params), self._free_vram_bytes())
+        if not best_ctx:
+            yield {'action': 'log', 'message': "[CRITICAL] Could not find a context size that fits."}
+            return self.best_config
+
+        self.best_config = {'params': {'-c': str(best_ctx)}, 'tps': 0.0}
+        yield {'action': 'save_best_params'}
+        yield {'action': 'log', 'message': "\n" + "=" * 27 + " Context Search Complete " + "=" * 20}
+        yield {'action': 'log', 'message': f"Largest Verified Context: {best_ctx} tokens"}
+        return self.best_config
+
     def _calculate_tensor_split_proportions(self, gpus):
         """Calculates tensor split proportions based on total VRAM."""
         if not gpus or len(gpus) < 2:
@@ -98,6 +288,45 @@ class TuningWizard:
             print(f"[DIAGNOSTICS] Stability API request failed: {e}")
             pass
 
+    def _discover_layers_and_devices(self, allow_sacrificial_load=True):
+        """
+        Reads the layer count from the GGUF header (falling back to a sacrificial load) and
+        reconciles the GPU list with llama.cpp's device order. Returns the layer count or None.
+        Args:
+            allow_sacrificial_load (bool): The fallback rewrites the offload settings; modes that
+                must keep them halt instead.
+        """
+        yield {'action': 'log', 'message': "> Reading model metadata from the GGUF header..."}
+        self.model_metadata = self._read_model_metadata()
+
+        if self.model_metadata and self.model_metadata.get('block_count'):
+            layer_count = self.model_metadata['block_count']
+            yield {'action': 'log',
+                   'message': f"> Architecture: {self.model_metadata['architecture']} | "
+                              f"Context length: {self.model_metadata.get('context_length', 'N/A')} | "
+                              f"Experts: {self.model_metadata.get('expert_count', 0)}"}
+            device_result = yield {'action': 'list_devices'}
+            ground_truth_gpus = device_result.get('gpus', []) if device_result else []
+        elif not allow_sacrificial_load:
+            yield {'action': 'log', 'message': "[CRITICAL] Could not read the GGUF header. Halting without changing any parameters."}
+            return None
+        else:
+            yield {'action': 'log', 'message': "> Could not read the GGUF header. Attempting a sacrificial load to extract metadata."}
+            yield {'action': 'update_params', 'params': {'-ngl': '1', '-ncmoe': 'REMOVE', '-ts': 'REMOVE', '-mg': 'REMOVE'}}
+            metadata_result = yield {'action': 'extract_layer_count'}
+
+            if not metadata_result['success']:
+                yield {'action': 'log', 'message': f"[CRITICAL] Could not determine layer count. Halting."}
+                return None
+            layer_count = metadata_result['layers']
+            ground_truth_gpus = metadata_result.get('gpus', [])
+
+        yield {'action': 'log',
+               'message': f"> Successfully discovered {layer_count} transformer layers (+1 output layer = {layer_count + 1} total offloadable)."}
+
+        yield from self._reorder_gpu_list(ground_truth_gpus)
+        return layer_count
+
     def run_tuning_wizard(self):
         """The main generator that yields actions for the UI to perform."""
         yield {'action': 'log', 'message': "\n" + "=" * 25 + " Starting Tuning Wizard " + "=" * 25}
@@ -123,24 +352,19 @@ class TuningWizard:
                                         "Proceeding may cause a crash. Continue anyway?"}
             if not proceed: yield {'action': 'log', 'message': "[INFO] Tuning aborted by user."}; return
 
-        yield {'action': 'log', 'message': "> Attempting a sacrificial load to extract metadata."}
-        yield {'action': 'update_params', 'params': {'-ngl': '1', '-ncmoe': 'REMOVE', '-ts': 'REMOVE', '-mg': 'REMOVE'}}
-        metadata_result = yield {'action': 'extract_layer_count'}
-
-        if not metadata_result['success']:
-            yield {'action': 'log', 'message': f"[CRITICAL] Could not determine layer count. Halting."}
+        layer_count = yield from self._discover_layers_and_devices()
+        if layer_count is None:
             return
-
-        total_layers = metadata_result['layers'] + 1
-        yield {'action': 'log',
-               'message': f"> Successfully discovered {metadata_result['layers']} transformer layers (+1 output layer = {total_layers} total offloadable)."}
-
-        yield from self._reorder_gpu_list(metadata_result.get('gpus', []))
+        total_layers = layer_count + 1
 
         fa_params = {'--flash-attn': 'on', '-ctk': 'q8_0', '-ctv': 'q8_0'}
         if has_draft_model: fa_params.update({'--cache-type-k-draft': 'q8_0', '--cache-type-v-draft': 'q8_0'})
         yield {'action': 'update_params', 'params': fa_params}
 
+        self.planner = self._build_planner()
+        free_vram_bytes = self._free_vram_bytes()
+        plan_params = {**self.initial_params, **fa_params}
+
         is_moe = self.analysis.get('model_architecture') == 'Mixture of Experts (MoE)'
         is_dense_model = not is_moe
         is_multi_gpu = len(self.analysis.get('gpus', [])) > 1
@@ -163,7 +387,8 @@ class TuningWizard:
 
         if is_moe:
             model_path = self.initial_params.get('-m', self.initial_params.get('--model', ''))
-            if 'gpt-oss' in model_path.lower():
+            architecture = (self.model_metadata or {}).get('architecture', '')
+            if architecture == 'gpt-oss' or 'gpt-oss' in model_path.lower():
                 yield {'action': 'log', 'message': "> Applying gpt-oss specific reasoning parameter."}
                 yield {'action': 'update_params',
                        'params': {'--chat-template-kwargs': '{"reasoning_effort": "medium"}'}}
@@ -186,7 +411,12 @@ class TuningWizard:
 
             yield {'action': 'update_params', 'params': single_gpu_params}
 
-            single_gpu_result = yield {'action': 'test_ngl_value'}
+            skip_load = yield from self._predicted_not_to_fit({**plan_params, **single_gpu_params}, free_vram_bytes)
+            if skip_load:
+                yield {'action': 'log', 'message': "> Memory plan shows a clear overflow. Skipping the trial load."}
+                single_gpu_result = {'success': False, 'error_details': None}
+            else:
+                single_gpu_result = yield {'action': 'test_ngl_value'}
 
             if single_gpu_result['success']:
                 yield {'action': 'log',
@@ -215,13 +445,16 @@ class TuningWizard:
                         yield {'action': 'update_params',
                                'params': {'-mg': str(best_gpu_id), '-ngl': 'REMOVE', '--split-mode': 'REMOVE'}}
                     else:
-                        yield {'action': 'log',
-                               'message': "[INFO] Please lower the context size ('-c') in the Parameter Editor and run the wizard again."}
-                        return
+                        yield from self._offer_context_maximizer({**plan_params, **single_gpu_params}, free_vram_bytes)
+                        if not self.best_config['params']:
+                            yield {'action': 'log',
+                                   'message': "[INFO] Please lower the context size ('-c') in the Parameter Editor and run the wizard again."}
+                        return self.best_config
                 else:
                     yield {'action': 'log',
-                           'message': "[CRITICAL] Model will not fit on the single available GPU. Tuning cannot proceed."}
-                    return
+                           'message': "[CRITICAL] Model will not fit on the single available GPU with the current context size."}
+                    yield from self._offer_context_maximizer({**plan_params, **single_gpu_params}, free_vram_bytes)
+                    return self.best_config
 
         if perform_multi_gpu_tuning:
             if is_moe and is_multi_gpu:
@@ -240,7 +473,13 @@ class TuningWizard:
                         params_to_test = {'-ngl': '99', '-ts': ts_string, '-ncmoe': 'REMOVE'}
 
                         yield {'action': 'update_params', 'params': params_to_test}
-                        result = yield {'action': 'test_ngl_value'}
+                        skip_load = yield from self._predicted_not_to_fit({**plan_params, **params_to_test},
+                                                                          free_vram_bytes)
+                        if skip_load:
+                            yield {'action': 'log', 'message': "> Memory plan shows a clear overflow. Skipping the trial load."}
+                            result = {'success': False, 'error_details': None}
+                        else:
+                            result = yield {'action': 'test_ngl_value'}
 
                         if result['success']:
                             yield {'action': 'log',
@@ -264,36 +503,52 @@ class TuningWizard:
                            'message': "\n[PHASE 3] Activating MoE multi-GPU tuning strategy (with CPU offload)."}
                     yield {'action': 'update_params', 'params': {'-ngl': '99'}}
 
-                    crossover_ncmoe = -1
-                    for ncmoe_to_test in list(range(0, total_layers, 5)) + [total_layers - 1]:
-                        yield {'action': 'log', 'message': f"> Coarse Test: -ncmoe {ncmoe_to_test}"}
-                        yield {'action': 'update_params', 'params': {'-ncmoe': str(ncmoe_to_test), '-ts': 'REMOVE'}}
-                        result = yield {'action': 'test_ngl_value'}
-                        if result['success']:
-                            crossover_ncmoe = ncmoe_to_test
-                            yield {'action': 'log',
-                                   'message': f"  > SUCCESS: Model loaded with default tensor split."}
-                            break
-                        if result['error_details'] and result['error_details']['device_id'] != best_gpu_id:
-                            crossover_ncmoe = ncmoe_to_test
-                            yield {'action': 'log',
-                                   'message': f"  > Crossover found. GPU {result['error_details']['device_id']} is now the bottleneck."}
-                            break
-                        else:
-                            yield {'action': 'log',
-                                   'message': f"  > FAILED: GPU {best_gpu_id} remains the bottleneck."}
+                    planned_ncmoe, planned_counts = (None, None)
+                    if self.planner and free_vram_bytes:
+                        planned_ncmoe, planned_counts = self.planner.min_ncmoe({**plan_params, '-ngl': '99'},
+                                                                               free_vram_bytes)
 
-                    if crossover_ncmoe == -1:
+                    if planned_ncmoe is not None:
+                        current_ncmoe = planned_ncmoe
+                        ts_proportions = self._split_from_layer_counts(planned_counts)
                         yield {'action': 'log',
-                               'message': f"[CRITICAL] Could not relieve GPU {best_gpu_id}. Halting."}
-                        return
+                               'message': f"> Memory plan predicts -ncmoe {planned_ncmoe} with a layer split of "
+                                          f"{','.join(str(c) for c in planned_counts)}. Skipping the coarse search."}
+                    else:
+                        crossover_ncmoe = -1
+                        coarse_start = self._estimate_ncmoe_start(total_layers, total_free_vram)
+                        if coarse_start:
+                            yield {'action': 'log',
+                                   'message': f"> Expert tensor sizes suggest starting the coarse search at -ncmoe {coarse_start}."}
+                        for ncmoe_to_test in list(range(coarse_start, total_layers, 5)) + [total_layers - 1]:
+                            yield {'action': 'log', 'message': f"> Coarse Test: -ncmoe {ncmoe_to_test}"}
+                            yield {'action': 'update_params', 'params': {'-ncmoe': str(ncmoe_to_test), '-ts': 'REMOVE'}}
+                            result = yield {'action': 'test_ngl_value'}
+                            if result['success']:
+                                crossover_ncmoe = ncmoe_to_test
+                                yield {'action': 'log',
+                                       'message': f"  > SUCCESS: Model loaded with default tensor split."}
+                                break
+                            if result['error_details'] and result['error_details']['device_id'] != best_gpu_id:
+                                crossover_ncmoe = ncmoe_to_test
+                                yield {'action': 'log',
+                                       'message': f"  > Crossover found. GPU {result['error_details']['device_id']} is now the bottleneck."}
+                                break
+                            else:
+                                yield {'action': 'log',
+                                       'message': f"  > FAILED: GPU {best_gpu_id} remains the bottleneck."}
 
-                    current_ncmoe = max(0, crossover_ncmoe - 5)
-                    ts_proportions = self._calculate_tensor_split_proportions(self.analysis['gpus'])
-                    if not ts_proportions:
-                        yield {'action': 'log',
-                               'message': "[CRITICAL] Could not calculate VRAM proportions. Halting."}
-                        return
+                        if crossover_ncmoe == -1:
+                            yield {'action': 'log',
+                                   'message': f"[CRITICAL] Could not relieve GPU {best_gpu_id}. Halting."}
+                            return
+
+                        current_ncmoe = max(0, crossover_ncmoe - 5)
+                        ts_proportions = self._calculate_tensor_split_proportions(self.analysis['gpus'])
+                        if not ts_proportions:
+                            yield {'action': 'log',
+                                   'message': "[CRITICAL] Could not calculate VRAM proportions. Halting."}
+                            return
 
                     max_attempts = 40
                     for attempt in range(max_attempts):
@@ -308,6 +563,8 @@ class TuningWizard:
                         if result['success']:
                             yield {'action': 'log', 'message': f"  > SUCCESS! Optimal configuration found."}
                             best_config_params = params_to_test
+                            if planned_ncmoe is not None and attempt == 0:
+                                yield from self._probe_lower_ncmoe(best_config_params)
                             break
 
                         if not result['error_details']:
@@ -352,23 +609,46 @@ class TuningWizard:
                                'message': "> No secondary GPU detected for splitting. Cannot proceed."}
                         return
 
+                    planned_ngl, planned_counts = (0, None)
+                    if self.planner and free_vram_bytes:
+                        planned_ngl, planned_counts = self.planner.max_ngl_split(plan_params, free_vram_bytes)
+                    if planned_counts:
+                        ts_proportions = self._split_from_layer_counts(planned_counts)
+                        yield {'action': 'log',
+                               'message': f"> Memory plan predicts -ngl {planned_ngl} with a layer split of "
+                                          f"{','.join(str(c) for c in planned_counts)}. Probing around it first."}
+
                     yield {'action': 'log',
                            'message': "\n> Stage 1: Finding a safe baseline NGL via binary search..."}
                     initial_ts_string = ",".join([f"{p:.2f}" for p in ts_proportions])
                     yield {'action': 'update_params', 'params': {'-ts': initial_ts_string}}
 
+                    # With a plan, gallop outwards from the predicted value (1, 2, 4... layers)
+                    # until the answer is bracketed, then bisect as before.
                     low, high, best_known_ngl = 0, total_layers, 0
+                    next_probe = planned_ngl if planned_counts else None
+                    gallop_step, gallop_direction = 1, 0
+                    failed_ngl_values = set()
                     while low <= high:
-                        mid = (low + high) // 2
+                        mid = next_probe if next_probe is not None and low <= next_probe <= high else (low + high) // 2
+                        next_probe = None
                         if mid == 0: low = 1; continue
                         yield {'action': 'log', 'message': f"> Binary Search: Testing with -ngl {mid}"}
                         yield {'action': 'update_params', 'params': {'-ngl': str(mid)}}
                         result = yield {'action': 'test_ngl_value'}
+                        direction = 1 if result['success'] else -1
                         if result['success']:
                             best_known_ngl = mid
                             low = mid + 1
                         else:
+                            failed_ngl_values.add(mid)
                             high = mid - 1
+                        if planned_counts and gallop_direction in (0, direction):
+                            gallop_direction = direction
+                            next_probe = mid + direction * gallop_step
+                            gallop_step *= 2
+                        else:
+                            gallop_direction = None
 
                     if best_known_ngl > 0:
                         yield {'action': 'log', 'message': f"> Found a safe baseline of -ngl {best_known_ngl}."}
@@ -378,9 +658,15 @@ class TuningWizard:
                                'message': "[CRITICAL] Could not find any viable NGL value. The model may be too large for the available VRAM."}
                         return
 
-                    yield {'action': 'log',
-                           'message': "\n> Stage 2: Adaptively searching for a higher NGL by adjusting tensor split..."}
-                    max_attempts = 30
+                    plan_confirmed = planned_counts and (best_known_ngl + 1 in failed_ngl_values
+                                                         or best_known_ngl >= total_layers)
+                    if plan_confirmed:
+                        yield {'action': 'log',
+                               'message': "> The planned split is already tight. Skipping the adaptive search."}
+                    else:
+                        yield {'action': 'log',
+                               'message': "\n> Stage 2: Adaptively searching for a higher NGL by adjusting tensor split..."}
+                    max_attempts = 0 if plan_confirmed else 30
                     current_ngl_to_test = best_known_ngl + 1
 
                     tried_ts_configs_for_this_ngl = set()
@@ -2,11 +2,13 @@
 
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
                              QComboBox, QCheckBox, QStackedWidget, QTextEdit)
-from PyQt6.QtGui import QFont
 # --- FIX: Added the missing import for pyqtSignal ---
 from PyQt6.QtCore import pyqtSignal
 # ---------------------------------------------------
 from parameter_browser import ParameterBrowser
+from output_console import OutputConsole
+from metrics_panel import MetricsPanel
+from pool_panel import PoolPanel
 from Llamacpp_Model_launcher.parameters_db import HELP_DOCUMENTATION
 
 
@@ -19,13 +21,17 @@ class LeftPanel(QWidget):
     load_model_clicked = pyqtSignal()
     unload_model_clicked = pyqtSignal()
     tune_model_clicked = pyqtSignal()
+    max_context_clicked = pyqtSignal()
     exit_clicked = pyqtSignal()
     webui_toggled = pyqtSignal(bool)
+    status_changed = pyqtSignal(object)
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self._showing_commands = False
         self._showing_help = False
+        self._showing_metrics = False
+        self._showing_pool = False
         self._setup_ui()
 
     def _setup_ui(self):
@@ -71,15 +77,24 @@ class LeftPanel(QWidget):
         self.unload_button = QPushButton('Unload Model')
         self.tuning_wizard_button = QPushButton("Tune Model")
         self.tuning_wizard_button.setStyleSheet("font-weight: bold;")
+        self.max_context_button = QPushButton("Max Context")
+        self.max_context_button.setToolTip("Find the largest context size that fits with the current offload settings.")
         self.commands_button = QPushButton('Commands')
+        self.metrics_button = QPushButton('Metrics')
+        self.metrics_button.setToolTip("Live throughput and latency of the loaded server.")
+        self.pool_button = QPushButton('Pool')
+        self.pool_button.setToolTip("Run several configurations side by side, each on its own port.")
         self.help_button = QPushButton('Help')
         self.exit_button = QPushButton('Exit')
 
         self.load_button.clicked.connect(self.load_model_clicked)
         self.unload_button.clicked.connect(self.unload_model_clicked)
         self.tuning_wizard_button.clicked.connect(self.tune_model_clicked)
+        self.max_context_button.clicked.connect(self.max_context_clicked)
         self.exit_button.clicked.connect(self.exit_clicked)
         self.commands_button.clicked.connect(self._toggle_commands_view)
+        self.metrics_button.clicked.connect(self._toggle_metrics_view)
+        self.pool_button.clicked.connect(self._toggle_pool_view)
         self.help_button.clicked.connect(self._toggle_help_view)
 
         self.status_label = QLabel('Status: Unloaded')
@@ -92,16 +107,17 @@ class LeftPanel(QWidget):
         controls_layout.addWidget(self.status_label)
         controls_layout.addStretch(1)
         controls_layout.addWidget(self.tuning_wizard_button)
+        controls_layout.addWidget(self.max_context_button)
         controls_layout.addWidget(self.commands_button)
+        controls_layout.addWidget(self.metrics_button)
+        controls_layout.addWidget(self.pool_button)
         controls_layout.addWidget(self.help_button)
         controls_layout.addWidget(self.exit_button)
         layout.addLayout(controls_layout)
 
         # --- Main View Stack ---
         self.view_stack = QStackedWidget()
-        self.output_viewer = QTextEdit()
-        self.output_viewer.setReadOnly(True)
-        self.output_viewer.setFont(QFont('Courier', 10))
+        self.output_viewer = OutputConsole()
 
         self.parameter_browser = ParameterBrowser()  # Instantiate child widget
 
@@ -110,19 +126,34 @@ class LeftPanel(QWidget):
 
         self.view_stack.addWidget(self.output_viewer)
         self.view_stack.addWidget(self.parameter_browser)
+        self.metrics_panel = MetricsPanel()
+
         self.view_stack.addWidget(self.help_viewer)
+        self.view_stack.addWidget(self.metrics_panel)
+        self.pool_panel = PoolPanel()
+        self.view_stack.addWidget(self.pool_panel)
         layout.addWidget(self.view_stack)
 
     def _set_view(self, index):
         self.view_stack.setCurrentIndex(index)
         self._showing_commands = (index == 1)
         self._showing_help = (index == 2)
+        self._showing_metrics = (index == 3)
+        self._showing_pool = (index == 4)
         self.commands_button.setText("Show Output" if self._showing_commands else "Commands")
         self.help_button.setText("Show Output" if self._showing_help else "Help")
+        self.metrics_button.setText("Show Output" if self._showing_metrics else "Metrics")
+        self.pool_button.setText("Show Output" if self._showing_pool else "Pool")
 
     def _toggle_commands_view(self):
         self._set_view(0 if self._showing_commands else 1)
 
+    def _toggle_metrics_view(self):
+        self._set_view(0 if self._showing_metrics else 3)
+
+    def _toggle_pool_view(self):
+        self._set_view(0 if self._showing_pool else 4)
+
     def _toggle_help_view(self):
         if self._showing_help:
             self._set_view(0)
@@ -166,11 +197,13 @@ class LeftPanel(QWidget):
         self.status_label.setText(status_enum.label)
         self.status_indicator.setStyleSheet(
             f"background-color: {status_enum.color}; border-radius: 10px; min-width: 20px; min-height: 20px;")
+        self.status_changed.emit(status_enum)
 
     def update_button_states(self, can_load, is_running):
         self.load_button.setEnabled(can_load)
         self.unload_button.setEnabled(is_running)
         self.tuning_wizard_button.setEnabled(can_load)
+        self.max_context_button.setEnabled(can_load)
 
     def populate_dropdown(self, model_names):
         self.model_dropdown.blockSignals(True)
@@ -185,8 +218,7 @@ class LeftPanel(QWidget):
         self.model_dropdown.blockSignals(False)
 
     def append_output(self, text):
-        self.output_viewer.append(text)
-        self.output_viewer.verticalScrollBar().setValue(self.output_viewer.verticalScrollBar().maximum())
+        self.output_viewer.append_text(text)
 
     def clear_output(self):
         self.output_viewer.clear()
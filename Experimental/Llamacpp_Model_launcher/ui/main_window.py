@@ -2,17 +2,35 @@
 
 import os
 import subprocess
-import tempfile
 import webbrowser
-import re
+import struct
+import threading
+import time
 from PyQt6.QtWidgets import (QWidget, QHBoxLayout, QSplitter, QFileDialog,
                              QMessageBox, QCheckBox, QComboBox, QLineEdit, QApplication)
-from PyQt6.QtCore import QProcess, Qt, QTimer, QObject, QThread, pyqtSignal
+from PyQt6.QtCore import QProcess, QProcessEnvironment, Qt, QTimer, QObject, QThread, pyqtSignal
 
 from Llamacpp_Model_launcher.core.status import ServerStatus
 from Llamacpp_Model_launcher.core.config_manager import ConfigManager
 from Llamacpp_Model_launcher.core.model_manager import ModelManager
 from Llamacpp_Model_launcher.core.command_builder import CommandBuilder, Parameter
+from Llamacpp_Model_launcher.core import log_patterns
+from Llamacpp_Model_launcher.core.log_archive import LogArchive
+from Llamacpp_Model_launcher.core.metrics import LoadTimeLog, MetricsCollector
+from Llamacpp_Model_launcher.core.metrics_exporter import MetricsExporter
+from Llamacpp_Model_launcher.core.process_supervisor import ProcessSupervisor
+from Llamacpp_Model_launcher.core.server_pool import ServerPool, port_is_free
+from Llamacpp_Model_launcher.core.pool_api import PoolApiServer
+from Llamacpp_Model_launcher.core.routing_proxy import RoutingProxy
+from Llamacpp_Model_launcher.core.readiness import wait_until_ready
+from Llamacpp_Model_launcher.core.idle_monitor import IdleMonitor
+from Llamacpp_Model_launcher.core.restart_policy import RestartPolicy
+from Llamacpp_Model_launcher.core.resource_sampler import ResourceSampler
+from Llamacpp_Model_launcher.core.prefetch import Prefetcher, model_files
+from Llamacpp_Model_launcher.core.model_cache import ModelCache
+from Llamacpp_Model_launcher.core.launch_scheduler import LaunchScheduler
+from Llamacpp_Model_launcher.core.log_scanner import LogEventKind, LogScanner, find_devices, pick_oom_error
+from Llamacpp_Model_launcher.core.memory_planner import MemoryPlanner, PlanError, GIB
 
 from Llamacpp_Model_launcher.system_analyzer import SystemAnalyzer
 from Llamacpp_Model_launcher.tuning_wizard import TuningWizard
@@ -47,14 +65,48 @@ class StabilityRequestWorker(QObject):
         self.finished.emit()
 
 
+class PoolSignals(QObject):
+    """Carries ServerPool callbacks from its watcher threads to the GUI thread."""
+    instance_changed = pyqtSignal(object)
+    output = pyqtSignal(str, str)
+
+
+class ReadinessSignals(QObject):
+    """Carries the result of a /health poll from its thread to the GUI thread."""
+    ready = pyqtSignal(object, object)  # (the load's cancel Event, Readiness)
+
+
+class IdleSignals(QObject):
+    """Carries the IdleMonitor's verdict on the launcher's own server to the GUI thread."""
+    idle = pyqtSignal(str, float)  # (configuration name, idle seconds)
+
+
+class ResourceSignals(QObject):
+    """Carries the ResourceSampler's samples of the launcher's own server to the GUI thread."""
+    sample = pyqtSignal(object)  # ResourceSample
+
+
+class PrefetchSignals(QObject):
+    """Carries the Prefetcher's progress and result from its thread to the GUI thread."""
+    progress = pyqtSignal(object)  # PrefetchProgress
+    done = pyqtSignal(object)  # PrefetchResult
+
+
+class DeviceProbeSignals(QObject):
+    """Carries the result of 'llama-server --list-devices' from its thread to the GUI thread."""
+    done = pyqtSignal(object, object)  # (the wizard generator that asked, probe result dict)
+
+
 class MainWindow(QWidget):
+    # Returned by _execute_wizard_action when the result arrives later via a process signal.
+    _WIZARD_WAIT = object()
+
     def __init__(self):
         super().__init__()
         self.process = None
         self.config_file = 'config.ini'
         self.llamacpp_dir = ''
         self.models_file = ''
-        self.temp_batch_file = ''
         self.is_editing_new_model = False
         self.is_dirty = False
         self.previous_model_index = -1
@@ -68,27 +120,57 @@ class MainWindow(QWidget):
         self.analysis_results = None
         # ... (all other wizard and regex attributes are unchanged)
         self.wizard_generator = None
-        self.wizard_timer = QTimer(self)
+        self.wizard_pending_logs = []
+        self.wizard_pending_updates = {}
+        self.wizard_pending_result = None
         self.wizard_is_benchmarking = False
         self.output_buffer = ""
         self.output_update_timer = QTimer(self)
-        self.tps_regex = re.compile(
-            r"^\s*eval time\s*=\s*[\d.]+\s*ms\s*/\s*\d+\s*tokens\s*\([\s\d.]+\s*ms per token,\s*([\d.]+)\s*tokens per second\)",
-            re.MULTILINE
-        )
-        self.idle_regex = re.compile(r"all slots are idle", re.IGNORECASE)
-        self.layer_count_regex = re.compile(r"n_layer\s*=\s*(\d+)", re.IGNORECASE)
-        self.cuda_oom_regex_alloc = re.compile(
-            r"allocating\s+([\d.]+)\s+MiB\s+on\s+device\s+(\d+):\s+cudaMalloc\s+failed:\s+out\s+of\s+memory",
-            re.IGNORECASE
-        )
-        self.cuda_oom_regex_generic = re.compile(r"CUDA error: out of memory\s+current device: (\d+)", re.IGNORECASE)
-        self.cuda_oom_regex_resource = re.compile(
-            r"CUDA error:\s+the\s+resource\s+allocation\s+failed\s+current\s+device:\s+(\d+)",
-            re.IGNORECASE
-        )
-        self.cuda_device_regex = re.compile(r"Device\s+(\d+):\s+([^,]+),", re.IGNORECASE)
-        self.soft_failure_regex = re.compile(r"eval time\s*=\s*0\.00\s*ms\s*/\s*1\s*tokens", re.IGNORECASE)
+        self.log_scanner = LogScanner()
+        self.log_archive = LogArchive()
+        self.log_session = None
+        self.metrics = MetricsCollector()
+        self.resource_signals = ResourceSignals()
+        self.resource_sampler = ResourceSampler(on_sample=self.resource_signals.sample.emit)
+        self.exporter = MetricsExporter(vram_source=SystemAnalyzer().get_live_vram_usage,
+                                        resource_source=self.resource_sampler.latest)
+        self._load_started = None
+        self._readiness_cancel = None
+        self._model_loaded_logged_at = None
+        self.readiness_signals = ReadinessSignals()
+        self.device_probe_signals = DeviceProbeSignals()
+        self.load_times = LoadTimeLog()
+        self.idle_signals = IdleSignals()
+        self.idle_monitor = None
+        self._loaded_model_name = None
+        self._hibernating = False
+        self.restart_policy = None
+        self.restart_timer = QTimer(self)
+        self._pending_restart = None
+        self._auto_restarting = False
+        self._launch_is_restart = False
+        self._launched_model_name = None
+        self._start_failed = False
+        self._run_oom_events = []
+        self._run_layer_count = None
+        self.prefetch_signals = PrefetchSignals()
+        self.prefetcher = None
+        self._prefetch_params = None
+        self._prefetch_reported = 0
+        self.model_cache = None
+        self.supervisor = ProcessSupervisor()
+        self.process_own_group = False
+        self._unload_started = None
+        self._unload_pid = None
+        self._unload_forced = False
+        self.pool_signals = PoolSignals()
+        self.pool = ServerPool('', resolve_command=lambda name: self.model_manager.models.get(name),
+                               supervisor=self.supervisor, log_archive=self.log_archive,
+                               on_change=self.pool_signals.instance_changed.emit,
+                               on_output=self.pool_signals.output.emit, load_times=self.load_times,
+                               metrics_exporter=self.exporter)
+        self.pool_api = None
+        self.proxy = None
         self.wizard_found_layers = None
         self.wizard_error_details = None
         self.wizard_found_gpus = []
@@ -97,9 +179,13 @@ class MainWindow(QWidget):
         self.wizard = None
         self.wizard_current_is_viability_check = False
         self.wizard_awaiting_idle_signal = False
+        self.wizard_stability_request_seen = False
         self.wizard_idle_signal_received = False
         self.wizard_saw_soft_failure_artifact = False
         self.best_params_snapshot = ""
+        self.kv_estimate_timer = QTimer(self)
+        self._planner_cache = {}
+        self._visible_gpu_count = None
 
         self._init_ui()
         self._connect_signals()
@@ -107,6 +193,12 @@ class MainWindow(QWidget):
         # Initial load
         self.load_config()
         self.populate_model_dropdown()
+        self._start_metrics_exporter()
+        self._configure_idle_unload()
+        self._configure_auto_restart()
+        self._configure_prefetch()
+        self._configure_model_cache()
+        self._configure_pool()
 
     def _init_ui(self):
         self.setWindowTitle('Llama.cpp Model Launcher')
@@ -123,22 +215,44 @@ class MainWindow(QWidget):
         splitter.addWidget(self.right_panel)
         splitter.setSizes([1050, 400])
 
-        self.wizard_timer.timeout.connect(self._process_next_wizard_step)
         self.output_update_timer.setInterval(100)
         self.output_update_timer.timeout.connect(self.flush_output_buffer)
+        self.kv_estimate_timer.setSingleShot(True)
+        self.restart_timer.setSingleShot(True)
+        self.restart_timer.timeout.connect(self._auto_restart)
+        self.kv_estimate_timer.setInterval(150)
+        self.kv_estimate_timer.timeout.connect(self._update_kv_estimate)
 
     def _connect_signals(self):
         # Left Panel Signals
+        self.left_panel.status_changed.connect(self.exporter.set_status)
         self.left_panel.dir_browse_clicked.connect(self.browse_llamacpp_directory)
         self.left_panel.file_browse_clicked.connect(self.browse_models_file)
         self.left_panel.model_selected.connect(self.model_selected)
         self.left_panel.load_model_clicked.connect(self.load_model)
         self.left_panel.unload_model_clicked.connect(self.unload_model)
         self.left_panel.tune_model_clicked.connect(self.start_tuning_wizard)
+        self.left_panel.max_context_clicked.connect(self.start_context_maximizer)
         self.left_panel.exit_clicked.connect(self.close)
         self.left_panel.webui_toggled.connect(self.update_auto_open_visibility)
         self.left_panel.parameter_browser.parameter_add_requested.connect(self.add_parameter_from_browser)
 
+        # Server Pool Signals
+        pool_panel = self.left_panel.pool_panel
+        pool_panel.load_requested.connect(self.load_pool_instance)
+        pool_panel.unload_requested.connect(self.unload_pool_instance)
+        pool_panel.open_requested.connect(lambda name: self.pool.get(name) and webbrowser.open(self.pool.get(name).url))
+        self.pool_signals.instance_changed.connect(pool_panel.update_instance)
+        self.pool_signals.output.connect(pool_panel.append_output)
+        self.readiness_signals.ready.connect(self._on_readiness)
+        self.device_probe_signals.done.connect(self._on_device_probe_done)
+        self.idle_signals.idle.connect(self._hibernate_server)
+        self.prefetch_signals.progress.connect(self._on_prefetch_progress)
+        self.prefetch_signals.done.connect(self._on_prefetch_done)
+        self.resource_signals.sample.connect(lambda _: self.left_panel.metrics_panel.refresh_resources(self.resource_sampler))
+        self.left_panel.metrics_panel.export_resources_requested.connect(self.export_resource_samples)
+        self.left_panel.metrics_panel.refresh_resources(self.resource_sampler)
+
         # Right Panel Signals
         self.right_panel.save_clicked.connect(self.save_parameters)
         self.right_panel.delete_clicked.connect(self.delete_model)
@@ -146,6 +260,7 @@ class MainWindow(QWidget):
         self.right_panel.duplicate_clicked.connect(self.duplicate_model)
         self.right_panel.reset_clicked.connect(self._reset_current_model)
         self.right_panel.dirty_state_changed.connect(lambda is_dirty: setattr(self, 'is_dirty', is_dirty))
+        self.right_panel.parameters_changed.connect(self.kv_estimate_timer.start)
 
     # --- Core Logic Methods (previously in LlamaCppGUI) ---
 
@@ -295,8 +410,10 @@ class MainWindow(QWidget):
 
     def update_button_states(self):
         is_running = self.process is not None and self.process.state() == QProcess.ProcessState.Running
-        can_load = not is_running and bool(self.llamacpp_dir) and bool(self.model_manager.models)
-        self.left_panel.update_button_states(can_load, is_running)
+        prefetching = self._prefetch_params is not None
+        can_load = not is_running and not prefetching and bool(self.llamacpp_dir) and bool(self.model_manager.models)
+        # Unload also cancels a pending automatic restart or a prewarm.
+        self.left_panel.update_button_states(can_load, is_running or prefetching or self.restart_timer.isActive())
 
     def browse_llamacpp_directory(self):
         directory = QFileDialog.getExistingDirectory(self, "Select Llama.cpp Directory")
@@ -320,6 +437,7 @@ class MainWindow(QWidget):
         models = self.model_manager.load_models()
         model_names = list(models.keys())
         self.left_panel.populate_dropdown(model_names)
+        self.left_panel.pool_panel.set_models(model_names)
         self.update_button_states()
 
         if self.left_panel.model_dropdown.count() > 0:
@@ -329,12 +447,238 @@ class MainWindow(QWidget):
             self.model_selected(-1)
         return model_names
 
+    def _start_metrics_exporter(self):
+        enabled, host, port = self.config_manager.load_exporter_settings()
+        if not enabled:
+            return
+        self.exporter.host, self.exporter.port = host, port
+        success, message = self.exporter.start()
+        print(f"[DIAGNOSTICS] {message}")
+        self.left_panel.append_output(f"[INFO] {message}" if success else f"[WARNING] {message}")
+
+    def _configure_pool(self):
+        api_enabled, host, port, port_range = self.config_manager.load_pool_settings()
+        self.pool.port_range = port_range
+        services = []
+        if api_enabled:
+            self.pool_api = PoolApiServer(self.pool, host, port)
+            services.append(self.pool_api)
+        proxy_settings = self.config_manager.load_proxy_settings()
+        if proxy_settings['enabled']:
+            self.proxy = RoutingProxy(self.pool, lambda: list(self.model_manager.models),
+                                      proxy_settings['host'], proxy_settings['port'],
+                                      proxy_settings['vram_budget_gb'], proxy_settings['ram_budget_gb'],
+                                      proxy_settings['max_instances'],
+                                      on_request=self.pool.idle_monitor.touch if self.pool.idle_monitor else None,
+                                      n_devices=max(1, self._get_visible_gpu_count()))
+            services.append(self.proxy)
+        for service in services:
+            success, message = service.start()
+            print(f"[DIAGNOSTICS] {message}")
+            self.left_panel.append_output(f"[INFO] {message}" if success else f"[WARNING] {message}")
+        self._configure_launch_queue()
+
+    def _configure_launch_queue(self):
+        """Queues pool loads per disk if [LaunchQueue] is enabled and loads its Preload configurations."""
+        settings = self.config_manager.load_launch_queue_settings()
+        if settings['enabled']:
+            self.pool.launch_scheduler = LaunchScheduler(settings['per_device'], settings['priorities'])
+        if not settings['preload'] or not self.llamacpp_dir:
+            return
+        for name, success, message in self.pool.preload(settings['preload']):
+            print(f"[DIAGNOSTICS] Preload: {message}")
+            if not success:
+                self.left_panel.append_output(f"[WARNING] Preload of '{name}': {message}")
+
+    def _configure_idle_unload(self):
+        """Starts the idle monitors of the launcher's own server and of the pool if [IdleUnload] sets a timeout."""
+        settings = self.config_manager.load_idle_settings()
+        args = (settings['default_minutes'], settings['per_config_minutes'], settings['check_seconds'])
+        monitor = IdleMonitor(self.idle_signals.idle.emit, *args)
+        if not monitor.enabled:
+            return
+        self.idle_monitor = monitor
+        self.pool.idle_monitor = IdleMonitor(self.pool.hibernate, *args)
+        self.idle_monitor.start()
+        self.pool.idle_monitor.start()
+        print(f"[DIAGNOSTICS] Idle unload enabled (default {settings['default_minutes']:g} min, "
+              f"{len(settings['per_config_minutes'])} per-configuration timeout(s)).")
+
+    def _configure_auto_restart(self):
+        """Sets up the crash restart policies of the launcher's own server and of the pool if [AutoRestart] opts in."""
+        settings = self.config_manager.load_restart_settings()
+        policy = RestartPolicy(**settings)
+        if not policy.enabled:
+            return
+        self.restart_policy = policy
+        self.pool.restart_policy = RestartPolicy(**settings)
+        print(f"[DIAGNOSTICS] Auto-restart enabled (at most {policy.max_crashes - 1} restarts "
+              f"per {policy.window_seconds / 60:g} min).")
+
+    def _configure_prefetch(self):
+        """Prewarms model files before the launcher's own server starts if [Prefetch] is enabled."""
+        settings = self.config_manager.load_prefetch_settings()
+        if not settings['enabled']:
+            return
+        self.prefetcher = Prefetcher(settings['method'], settings['chunk_mb'])
+        print(f"[DIAGNOSTICS] Page-cache prewarming enabled (method: {self.prefetcher.method}).")
+
+    def _configure_model_cache(self):
+        """Sets up the hot-model cache on fast storage, shared by the launcher's server and the pool, if [ModelCache] configures one."""
+        settings = self.config_manager.load_model_cache_settings()
+        if not settings['directory'] or settings['budget_gb'] <= 0:
+            return
+        try:
+            self.model_cache = ModelCache(settings['directory'], int(settings['budget_gb'] * GIB),
+                                          settings['min_launches'])
+        except OSError as e:
+            print(f"[DIAGNOSTICS] Model cache disabled: {e}")
+            return
+        self.pool.model_cache = self.model_cache
+        print(f"[DIAGNOSTICS] Model cache: '{self.model_cache.cache_dir}', {settings['budget_gb']:g} GB budget.")
+
+    def _apply_model_cache(self, params):
+        """Rewrites the model paths of a launch to their cached copies; wizard trials do not count as launches."""
+        if not self.model_cache:
+            return params
+        cached = self.model_cache.resolve({p.key: p.value for p in params}, self.llamacpp_dir,
+                                          record=self.wizard_generator is None)
+        if not cached:
+            return params
+        self.left_panel.append_output(f"[CACHE] Using the cached copy {', '.join(cached.values())}")
+        return [Parameter(p.key, cached.get(p.key, p.value)) for p in params]
+
+    def _start_prefetch(self, params):
+        """
+        Starts prewarming the model files of `params` unless they are warm already.
+        Returns:
+            True if the launch continues in _on_prefetch_done.
+        """
+        if not self.prefetcher:
+            return False
+        files = model_files({p.key: p.value for p in params}, self.llamacpp_dir)
+        started, message = self.prefetcher.start(files, on_progress=self.prefetch_signals.progress.emit,
+                                                 on_done=self.prefetch_signals.done.emit)
+        if message:
+            self.left_panel.append_output(f"[PREFETCH] {message}")
+        if not started:
+            return False
+        self._prefetch_params = params
+        self._prefetch_reported = 0
+        self.left_panel.set_status(ServerStatus.LOADING)
+        self.update_button_states()
+        return True
+
+    def _on_prefetch_progress(self, progress):
+        # One line per tenth of the data keeps the console readable for 100 GB models.
+        tenth = int(progress.done_bytes * 10 / progress.total_bytes) if progress.total_bytes else 10
+        if tenth <= self._prefetch_reported or self._prefetch_params is None:
+            return
+        self._prefetch_reported = tenth
+        rate = progress.done_bytes / 1024 ** 2 / progress.seconds if progress.seconds else 0.0
+        self.left_panel.append_output(f"[PREFETCH] {tenth * 10}% ({progress.done_bytes / GIB:.1f} of "
+                                      f"{progress.total_bytes / GIB:.1f} GB, {rate:,.0f} MiB/s)")
+
+    def _on_prefetch_done(self, result):
+        params, self._prefetch_params = self._prefetch_params, None
+        if params is None:
+            return  # Cancelled by unload_model.
+        self.left_panel.append_output(f"[PREFETCH] {result.message}")
+        if self.benchmark_timeout_timer and self.benchmark_timeout_timer.isActive():
+            self.benchmark_timeout_timer.start()  # A wizard trial's time budget starts with its server.
+        self._launch_server(params)
+
+    def _handle_crash(self, name, exit_code):
+        """Asks the restart policy about an unexpected exit of the launcher's server and schedules the restart it allows."""
+        if not self.restart_policy or not name or not self.restart_policy.enabled_for(name):
+            return
+        params = {p.key: p.value for p in self.right_panel.get_parameters()}
+        decision = self.restart_policy.on_crash(name, exit_code, pick_oom_error(self._run_oom_events), params,
+                                                self._run_layer_count)
+        self.left_panel.append_output(f"\n[RESTART] {decision.message}")
+        print(f"[DIAGNOSTICS] Auto-restart of '{name}': {decision.message}")
+        if decision.restart:
+            self._pending_restart = (name, decision.updates)
+            self.restart_timer.start(int(decision.delay * 1000))
+            self.update_button_states()
+
+    def _auto_restart(self):
+        name, updates = self._pending_restart
+        self._pending_restart = None
+        if self.process or self.right_panel.get_model_name() != name:
+            print(f"[DIAGNOSTICS] Auto-restart of '{name}' skipped; another server or configuration is active.")
+            return
+        if updates:
+            self._update_editor_params(updates)
+            changes = ", ".join(f"{key} {value}" for key, value in updates.items())
+            self.left_panel.append_output(f"[RESTART] Using a smaller configuration ({changes}); "
+                                          f"save it to keep the change.")
+        self._auto_restarting = True
+        try:
+            self.load_model()
+        finally:
+            self._auto_restarting = False
+
+    def export_resource_samples(self):
+        """Saves the sampled CPU, memory and disk history of the launched servers as CSV."""
+        path, _ = QFileDialog.getSaveFileName(self, "Export Resource Samples", "resource_samples.csv", "CSV Files (*.csv)")
+        if not path:
+            return
+        success, message = self.resource_sampler.export_csv(path)
+        if success:
+            QMessageBox.information(self, "Export Complete", message)
+        else:
+            QMessageBox.critical(self, "Export Failed", message)
+
+    def _hibernate_server(self, name, idle_seconds):
+        if name != self._loaded_model_name or not self.process or self.process.state() != QProcess.ProcessState.Running:
+            return
+        self.left_panel.append_output(f"\n[INFO] '{name}' has not been used for {round(idle_seconds / 60, 1):g} min; "
+                                      f"unloading it to free memory. Load it again when needed.")
+        self._hibernating = True
+        self.unload_model()
+
+    def load_pool_instance(self, name):
+        if not self.llamacpp_dir: QMessageBox.warning(self, "Warning", "Set the Llama.cpp directory first."); return
+        success, message = self.pool.load(name)
+        if not success:
+            QMessageBox.warning(self, "Server Pool", message)
+
+    def unload_pool_instance(self, name):
+        success, message = self.pool.unload(name)
+        if not success:
+            QMessageBox.information(self, "Server Pool", message)
+
+    def _single_server_ports(self):
+        """The port of the server started with 'Load Model', while it runs."""
+        if not self.process:
+            return set()
+        _, port = self.get_server_address_from_command()
+        return {int(port)} if str(port).isdigit() else set()
+
+    def _check_server_port(self):
+        """Warns and returns False if the port in the editor is taken by a pool server or another program."""
+        host, port = self.get_server_address_from_command()
+        if not str(port).isdigit():
+            return True
+        if int(port) in self.pool.active_ports():
+            owner = next(i.name for i in self.pool.instances() if i.port == int(port))
+            QMessageBox.warning(self, "Port In Use", f"Port {port} is used by the pool server '{owner}'.\n"
+                                                     "Change --port or unload that server first.")
+            return False
+        if not port_is_free(host, port):
+            QMessageBox.warning(self, "Port In Use", f"Port {port} on {host} is already in use by another program.\n"
+                                                     "Change --port or stop the other server first.")
+            return False
+        return True
+
     def load_config(self):
         self.llamacpp_dir, self.models_file = self.config_manager.load_config()
         self.model_manager.set_models_file(self.models_file)
         self.update_path_labels()
 
     def update_path_labels(self):
+        self.pool.llamacpp_dir = self.llamacpp_dir
         dir_valid = os.path.isdir(self.llamacpp_dir)
         models_valid = os.path.isfile(self.models_file)
         self.left_panel.update_path_labels(self.llamacpp_dir, self.models_file, dir_valid, models_valid)
@@ -349,9 +693,87 @@ class MainWindow(QWidget):
             elif reply == QMessageBox.StandardButton.Cancel:
                 event.ignore()
                 return
-        self.unload_model()
+        self.unload_model(wait=True)
+        for monitor in (self.idle_monitor, self.pool.idle_monitor):
+            if monitor:
+                monitor.stop()
+        if self.proxy:
+            self.proxy.stop()
+        if self.pool_api:
+            self.pool_api.stop()
+        self.pool.unload_all(wait=True)
+        self._end_log_session(reason='launcher closed')
+        self.exporter.stop()
+        self.resource_sampler.detach()
+        self.left_panel.output_viewer.history.close()
         event.accept()
 
+    # --- Live KV-cache estimate ---
+
+    def _get_planner(self, model_path):
+        """Returns a cached MemoryPlanner for the model, re-reading it only if the file changed."""
+        try:
+            stat = os.stat(model_path)
+        except OSError:
+            return None
+        cache_key = (stat.st_size, stat.st_mtime)
+        cached = self._planner_cache.get(model_path)
+        if cached and cached[0] == cache_key:
+            return cached[1]
+        try:
+            planner = MemoryPlanner.from_model(model_path)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"[DIAGNOSTICS] Could not read GGUF metadata for KV estimate: {e}")
+            planner = None
+        self._planner_cache[model_path] = (cache_key, planner)
+        return planner
+
+    def _get_visible_gpu_count(self):
+        if self._visible_gpu_count is None:
+            self._visible_gpu_count = len(SystemAnalyzer().get_live_vram_usage() or {})
+        return self._visible_gpu_count
+
+    def _update_kv_estimate(self):
+        params = {p.key: p.value for p in self.right_panel.get_parameters()}
+        model_path = params.get('-m', params.get('--model'))
+        planner = self._get_planner(model_path) if model_path else None
+        if planner is None:
+            self.right_panel.set_kv_estimate("")
+            return
+
+        options = planner.options_from_params(params)
+        try:
+            prediction = planner.predict(params, n_devices=max(1, self._get_visible_gpu_count()))
+        except PlanError as e:
+            # Typically a value still being edited, e.g. '-ts 3,'.
+            self.right_panel.set_kv_estimate(f"KV Cache: estimate unavailable ({e})")
+            return
+        kv_total = sum(prediction['kv_devices'].values()) + prediction['kv_host']
+
+        placement = [f"GPU {d}: {kv / GIB:.2f} GB" for d, kv in sorted(prediction['kv_devices'].items()) if kv]
+        if prediction['kv_host']:
+            placement.append(f"CPU: {prediction['kv_host'] / GIB:.2f} GB")
+        text = (f"KV Cache: {kv_total / GIB:.2f} GB for {options['n_ctx']} tokens "
+                f"(K {options['cache_type_k']}, V {options['cache_type_v']})")
+        if placement:
+            text += "\n" + " | ".join(placement)
+        if planner.kv.swa_layer_count and not options['swa_full']:
+            text += f"\n{planner.kv.swa_layer_count} of {planner.n_layer} layers use a {planner.kv.n_swa}-token sliding window."
+
+        draft_path = params.get('-md', params.get('--model-draft'))
+        draft_planner = self._get_planner(draft_path) if draft_path else None
+        if draft_planner is not None:
+            draft_params = {
+                '-c': params.get('-cd', params.get('--ctx-size-draft', str(options['n_ctx']))),
+                '-ctk': params.get('-ctkd', params.get('--cache-type-k-draft', 'f16')),
+                '-ctv': params.get('-ctvd', params.get('--cache-type-v-draft', 'f16')),
+            }
+            draft_options = draft_planner.options_from_params(draft_params)
+            draft_kv = draft_planner.kv.total_bytes(draft_options['n_ctx'], draft_options['cache_type_k'],
+                                                    draft_options['cache_type_v'])
+            text += f"\nDraft KV Cache: {draft_kv / GIB:.2f} GB"
+        self.right_panel.set_kv_estimate(text)
+
     def get_server_address_from_command(self):
         host, port = 'localhost', '8080'
         params_from_editor = self.right_panel.get_parameters()
@@ -370,165 +792,271 @@ class MainWindow(QWidget):
         params_from_editor = self.right_panel.get_parameters()
         command_str = self.command_builder.build(params_from_editor)
         if not command_str: QMessageBox.warning(self, "Warning", "Command is empty."); return
+        # The wizard checks once when it starts; its trials reuse the port the previous trial released.
+        if self.wizard_generator is None and not self._check_server_port(): return
+        if not self._auto_restarting:
+            # Loading by hand cancels a pending restart and starts a fresh crash history.
+            self.restart_timer.stop()
+            self._pending_restart = None
+            if self.restart_policy:
+                self.restart_policy.reset(self.right_panel.get_model_name())
+
+        # Only restarts by the restart policy count as restarts in the metrics, not loads by hand.
+        self._launch_is_restart = self._auto_restarting
+        self.left_panel.clear_output()
+        params_from_editor = self._apply_model_cache(params_from_editor)
+        if self._start_prefetch(params_from_editor):
+            return
+        self._launch_server(params_from_editor)
 
+    def _launch_server(self, params_from_editor):
+        command_str = self.command_builder.build(params_from_editor)
         log_msg = f"Working Dir: {self.llamacpp_dir}\nExecuting Command: {command_str}\n\n" + "=" * 80 + "\n"
-        self.left_panel.clear_output()
         self.left_panel.append_output(log_msg)
         print(f"\n[DIAGNOSTICS] LAUNCHING SERVER\n[DIAGNOSTICS] > {command_str}\n")
 
-        if not self.left_panel.webui_checkbox.isChecked() and '--no-webui' not in command_str:
-            command_str += ' --no-webui'
-        else:
-            command_str = re.sub(r'\s+--no-webui\b', '', command_str)
-
-        try:
-            temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='.bat', delete=False, encoding='utf-8')
-            self.temp_batch_file = temp_file.name
-            temp_file.write(f'@echo off\n{command_str}')
-            temp_file.close()
-        except Exception as e:
-            QMessageBox.critical(self, "File Error", f"Could not create temp batch file:\n{e}");
-            return
+        params_from_editor = [p for p in params_from_editor if p.key != '--no-webui']
+        if not self.left_panel.webui_checkbox.isChecked():
+            params_from_editor.append(Parameter('--no-webui', None))
 
+        # The server is executed directly from its argument vector: no temp script, no shell and no re-quoting.
+        args = self.command_builder.launch_args(params_from_editor, self.llamacpp_dir)
+        self.log_scanner = LogScanner()
+        self._start_log_session(subprocess.list2cmdline(args))
         self.process = QProcess();
         self.process.setProcessChannelMode(QProcess.ProcessChannelMode.MergedChannels)
+        self.process.setProcessEnvironment(QProcessEnvironment.systemEnvironment())
         self.process.readyReadStandardOutput.connect(self.handle_stdout);
         self.process.finished.connect(self.process_finished)
+        self.process.errorOccurred.connect(self.process_error)
         self.process.setWorkingDirectory(self.llamacpp_dir);
-        self.process.start(self.temp_batch_file)
+        # A session of its own lets unload_model stop the server and anything it spawned as one group.
+        self.process_own_group = os.name != 'nt' and hasattr(self.process, 'setUnixProcessParameters')
+        if self.process_own_group:
+            self.process.setUnixProcessParameters(QProcess.UnixProcessFlag.CreateNewSession)
+        self._unload_started = None
+        self._launched_model_name = self.right_panel.get_model_name()
+        self._start_failed = False
+        self._run_oom_events = []
+        self._run_layer_count = None
+        self.process.start(args[0], args[1:])
+        self._load_started = time.monotonic()
+        self._start_readiness_poll()
+        self.exporter.record_start(self.right_panel.get_model_name() or 'server', self.process.processId() or None,
+                                   restart=self._launch_is_restart)
+        self.resource_sampler.attach(self.process.processId() or None, self.right_panel.get_model_name() or 'server')
+        self.pool.reserved_ports = self._single_server_ports()
         self.left_panel.set_status(ServerStatus.LOADING);
         self.update_button_states()
 
+    def _start_readiness_poll(self):
+        """
+        Polls the new server's /health endpoint on a background thread. The 'model loaded'
+        output line only decides readiness if the endpoint does not answer.
+        """
+        self._stop_readiness_poll()
+        cancel = self._readiness_cancel = threading.Event()
+        self._model_loaded_logged_at = None
+        host, port = self.get_server_address_from_command()
+        started = self._load_started
+
+        def poll():
+            readiness = wait_until_ready(host, port, None, started=started,
+                                         log_says_loaded=lambda: self._model_loaded_logged_at,
+                                         should_stop=cancel.is_set)
+            if not cancel.is_set():
+                self.readiness_signals.ready.emit(cancel, readiness)
+
+        threading.Thread(target=poll, name='readiness', daemon=True).start()
+
+    def _stop_readiness_poll(self):
+        if self._readiness_cancel:
+            self._readiness_cancel.set()
+            self._readiness_cancel = None
+
+    def _on_readiness(self, cancel, readiness):
+        if cancel is not self._readiness_cancel or cancel.is_set():
+            return  # The load was cancelled or replaced.
+        self._readiness_cancel = None
+        if readiness.ready and "Loading..." in self.left_panel.status_label.text():
+            self._on_model_loaded(readiness)
+
+    def process_error(self, error):
+        # Without a shell in between, a missing or non-executable binary never emits 'finished'.
+        # The error can be raised from inside start(), so finish on the next event loop turn.
+        if error != QProcess.ProcessError.FailedToStart or not self.process:
+            return
+        self.left_panel.append_output(f"\n--- Could not start the server: {self.process.errorString()} ---\n")
+        self._start_failed = True
+        QTimer.singleShot(0, self.process_finished)
+
     def handle_stdout(self):
         try:
-            data = self.process.readAllStandardOutput().data().decode('utf-8', errors='ignore');
-            self.output_buffer += data
-            if not self.output_update_timer.isActive(): self.output_update_timer.start()
-
-            if self.wizard_is_benchmarking and self.wizard_current_is_viability_check == "layer_extraction":
-                layer_match = self.layer_count_regex.search(self.output_buffer)
-                if layer_match:
-                    try:
-                        layer_count = int(layer_match.group(1))
-                        if self.wizard_found_layers is None:
-                            self.wizard_found_layers = layer_count
-                            print(f"[DIAGNOSTICS] Found layer count: {layer_count}.")
-                            self.left_panel.append_output(f"[WIZARD] Found n_layer = {layer_count}")
-                    except (ValueError, IndexError):
-                        pass
-
-                gpu_matches = self.cuda_device_regex.finditer(self.output_buffer)
-                for match in gpu_matches:
-                    try:
-                        gpu_id = int(match.group(1))
-                        gpu_name = match.group(2).strip()
-                        if not any(g['id'] == gpu_id for g in self.wizard_found_gpus):
-                            self.wizard_found_gpus.append({'id': gpu_id, 'name': gpu_name})
-                            print(f"[DIAGNOSTICS] Found GPU Device {gpu_id}: {gpu_name}")
-                    except (ValueError, IndexError):
-                        pass
-
-                if self.wizard_found_layers is not None and len(self.wizard_found_gpus) > 0:
-                    self.unload_model()
-
-            if self.wizard_is_benchmarking and self.wizard_current_is_viability_check:
-                oom_match_alloc = self.cuda_oom_regex_alloc.search(self.output_buffer)
-                oom_match_generic = self.cuda_oom_regex_generic.search(self.output_buffer)
-                oom_match_resource = self.cuda_oom_regex_resource.search(self.output_buffer)
-                oom_match = oom_match_alloc or oom_match_generic or oom_match_resource
-
-                if oom_match:
-                    size_mib, device_id = 0.0, -1
-                    if oom_match == oom_match_alloc:
-                        size_mib = float(oom_match.group(1))
-                        device_id = int(oom_match.group(2))
-                    else:
-                        size_mib = 0.0
-                        device_id = int(oom_match.group(1))
-
-                    self.wizard_error_details = {
-                        'type': 'oom',
-                        'size_mib': size_mib,
-                        'device_id': device_id
-                    }
-                    print(f"[DIAGNOSTICS] Captured OOM error: {self.wizard_error_details}")
-
+            data = self.process.readAllStandardOutput().data()
+            self._consume_output(*self.log_scanner.feed(data))
         except Exception as e:
             self.output_buffer += f"\n--- Error reading output: {e} ---\n"
 
+    def _start_log_session(self, command_str):
+        self._end_log_session()
+        self.metrics.start_session(self.right_panel.get_model_name() or 'server')
+        try:
+            self.log_session = self.log_archive.start_session(self.right_panel.get_model_name() or 'server', command_str)
+        except OSError as e:
+            print(f"[DIAGNOSTICS] Could not start log archive session: {e}")
+            self.log_session = None
+
+    def _end_log_session(self, exit_code=None, reason=''):
+        self.metrics.end_session()
+        if self.log_session:
+            self.log_session.end(exit_code, reason)
+            self.log_session = None
+
+    def _consume_output(self, text, events):
+        """Queues decoded text for the console and dispatches the log events parsed from it."""
+        if self.log_session:
+            self.log_session.write(text, events)
+        samples = self.metrics.feed(events)
+        if samples:
+            for sample in samples:
+                self.exporter.observe(sample)
+            self.left_panel.metrics_panel.refresh(self.metrics)
+            if self.idle_monitor and self._loaded_model_name:
+                self.idle_monitor.touch(self._loaded_model_name)
+        self.output_buffer += text
+        if not events:
+            if self.output_buffer and not self.output_update_timer.isActive(): self.output_update_timer.start()
+            return
+
+        # Show the lines behind the events before any messages the events themselves produce.
+        self.flush_output_buffer()
+        scanner = self.log_scanner
+        for event in events:
+            if scanner is not self.log_scanner: break  # A handler started a new server.
+            self._handle_log_event(event)
+
     def flush_output_buffer(self):
         if not self.output_buffer: self.output_update_timer.stop(); return
         text_to_append = self.output_buffer;
         self.output_buffer = ""
         self.left_panel.append_output(text_to_append)
 
-        if self.wizard_is_benchmarking and self.wizard_current_is_viability_check == "ngl_testing":
-            if self.soft_failure_regex.search(text_to_append):
+    def _handle_log_event(self, event):
+        if event.kind in (LogEventKind.SOFT_FAILURE, LogEventKind.EVAL_TIMING, LogEventKind.TOTAL_TIMING):
+            # The stability request has been answered; the next idle signal belongs to it.
+            self.wizard_stability_request_seen = self.wizard_awaiting_idle_signal
+
+        if event.kind == LogEventKind.LAYER_COUNT and self._run_layer_count is None:
+            self._run_layer_count = event.value
+        elif event.kind == LogEventKind.OOM:
+            self._run_oom_events.append(event.value)
+
+        if event.kind == LogEventKind.LAYER_COUNT or event.kind == LogEventKind.DEVICE:
+            if self.wizard_is_benchmarking and self.wizard_current_is_viability_check == "layer_extraction":
+                self._record_layer_extraction_event(event)
+
+        elif event.kind == LogEventKind.OOM:
+            if self.wizard_is_benchmarking and self.wizard_current_is_viability_check:
+                self.wizard_error_details = pick_oom_error(
+                    [e for e in (self.wizard_error_details, event.value) if e])
+                print(f"[DIAGNOSTICS] Captured OOM error: {self.wizard_error_details}")
+
+        elif event.kind == LogEventKind.SOFT_FAILURE:
+            if self.wizard_is_benchmarking and self.wizard_current_is_viability_check == "ngl_testing":
                 print("[DIAGNOSTICS] Soft failure artifact detected. Flagging for failure.")
                 self.left_panel.append_output("[WIZARD] **Detected unstable server signature (soft failure).**")
                 self.wizard_saw_soft_failure_artifact = True
 
-        if self.wizard_is_benchmarking and not self.wizard_current_is_viability_check and len(
-                self.wizard_tps_results) < 3:
-            matches = self.tps_regex.findall(text_to_append)
-            for match in matches:
-                try:
-                    tps_value = float(match)
-                    if tps_value > 5000:
-                        print(f"[DIAGNOSTICS] Discarding unrealistic TPS value: {tps_value}")
-                        continue
-
-                    self.wizard_tps_results.append(tps_value)
-                    log_msg = f"[WIZARD] Found TPS value: {tps_value:.2f}. ({len(self.wizard_tps_results)}/3)"
-                    self.left_panel.append_output(log_msg)
-                    print(f"[DIAGNOSTICS] Regex matched: {tps_value:.2f} t/s.")
-
-                    if len(self.wizard_tps_results) >= 3:
-                        if self.benchmark_timeout_timer and self.benchmark_timeout_timer.isActive():
-                            self.benchmark_timeout_timer.stop()
-                        self.left_panel.append_output("[WIZARD] Collected 3 TPS values. Finalizing benchmark.")
-                        print("[DIAGNOSTICS] Collected 3/3 TPS values. Calculating average.")
-                        avg_tps = sum(self.wizard_tps_results) / len(self.wizard_tps_results)
-                        result = {'success': True, 'avg_tps': avg_tps, 'error': ''}
-
-                        current_params_list = [p._asdict() for p in self.right_panel.get_parameters()]
-                        result['params_used'] = dict(current_params_list)
-
-                        self._handle_benchmark_result(result)
-                        break
-                except (ValueError, IndexError):
-                    pass
-
-        if self.wizard_awaiting_idle_signal and self.idle_regex.search(text_to_append):
-            print("[DIAGNOSTICS] 'all slots are idle' signal detected. Asking for user confirmation.")
-            self.wizard_awaiting_idle_signal = False
-            self._ask_for_stability_confirmation()
+        elif event.kind == LogEventKind.EVAL_TIMING:
+            if self.wizard_is_benchmarking and not self.wizard_current_is_viability_check and len(
+                    self.wizard_tps_results) < 3:
+                self._record_benchmark_tps(event.value.tps)
 
-        is_loading = "Loading..." in self.left_panel.status_label.text()
-        if is_loading and "model loaded" in text_to_append.lower():
-            self.left_panel.set_status(ServerStatus.LOADED)
-            log_msg = "\n[INFO] Model is fully loaded."
-            self.left_panel.append_output(log_msg)
-            print(f"[DIAGNOSTICS] Detected 'model loaded' string.")
+        elif event.kind == LogEventKind.IDLE:
+            # The server also reports idle slots right after loading, before the request is sent.
+            if self.wizard_awaiting_idle_signal and self.wizard_stability_request_seen:
+                print("[DIAGNOSTICS] 'all slots are idle' signal detected. Asking for user confirmation.")
+                self.wizard_awaiting_idle_signal = False
+                self._ask_for_stability_confirmation()
+
+        elif event.kind == LogEventKind.MODEL_LOADED:
+            # Only a fallback for the /health poll, which picks this time up if the endpoint stays silent.
+            if self._model_loaded_logged_at is None:
+                self._model_loaded_logged_at = time.monotonic()
+
+    def _record_layer_extraction_event(self, event):
+        if event.kind == LogEventKind.LAYER_COUNT:
+            if self.wizard_found_layers is None:
+                self.wizard_found_layers = event.value
+                print(f"[DIAGNOSTICS] Found layer count: {event.value}.")
+                self.left_panel.append_output(f"[WIZARD] Found n_layer = {event.value}")
+        elif not any(g['id'] == event.value['id'] for g in self.wizard_found_gpus):
+            self.wizard_found_gpus.append(event.value)
+            print(f"[DIAGNOSTICS] Found GPU Device {event.value['id']}: {event.value['name']}")
+
+        if self.wizard_found_layers is not None and len(self.wizard_found_gpus) > 0:
+            self.unload_model()
 
-            if self.wizard_is_benchmarking and self.wizard_current_is_viability_check == "ngl_testing":
-                self._run_inference_stability_test()
-
-            elif self.wizard_is_benchmarking:
-                print("[DIAGNOSTICS] Calling _continue_wizard_benchmark().")
-                self._continue_wizard_benchmark()
-            elif self.left_panel.open_on_load_checkbox.isChecked():
-                try:
-                    host, port = self.get_server_address_from_command()
-                    url_to_open = f'http://{host}:{port}/'
-                    webbrowser.open(url_to_open);
-                    self.left_panel.open_on_load_checkbox.setChecked(False)
-                except Exception as e:
-                    self.left_panel.append_output(f"\n--- Could not open web browser: {e} ---")
+    def _record_benchmark_tps(self, tps_value):
+        if tps_value > log_patterns.MAX_REALISTIC_TPS:
+            print(f"[DIAGNOSTICS] Discarding unrealistic TPS value: {tps_value}")
+            return
 
-    def _ask_for_stability_confirmation(self):
-        self.wizard_timer.stop()
+        self.wizard_tps_results.append(tps_value)
+        log_msg = f"[WIZARD] Found TPS value: {tps_value:.2f}. ({len(self.wizard_tps_results)}/3)"
+        self.left_panel.append_output(log_msg)
+        print(f"[DIAGNOSTICS] Regex matched: {tps_value:.2f} t/s.")
 
+        if len(self.wizard_tps_results) >= 3:
+            if self.benchmark_timeout_timer and self.benchmark_timeout_timer.isActive():
+                self.benchmark_timeout_timer.stop()
+            self.left_panel.append_output("[WIZARD] Collected 3 TPS values. Finalizing benchmark.")
+            print("[DIAGNOSTICS] Collected 3/3 TPS values. Calculating average.")
+            avg_tps = sum(self.wizard_tps_results) / len(self.wizard_tps_results)
+            result = {'success': True, 'avg_tps': avg_tps, 'error': ''}
+
+            current_params_list = [p._asdict() for p in self.right_panel.get_parameters()]
+            result['params_used'] = dict(current_params_list)
+
+            self._handle_benchmark_result(result)
+
+    def _on_model_loaded(self, readiness):
+        self._load_started = None
+        self.exporter.record_load(readiness.seconds)
+        self.left_panel.set_status(ServerStatus.LOADED)
+        log_msg = f"\n[INFO] Model is fully loaded ({readiness.seconds:.2f} s)."
+        if readiness.source == 'log':
+            log_msg += " The server's /health endpoint did not answer; readiness was taken from its output."
+        # Wizard trials run modified parameters, so only regular loads count towards the configuration.
+        if not self.wizard_is_benchmarking:
+            model_name = self.right_panel.get_model_name() or 'server'
+            self.load_times.record(model_name, readiness.seconds, readiness.source)
+            summary = self.load_times.summary(model_name)
+            if summary['loads'] > 1:
+                log_msg += f" Average over the last {summary['loads']} loads: {summary['avg']:.2f} s."
+            self._loaded_model_name = model_name
+            if self.idle_monitor:
+                host, port = self.get_server_address_from_command()
+                self.idle_monitor.watch(model_name, host, port)
+        self.left_panel.append_output(log_msg)
+        print(f"[DIAGNOSTICS] Server ready after {readiness.seconds:.2f} s ({readiness.source}).")
+
+        if self.wizard_is_benchmarking and self.wizard_current_is_viability_check == "ngl_testing":
+            self._run_inference_stability_test()
+
+        elif self.wizard_is_benchmarking:
+            print("[DIAGNOSTICS] Calling _continue_wizard_benchmark().")
+            self._continue_wizard_benchmark()
+        elif self.left_panel.open_on_load_checkbox.isChecked():
+            try:
+                host, port = self.get_server_address_from_command()
+                url_to_open = f'http://{host}:{port}/'
+                webbrowser.open(url_to_open);
+                self.left_panel.open_on_load_checkbox.setChecked(False)
+            except Exception as e:
+                self.left_panel.append_output(f"\n--- Could not open web browser: {e} ---")
+
+    def _ask_for_stability_confirmation(self):
         user_confirmed = False
         if self.wizard_confirm_each_step:
             reply = QMessageBox.question(self, 'Stability Test Passed',
@@ -559,6 +1087,7 @@ class MainWindow(QWidget):
         print("[DIAGNOSTICS] Starting StabilityRequestWorker thread.")
 
         self.wizard_awaiting_idle_signal = True
+        self.wizard_stability_request_seen = False
         self.stability_thread = QThread()
         self.stability_worker = StabilityRequestWorker(self.wizard)
         self.stability_worker.moveToThread(self.stability_thread)
@@ -568,31 +1097,92 @@ class MainWindow(QWidget):
         self.stability_thread.finished.connect(self.stability_thread.deleteLater)
         self.stability_thread.start()
 
-    def unload_model(self):
-        if self.process and self.process.state() == QProcess.ProcessState.Running:
-            print("[DIAGNOSTICS] Unloading model via taskkill.")
-            subprocess.run(f'taskkill /F /T /PID {self.process.processId()}', shell=True, capture_output=True,
-                           creationflags=subprocess.CREATE_NO_WINDOW)
+    def unload_model(self, wait=False):
+        """
+        Asks the server to exit and kills its process group if it is still running after the
+        supervisor's grace period. process_finished records how long the unload took.
+        Args:
+            wait (bool): Block until the server is gone, e.g. when the launcher closes.
+        """
+        if self.restart_timer.isActive():
+            self.restart_timer.stop()
+            self._pending_restart = None
+            self.left_panel.append_output("\n[RESTART] Pending restart cancelled.")
+            self.update_button_states()
+        if self._prefetch_params is not None:
+            self._prefetch_params = None
+            self.prefetcher.cancel()
+            if wait:
+                self.prefetcher.wait()
+            self.left_panel.append_output("[PREFETCH] Cancelled; the server was not started.")
+            self.left_panel.set_status(ServerStatus.UNLOADED)
+            self.update_button_states()
+        if not self.process or self.process.state() != QProcess.ProcessState.Running:
+            return
+        self._stop_readiness_poll()
+        process, pid = self.process, self.process.processId()
+        if self._unload_started is None:
+            self._unload_started, self._unload_pid = time.monotonic(), pid
+        print(f"[DIAGNOSTICS] Unloading model (PID {pid}).")
+        if not self.supervisor.request_stop(pid, self.process_own_group):
+            self._unload_forced = True
+            self.supervisor.kill(pid, self.process_own_group)
+        elif wait:
+            if not process.waitForFinished(int(self.supervisor.grace_period * 1000)):
+                self._escalate_unload(process, pid)
+        else:
+            QTimer.singleShot(int(self.supervisor.grace_period * 1000),
+                              lambda: self._escalate_unload(process, pid))
+        if wait:
+            process.waitForFinished(5000)
+
+    def _escalate_unload(self, process, pid):
+        if self.process is process and process.state() == QProcess.ProcessState.Running:
+            print(f"[DIAGNOSTICS] Server did not exit within {self.supervisor.grace_period:.0f} s; killing it.")
+            self._unload_forced = True
+            self.supervisor.kill(pid, self.process_own_group)
 
     def process_finished(self):
         self.handle_stdout()
+        self._consume_output(*self.log_scanner.flush())
         self.flush_output_buffer()
 
         original_status_label = self.left_panel.status_label.text()
         log_msg = "\n" + "=" * 80 + f"\n--- Process Finished ---"
         self.left_panel.append_output(log_msg)
         print(f"[DIAGNOSTICS] QProcess finished signal received. Original status: {original_status_label}")
-        if self.temp_batch_file and os.path.exists(self.temp_batch_file):
-            try:
-                os.remove(self.temp_batch_file);
-                self.temp_batch_file = ''
-            except OSError:
-                pass
-
         is_error = 'Loading...' in original_status_label
-        self.left_panel.set_status(ServerStatus.ERROR if is_error else ServerStatus.UNLOADED)
+        exit_code = self.process.exitCode() if self.process.exitStatus() == QProcess.ExitStatus.NormalExit else None
+        # Exits nobody asked for, outside the wizard (whose trials are expected to fail), are crashes.
+        crashed = (self._unload_started is None and not self._hibernating and not self._start_failed and
+                   self.wizard_generator is None and not self.wizard_is_benchmarking and
+                   (is_error or exit_code != 0))
+        if self._unload_started is not None:
+            record = self.supervisor.record(self._unload_pid, self._unload_started,
+                                            'killed' if self._unload_forced else 'graceful')
+            self.exporter.record_unload(record.seconds)
+            self._unload_started = None
+        self._unload_forced = False
+        self._end_log_session(self.process.exitCode(),
+                              'error' if is_error else 'crashed' if crashed else
+                              ('hibernated' if self._hibernating else 'unloaded'))
+        self.exporter.record_exit()
+        self.resource_sampler.detach()
+        self.pool.reserved_ports = set()
+        self._stop_readiness_poll()
+        self._load_started = None
+        if self.idle_monitor and self._loaded_model_name:
+            self.idle_monitor.forget(self._loaded_model_name)
+        self._loaded_model_name = None
+        if self._hibernating and not is_error:
+            self.left_panel.set_status(ServerStatus.HIBERNATED)
+        else:
+            self.left_panel.set_status(ServerStatus.ERROR if is_error or crashed else ServerStatus.UNLOADED)
+        self._hibernating = False
         self.process = None;
         self.update_button_states()
+        if crashed:
+            self._handle_crash(self._launched_model_name, exit_code)
 
         if self.wizard_is_benchmarking:
             if self.benchmark_timeout_timer and self.benchmark_timeout_timer.isActive():
@@ -607,8 +1197,7 @@ class MainWindow(QWidget):
                         'error': '' if self.wizard_found_layers is not None else 'Could not find n_layer'
                     }
                     print(f"[DIAGNOSTICS] Layer extraction finished. Result: {result}")
-                    self.wizard_generator.send(result)
-                    self.wizard_timer.start(100)
+                    self._advance_wizard(result)
 
                 elif self.wizard_current_is_viability_check == "ngl_testing":
                     was_successful = self.wizard_idle_signal_received and (not is_error) and (
@@ -628,8 +1217,7 @@ class MainWindow(QWidget):
                     self.wizard_saw_soft_failure_artifact = False
 
                     result = {'success': was_successful, 'error_details': self.wizard_error_details}
-                    self.wizard_generator.send(result)
-                    self.wizard_timer.start(100)
+                    self._advance_wizard(result)
 
             elif is_error:
                 self.wizard_is_benchmarking = False
@@ -641,10 +1229,18 @@ class MainWindow(QWidget):
                 log_msg = f"[WIZARD CRITICAL] Server crashed during load. Aborting this step."
                 self.left_panel.append_output(log_msg)
                 print(f"[DIAGNOSTICS] Server crashed. Sending failure result to wizard generator.")
-                self.wizard_generator.send(result)
-                self.wizard_timer.start(100)
-
-    def start_tuning_wizard(self):
+                self._advance_wizard(result)
+
+        elif self.wizard_pending_result is not None:
+            # A finished benchmark was waiting for its server to exit.
+            result, self.wizard_pending_result = self.wizard_pending_result, None
+            self._advance_wizard(result)
+
+    def _run_wizard_analysis(self):
+        """
+        Checks prerequisites, runs the system analysis with live output and prints the summary.
+        Returns the analysis results, or None if the wizard can't proceed.
+        """
         self.left_panel.show_output_view()
         self.left_panel.clear_output()
         self.left_panel.append_output("=" * 30 + " Starting System Analysis " + "=" * 30)
@@ -656,7 +1252,7 @@ class MainWindow(QWidget):
         if "Executable" not in current_params or not model_path:
             QMessageBox.critical(self, "Prerequisite Missing",
                                  "Tuning requires the 'Executable' and a model path ('-m') to be set in the editor.")
-            return
+            return None
 
         if "--jinja" not in current_params:
             self.left_panel.append_output("[INFO] --jinja flag not found. It will be added for the tuning process.")
@@ -676,7 +1272,7 @@ class MainWindow(QWidget):
 
         if not final_results:
             self.left_panel.append_output("\n[CRITICAL] System analysis failed. Cannot proceed with tuning.")
-            return
+            return None
 
         self.analysis_results = final_results
         summary = "\n" + "-" * 25 + " System & Model Summary " + "-" * 25
@@ -700,12 +1296,22 @@ class MainWindow(QWidget):
 
         summary += f"\nModel Size: {final_results.get('model_size_gb', 'N/A')} GB"
         summary += f"\nModel Arch: {final_results.get('model_architecture', 'N/A')}"
+        if final_results.get('expert_count'):
+            summary += (f"\nExperts:    {final_results['expert_count']} ({final_results.get('expert_used_count', 'N/A')} active) | "
+                        f"Expert Tensors: {final_results.get('expert_tensors_gb', 'N/A')} GB | "
+                        f"Dense Tensors: {final_results.get('dense_tensors_gb', 'N/A')} GB")
         summary += "\n" + "-" * 72
         self.left_panel.append_output(summary)
         QApplication.processEvents()
 
         self.left_panel.tuning_wizard_button.setEnabled(False)
+        self.left_panel.max_context_button.setEnabled(False)
         self.left_panel.load_button.setEnabled(False)
+        return final_results
+
+    def start_tuning_wizard(self):
+        if not self._check_server_port() or self._run_wizard_analysis() is None:
+            return
 
         if self.analysis_results.get('model_architecture') == 'Dense':
             current_params_dict = {p.key: p.value for p in self.right_panel.get_parameters()}
@@ -723,124 +1329,160 @@ class MainWindow(QWidget):
 
         self.wizard = TuningWizard(self.analysis_results, final_params_dict)
         self.wizard_generator = self.wizard.run_tuning_wizard()
-        self.wizard_timer.start(100)
+        self._advance_wizard()
 
-    def _process_next_wizard_step(self):
+    def start_context_maximizer(self):
+        if not self._check_server_port() or self._run_wizard_analysis() is None:
+            return
+        current_params_dict = {p.key: p.value for p in self.right_panel.get_parameters()}
+        self.wizard = TuningWizard(self.analysis_results, current_params_dict)
+        self.wizard_generator = self.wizard.run_context_maximizer()
+        self._advance_wizard()
+
+    def _advance_wizard(self, value=None):
+        """
+        Sends a value into the wizard generator and keeps executing the actions it yields.
+        Actions that complete immediately (logs, parameter updates, dialogs) are handled in
+        one pass; the loop only returns to the event loop when an action waits for the server
+        process or the device probe. Its completion handler calls back in with the result.
+        """
+        if self.wizard_generator is None:
+            return
         try:
-            if self.wizard_generator is None:
-                self.wizard_timer.stop()
-                return
-
-            action = next(self.wizard_generator)
-            print(f"[DIAGNOSTICS] Wizard action received: {action}")
-
-            if action.get('action') == 'log':
-                self.left_panel.append_output(f"[WIZARD] {action['message']}")
-                self.wizard_timer.start(100)
-            elif action.get('action') == 'update_params':
-                self.left_panel.append_output(f"[WIZARD] Applying new parameters: {action['params']}")
-                self._update_editor_params(action['params'])
-                self.wizard_timer.start(100)
-            elif action.get('action') == 'save_best_params':
-                self.left_panel.append_output(f"[WIZARD] Saving current configuration as the best so far.")
-                current_params = self.right_panel.get_parameters()
-                self.best_params_snapshot = self.command_builder.build(current_params)
-                self.wizard_timer.start(100)
-            elif action.get('action') == 'restore_best_params':
-                self.left_panel.append_output(f"[WIZARD] Restoring the best known configuration.")
-                self._restore_params_from_snapshot()
-                self.wizard_timer.start(100)
-            # ... (rest of wizard step processing is the same)
-            elif action.get('action') == 'confirm_warning':
-                self.wizard_timer.stop()
-                reply = QMessageBox.question(self, action['title'], action['message'],
-                                             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-                                             QMessageBox.StandardButton.No)
-                user_proceeded = (reply == QMessageBox.StandardButton.Yes)
-                try:
-                    self.wizard_generator.send(user_proceeded)
-                except StopIteration:
-                    self._finish_tuning_wizard()
-                    return
-                self.wizard_timer.start(100)
-            elif action.get('action') == 'confirm_context_tradeoff':
-                self.wizard_timer.stop()
-                msg_box = QMessageBox(self)
-                msg_box.setIcon(QMessageBox.Icon.Question)
-                msg_box.setWindowTitle(action['title'])
-                msg_box.setText(action['message'])
-                multi_gpu_button = msg_box.addButton("Use Multiple GPUs", QMessageBox.ButtonRole.YesRole)
-                msg_box.addButton("Abort & Adjust Manually", QMessageBox.ButtonRole.NoRole)
-                msg_box.exec()
-
-                user_proceeded = (msg_box.clickedButton() == multi_gpu_button)
-
-                if not user_proceeded:
-                    self.left_panel.append_output("[WIZARD] User chose to abort and adjust context size manually.")
-
-                try:
-                    self.wizard_generator.send(user_proceeded)
-                except StopIteration:
-                    self._finish_tuning_wizard()
-                    return
-                self.wizard_timer.start(100)
-            elif action.get('action') == 'extract_layer_count':
-                self.wizard_timer.stop()
-                self.wizard_is_benchmarking = True
-                self.wizard_current_is_viability_check = "layer_extraction"
-                self.wizard_found_layers = None
-                self.wizard_found_gpus = []
-                self.load_model()
-                self._setup_benchmark_timer()
-                self.benchmark_timeout_timer.start(30000)
-            elif action.get('action') == 'test_ngl_value':
-                self.wizard_timer.stop()
-                self.wizard_is_benchmarking = True
-                self.wizard_current_is_viability_check = "ngl_testing"
-                self.wizard_error_details = None
-                self.wizard_awaiting_idle_signal = False
-                self.wizard_idle_signal_received = False
-                self.wizard_saw_soft_failure_artifact = False
-                self.load_model()
-                self._setup_benchmark_timer()
-                self.benchmark_timeout_timer.start(120000)
-            elif action.get('action') == 'confirm_benchmark':
-                self.wizard_timer.stop()
-                user_proceeded = False
-                if self.wizard_confirm_each_step:
-                    params = self.right_panel.get_parameters()
-                    command_to_run = self.command_builder.build(params)
-                    reply = QMessageBox.question(self, 'Confirm Benchmark',
-                                                 f"The wizard proposes the following parameters for the next test. Do you want to proceed?\n\nCommand:\n{command_to_run}",
-                                                 QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-                                                 QMessageBox.StandardButton.Yes)
-                    if reply == QMessageBox.StandardButton.Yes: user_proceeded = True
-                else:
-                    user_proceeded = True
-
-                if not user_proceeded:
-                    self.left_panel.append_output("[WIZARD] Tuning aborted by user.")
-                    self._finish_tuning_wizard()
+            while True:
+                action = self.wizard_generator.send(value)
+                print(f"[DIAGNOSTICS] Wizard action received: {action}")
+                value = self._execute_wizard_action(action)
+                if value is self._WIZARD_WAIT:
                     return
-                try:
-                    next_action = self.wizard_generator.send(True)
-                    if next_action.get('action') == 'load_and_benchmark':
-                        self.wizard_current_is_viability_check = False
-                        self.wizard_is_benchmarking = True
-                        self.load_model()
-                    else:
-                        self.wizard_timer.start(100)
-                except StopIteration:
-                    self._finish_tuning_wizard()
-            elif action.get('action') == 'load_and_benchmark':
-                self.wizard_current_is_viability_check = False
-                self.wizard_is_benchmarking = True
-                self.wizard_timer.stop()
-                self.load_model()
-            QApplication.processEvents()
         except StopIteration:
             self._finish_tuning_wizard()
 
+    def _execute_wizard_action(self, action):
+        """
+        Executes one wizard action. Returns the value to send back into the generator,
+        or _WIZARD_WAIT if the action completes later through a process or thread signal.
+        """
+        kind = action.get('action')
+        # Log lines and parameter updates are buffered and applied together before
+        # anything that reads the editor, shows a dialog or starts the server.
+        if kind == 'log':
+            self.wizard_pending_logs.append(f"[WIZARD] {action['message']}")
+            return None
+        if kind == 'update_params':
+            self.wizard_pending_logs.append(f"[WIZARD] Applying new parameters: {action['params']}")
+            self.wizard_pending_updates.update(action['params'])
+            return None
+        self._flush_wizard_batch()
+
+        if kind == 'save_best_params':
+            self.left_panel.append_output(f"[WIZARD] Saving current configuration as the best so far.")
+            current_params = self.right_panel.get_parameters()
+            self.best_params_snapshot = self.command_builder.build(current_params)
+        elif kind == 'restore_best_params':
+            self.left_panel.append_output(f"[WIZARD] Restoring the best known configuration.")
+            self._restore_params_from_snapshot()
+        elif kind == 'confirm_warning':
+            reply = QMessageBox.question(self, action['title'], action['message'],
+                                         QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                                         QMessageBox.StandardButton.No)
+            return reply == QMessageBox.StandardButton.Yes
+        elif kind == 'confirm_context_tradeoff':
+            msg_box = QMessageBox(self)
+            msg_box.setIcon(QMessageBox.Icon.Question)
+            msg_box.setWindowTitle(action['title'])
+            msg_box.setText(action['message'])
+            multi_gpu_button = msg_box.addButton("Use Multiple GPUs", QMessageBox.ButtonRole.YesRole)
+            msg_box.addButton("Abort & Adjust Manually", QMessageBox.ButtonRole.NoRole)
+            msg_box.exec()
+
+            user_proceeded = (msg_box.clickedButton() == multi_gpu_button)
+            if not user_proceeded:
+                self.left_panel.append_output("[WIZARD] User chose to abort and adjust context size manually.")
+            return user_proceeded
+        elif kind == 'list_devices':
+            self._start_device_probe()
+            return self._WIZARD_WAIT
+        elif kind == 'confirm_benchmark':
+            if self.wizard_confirm_each_step:
+                command_to_run = self.command_builder.build(self.right_panel.get_parameters())
+                reply = QMessageBox.question(self, 'Confirm Benchmark',
+                                             f"The wizard proposes the following parameters for the next test. Do you want to proceed?\n\nCommand:\n{command_to_run}",
+                                             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                                             QMessageBox.StandardButton.Yes)
+                return reply == QMessageBox.StandardButton.Yes
+            return True
+        elif kind == 'extract_layer_count':
+            self.wizard_is_benchmarking = True
+            self.wizard_current_is_viability_check = "layer_extraction"
+            self.wizard_found_layers = None
+            self.wizard_found_gpus = []
+            self.load_model()
+            self._setup_benchmark_timer()
+            self.benchmark_timeout_timer.start(30000)
+            return self._WIZARD_WAIT
+        elif kind == 'test_ngl_value':
+            self.wizard_is_benchmarking = True
+            self.wizard_current_is_viability_check = "ngl_testing"
+            self.wizard_error_details = None
+            self.wizard_awaiting_idle_signal = False
+            self.wizard_idle_signal_received = False
+            self.wizard_saw_soft_failure_artifact = False
+            self.load_model()
+            self._setup_benchmark_timer()
+            self.benchmark_timeout_timer.start(120000)
+            return self._WIZARD_WAIT
+        elif kind == 'load_and_benchmark':
+            self.wizard_current_is_viability_check = False
+            self.wizard_is_benchmarking = True
+            self.load_model()
+            return self._WIZARD_WAIT
+        return None
+
+    def _flush_wizard_batch(self):
+        """Writes buffered wizard log lines and applies buffered parameter updates in one go."""
+        if self.wizard_pending_logs:
+            self.left_panel.append_output("\n".join(self.wizard_pending_logs))
+            self.wizard_pending_logs = []
+        if self.wizard_pending_updates:
+            self._update_editor_params(self.wizard_pending_updates)
+            self.wizard_pending_updates = {}
+
+    def _start_device_probe(self):
+        """
+        Runs 'llama-server --list-devices' on a background thread to learn llama.cpp's own
+        device order; initializing the backends can take many seconds. This loads no model.
+        The result is sent into the wizard by _on_device_probe_done.
+        """
+        # Resolved exactly as _launch_server (and SubprocessBackend.list_devices) resolve it.
+        args = self.command_builder.launch_args(self.right_panel.get_parameters(), self.llamacpp_dir)
+        executable = args[0] if args else ''
+        cwd = self.llamacpp_dir or None
+        generator = self.wizard_generator
+
+        self.left_panel.append_output("[WIZARD] Probing llama.cpp device order (--list-devices)...")
+
+        def probe():
+            try:
+                completed = subprocess.run([executable, '--list-devices'], cwd=cwd,
+                                           capture_output=True, text=True, errors='ignore', timeout=30,
+                                           creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+            except (OSError, subprocess.SubprocessError) as e:
+                print(f"[DIAGNOSTICS] Device probe failed: {e}")
+                self.device_probe_signals.done.emit(generator, {'success': False, 'gpus': [], 'error': str(e)})
+                return
+            gpus = find_devices(completed.stdout + completed.stderr)
+            print(f"[DIAGNOSTICS] Device probe found: {gpus}")
+            self.device_probe_signals.done.emit(generator, {'success': bool(gpus), 'gpus': gpus,
+                                                            'error': '' if gpus else 'No devices reported'})
+
+        threading.Thread(target=probe, name='device-probe', daemon=True).start()
+
+    def _on_device_probe_done(self, generator, result):
+        # Ignore the probe of a wizard run that has been stopped (or replaced) meanwhile.
+        if generator is not None and generator is self.wizard_generator:
+            self._advance_wizard(result)
+
     def _setup_benchmark_timer(self):
         if self.benchmark_timeout_timer is None:
             self.benchmark_timeout_timer = QTimer(self)
@@ -848,7 +1490,6 @@ class MainWindow(QWidget):
             self.benchmark_timeout_timer.timeout.connect(self._check_benchmark_timeout)
 
     def _continue_wizard_benchmark(self):
-        self.wizard_timer.stop()
         self.left_panel.append_output("[WIZARD] Triggering 3 API requests for benchmarking...")
         print("[DIAGNOSTICS] Starting ApiRequestWorker thread.")
         self.wizard_tps_results.clear()
@@ -864,6 +1505,9 @@ class MainWindow(QWidget):
         self.benchmark_timeout_timer.start(300000)
 
     def _check_benchmark_timeout(self):
+        if self._prefetch_params is not None:
+            self.benchmark_timeout_timer.start()  # The trial's server has not started yet.
+            return
         if self.wizard_is_benchmarking:
             self.benchmark_timeout_timer.stop()
             if self.wizard_current_is_viability_check == "layer_extraction":
@@ -883,26 +1527,19 @@ class MainWindow(QWidget):
 
         log_msg = f"[WIZARD] Benchmark step finished. Average TPS: {result.get('avg_tps', 0.0):.2f}"
         self.left_panel.append_output(log_msg)
+        self.wizard_is_benchmarking = False
+        if self.process is None:
+            self._advance_wizard(result)
+            return
+        # process_finished hands the result to the wizard once the server has exited.
+        self.wizard_pending_result = result
         self.unload_model()
-        unload_timer = QTimer(self)
-
-        def on_unload_complete():
-            self.wizard_is_benchmarking = False
-            try:
-                if self.wizard_generator:
-                    self.wizard_generator.send(result)
-                    self.wizard_timer.start(100)
-            except StopIteration:
-                self._finish_tuning_wizard()
-            unload_timer.stop()
-
-        unload_timer.timeout.connect(lambda: None if self.process is not None else on_unload_complete())
-        unload_timer.start(250)
 
     def _finish_tuning_wizard(self):
         print("[DIAGNOSTICS] Wizard generator finished. Cleaning up.")
-        self.wizard_timer.stop()
+        self._flush_wizard_batch()
         self.wizard_generator = None
+        self.wizard_pending_result = None
         self.wizard_is_benchmarking = False
         self.update_button_states()
         if self.best_params_snapshot:
@@ -914,16 +1551,7 @@ class MainWindow(QWidget):
                 self.right_panel._mark_as_dirty()
 
     def _update_editor_params(self, params_to_update):
-        current_params_list = self.right_panel.get_parameters()
-        params_dict = {p.key: p.value for p in current_params_list}
-
-        for param, value in params_to_update.items():
-            if value == 'REMOVE':
-                if param in params_dict: del params_dict[param]
-            else:
-                params_dict[param] = value
-
-        updated_params_list = [Parameter(k, v) for k, v in params_dict.items()]
+        updated_params_list = self.command_builder.apply_updates(self.right_panel.get_parameters(), params_to_update)
         # Repopulate the editor without changing the model name
         self.right_panel.populate(updated_params_list, self.right_panel.get_model_name())
         QApplication.processEvents()
@@ -0,0 +1,128 @@
+# ui/metrics_panel.py
+
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton
+from PyQt6.QtGui import QPainter, QPen, QColor, QPolygonF
+from PyQt6.QtCore import Qt, QPointF, QRectF, pyqtSignal
+
+MIB = 1024 ** 2
+
+# (value of a RequestSample, label, colour)
+PLOT_SERIES = [
+    (lambda s: s.gen_tps, 'Generation t/s', QColor('#4CAF50')),
+    (lambda s: s.prompt_tps, 'Prompt t/s', QColor('#4D90E2')),
+    (lambda s: s.latency_ms / 1000.0, 'Latency (s)', QColor('#FFC107')),
+]
+
+# (value of a ResourceSample, label, colour)
+RESOURCE_SERIES = [
+    (lambda s: s.rss_bytes / MIB, 'RSS (MiB)', QColor('#AB47BC')),
+    (lambda s: s.cpu_percent, 'CPU %', QColor('#EF5350')),
+    (lambda s: s.threads, 'Threads', QColor('#26A69A')),
+    (lambda s: (s.read_rate or 0.0) / MIB, 'Disk read (MiB/s)', QColor('#8D6E63')),
+]
+
+
+class ThroughputPlot(QWidget):
+    """A dependency-free line chart of the most recent samples, one normalised row per series."""
+
+    def __init__(self, series=PLOT_SERIES, empty_text="Waiting for completed requests...", parent=None):
+        super().__init__(parent)
+        self.series = series
+        self.empty_text = empty_text
+        self.samples = []
+        self.setMinimumHeight(60 * len(series) + 60)
+
+    def set_samples(self, samples):
+        self.samples = samples
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.fillRect(self.rect(), QColor(25, 25, 25))
+        if len(self.samples) < 2:
+            painter.setPen(QColor('#A0A0A0'))
+            painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, self.empty_text)
+            return
+
+        margin, row_gap = 8, 6
+        row_height = (self.height() - 2 * margin - row_gap * (len(self.series) - 1)) / len(self.series)
+        width = self.width() - 2 * margin
+        step = width / (len(self.samples) - 1)
+        for row, (value_of, label, colour) in enumerate(self.series):
+            values = [value_of(s) for s in self.samples]
+            top = margin + row * (row_height + row_gap)
+            area = QRectF(margin, top, width, row_height)
+            painter.setPen(QPen(QColor('#40454E'), 1))
+            painter.drawRect(area)
+
+            peak = max(values) or 1.0
+            points = [QPointF(area.left() + i * step, area.bottom() - v / peak * (row_height - 14))
+                      for i, v in enumerate(values)]
+            painter.setPen(QPen(colour, 1.5))
+            painter.drawPolyline(QPolygonF(points))
+            painter.setPen(colour)
+            painter.drawText(area.adjusted(4, 2, -4, -2), Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop,
+                             f"{label}: {values[-1]:.2f} (max {peak:.2f})")
+        painter.end()
+
+
+class MetricsPanel(QWidget):
+    """Live view of the server's per-request throughput and latency, and of its process resources."""
+    export_resources_requested = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        self.summary_label = QLabel("No requests recorded yet.")
+        self.summary_label.setWordWrap(True)
+        self.plot = ThroughputPlot()
+        layout.addWidget(self.summary_label)
+        layout.addWidget(self.plot, 1)
+
+        resource_header = QHBoxLayout()
+        self.resource_label = QLabel("No process samples yet.")
+        self.resource_label.setWordWrap(True)
+        self.export_button = QPushButton("Export CSV...")
+        self.export_button.clicked.connect(self.export_resources_requested.emit)
+        resource_header.addWidget(self.resource_label, 1)
+        resource_header.addWidget(self.export_button)
+        self.resource_plot = ThroughputPlot(RESOURCE_SERIES, "Waiting for process samples...")
+        layout.addLayout(resource_header)
+        layout.addWidget(self.resource_plot, 1)
+
+    def refresh(self, collector, window=200):
+        """Redraws from a MetricsCollector's current model, plotting at most the last `window` requests."""
+        self.plot.set_samples(collector.recent(model=collector.model)[-window:])
+        summary = collector.summary(model=collector.model)
+        last = summary['last']
+        if not last:
+            self.summary_label.setText("No requests recorded yet.")
+            return
+        self.summary_label.setText(
+            f"Model: {last.model or '-'} | Requests: {summary['requests']} | "
+            f"Avg generation: {summary['avg_gen_tps']:.2f} t/s | Avg prompt: {summary['avg_prompt_tps']:.2f} t/s | "
+            f"Avg latency: {summary['avg_latency_ms'] / 1000:.2f} s | "
+            f"Last: {last.gen_tokens} tokens at {last.gen_tps:.2f} t/s")
+
+    def refresh_resources(self, sampler, window=600):
+        """Redraws from a ResourceSampler, plotting at most the last `window` samples of the current server."""
+        if not sampler.available:
+            self.resource_label.setText("Install psutil to sample the server's CPU, memory and disk use.")
+            self.export_button.setEnabled(False)
+            return
+        self.resource_plot.set_samples(sampler.samples(pid=sampler.pid)[-window:])
+        summary = sampler.summary()
+        if not summary:
+            self.resource_label.setText("No process samples yet.")
+            return
+        text = (f"RSS: {summary['rss_bytes'] / MIB:,.0f} MiB (peak {summary['peak_rss_bytes'] / MIB:,.0f}) | "
+                f"CPU: {summary['avg_cpu_percent']:.0f}% ({summary['cores_used']:.1f} of "
+                f"{summary['logical_cores']} cores, host {summary['avg_host_cpu_percent']:.0f}%) | "
+                f"Threads: {summary['threads']}")
+        if summary['read_rate'] is not None:
+            text += f" | Disk read: {summary['read_rate'] / MIB:.1f} MiB/s"
+        # A trend needs a few minutes of samples before it means anything.
+        if summary['span_seconds'] >= 120:
+            text += f" | RSS trend: {summary['rss_slope_bytes_per_min'] / MIB:+.1f} MiB/min"
+        self.resource_label.setText(text)
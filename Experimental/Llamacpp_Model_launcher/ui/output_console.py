@@ -0,0 +1,55 @@
+# ui/output_console.py
+
+from PyQt6.QtWidgets import QPlainTextEdit
+from PyQt6.QtGui import QFont, QDesktopServices
+from PyQt6.QtCore import QUrl
+from Llamacpp_Model_launcher.core.output_history import OutputHistory
+
+# Lines kept in the widget. Older lines are dropped from the view but stay in the history file.
+DEFAULT_MAX_LINES = 5000
+
+
+class OutputConsole(QPlainTextEdit):
+    """
+    Server output view with a fixed line capacity. QPlainTextEdit lays out only the
+    visible blocks and maximumBlockCount turns its document into a ring buffer, so the
+    cost of an append no longer grows with the session. Everything appended is also
+    written to an OutputHistory file.
+    """
+
+    def __init__(self, max_lines=DEFAULT_MAX_LINES, history=None, parent=None):
+        super().__init__(parent)
+        self.history = history if history is not None else OutputHistory()
+        self.setReadOnly(True)
+        self.setFont(QFont('Courier', 10))
+        self.setMaximumBlockCount(max_lines)
+
+    def is_pinned_to_bottom(self):
+        bar = self.verticalScrollBar()
+        return bar.value() >= bar.maximum() - 2
+
+    def append_text(self, text):
+        """Appends text as a new paragraph; follows the output only if the view is already at the bottom."""
+        pinned = self.is_pinned_to_bottom()
+        self.appendPlainText(text)
+        self.history.write(text if text.endswith('\n') else text + '\n')
+        if pinned:
+            bar = self.verticalScrollBar()
+            bar.setValue(bar.maximum())
+
+    def clear(self):
+        """Clears the view and starts a new history file."""
+        super().clear()
+        self.history.start_session()
+
+    def contextMenuEvent(self, event):
+        menu = self.createStandardContextMenu()
+        menu.addSeparator()
+        open_action = menu.addAction("Open Full Log")
+        open_action.setEnabled(bool(self.history.path))
+        open_action.triggered.connect(self.open_history_file)
+        menu.exec(event.globalPos())
+
+    def open_history_file(self):
+        if self.history.path:
+            QDesktopServices.openUrl(QUrl.fromLocalFile(self.history.path))
@@ -0,0 +1,109 @@
+# ui/pool_panel.py
+
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QComboBox,
+                             QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView,
+                             QPlainTextEdit, QSplitter)
+from PyQt6.QtGui import QColor
+from PyQt6.QtCore import Qt, pyqtSignal
+
+COLUMNS = ['Name', 'Status', 'Port', 'PID', 'Load time', 'Message']
+LOG_MAX_LINES = 2000
+
+
+class PoolPanel(QWidget):
+    """Lists the servers of the ServerPool and shows the output of the selected one."""
+    load_requested = pyqtSignal(str)
+    unload_requested = pyqtSignal(str)
+    open_requested = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._instances = {}
+        self._setup_ui()
+
+    def _setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        controls = QHBoxLayout()
+        self.model_picker = QComboBox()
+        self.load_button = QPushButton('Load in Pool')
+        self.unload_button = QPushButton('Unload Selected')
+        self.open_button = QPushButton('Open Web UI')
+        self.load_button.clicked.connect(lambda: self.model_picker.currentText() and
+                                         self.load_requested.emit(self.model_picker.currentText()))
+        self.unload_button.clicked.connect(lambda: self.selected_name() and self.unload_requested.emit(self.selected_name()))
+        self.open_button.clicked.connect(lambda: self.selected_name() and self.open_requested.emit(self.selected_name()))
+        controls.addWidget(QLabel('Configuration:'))
+        controls.addWidget(self.model_picker, 1)
+        controls.addWidget(self.load_button)
+        controls.addWidget(self.unload_button)
+        controls.addWidget(self.open_button)
+        layout.addLayout(controls)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.itemSelectionChanged.connect(self._show_selected_log)
+
+        self.log_view = QPlainTextEdit()
+        self.log_view.setReadOnly(True)
+        self.log_view.setMaximumBlockCount(LOG_MAX_LINES)
+        self.log_view.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        self.log_view.setStyleSheet("font-family: Consolas, monospace;")
+
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        splitter.addWidget(self.table)
+        splitter.addWidget(self.log_view)
+        splitter.setSizes([200, 400])
+        layout.addWidget(splitter, 1)
+
+    def set_models(self, model_names):
+        current = self.model_picker.currentText()
+        self.model_picker.clear()
+        self.model_picker.addItems(model_names)
+        if current in model_names:
+            self.model_picker.setCurrentText(current)
+
+    def selected_name(self):
+        rows = self.table.selectionModel().selectedRows()
+        return self.table.item(rows[0].row(), 0).text() if rows else ''
+
+    def update_instance(self, instance):
+        """Adds or refreshes the row of a PoolInstance."""
+        self._instances[instance.name] = instance
+        row = self._row_of(instance.name)
+        if row < 0:
+            row = self.table.rowCount()
+            self.table.insertRow(row)
+        load_time = f"{instance.load_seconds:.1f} s" if instance.load_seconds is not None else ''
+        values = [instance.name, instance.status.key.capitalize(), str(instance.port), str(instance.pid or ''),
+                  load_time, instance.error]
+        for column, value in enumerate(values):
+            item = QTableWidgetItem(value)
+            if column == 1:
+                item.setForeground(QColor(instance.status.color))
+            self.table.setItem(row, column, item)
+        if self.table.rowCount() == 1 and not self.selected_name():
+            self.table.selectRow(0)
+
+    def append_output(self, name, text):
+        if name == self.selected_name():
+            self.log_view.moveCursor(self.log_view.textCursor().MoveOperation.End)
+            self.log_view.insertPlainText(text)
+            self.log_view.ensureCursorVisible()
+
+    def _row_of(self, name):
+        for row in range(self.table.rowCount()):
+            if self.table.item(row, 0) and self.table.item(row, 0).text() == name:
+                return row
+        return -1
+
+    def _show_selected_log(self):
+        instance = self._instances.get(self.selected_name())
+        self.log_view.setPlainText(instance.log_text() if instance else '')
+        self.log_view.moveCursor(self.log_view.textCursor().MoveOperation.End)
@@ -16,6 +16,7 @@ class RightPanel(QWidget):
     duplicate_clicked = pyqtSignal()
     reset_clicked = pyqtSignal()
     dirty_state_changed = pyqtSignal(bool)
+    parameters_changed = pyqtSignal()
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -41,6 +42,13 @@ class RightPanel(QWidget):
         title.setStyleSheet("font-size: 14pt; font-weight: bold;")
         layout.addWidget(title)
 
+        # Live KV-cache estimate, filled in by the main window
+        self.kv_estimate_label = QLabel("")
+        self.kv_estimate_label.setWordWrap(True)
+        self.kv_estimate_label.setStyleSheet("color: #A0A0A0; font-size: 9pt;")
+        self.kv_estimate_label.setVisible(False)
+        layout.addWidget(self.kv_estimate_label)
+
         # Parameter list
         scroll_area = QScrollArea()
         scroll_area.setWidgetResizable(True)
@@ -112,6 +120,7 @@ class RightPanel(QWidget):
             self.param_widget.blockSignals(False)
 
         self.clear_dirty_state()
+        self.parameters_changed.emit()
 
     # --- MODIFIED: Simplified to always connect signals ---
     def add_parameter_row(self, param_key, param_value):
@@ -138,8 +147,10 @@ class RightPanel(QWidget):
         # --- FIX: Signals are now connected unconditionally ---
         if isinstance(input_widget, QLineEdit):
             input_widget.textChanged.connect(self._mark_as_dirty)
+            input_widget.textChanged.connect(lambda _: self.parameters_changed.emit())
         elif isinstance(input_widget, QCheckBox):
             input_widget.stateChanged.connect(self._mark_as_dirty)
+            input_widget.stateChanged.connect(lambda _: self.parameters_changed.emit())
 
         remove_button = QPushButton("X")
         remove_button.setFixedWidth(30)
@@ -150,6 +161,7 @@ class RightPanel(QWidget):
         field_layout.addWidget(remove_button)
 
         self.param_layout.addRow(QLabel(param_key), field_container)
+        self.parameters_changed.emit()
         return input_widget
 
     def _remove_parameter_row(self):
@@ -159,6 +171,7 @@ class RightPanel(QWidget):
             if self.param_layout.itemAt(i, QFormLayout.ItemRole.FieldRole).widget() == clicked_button.parent():
                 self.param_layout.removeRow(i)
                 self._mark_as_dirty()
+                self.parameters_changed.emit()
                 break
 
     # --- MODIFIED: Call the simplified add_parameter_row ---
@@ -210,6 +223,11 @@ class RightPanel(QWidget):
         self.model_name_input.setText(name)
         self.model_name_input.blockSignals(False)
 
+    def set_kv_estimate(self, text):
+        """Shows the KV-cache estimate for the current parameters, or hides it when text is empty."""
+        self.kv_estimate_label.setText(text)
+        self.kv_estimate_label.setVisible(bool(text))
+
     def _mark_as_dirty(self):
         if self._is_dirty: return
         self._is_dirty = True
@@ -0,0 +1,199 @@
+# benchmarks/fake_llama_server.py
+"""
+A stand-in for llama-server that accepts the same command line, decides with its own
+allocation model (core/server_simulator.py) whether the model fits a simulated set of GPUs, prints the
+log lines the launcher reacts to, and serves /v1/chat/completions on localhost.
+
+Environment:
+    FAKE_LLAMA_VRAM_GB      Comma-separated free VRAM per device in GB (default: 24).
+    FAKE_LLAMA_LOAD_SECONDS Simulated model load time (default: 0.5).
+    FAKE_LLAMA_TIME_SCALE   Multiplier applied to simulated generation time (default: 0.02).
+    FAKE_LLAMA_GPU_TPS      Generation speed with the whole model in VRAM (default: 100).
+    FAKE_LLAMA_CPU_TPS      Generation speed with the whole model in system RAM (default: 8).
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Llamacpp_Model_launcher.core.server_simulator import ServerSimulator  # noqa: E402
+from Llamacpp_Model_launcher.core.memory_planner import MIB  # noqa: E402
+
+_print_lock = threading.Lock()
+
+
+def log(line):
+    with _print_lock:
+        print(line, flush=True)
+
+
+def parse_flags(argv):
+    """Turns llama-server arguments into a {flag: value} dictionary, like CommandBuilder.parse."""
+    params = {}
+    i = 0
+    while i < len(argv):
+        token = argv[i]
+        if token.startswith('-'):
+            if i + 1 < len(argv) and not argv[i + 1].startswith('-'):
+                params[token] = argv[i + 1]
+                i += 2
+                continue
+            params[token] = None
+        i += 1
+    return params
+
+
+def simulator_from_env():
+    vram = [float(x) for x in os.environ.get('FAKE_LLAMA_VRAM_GB', '24').split(',') if x.strip()]
+    return ServerSimulator(vram, gpu_tps=float(os.environ.get('FAKE_LLAMA_GPU_TPS', '100')),
+                           cpu_tps=float(os.environ.get('FAKE_LLAMA_CPU_TPS', '8')))
+
+
+def print_devices(simulator):
+    log(f"ggml_cuda_init: found {len(simulator.gpu_names)} CUDA devices:")
+    for device_id, name in enumerate(simulator.gpu_names):
+        log(f"  Device {device_id}: {name}, compute capability 8.9, VMM: yes")
+
+
+class CompletionHandler(BaseHTTPRequestHandler):
+    server_version = "fake-llama-server"
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        elif self.path == '/v1/models':
+            self._send_json(200, {'object': 'list', 'data': [{'id': self.server.model_name, 'object': 'model'}]})
+        elif self.path == '/slots':
+            self._send_json(200, [{'id': 0, 'is_processing': self.server.slot_lock.locked()}])
+        elif self.path == '/metrics' and self.server.metrics:
+            body = (f"llamacpp:prompt_tokens_total {self.server.prompt_tokens}\n"
+                    f"llamacpp:tokens_predicted_total {self.server.predicted_tokens}\n"
+                    f"llamacpp:requests_processing {int(self.server.slot_lock.locked())}\n").encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path == '/metrics':
+            self._send_json(501, {'error': {'code': 501, 'message': 'This server does not support metrics endpoint.'}})
+        else:
+            self._send_json(404, {'error': {'code': 404, 'message': 'File Not Found'}})
+
+    def do_POST(self):
+        if self.path not in ('/v1/chat/completions', '/completion'):
+            self._send_json(404, {'error': {'code': 404, 'message': 'File Not Found'}})
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_json(400, {'error': {'code': 400, 'message': 'Invalid JSON'}})
+            return
+
+        n_predict = int(body.get('n_predict', body.get('max_tokens', 16)))
+        n_prompt = 20
+        with self.server.slot_lock:
+            gen_ms = n_predict / self.server.tps * 1000
+            prompt_ms = n_prompt / (self.server.tps * 8) * 1000
+            time.sleep((gen_ms + prompt_ms) / 1000 * self.server.time_scale)
+            log(f"prompt eval time = {prompt_ms:10.2f} ms / {n_prompt:5d} tokens ({prompt_ms / n_prompt:8.2f} ms per token, "
+                f"{n_prompt / prompt_ms * 1000:8.2f} tokens per second)")
+            log(f"       eval time = {gen_ms:10.2f} ms / {n_predict:5d} tokens ({gen_ms / n_predict:8.2f} ms per token, "
+                f"{n_predict / gen_ms * 1000:8.2f} tokens per second)")
+            log(f"      total time = {gen_ms + prompt_ms:10.2f} ms / {n_prompt + n_predict:5d} tokens")
+            log("srv  update_slots: all slots are idle")
+            self.server.prompt_tokens += n_prompt
+            self.server.predicted_tokens += n_predict
+
+        self._send_json(200, {
+            'object': 'chat.completion',
+            'model': self.server.model_name,
+            'choices': [{'index': 0, 'finish_reason': 'length',
+                         'message': {'role': 'assistant', 'content': 'lorem ' * n_predict}}],
+            'usage': {'prompt_tokens': n_prompt, 'completion_tokens': n_predict,
+                      'total_tokens': n_prompt + n_predict},
+        })
+
+    def log_message(self, format, *args):
+        log(f"srv  log_server_r: request: {self.command} {self.path} {self.client_address[0]}")
+
+
+def main(argv):
+    params = parse_flags(argv)
+    simulator = simulator_from_env()
+    log("build: 0 (fake) with Python for simulation")
+    print_devices(simulator)
+    if '--list-devices' in params:
+        log("Available devices:")
+        for device_id, name in enumerate(simulator.gpu_names):
+            free_mib = int(simulator.free_bytes[device_id] / MIB)
+            log(f"  CUDA{device_id}: {name} ({free_mib} MiB, {free_mib} MiB free)")
+        return 0
+
+    model_path = params.get('-m', params.get('--model', ''))
+    try:
+        planner = simulator.planner(params)
+    except (OSError, ValueError) as e:
+        log(f"llama_model_load: error loading model: {e}")
+        return 1
+
+    log(f"llama_model_loader: loaded meta data from {model_path}")
+    log(f"print_info: arch             = {planner.architecture}")
+    log(f"print_info: n_layer          = {planner.n_layer}")
+    log(f"print_info: n_embd           = {planner.n_embd}")
+    time.sleep(float(os.environ.get('FAKE_LLAMA_LOAD_SECONDS', '0.5')))
+
+    prediction, error_details = simulator.simulate_load(params)
+    if error_details:
+        log(f"ggml_backend_cuda_buffer_type_alloc_buffer: allocating {error_details['size_mib']:.2f} MiB "
+            f"on device {error_details['device_id']}: cudaMalloc failed: out of memory")
+        log("llama_model_load: error loading model: unable to allocate CUDA buffer")
+        log("main: exiting due to model loading error")
+        return 1
+    for device_id, used in sorted(prediction['devices'].items()):
+        if used:
+            log(f"load_tensors:        CUDA{device_id} model buffer size = {used / MIB:10.2f} MiB")
+    log(f"load_tensors:   CPU_Mapped model buffer size = {prediction['host'] / MIB:10.2f} MiB")
+
+    host = params.get('--host', '127.0.0.1')
+    port = int(params.get('--port', '8080'))
+    try:
+        server = ThreadingHTTPServer((host, port), CompletionHandler)
+    except OSError as e:
+        log(f"start: couldn't bind HTTP server socket, hostname: {host}, port: {port}: {e}")
+        return 1
+    server.daemon_threads = True
+    server.model_name = os.path.basename(model_path)
+    server.tps = simulator.tokens_per_second(params, prediction)
+    server.time_scale = float(os.environ.get('FAKE_LLAMA_TIME_SCALE', '0.02'))
+    server.slot_lock = threading.Lock()
+    server.metrics = '--metrics' in params
+    server.prompt_tokens = server.predicted_tokens = 0
+
+    log("main: model loaded")
+    log(f"main: server is listening on http://{host}:{port} - starting the main loop")
+    log("srv  update_slots: all slots are idle")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,131 @@
+# benchmarks/launch_benchmark.py
+"""
+Compares the cost of starting a server the old way (command written to a temporary
+.bat/.sh script that a shell parses and runs) with a direct argv exec, and checks that
+both deliver the arguments unchanged.
+
+    python -m benchmarks.launch_benchmark                       # a trivial target, 50 runs each
+    python -m benchmarks.launch_benchmark --runs 200 --json out.json
+    python -m benchmarks.launch_benchmark --exe C:\\llama.cpp\\llama-server.exe -- --version
+
+Run from the 'Experimental' directory. The latency is measured from the launch request
+until the target exits, so pick a target that exits immediately.
+"""
+
+import argparse
+import json
+import os
+import shlex
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from Llamacpp_Model_launcher.core.command_builder import CommandBuilder, Parameter
+
+# Arguments that have broken the script path before: spaces, quotes and JSON.
+QUOTING_ARGS = ['-m', os.path.join(tempfile.gettempdir(), 'My Models', 'model Q4_K_M.gguf'),
+                '--chat-template-kwargs', '{"reasoning_effort": "medium"}', '--alias', "it's-a-test"]
+
+ECHO_SCRIPT = "import json, sys; print(json.dumps(sys.argv[1:]))"
+
+
+def _default_target():
+    if os.name != 'nt' and shutil.which('true'):
+        return [shutil.which('true')]
+    return [sys.executable, '-c', 'pass']
+
+
+def _script_command(args):
+    """The command line the launcher used to write into its temporary script."""
+    return subprocess.list2cmdline(args) if os.name == 'nt' else shlex.join(args)
+
+
+def launch_via_script(args):
+    """Old path: write a temporary script, let a shell parse and run it, then delete it."""
+    suffix, header = ('.bat', '@echo off\n') if os.name == 'nt' else ('.sh', '')
+    temp_file = tempfile.NamedTemporaryFile(mode='w', suffix=suffix, delete=False, encoding='utf-8')
+    try:
+        temp_file.write(header + _script_command(args) + '\n')
+        temp_file.close()
+        shell = ['cmd', '/c', temp_file.name] if os.name == 'nt' else ['/bin/sh', temp_file.name]
+        return subprocess.run(shell, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=os.environ.copy())
+    finally:
+        os.remove(temp_file.name)
+
+
+def launch_direct(args):
+    """New path: execute the argument vector with an explicit environment."""
+    return subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=os.environ.copy())
+
+
+PATHS = [('script', launch_via_script), ('direct', launch_direct)]
+
+
+def check_quoting():
+    """Returns {path name: True if the echoed argv matched QUOTING_ARGS}."""
+    params = [Parameter('Executable', sys.executable), Parameter('-c', ECHO_SCRIPT)]
+    args = CommandBuilder.launch_args(params) + QUOTING_ARGS
+    results = {}
+    for name, launch in PATHS:
+        completed = launch(args)
+        try:
+            results[name] = json.loads(completed.stdout.decode('utf-8', 'replace').strip().splitlines()[-1]) == QUOTING_ARGS
+        except (ValueError, IndexError):
+            results[name] = False
+    return results
+
+
+def measure(args, runs, warmup=3):
+    """Alternates the two paths so both see the same system noise. Returns {name: [ms, ...]}."""
+    timings = {name: [] for name, _ in PATHS}
+    for i in range(warmup + runs):
+        for name, launch in PATHS:
+            start = time.perf_counter()
+            launch(args)
+            if i >= warmup:
+                timings[name].append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        'runs': len(ordered),
+        'median_ms': round(statistics.median(ordered), 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        'mean_ms': round(statistics.fmean(ordered), 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark server launch latency: temp script + shell vs direct exec.")
+    parser.add_argument('--exe', help="Executable to launch (default: a trivial program that exits at once).")
+    parser.add_argument('--runs', type=int, default=50, help="Measured launches per path.")
+    parser.add_argument('--json', help="Write the results to this file.")
+    parser.add_argument('target_args', nargs='*', help="Arguments for --exe (put them after '--').")
+    args = parser.parse_args(argv)
+
+    target = [args.exe] + args.target_args if args.exe else _default_target()
+    print(f"Target: {subprocess.list2cmdline(target)}")
+    timings = measure(target, args.runs)
+    quoting = check_quoting()
+
+    results = {name: {**summarize(samples), 'argv_preserved': quoting[name]} for name, samples in timings.items()}
+    print(f"{'path':<10}{'runs':>6}{'median ms':>12}{'p95 ms':>10}{'mean ms':>10}  argv preserved")
+    for name, result in results.items():
+        print(f"{name:<10}{result['runs']:>6}{result['median_ms']:>12.2f}{result['p95_ms']:>10.2f}"
+              f"{result['mean_ms']:>10.2f}  {'yes' if result['argv_preserved'] else 'NO'}")
+    saved = results['script']['median_ms'] - results['direct']['median_ms']
+    print(f"Direct exec saves {saved:.2f} ms per launch (median).")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0 if results['direct']['argv_preserved'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+# benchmarks/prefetch_benchmark.py
+"""
+Compares a cold model load with one preceded by page-cache prewarming (see core/prefetch.py).
+Each run first drops the model's pages from the cache with posix_fadvise(DONTNEED), then
+either loads straight away or prewarms and loads.
+
+    python -m benchmarks.prefetch_benchmark                              # a 1 GiB scratch file
+    python -m benchmarks.prefetch_benchmark --model D:\\models\\big.gguf --runs 5 --json out.json
+    python -m benchmarks.prefetch_benchmark --model big.gguf --server ~/llama.cpp/llama-server -- -ngl 0
+
+Run from the 'Experimental' directory. Without --server, a "load" maps the files and touches
+every page, as llama-server's mmap loader does; with --server the time to /health ready is
+measured. Dropping the cache needs posix_fadvise (Linux); elsewhere, and for files on tmpfs,
+the cold numbers are only cold if the cache was emptied by other means.
+"""
+
+import argparse
+import json
+import mmap
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from Llamacpp_Model_launcher.core.gguf_reader import find_shard_paths
+from Llamacpp_Model_launcher.core.prefetch import FADVISE_AVAILABLE, MIB, advise, prewarm, rate_mib
+from Llamacpp_Model_launcher.core.readiness import wait_until_ready
+from Llamacpp_Model_launcher.core.server_pool import port_is_free
+
+PAGE = mmap.PAGESIZE
+
+
+def make_scratch_file(size_mb):
+    """Writes an incompressible scratch file and flushes it to disk so its pages can be dropped."""
+    handle, path = tempfile.mkstemp(suffix='.gguf', dir=os.getcwd())
+    with os.fdopen(handle, 'wb') as f:
+        block = os.urandom(MIB)
+        for _ in range(size_mb):
+            f.write(block)
+        f.flush()
+        os.fsync(f.fileno())
+    return path
+
+
+def mmap_load(paths):
+    """Maps each file and reads one byte per page."""
+    checksum = 0
+    for path in paths:
+        if not os.path.getsize(path):
+            continue
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for offset in range(0, len(mapped), PAGE):
+                checksum ^= mapped[offset]
+    return checksum
+
+
+def server_load(server, paths, extra_args, port=8092, timeout=600):
+    """Starts llama-server on the first file and stops it once /health reports ready."""
+    while not port_is_free('127.0.0.1', port):
+        port += 1
+    process = subprocess.Popen([server, '-m', paths[0], '--host', '127.0.0.1', '--port', str(port)] + extra_args,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        readiness = wait_until_ready('127.0.0.1', port, timeout, is_alive=lambda: process.poll() is None)
+        if not readiness.ready:
+            raise RuntimeError(f"The server did not become ready (exit code {process.poll()}).")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def measure(paths, runs, load, chunk_bytes):
+    """Alternates cold and prewarmed runs so both see the same system noise. Returns {case: [seconds, ...]}."""
+    timings = {'cold_load': [], 'prewarm': [], 'prewarmed_load': []}
+    for _ in range(runs):
+        advise(paths, 'dontneed')
+        timings['cold_load'].append(timed(load, paths))
+        advise(paths, 'dontneed')
+        timings['prewarm'].append(prewarm(paths, chunk_bytes).seconds)
+        timings['prewarmed_load'].append(timed(load, paths))
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark model load time with and without page-cache prewarming.")
+    parser.add_argument('--model', help="Model file (any shard of a split model). Default: a scratch file.")
+    parser.add_argument('--size-mb', type=int, default=1024, help="Size of the scratch file.")
+    parser.add_argument('--server', help="llama-server executable; measures time to ready instead of an mmap scan.")
+    parser.add_argument('--runs', type=int, default=3, help="Measured runs per case.")
+    parser.add_argument('--chunk-mb', type=int, default=16, help="Prewarm read size.")
+    parser.add_argument('--json', help="Write the results to this file.")
+    parser.add_argument('server_args', nargs='*', help="Extra arguments for --server (put them after '--').")
+    args = parser.parse_args(argv)
+
+    scratch = None if args.model else make_scratch_file(args.size_mb)
+    paths = find_shard_paths(args.model) if args.model else [scratch]
+    try:
+        total = sum(os.path.getsize(p) for p in paths)
+        print(f"Files: {len(paths)}, {total / MIB:,.0f} MiB")
+        if not FADVISE_AVAILABLE:
+            print("posix_fadvise is unavailable: the cache cannot be dropped, so 'cold' loads may be warm.")
+        if args.server:
+            load = lambda p: server_load(args.server, p, args.server_args)
+        else:
+            load = mmap_load
+        timings = measure(paths, args.runs, load, args.chunk_mb * MIB)
+    finally:
+        if scratch:
+            os.remove(scratch)
+
+    results = {case: round(statistics.median(samples), 3) for case, samples in timings.items()}
+    results['prewarm_mib_per_second'] = round(rate_mib(total, results['prewarm']), 1)
+    results['cold_load_mib_per_second'] = round(rate_mib(total, results['cold_load']), 1)
+    print(f"{'case':<18}{'median s':>10}")
+    for case in ('cold_load', 'prewarm', 'prewarmed_load'):
+        print(f"{case:<18}{results[case]:>10.3f}")
+    print(f"Cold load reads {results['cold_load_mib_per_second']:,.0f} MiB/s; "
+          f"prewarm reads {results['prewarm_mib_per_second']:,.0f} MiB/s.")
+    saved = results['cold_load'] - results['prewarmed_load']
+    print(f"A prewarmed load is {saved:.3f} s faster; prewarm plus load takes "
+          f"{results['prewarm'] + results['prewarmed_load']:.3f} s against {results['cold_load']:.3f} s cold.")
+    if results['cold_load'] < results['prewarmed_load'] * 1.2:
+        print("Cold and warm loads are close: the cache was probably not dropped (tmpfs, or no posix_fadvise).")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'bytes': total, 'runs': args.runs, **results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,152 @@
+# benchmarks/synthetic_models.py
+
+import os
+import struct
+
+GGUF_ALIGNMENT = 32
+GGML_TYPE_F32 = 0
+GGML_TYPE_Q4_K = 12
+GGML_TYPE_Q6_K = 14
+
+# GGUF metadata value types used by the writer.
+_UINT32, _FLOAT32, _STRING, _ARRAY = 4, 6, 8, 9
+
+# (elements per block, bytes per block) for the tensor types the writer emits.
+_TYPE_SIZES = {GGML_TYPE_F32: (1, 4), GGML_TYPE_Q4_K: (256, 144), GGML_TYPE_Q6_K: (256, 210)}
+
+# Shapes of real model families, quantized to Q4_K. Only the header is written; the
+# tensor data region is left sparse, so the files take no real disk space.
+MODEL_SPECS = {
+    'dense-8b': dict(arch='llama', n_layer=32, n_embd=4096, n_head=32, n_head_kv=8, n_ff=14336, n_vocab=128256),
+    'dense-32b': dict(arch='qwen2', n_layer=64, n_embd=5120, n_head=40, n_head_kv=8, n_ff=27648, n_vocab=152064),
+    'dense-70b': dict(arch='llama', n_layer=80, n_embd=8192, n_head=64, n_head_kv=8, n_ff=28672, n_vocab=128256),
+    'moe-30b-a3b': dict(arch='qwen3moe', n_layer=48, n_embd=2048, n_head=32, n_head_kv=4, head_dim=128,
+                        n_ff=6144, n_vocab=151936, expert_count=128, expert_used_count=8, expert_ff=768),
+    'moe-120b': dict(arch='gpt-oss', n_layer=36, n_embd=2880, n_head=64, n_head_kv=8, head_dim=64,
+                     n_ff=2880, n_vocab=201088, expert_count=128, expert_used_count=4, expert_ff=2880,
+                     sliding_window=128),
+    'gemma3-12b': dict(arch='gemma3', n_layer=48, n_embd=3840, n_head=16, n_head_kv=8, head_dim=256,
+                       n_ff=15360, n_vocab=262144, sliding_window=1024),
+}
+
+
+def _string(value):
+    data = value.encode('utf-8')
+    return struct.pack('<Q', len(data)) + data
+
+
+def _kv(key, value_type, value):
+    out = _string(key) + struct.pack('<I', value_type)
+    if value_type == _UINT32:
+        return out + struct.pack('<I', value)
+    if value_type == _FLOAT32:
+        return out + struct.pack('<f', value)
+    if value_type == _STRING:
+        return out + _string(value)
+    raise ValueError(f"Unsupported metadata type: {value_type}")
+
+
+def _tensor_bytes(shape, ggml_type):
+    block_size, type_size = _TYPE_SIZES[ggml_type]
+    n_elements = 1
+    for dim in shape:
+        n_elements *= dim
+    return (n_elements // block_size) * type_size
+
+
+def _tensor_list(spec):
+    """Returns [(name, shape, ggml_type)] in llama.cpp naming."""
+    n_embd, n_vocab = spec['n_embd'], spec['n_vocab']
+    head_dim = spec.get('head_dim', n_embd // spec['n_head'])
+    q_dim, kv_dim = spec['n_head'] * head_dim, spec['n_head_kv'] * head_dim
+    quant = spec.get('tensor_type', GGML_TYPE_Q4_K)
+
+    tensors = [('token_embd.weight', (n_embd, n_vocab), quant)]
+    for il in range(spec['n_layer']):
+        prefix = f'blk.{il}.'
+        tensors += [
+            (prefix + 'attn_norm.weight', (n_embd,), GGML_TYPE_F32),
+            (prefix + 'attn_q.weight', (n_embd, q_dim), quant),
+            (prefix + 'attn_k.weight', (n_embd, kv_dim), quant),
+            (prefix + 'attn_v.weight', (n_embd, kv_dim), quant),
+            (prefix + 'attn_output.weight', (q_dim, n_embd), quant),
+            (prefix + 'ffn_norm.weight', (n_embd,), GGML_TYPE_F32),
+        ]
+        if spec.get('expert_count'):
+            n_expert, expert_ff = spec['expert_count'], spec['expert_ff']
+            tensors += [
+                (prefix + 'ffn_gate_inp.weight', (n_embd, n_expert), GGML_TYPE_F32),
+                (prefix + 'ffn_gate_exps.weight', (n_embd, expert_ff, n_expert), quant),
+                (prefix + 'ffn_up_exps.weight', (n_embd, expert_ff, n_expert), quant),
+                (prefix + 'ffn_down_exps.weight', (expert_ff, n_embd, n_expert), quant),
+            ]
+        else:
+            n_ff = spec['n_ff']
+            tensors += [
+                (prefix + 'ffn_gate.weight', (n_embd, n_ff), quant),
+                (prefix + 'ffn_up.weight', (n_embd, n_ff), quant),
+                (prefix + 'ffn_down.weight', (n_ff, n_embd), quant),
+            ]
+    tensors += [('output_norm.weight', (n_embd,), GGML_TYPE_F32),
+                ('output.weight', (n_embd, n_vocab), GGML_TYPE_Q6_K)]
+    return tensors
+
+
+def write_synthetic_gguf(path, arch, n_layer, n_embd, n_head, n_head_kv, n_ff, n_vocab, head_dim=None,
+                         context_length=131072, expert_count=0, expert_used_count=0, expert_ff=0,
+                         sliding_window=0, tensor_type=GGML_TYPE_Q4_K):
+    """
+    Writes a GGUF file with real-looking metadata and tensor table. The file has the
+    full logical size of the model but its data region is never written.
+    Returns:
+        The file size in bytes.
+    """
+    spec = dict(arch=arch, n_layer=n_layer, n_embd=n_embd, n_head=n_head, n_head_kv=n_head_kv, n_ff=n_ff,
+                n_vocab=n_vocab, expert_count=expert_count, expert_ff=expert_ff, tensor_type=tensor_type)
+    if head_dim:
+        spec['head_dim'] = head_dim
+
+    metadata = [
+        _kv('general.architecture', _STRING, arch),
+        _kv('general.name', _STRING, os.path.splitext(os.path.basename(path))[0]),
+        _kv('general.alignment', _UINT32, GGUF_ALIGNMENT),
+        _kv(f'{arch}.block_count', _UINT32, n_layer),
+        _kv(f'{arch}.context_length', _UINT32, context_length),
+        _kv(f'{arch}.embedding_length', _UINT32, n_embd),
+        _kv(f'{arch}.feed_forward_length', _UINT32, n_ff),
+        _kv(f'{arch}.attention.head_count', _UINT32, n_head),
+        _kv(f'{arch}.attention.head_count_kv', _UINT32, n_head_kv),
+    ]
+    if head_dim:
+        metadata += [_kv(f'{arch}.attention.key_length', _UINT32, head_dim),
+                     _kv(f'{arch}.attention.value_length', _UINT32, head_dim)]
+    if expert_count:
+        metadata += [_kv(f'{arch}.expert_count', _UINT32, expert_count),
+                     _kv(f'{arch}.expert_used_count', _UINT32, expert_used_count),
+                     _kv(f'{arch}.expert_feed_forward_length', _UINT32, expert_ff)]
+    if sliding_window:
+        metadata.append(_kv(f'{arch}.attention.sliding_window', _UINT32, sliding_window))
+
+    tensor_infos = []
+    data_offset = 0
+    for name, shape, ggml_type in _tensor_list(spec):
+        tensor_infos.append(_string(name) + struct.pack('<I', len(shape)) + struct.pack(f'<{len(shape)}Q', *shape)
+                            + struct.pack('<IQ', ggml_type, data_offset))
+        size = _tensor_bytes(shape, ggml_type)
+        data_offset += (size + GGUF_ALIGNMENT - 1) // GGUF_ALIGNMENT * GGUF_ALIGNMENT
+
+    header = b'GGUF' + struct.pack('<IQQ', 3, len(tensor_infos), len(metadata))
+    header += b''.join(metadata) + b''.join(tensor_infos)
+    header += b'\0' * (-len(header) % GGUF_ALIGNMENT)
+    with open(path, 'wb') as f:
+        f.write(header)
+        f.truncate(len(header) + data_offset)
+    return len(header) + data_offset
+
+
+def ensure_model(directory, name):
+    """Writes MODEL_SPECS[name] to '<directory>/<name>.gguf' unless it already exists. Returns the path."""
+    path = os.path.join(directory, f"{name}.gguf")
+    if not os.path.exists(path):
+        write_synthetic_gguf(path, **MODEL_SPECS[name])
+    return path
@@ -0,0 +1,173 @@
+# benchmarks/tuning_benchmark.py
+"""
+Counts trial loads and wall-clock time for every TuningWizard strategy over a fixed set
+of simulated hardware/model scenarios, so regressions in search efficiency show up in CI.
+
+    python -m benchmarks.tuning_benchmark                      # in-process FakeBackend
+    python -m benchmarks.tuning_benchmark --backend process    # fake llama-server processes
+    python -m benchmarks.tuning_benchmark --json out.json --baseline benchmarks/baseline.json
+
+Run from the 'Experimental' directory. Exits with status 1 when a scenario needs more
+loads than the baseline, or no longer finds a configuration.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+from collections import namedtuple
+
+from Llamacpp_Model_launcher.core.server_backend import FakeBackend, SubprocessBackend
+from Llamacpp_Model_launcher.system_analyzer import SystemAnalyzer
+from Llamacpp_Model_launcher.tuning_wizard import TuningWizard
+from Llamacpp_Model_launcher.tuning_runner import TuningRunner
+from benchmarks.synthetic_models import ensure_model
+
+FAKE_SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_llama_server.py')
+
+Scenario = namedtuple('Scenario', ['name', 'model', 'gpu_vram_gb', 'strategy', 'params'])
+
+# strategy is the TuningWizard generator method that is driven.
+SCENARIOS = [
+    Scenario('dense-fits-one-gpu', 'dense-8b', [24], 'run_tuning_wizard', {'-c': '8192'}),
+    Scenario('dense-split-two-gpus', 'dense-32b', [16, 12], 'run_tuning_wizard', {'-c': '8192'}),
+    Scenario('dense-partial-offload', 'dense-70b', [24, 12], 'run_tuning_wizard', {'-c': '8192'}),
+    Scenario('moe-fits-two-gpus', 'moe-30b-a3b', [12, 12], 'run_tuning_wizard', {'-c': '16384'}),
+    Scenario('moe-cpu-experts', 'moe-120b', [24, 16], 'run_tuning_wizard', {'-c': '16384'}),
+    Scenario('dense-too-big-one-gpu', 'dense-32b', [12], 'run_tuning_wizard', {'-c': '32768'}),
+    Scenario('context-max-dense', 'dense-8b', [12], 'run_context_maximizer', {'-ngl': '99'}),
+    Scenario('context-max-swa', 'gemma3-12b', [16], 'run_context_maximizer', {'-ngl': '99', '-fa': 'on'}),
+]
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _analysis_for(model_path, gpu_vram_gb):
+    """Runs the real model analysis, then replaces the hardware probe with the simulated GPUs."""
+    generator = SystemAnalyzer().run_analysis(model_path)
+    try:
+        while True:
+            next(generator)
+    except StopIteration as e:
+        analysis = e.value
+    analysis['gpus'] = [{'id': i, 'name': f"Fake GPU {i}", 'vram': {'total_gb': gb, 'used_gb': 0.0, 'free_gb': gb}}
+                        for i, gb in enumerate(gpu_vram_gb)]
+    analysis['ram'] = {'total_gb': 128.0, 'used_gb': 0.0, 'free_gb': 128.0}
+    return analysis
+
+
+def _make_backend(kind, scenario):
+    if kind == 'fake':
+        return FakeBackend(scenario.gpu_vram_gb), FAKE_SERVER_SCRIPT
+    env = {'FAKE_LLAMA_VRAM_GB': ",".join(str(gb) for gb in scenario.gpu_vram_gb),
+           'FAKE_LLAMA_LOAD_SECONDS': '0.2', 'FAKE_LLAMA_TIME_SCALE': '0.005'}
+    backend = SubprocessBackend(os.path.dirname(FAKE_SERVER_SCRIPT), load_timeout=30, idle_timeout=30,
+                                request_timeout=30, request_pause=0.1, launcher=[sys.executable], env=env)
+    return backend, FAKE_SERVER_SCRIPT
+
+
+def run_scenario(scenario, model_dir, backend_kind='fake', verbose=False):
+    """
+    Runs one scenario end to end.
+    Returns:
+        A dict with 'loads', 'elapsed_s', 'unload_s' (time spent stopping servers), 'found',
+        'tps' and the key tuned 'params'.
+    """
+    model_path = ensure_model(model_dir, scenario.model)
+    backend, executable = _make_backend(backend_kind, scenario)
+    params = {'Executable': executable, '-m': model_path, '--jinja': None, '--port': str(_free_port()),
+              **scenario.params}
+
+    captured = io.StringIO()
+    output = sys.stdout if verbose else captured
+    with contextlib.redirect_stdout(output):
+        wizard = TuningWizard(_analysis_for(model_path, scenario.gpu_vram_gb), params)
+        runner = TuningRunner(wizard, backend, on_log=print)
+        outcome = runner.run(getattr(wizard, scenario.strategy)())
+
+    best = outcome['best_params'] or {}
+    return {
+        'loads': outcome['loads'],
+        'elapsed_s': round(outcome['elapsed_s'], 3),
+        'unload_s': round(sum(r.seconds for r in backend.supervisor.unloads), 3) if backend_kind == 'process' else 0.0,
+        'found': bool(outcome['best_params']),
+        'tps': round(wizard.best_config.get('tps', 0.0), 2),
+        'params': {k: best[k] for k in ('-ngl', '-ts', '-ncmoe', '-c', '--split-mode') if k in best},
+    }
+
+
+def compare_to_baseline(results, baseline):
+    """Returns a list of regression messages."""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if result['loads'] > previous['loads']:
+            regressions.append(f"{name}: {result['loads']} loads (baseline {previous['loads']})")
+        if previous['found'] and not result['found']:
+            regressions.append(f"{name}: no configuration found (baseline found one)")
+    return regressions
+
+
+def print_table(results, baseline):
+    print(f"{'scenario':<26}{'loads':>7}{'base':>6}{'time s':>9}{'unload s':>10}{'found':>7}{'t/s':>9}  params")
+    for name, result in results.items():
+        base_loads = baseline.get(name, {}).get('loads', '-')
+        params = " ".join(f"{k} {v}" for k, v in result['params'].items())
+        print(f"{name:<26}{result['loads']:>7}{base_loads:>6}{result['elapsed_s']:>9.2f}{result['unload_s']:>10.2f}"
+              f"{'yes' if result['found'] else 'no':>7}{result['tps']:>9.2f}  {params}")
+    total_loads = sum(r['loads'] for r in results.values())
+    total_time = sum(r['elapsed_s'] for r in results.values())
+    total_unload = sum(r['unload_s'] for r in results.values())
+    print(f"{'TOTAL':<26}{total_loads:>7}{'':>6}{total_time:>9.2f}{total_unload:>10.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the tuning wizard's search efficiency.")
+    parser.add_argument('--backend', choices=['fake', 'process'], default='fake',
+                        help="'fake' runs in-process; 'process' starts the simulated llama-server for every load.")
+    parser.add_argument('--scenario', action='append', help="Run only the named scenario(s).")
+    parser.add_argument('--model-dir', help="Where synthetic models are written (default: a temporary directory).")
+    parser.add_argument('--json', help="Write the results to this file.")
+    parser.add_argument('--baseline', help="Compare against a previous --json output.")
+    parser.add_argument('--verbose', action='store_true', help="Show the wizard log.")
+    args = parser.parse_args(argv)
+
+    scenarios = [s for s in SCENARIOS if not args.scenario or s.name in args.scenario]
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        model_dir = args.model_dir or temp_dir
+        os.makedirs(model_dir, exist_ok=True)
+        results = {}
+        start_time = time.monotonic()
+        for scenario in scenarios:
+            results[scenario.name] = run_scenario(scenario, model_dir, args.backend, args.verbose)
+        print_table(results, baseline)
+        print(f"Wall-clock: {time.monotonic() - start_time:.2f} s ({args.backend} backend)")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    regressions = compare_to_baseline(results, baseline)
+    for message in regressions:
+        print(f"REGRESSION: {message}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+import argparse
+import sys
+
+# Use absolute imports from the top-level package
+from Llamacpp_Model_launcher.core.config_manager import ConfigManager
+from Llamacpp_Model_launcher.core.model_manager import ModelManager
+from Llamacpp_Model_launcher.core.command_builder import CommandBuilder
+from Llamacpp_Model_launcher.core.log_archive import LogArchive
+from Llamacpp_Model_launcher.core.server_backend import SubprocessBackend, FakeBackend
+from Llamacpp_Model_launcher.system_analyzer import SystemAnalyzer, initialize_pynvml, shutdown_pynvml
+from Llamacpp_Model_launcher.tuning_wizard import TuningWizard
+from Llamacpp_Model_launcher.tuning_runner import TuningRunner
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Run the llama.cpp tuning wizard without the GUI.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--model-name', help="Name of a saved configuration in the models file.")
+    source.add_argument('--command', help="A full llama-server command line to tune.")
+    parser.add_argument('--config', default='config.ini', help="Launcher config file (default: config.ini).")
+    parser.add_argument('--llamacpp-dir', help="Overrides the Llama.cpp directory from the config file.")
+    parser.add_argument('--models-file', help="Overrides the models file from the config file.")
+    parser.add_argument('--mode', choices=['tune', 'max-context'], default='tune',
+                        help="Full tuning run, or search for the largest context with the current offload settings.")
+    parser.add_argument('--yes', action='store_true', help="Accept every confirmation prompt.")
+    parser.add_argument('--confirm-each-step', action='store_true', help="Ask before every benchmark load.")
+    parser.add_argument('--save', action='store_true',
+                        help="Write the best configuration back to the models file (requires --model-name).")
+    parser.add_argument('--fake-gpu', type=float, action='append', metavar='GB',
+                        help="Simulate a GPU with this much free VRAM instead of starting llama-server. Repeatable.")
+    parser.add_argument('--log-archive', metavar='DIR',
+                        help="Record every server session in a compressed log archive in this directory.")
+    return parser.parse_args(argv)
+
+
+def prompt_confirm(action):
+    print(f"\n[{action.get('title', 'Confirm')}]\n{action.get('message', '')}")
+    return input("Proceed? [y/N] ").strip().lower() in ('y', 'yes')
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    llamacpp_dir, models_file = ConfigManager(args.config).load_config()
+    llamacpp_dir = args.llamacpp_dir or llamacpp_dir
+    models_file = args.models_file or models_file
+
+    model_manager = ModelManager(models_file)
+    if args.model_name:
+        command_str = model_manager.load_models().get(args.model_name)
+        if not command_str:
+            print(f"Model '{args.model_name}' not found in '{models_file}'.")
+            return 2
+    else:
+        command_str = args.command
+
+    params = {p.key: p.value for p in CommandBuilder.parse(command_str)}
+    model_path = params.get('-m', params.get('--model'))
+    if 'Executable' not in params or not model_path:
+        print("Tuning requires the executable and a model path ('-m') in the command.")
+        return 2
+    if '--jinja' not in params:
+        print("[INFO] --jinja flag not found. It will be added for the tuning process.")
+        params['--jinja'] = None
+
+    initialize_pynvml()
+    try:
+        analysis_generator = SystemAnalyzer().run_analysis(model_path)
+        try:
+            while True:
+                print(next(analysis_generator))
+        except StopIteration as e:
+            analysis = e.value
+    finally:
+        shutdown_pynvml()
+
+    if args.fake_gpu:
+        analysis['gpus'] = [{'id': i, 'name': f"Fake GPU {i}",
+                             'vram': {'total_gb': gb, 'used_gb': 0.0, 'free_gb': gb}}
+                            for i, gb in enumerate(args.fake_gpu)]
+        backend = FakeBackend(args.fake_gpu)
+    else:
+        backend = SubprocessBackend(llamacpp_dir, log_archive=LogArchive(args.log_archive) if args.log_archive else None)
+
+    wizard = TuningWizard(analysis, params)
+    runner = TuningRunner(wizard, backend, confirm=(lambda action: True) if args.yes else prompt_confirm,
+                          confirm_each_step=args.confirm_each_step)
+    generator = wizard.run_context_maximizer() if args.mode == 'max-context' else wizard.run_tuning_wizard()
+    outcome = runner.run(generator)
+
+    print("\n" + "=" * 80)
+    print(f"Server loads: {outcome['loads']}, elapsed: {outcome['elapsed_s']:.1f} s")
+    if isinstance(backend, SubprocessBackend):
+        unloads = backend.supervisor.summary()
+        print(f"Unloads: {unloads['unloads']}, average {unloads['avg_seconds']:.2f} s, "
+              f"slowest {unloads['max_seconds']:.2f} s, killed after the grace period: {unloads['killed']}")
+    if not outcome['best_params']:
+        print("No configuration was found.")
+        return 1
+    print(f"Best configuration:\n{outcome['best_command']}")
+
+    if args.save:
+        if not args.model_name:
+            print("--save requires --model-name; the configuration was not saved.")
+            return 1
+        success, message = model_manager.save_model(args.model_name, args.model_name,
+                                                    outcome['best_command'], is_new=False)
+        print(message)
+        return 0 if success else 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+import argparse
+import json
+import os
+import sys
+
+# Use absolute imports from the top-level package
+from Llamacpp_Model_launcher.core.config_manager import ConfigManager
+from Llamacpp_Model_launcher.core.command_builder import CommandBuilder
+from Llamacpp_Model_launcher.core.model_manager import ModelManager
+from Llamacpp_Model_launcher.core.model_library import ModelLibrary
+from Llamacpp_Model_launcher.core.prefetch import model_files
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description="Scan model directories for GGUF files and list them with their metadata. "
+                    "Unchanged files are not read again, so rescans are fast.")
+    parser.add_argument('directories', nargs='*', help="Directories to scan (default: [Library] Directories).")
+    parser.add_argument('--config', default='config.ini', help="Launcher config file (default: config.ini).")
+    parser.add_argument('--catalog', help="Catalog file (default: [Library] Catalog or model_catalog.json).")
+    parser.add_argument('--workers', type=int, help="Headers read in parallel (default: [Library] Workers or 8).")
+    parser.add_argument('--unconfigured', action='store_true',
+                        help="Only list models that no configuration in the models file uses.")
+    parser.add_argument('--json', action='store_true', help="Print the catalog entries as JSON.")
+    return parser.parse_args(argv)
+
+
+def format_size(n_bytes):
+    return f"{n_bytes / 1024 ** 3:.1f} GB" if n_bytes >= 1024 ** 3 else f"{n_bytes / 1024 ** 2:.0f} MB"
+
+
+def configured_files(llamacpp_dir, models_file):
+    """The model files used by the configurations in the models file."""
+    files = set()
+    for command in ModelManager(models_file).load_models().values():
+        params = {p.key: p.value for p in CommandBuilder.parse(command)}
+        files.update(os.path.abspath(f) for f in model_files(params, llamacpp_dir or ''))
+    return files
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config_manager = ConfigManager(args.config)
+    settings = config_manager.load_library_settings()
+    directories = args.directories or settings['directories']
+    if not directories:
+        print("No directories to scan: pass them as arguments or set [Library] Directories.")
+        return 2
+    for directory in directories:
+        if not os.path.isdir(directory):
+            print(f"Skipping '{directory}': not a directory.")
+
+    library = ModelLibrary(args.catalog or settings['catalog'], args.workers or settings['workers'])
+    result = library.scan(directories)
+    entries = library.entries()
+    if args.unconfigured:
+        used = configured_files(*config_manager.load_config())
+        entries = [e for e in entries if not used.intersection(e.shards)]
+
+    if args.json:
+        print(json.dumps([e._asdict() for e in entries], indent=2))
+        return 0
+    for e in entries:
+        if e.error:
+            print(f"{e.name:<48} {format_size(e.size_bytes):>9}  {e.quant or '?':<8} ERROR: {e.error}")
+            continue
+        experts = f"{e.expert_used_count}/{e.expert_count} experts" if e.expert_count else 'dense'
+        shards = f"  ({len(e.shards)} shards)" if len(e.shards) > 1 else ''
+        print(f"{e.name:<48} {format_size(e.size_bytes):>9}  {e.quant or '?':<8} {e.architecture:<12} "
+              f"{e.block_count or '?':>3} layers  {experts:<15} ctx {e.context_length or '?'}{shards}")
+    print(f"{len(entries)} model(s); {result.added} new, {result.updated} changed, {result.removed} gone, "
+          f"{result.failed} unreadable; scanned in {result.seconds:.2f} s.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
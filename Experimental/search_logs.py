@@ -0,0 +1,55 @@
+import argparse
+import sys
+import time
+
+# Use absolute imports from the top-level package
+from Llamacpp_Model_launcher.core.log_archive import LogArchive
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Search the launcher's archived llama-server logs.")
+    parser.add_argument('--archive', default='logs/archive', help="Archive directory (default: logs/archive).")
+    parser.add_argument('--model', help="Only sessions of this model configuration.")
+    parser.add_argument('--session', help="Only this session id.")
+    parser.add_argument('--event', choices=['oom', 'model_loaded', 'soft_failure'],
+                        help="List indexed events of this kind instead of sessions.")
+    parser.add_argument('--hours', type=float, help="Only look at the last N hours.")
+    parser.add_argument('--context', action='store_true', help="Print the log output around each event.")
+    parser.add_argument('--dump', action='store_true', help="Print the full output of the selected session(s).")
+    return parser.parse_args(argv)
+
+
+def format_time(timestamp):
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp)) if timestamp else '-'
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    archive = LogArchive(args.archive)
+    since = time.time() - args.hours * 3600 if args.hours else None
+
+    if args.event:
+        events = archive.events(kind=args.event, model=args.model, session=args.session, since=since)
+        for event in events:
+            print(f"{format_time(event['time'])}  {event['session']}  {event['kind']}  {event['line'].strip()}")
+            if args.context:
+                print("-" * 80)
+                print(archive.context(event))
+                print("-" * 80)
+        print(f"{len(events)} event(s).")
+        return 0
+
+    sessions = [s for s in archive.sessions(args.model)
+                if (not args.session or s['session'] == args.session) and (not since or s['time'] >= since)]
+    for session in sessions:
+        status = 'running' if session['ended'] is None else f"exit {session['exit_code']} {session['reason']}".strip()
+        print(f"{format_time(session['time'])}  {session['session']}  [{status}]  {session['bytes']} bytes")
+        if args.dump:
+            for segment in session['segments']:
+                print(archive.read_segment(segment), end='')
+    print(f"{len(sessions)} session(s).")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+import argparse
+import signal
+import sys
+import threading
+
+# Use absolute imports from the top-level package
+from Llamacpp_Model_launcher.core.config_manager import ConfigManager
+from Llamacpp_Model_launcher.core.model_manager import ModelManager
+from Llamacpp_Model_launcher.core.log_archive import LogArchive
+from Llamacpp_Model_launcher.core.metrics import LoadTimeLog
+from Llamacpp_Model_launcher.core.idle_monitor import IdleMonitor
+from Llamacpp_Model_launcher.core.restart_policy import RestartPolicy
+from Llamacpp_Model_launcher.core.model_cache import GIB, ModelCache
+from Llamacpp_Model_launcher.core.launch_scheduler import LaunchScheduler
+from Llamacpp_Model_launcher.core.server_pool import ServerPool
+from Llamacpp_Model_launcher.core.pool_api import PoolApiServer
+from Llamacpp_Model_launcher.core.routing_proxy import RoutingProxy
+from Llamacpp_Model_launcher.system_analyzer import SystemAnalyzer, initialize_pynvml, shutdown_pynvml
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description="Serve every configuration in the models file behind one OpenAI-compatible endpoint, "
+                    "loading models on demand.")
+    parser.add_argument('--config', default='config.ini', help="Launcher config file (default: config.ini).")
+    parser.add_argument('--llamacpp-dir', help="Overrides the Llama.cpp directory from the config file.")
+    parser.add_argument('--models-file', help="Overrides the models file from the config file.")
+    parser.add_argument('--host', help="Proxy interface (default: [Proxy] Host or 127.0.0.1).")
+    parser.add_argument('--port', type=int, help="Proxy port (default: [Proxy] Port or 8000).")
+    parser.add_argument('--vram-budget', type=float, metavar='GB', help="Predicted VRAM all models may use together.")
+    parser.add_argument('--ram-budget', type=float, metavar='GB', help="Predicted system RAM all models may use together.")
+    parser.add_argument('--max-instances', type=int, help="Models loaded at once (0 for no limit).")
+    parser.add_argument('--gpus', type=int, metavar='N',
+                        help="GPUs llama.cpp sees, for the memory estimates (default: NVIDIA GPUs found, or 1).")
+    parser.add_argument('--idle-minutes', type=float, metavar='MIN',
+                        help="Unload models idle this long (default: [IdleUnload] Minutes; 0 never).")
+    parser.add_argument('--preload', metavar='NAMES',
+                        help="Comma-separated configurations to load at startup (default: [LaunchQueue] Preload).")
+    parser.add_argument('--log-archive', metavar='DIR', help="Record every server session in this directory.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config_manager = ConfigManager(args.config)
+    llamacpp_dir, models_file = config_manager.load_config()
+    llamacpp_dir = args.llamacpp_dir or llamacpp_dir
+    model_manager = ModelManager(args.models_file or models_file)
+    if not model_manager.load_models():
+        print(f"No configurations found in '{model_manager.models_file_path}'.")
+        return 2
+
+    settings = config_manager.load_proxy_settings()
+    n_devices = args.gpus
+    if n_devices is None:
+        initialize_pynvml()
+        n_devices = max(1, len(SystemAnalyzer().get_live_vram_usage() or {}))
+        shutdown_pynvml()
+    api_enabled, api_host, api_port, port_range = config_manager.load_pool_settings()
+    idle = config_manager.load_idle_settings()
+    idle_monitor = IdleMonitor(lambda name, idle_seconds: pool.hibernate(name, idle_seconds),
+                               idle['default_minutes'] if args.idle_minutes is None else args.idle_minutes,
+                               idle['per_config_minutes'], idle['check_seconds'])
+    restart_policy = RestartPolicy(**config_manager.load_restart_settings())
+    cache = config_manager.load_model_cache_settings()
+    model_cache = (ModelCache(cache['directory'], int(cache['budget_gb'] * GIB), cache['min_launches'])
+                   if cache['directory'] and cache['budget_gb'] > 0 else None)
+    queue = config_manager.load_launch_queue_settings()
+    preload = [n.strip() for n in args.preload.split(',') if n.strip()] if args.preload is not None else queue['preload']
+    pool = ServerPool(llamacpp_dir, resolve_command=model_manager.models.get, port_range=port_range,
+                      log_archive=LogArchive(args.log_archive) if args.log_archive else None,
+                      load_times=LoadTimeLog(), idle_monitor=idle_monitor if idle_monitor.enabled else None,
+                      restart_policy=restart_policy if restart_policy.enabled else None, model_cache=model_cache,
+                      launch_scheduler=LaunchScheduler(queue['per_device'], queue['priorities'])
+                      if queue['enabled'] else None)
+    proxy = RoutingProxy(pool, lambda: list(model_manager.models),
+                         host=args.host or settings['host'], port=args.port or settings['port'],
+                         vram_budget_gb=settings['vram_budget_gb'] if args.vram_budget is None else args.vram_budget,
+                         ram_budget_gb=settings['ram_budget_gb'] if args.ram_budget is None else args.ram_budget,
+                         max_instances=settings['max_instances'] if args.max_instances is None else args.max_instances,
+                         on_request=idle_monitor.touch, n_devices=n_devices)
+    success, message = proxy.start()
+    print(message)
+    if not success:
+        return 1
+    pool_api = PoolApiServer(pool, api_host, api_port) if api_enabled else None
+    if pool_api:
+        print(pool_api.start()[1])
+    print(f"Serving {len(model_manager.models)} configuration(s): {', '.join(model_manager.models)}")
+    if idle_monitor.enabled:
+        idle_monitor.start()
+        print("Idle models are unloaded after their [IdleUnload] timeout and reload on the next request.")
+    for name, success, message in pool.preload(preload):
+        print(f"Preload: {message}")
+    if model_cache:
+        print(f"Hot models are copied to '{model_cache.cache_dir}' ({cache['budget_gb']:g} GB budget).")
+
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    while not stop.wait(0.5):
+        pass
+    print("Shutting down...")
+    idle_monitor.stop()
+    proxy.stop()
+    if pool_api:
+        pool_api.stop()
+    pool.unload_all(wait=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+# The package and the benchmarks are imported from the Experimental directory, as the launchers do.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_models import write_synthetic_gguf  # noqa: E402
+
+# Small enough to plan instantly, shaped like the real families in benchmarks.synthetic_models.
+DENSE_SPEC = dict(arch='llama', n_layer=4, n_embd=256, n_head=4, n_head_kv=2, n_ff=512, n_vocab=1024,
+                  context_length=8192)
+MOE_SPEC = dict(arch='qwen3moe', n_layer=4, n_embd=256, n_head=4, n_head_kv=2, n_ff=512, n_vocab=1024,
+                context_length=8192, expert_count=8, expert_used_count=2, expert_ff=256)
+SWA_SPEC = dict(arch='gemma3', n_layer=12, n_embd=256, n_head=4, n_head_kv=2, head_dim=64, n_ff=512,
+                n_vocab=1024, context_length=32768, sliding_window=512)
+
+
+@pytest.fixture
+def dense_model(tmp_path):
+    path = str(tmp_path / 'dense.gguf')
+    write_synthetic_gguf(path, **DENSE_SPEC)
+    return path
+
+
+@pytest.fixture
+def moe_model(tmp_path):
+    path = str(tmp_path / 'moe.gguf')
+    write_synthetic_gguf(path, **MOE_SPEC)
+    return path
+
+
+@pytest.fixture
+def swa_model(tmp_path):
+    path = str(tmp_path / 'swa.gguf')
+    write_synthetic_gguf(path, **SWA_SPEC)
+    return path
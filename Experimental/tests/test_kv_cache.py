@@ -0,0 +1,97 @@
+import pytest
+
+from Llamacpp_Model_launcher.core.kv_cache import KV_CACHE_TYPE_SIZES, KVCacheCalculator
+
+from conftest import DENSE_SPEC, SWA_SPEC
+
+
+class FakeReader:
+    """The parts of a GGUFReader the calculator reads, for hyperparameters the synthetic writer can't emit."""
+
+    def __init__(self, arch, n_layer, n_embd, n_head, context_length=8192, **arch_values):
+        self._summary = {'architecture': arch, 'block_count': n_layer, 'context_length': context_length,
+                         'embedding_length': n_embd, 'head_count': n_head}
+        self._arch_values = arch_values
+
+    def summary(self):
+        return self._summary
+
+    def arch_value(self, key, default=None):
+        return self._arch_values.get(key, default)
+
+
+def test_dense_layers_hold_the_full_context(dense_model):
+    kv = KVCacheCalculator.from_model(dense_model)
+    head_dim = DENSE_SPEC['n_embd'] // DENSE_SPEC['n_head']
+    per_layer = 4096 * DENSE_SPEC['n_head_kv'] * head_dim * (2 + 2)
+    assert kv.swa_layer_count == 0
+    assert kv.layer_bytes(0, 4096) == per_layer
+    assert kv.total_bytes(4096) == DENSE_SPEC['n_layer'] * per_layer
+
+
+def test_quantized_cache_types_scale_each_half(dense_model):
+    kv = KVCacheCalculator.from_model(dense_model)
+    f16 = kv.layer_bytes(0, 4096)
+    assert kv.layer_bytes(0, 4096, 'q8_0', 'q8_0') == int(f16 * KV_CACHE_TYPE_SIZES['q8_0'] / 2)
+    assert kv.layer_bytes(0, 4096, 'f16', 'q4_0') == int(f16 / 2 + f16 / 2 * KV_CACHE_TYPE_SIZES['q4_0'] / 2)
+    assert kv.layer_bytes(0, 4096, 'unknown', 'unknown') == f16
+
+
+def test_sliding_window_layers_follow_the_architecture_default_pattern(swa_model):
+    kv = KVCacheCalculator.from_model(swa_model)
+    # gemma3: every sixth layer is global.
+    assert [il for il in range(SWA_SPEC['n_layer']) if not kv.is_swa_layer(il)] == [5, 11]
+    assert kv.swa_layer_count == 10
+
+
+def test_sliding_window_layers_keep_the_window_plus_one_ubatch(swa_model):
+    kv = KVCacheCalculator.from_model(swa_model)
+    n_swa = SWA_SPEC['sliding_window']
+    assert kv.layer_cells(0, 32768) == n_swa + 512
+    assert kv.layer_cells(0, 32768, n_seq=2, n_ubatch=100) == 1280  # 2 * 512 + 100, padded to 256 cells
+    assert kv.layer_cells(0, 600) == 600  # never more than the context
+    assert kv.layer_cells(5, 32768) == 32768  # a global layer
+    assert kv.layer_cells(0, 32768, swa_full=True) == 32768
+
+
+def test_swa_shrinks_the_total(swa_model):
+    kv = KVCacheCalculator.from_model(swa_model)
+    per_cell = kv.layer_bytes(0, 1)
+    assert kv.total_bytes(32768, swa_full=True) == 12 * 32768 * per_cell
+    assert kv.total_bytes(32768) == (2 * 32768 + 10 * 1024) * per_cell
+
+
+def test_explicit_sliding_window_pattern_overrides_the_default():
+    reader = FakeReader('gemma3', 4, 256, 4, **{'attention.sliding_window': 128,
+                                                'attention.sliding_window_pattern': (True, False, False, True)})
+    kv = KVCacheCalculator(reader)
+    assert [kv.is_swa_layer(il) for il in range(4)] == [True, False, False, True]
+
+
+def test_scalar_sliding_window_pattern_is_a_period():
+    reader = FakeReader('unknown', 6, 256, 4, **{'attention.sliding_window': 128,
+                                                 'attention.sliding_window_pattern': 3})
+    kv = KVCacheCalculator(reader)
+    assert [il for il in range(6) if kv.is_swa_layer(il)] == [0, 1, 3, 4]
+
+
+def test_window_without_a_known_pattern_means_no_swa_layers():
+    kv = KVCacheCalculator(FakeReader('llama', 4, 256, 4, **{'attention.sliding_window': 128}))
+    assert kv.swa_layer_count == 0
+
+
+def test_per_layer_kv_head_counts():
+    # As in OpenELM; a layer without KV heads holds no cache.
+    reader = FakeReader('llama', 4, 256, 4, **{'attention.head_count_kv': (4, 2, 0, 1),
+                                               'attention.key_length': 64, 'attention.value_length': 32})
+    kv = KVCacheCalculator(reader)
+    per_head = 1024 * (64 * 2 + 32 * 2)
+    assert [kv.layer_bytes(il, 1024) for il in range(4)] == [4 * per_head, 2 * per_head, 0, per_head]
+    assert kv.head_count_kv(7) == 0  # beyond the listed layers
+
+
+@pytest.mark.parametrize('cache_type', ['f32', 'bf16', 'q5_1', 'iq4_nl'])
+def test_every_listed_cache_type_is_used(dense_model, cache_type):
+    kv = KVCacheCalculator.from_model(dense_model)
+    expected = int(4096 * DENSE_SPEC['n_head_kv'] * 64 * KV_CACHE_TYPE_SIZES[cache_type] * 2)
+    assert kv.layer_bytes(0, 4096, cache_type, cache_type) == expected
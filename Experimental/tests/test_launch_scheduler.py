@@ -0,0 +1,138 @@
+import pytest
+
+from Llamacpp_Model_launcher.core.launch_scheduler import LaunchScheduler, device_key
+
+
+def disk_of(path):
+    """Test files are named '<disk>/<model>'; 'missing/...' stands for a file that does not exist."""
+    disk = path.split('/')[0]
+    return None if disk == 'missing' else disk
+
+
+@pytest.fixture
+def started():
+    return []
+
+
+@pytest.fixture
+def scheduler():
+    return LaunchScheduler(device_of=disk_of)
+
+
+def _submit(scheduler, started, name, *files, **kwargs):
+    return scheduler.submit(name, list(files), lambda: started.append(name), **kwargs)
+
+
+def test_a_free_device_starts_at_once(scheduler, started):
+    assert _submit(scheduler, started, 'a', 'ssd/a.gguf')
+    assert started == ['a']
+    assert scheduler.waiting() == []
+
+
+def test_launches_on_one_device_wait_for_each_other(scheduler, started):
+    _submit(scheduler, started, 'a', 'ssd/a.gguf')
+    assert not _submit(scheduler, started, 'b', 'ssd/b.gguf')
+    assert scheduler.waiting() == ['b']
+    assert scheduler.blocking('b') == ['a']
+    scheduler.release('a')
+    assert started == ['a', 'b']
+    assert scheduler.waiting() == []
+
+
+def test_launches_on_different_devices_run_in_parallel(scheduler, started):
+    assert _submit(scheduler, started, 'a', 'ssd/a.gguf')
+    assert _submit(scheduler, started, 'b', 'hdd/b.gguf')
+    assert started == ['a', 'b']
+
+
+def test_a_split_model_holds_every_device_it_reads(scheduler, started):
+    _submit(scheduler, started, 'split', 'ssd/part1.gguf', 'hdd/part2.gguf')
+    assert not _submit(scheduler, started, 'a', 'ssd/a.gguf')
+    assert not _submit(scheduler, started, 'b', 'hdd/b.gguf')
+    scheduler.release('split')
+    assert started == ['split', 'a', 'b']
+
+
+def test_files_without_a_device_never_wait(scheduler, started):
+    _submit(scheduler, started, 'a', 'ssd/a.gguf')
+    assert _submit(scheduler, started, 'b', 'missing/b.gguf')
+
+
+def test_per_device_allows_that_many_concurrent_loads(started):
+    scheduler = LaunchScheduler(per_device=2, device_of=disk_of)
+    assert _submit(scheduler, started, 'a', 'ssd/a.gguf')
+    assert _submit(scheduler, started, 'b', 'ssd/b.gguf')
+    assert not _submit(scheduler, started, 'c', 'ssd/c.gguf')
+    assert scheduler.blocking('c') == ['a', 'b']
+    scheduler.release('b')
+    assert started == ['a', 'b', 'c']
+
+
+# --- priority ---
+
+def test_higher_priority_starts_first_then_submission_order(started):
+    scheduler = LaunchScheduler(priorities={'Big MoE': 10}, device_of=disk_of)
+    _submit(scheduler, started, 'holder', 'ssd/holder.gguf')
+    _submit(scheduler, started, 'low', 'ssd/low.gguf', priority=-1)
+    _submit(scheduler, started, 'first', 'ssd/first.gguf')
+    _submit(scheduler, started, 'big moe', 'ssd/big.gguf')  # priority names are case-insensitive
+    _submit(scheduler, started, 'second', 'ssd/second.gguf')
+    assert scheduler.waiting() == ['big moe', 'first', 'second', 'low']
+    for name in ['holder', 'big moe', 'first', 'second']:
+        scheduler.release(name)
+    assert started == ['holder', 'big moe', 'first', 'second', 'low']
+
+
+def test_a_blocked_high_priority_launch_does_not_hold_up_other_devices(scheduler, started):
+    _submit(scheduler, started, 'holder', 'ssd/holder.gguf')
+    _submit(scheduler, started, 'urgent', 'ssd/urgent.gguf', priority=5)
+    assert _submit(scheduler, started, 'other', 'hdd/other.gguf')
+    assert scheduler.waiting() == ['urgent']
+
+
+# --- release / cancel ---
+
+def test_cancel_removes_only_waiting_launches(scheduler, started):
+    _submit(scheduler, started, 'a', 'ssd/a.gguf')
+    _submit(scheduler, started, 'b', 'ssd/b.gguf')
+    assert not scheduler.cancel('a')
+    assert scheduler.cancel('b')
+    assert not scheduler.cancel('b')
+    scheduler.release('a')
+    assert started == ['a']
+
+
+def test_release_of_an_unknown_launch_is_ignored(scheduler, started):
+    _submit(scheduler, started, 'a', 'ssd/a.gguf')
+    _submit(scheduler, started, 'b', 'ssd/b.gguf')
+    scheduler.release('b')  # still waiting, holds nothing
+    scheduler.release('nobody')
+    assert started == ['a']
+
+
+def test_a_start_that_raises_releases_its_device(scheduler, started, capsys):
+    def broken():
+        raise OSError("executable not found")
+
+    scheduler.submit('broken', ['ssd/broken.gguf'], broken)
+    assert 'starting \'broken\' failed' in capsys.readouterr().out
+    assert _submit(scheduler, started, 'next', 'ssd/next.gguf')
+
+
+def test_a_waiting_start_that_raises_lets_the_next_one_run(scheduler, started):
+    def broken():
+        raise RuntimeError("boom")
+
+    _submit(scheduler, started, 'a', 'ssd/a.gguf')
+    scheduler.submit('broken', ['ssd/broken.gguf'], broken)
+    _submit(scheduler, started, 'c', 'ssd/c.gguf')
+    scheduler.release('a')
+    assert started == ['a', 'c']
+    assert scheduler.waiting() == []
+
+
+def test_device_key_of_a_missing_file_is_none(tmp_path):
+    existing = tmp_path / 'model.gguf'
+    existing.write_bytes(b'')
+    assert device_key(str(tmp_path / 'absent.gguf')) is None
+    assert device_key(str(existing)) == device_key(str(tmp_path))
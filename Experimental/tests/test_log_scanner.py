@@ -0,0 +1,139 @@
+import sys
+
+from Llamacpp_Model_launcher.core.log_scanner import (LogEventKind, LogScanner, Timing, find_devices,
+                                                       find_oom_error, pick_oom_error, scan_text)
+from Llamacpp_Model_launcher.core.server_backend import ServerProcess
+
+EVAL_LINE = "       eval time =    1000.00 ms /    50 tokens (   20.00 ms per token,    50.00 tokens per second)"
+PROMPT_LINE = "prompt eval time =     200.00 ms /   100 tokens (    2.00 ms per token,   500.00 tokens per second)"
+TOTAL_LINE = "      total time =    1200.00 ms /   150 tokens"
+IDLE_LINE = "srv  update_slots: all slots are idle"
+
+
+def _feed_all(scanner, chunks):
+    events = []
+    for chunk in chunks:
+        events.extend(scanner.feed(chunk)[1])
+    return events + scanner.flush()[1]
+
+
+def _kinds(events):
+    return [event.kind for event in events]
+
+
+# --- chunk boundaries ---
+
+def test_a_line_split_across_reads_is_scanned_once_complete():
+    scanner = LogScanner()
+    text, events = scanner.feed(b"srv  update_slots: all slots")
+    assert text == "srv  update_slots: all slots"
+    assert events == []
+    _, events = scanner.feed(b" are idle\n")
+    assert _kinds(events) == [LogEventKind.IDLE]
+    assert events[0].line == IDLE_LINE
+
+
+def test_a_character_split_across_reads_is_decoded_intact():
+    line = "Device 0: NVIDIA GeForce RTX 4090 – édition, compute capability 8.9\n".encode('utf-8')
+    split = line.index('–'.encode('utf-8')) + 1
+    scanner = LogScanner()
+    first, _ = scanner.feed(line[:split])
+    second, events = scanner.feed(line[split:])
+    assert '�' not in first + second
+    assert events[0].value == {'id': 0, 'name': "NVIDIA GeForce RTX 4090 – édition"}
+
+
+def test_byte_at_a_time_feeding_matches_whole_text():
+    data = "\n".join([PROMPT_LINE, EVAL_LINE, TOTAL_LINE, IDLE_LINE, ""]).encode('utf-8')
+    assert _feed_all(LogScanner(), [data[i:i + 1] for i in range(len(data))]) == scan_text(data.decode('utf-8'))
+
+
+def test_windows_line_endings_are_stripped():
+    events = _feed_all(LogScanner(), [(IDLE_LINE + "\r\n").encode('utf-8')])
+    assert events[0].line == IDLE_LINE
+
+
+def test_flush_scans_the_unterminated_last_line():
+    scanner = LogScanner()
+    assert scanner.feed(IDLE_LINE.encode('utf-8'))[1] == []
+    assert _kinds(scanner.flush()[1]) == [LogEventKind.IDLE]
+    assert scanner.flush()[1] == []
+
+
+# --- events ---
+
+def test_timing_lines():
+    events = scan_text("\n".join([PROMPT_LINE, EVAL_LINE, TOTAL_LINE]))
+    assert _kinds(events) == [LogEventKind.PROMPT_TIMING, LogEventKind.EVAL_TIMING, LogEventKind.TOTAL_TIMING]
+    assert events[0].value == Timing(200.0, 100, 500.0)
+    assert events[1].value == Timing(1000.0, 50, 50.0)
+    assert events[2].value == Timing(1200.0, 150, 125.0)
+
+
+def test_a_zero_time_one_token_eval_is_a_soft_failure():
+    line = "       eval time =       0.00 ms /     1 tokens (    0.00 ms per token,      inf tokens per second)"
+    assert LogEventKind.SOFT_FAILURE in _kinds(scan_text(line))
+
+
+def test_layer_count_and_model_loaded():
+    events = scan_text("print_info: n_layer          = 48\nmain: model loaded\n")
+    assert [(e.kind, e.value) for e in events] == [(LogEventKind.LAYER_COUNT, 48), (LogEventKind.MODEL_LOADED, None)]
+
+
+def test_find_devices_keeps_the_first_report_of_each_id():
+    text = ("  Device 0: NVIDIA GeForce RTX 3090, compute capability 8.6, VMM: yes\n"
+            "  Device 1: NVIDIA GeForce RTX 3060, compute capability 8.6, VMM: yes\n"
+            "  Device 0: NVIDIA GeForce RTX 3090, compute capability 8.6, VMM: yes\n")
+    assert find_devices(text) == [{'id': 0, 'name': 'NVIDIA GeForce RTX 3090'},
+                                  {'id': 1, 'name': 'NVIDIA GeForce RTX 3060'}]
+
+
+# --- out of memory ---
+
+def test_failed_allocation_carries_its_size_and_device():
+    line = "ggml_backend_cuda_buffer_type_alloc_buffer: allocating 1536.00 MiB on device 1: cudaMalloc failed: out of memory"
+    assert find_oom_error(line) == {'type': 'oom', 'size_mib': 1536.0, 'device_id': 1}
+
+
+def test_cuda_error_takes_the_device_from_a_later_line_in_a_later_read():
+    scanner = LogScanner()
+    events = _feed_all(scanner, [b"CUDA error: out of memory\n  current dev", b"ice: 2, in function alloc\n"])
+    assert [e.value for e in events] == [{'type': 'oom', 'size_mib': 0.0, 'device_id': 2}]
+
+
+def test_current_device_without_a_cuda_error_is_ignored():
+    assert scan_text("ggml_cuda_init: current device: 0\n") == []
+
+
+def test_cuda_error_reports_the_device_only_once():
+    text = "CUDA error: out of memory\ncurrent device: 0\ncurrent device: 0\n"
+    assert len(scan_text(text)) == 1
+
+
+def test_pick_oom_error_prefers_a_sized_allocation():
+    bare = {'type': 'oom', 'size_mib': 0.0, 'device_id': 0}
+    sized = {'type': 'oom', 'size_mib': 512.0, 'device_id': 1}
+    assert pick_oom_error([bare, sized]) is sized
+    assert pick_oom_error([bare]) is bare
+    assert pick_oom_error([]) is None
+
+
+# --- ServerProcess event indices ---
+
+def test_wait_for_ignores_events_before_start():
+    # An idle line printed during the load must not count as the end of a later request.
+    script = ("import sys, time\n"
+              f"print({IDLE_LINE!r}, flush=True)\n"
+              "time.sleep(0.3)\n"
+              f"print({EVAL_LINE!r}, flush=True)\n"
+              f"print({IDLE_LINE!r}, flush=True)\n")
+    server = ServerProcess([sys.executable, '-c', script], cwd=None)
+    try:
+        first = server.wait_for_index((LogEventKind.IDLE,), timeout=10)
+        assert first == 0
+        answered = server.wait_for_index((LogEventKind.EVAL_TIMING,), timeout=10, start=first + 1)
+        assert answered == 1
+        assert server.wait_for_index((LogEventKind.IDLE,), timeout=10, start=answered + 1) == 2
+        assert server.wait_for(LogEventKind.IDLE, timeout=10, start=3) is None  # the output ended
+    finally:
+        server.stop(timeout=5)
@@ -0,0 +1,164 @@
+import pytest
+
+from Llamacpp_Model_launcher.core.memory_planner import DEVICE_OVERHEAD_BYTES, GIB, MemoryPlanner, PlanError
+
+
+@pytest.fixture
+def dense(dense_model):
+    return MemoryPlanner.from_model(dense_model)
+
+
+@pytest.fixture
+def moe(moe_model):
+    return MemoryPlanner.from_model(moe_model)
+
+
+def _weights(planner):
+    return sum(planner.block_dense_bytes) + sum(planner.block_expert_bytes)
+
+
+def _kv(planner, params):
+    options = planner.options_from_params(params)
+    return sum(planner.kv_bytes_per_layer(il, options) for il in range(planner.n_layer))
+
+
+# --- place ---
+
+def test_place_without_offload_keeps_everything_on_the_host(dense):
+    placement = dense.place({'-ngl': '0'})
+    assert placement['devices'] == {0: 0}
+    assert placement['output_device'] is None
+    assert placement['host'] == dense.input_bytes + _weights(dense) + dense.output_bytes + _kv(dense, {'-ngl': '0'})
+
+
+def test_place_full_offload_leaves_only_the_input_layer_on_the_host(dense):
+    params = {'-ngl': '99'}
+    placement = dense.place(params)
+    assert placement['host'] == dense.input_bytes
+    assert placement['devices'][0] == _weights(dense) + dense.output_bytes + _kv(dense, params)
+    assert placement['kv_devices'][0] == _kv(dense, params)
+    assert placement['output_device'] == 0
+
+
+def test_place_offloads_the_last_layers_first(dense):
+    placement = dense.place({'-ngl': '2'})
+    # Layers 2 and 3 go to the GPU; the output layer would be the next one and stays on the CPU.
+    assert placement['output_device'] is None
+    assert placement['devices'][0] == sum(dense.block_dense_bytes[2:]) + placement['kv_devices'][0]
+    assert placement['kv_devices'][0] == 2 * dense.kv_bytes_per_layer(0, placement['options'])
+
+
+def test_place_non_numeric_ngl_offloads_everything(dense):
+    assert dense.place({'-ngl': 'all'})['devices'] == dense.place({'-ngl': '99'})['devices']
+
+
+def test_place_follows_the_tensor_split(dense):
+    placement = dense.place({'-ngl': '99', '-ts': '3,1'}, n_devices=2)
+    per_layer = dense.block_dense_bytes[0] + dense.kv_bytes_per_layer(0, placement['options'])
+    # Five offloaded layers at positions 0, 0.2, ... 0.8 against split points 0.75 and 1.0.
+    assert placement['devices'] == {0: 4 * per_layer, 1: dense.output_bytes}
+    assert placement['output_device'] == 1
+
+
+def test_place_splits_by_free_memory_without_ts(dense):
+    placement = dense.place({'-ngl': '99'}, n_devices=2, free_bytes={0: 1 * GIB, 1: 4 * GIB})
+    per_layer = dense.block_dense_bytes[0] + dense.kv_bytes_per_layer(0, placement['options'])
+    assert placement['devices'][0] == per_layer
+    assert placement['devices'][1] == 3 * per_layer + dense.output_bytes
+
+
+def test_place_split_mode_none_uses_the_main_gpu(dense):
+    placement = dense.place({'-ngl': '99', '-sm': 'none', '-mg': '1'}, n_devices=2)
+    assert placement['devices'][0] == 0
+    assert placement['output_device'] == 1
+
+
+def test_place_ncmoe_keeps_expert_weights_of_the_first_layers_on_the_host(moe):
+    full = moe.place({'-ngl': '99'})
+    partial = moe.place({'-ngl': '99', '-ncmoe': '3'})
+    moved = sum(moe.block_expert_bytes[:3])
+    assert moved > 0
+    assert partial['devices'][0] == full['devices'][0] - moved
+    assert partial['host'] == full['host'] + moved
+    assert moe.place({'-ngl': '99', '-cmoe': None})['host'] == full['host'] + sum(moe.block_expert_bytes)
+
+
+def test_place_no_kv_offload_keeps_the_cache_on_the_host(dense):
+    params = {'-ngl': '99', '-nkvo': None}
+    placement = dense.place(params)
+    assert placement['kv_devices'][0] == 0
+    assert placement['kv_host'] == _kv(dense, params)
+    assert placement['host'] == dense.input_bytes + _kv(dense, params)
+
+
+# --- predict / fits ---
+
+def test_predict_adds_overhead_only_to_devices_in_use(dense):
+    params = {'-ngl': '99', '-ts': '1,0'}
+    placement = dense.place(params, n_devices=2)
+    prediction = dense.predict(params, n_devices=2)
+    assert prediction['devices'][1] == 0
+    compute = dense.compute_buffer_bytes(4096, 512, True, holds_output=True)
+    assert prediction['devices'][0] == placement['devices'][0] + DEVICE_OVERHEAD_BYTES + compute
+
+
+def test_fits_compares_against_free_memory_minus_headroom(dense):
+    params = {'-ngl': '99'}
+    needed = dense.predict(params)['devices'][0]
+    assert dense.fits(params, {0: needed}, headroom_bytes=0)
+    assert not dense.fits(params, {0: needed - 1}, headroom_bytes=0)
+    assert not dense.fits(params, {0: needed}, headroom_bytes=1)
+
+
+def test_max_ngl_is_the_largest_layer_count_that_fits(dense):
+    free = {0: dense.predict({'-ngl': '3'})['devices'][0]}
+    assert dense.max_ngl({}, free, headroom_bytes=0) == 3
+
+
+def test_plan_layer_split_fills_devices_in_order(dense):
+    counts = dense.plan_layer_split({}, {0: 8 * GIB, 1: 8 * GIB}, ngl=5)
+    assert counts == [5, 0]
+    assert dense.plan_layer_split({}, {0: 0, 1: 0}, ngl=5) is None
+
+
+# --- flash attention (llama.cpp's default is '-fa auto') ---
+
+@pytest.mark.parametrize('params, expected', [
+    ({'-ngl': '99'}, True),                   # absent means auto: on with GPU layers
+    ({'-ngl': '0'}, False),                   # ... and off on the CPU
+    ({}, False),
+    ({'-ngl': '99', '-fa': 'auto'}, True),
+    ({'-ngl': '0', '-fa': 'auto'}, False),
+    ({'-ngl': '0', '-fa': None}, True),       # bare -fa, the older boolean form
+    ({'-ngl': '0', '--flash-attn': None}, True),
+    ({'-ngl': '0', '-fa': 'on'}, True),
+    ({'-ngl': '99', '-fa': 'off'}, False),
+    ({'-ngl': '99', '-fa': '0'}, False),
+])
+def test_flash_attention_option(dense, params, expected):
+    assert dense.options_from_params(params)['flash_attn'] is expected
+
+
+def test_flash_attention_follows_an_explicit_gpu_offload(dense):
+    assert dense.options_from_params({}, gpu_offload=True)['flash_attn'] is True
+    assert dense.options_from_params({'-ngl': '99'}, gpu_offload=False)['flash_attn'] is False
+
+
+def test_flash_attention_drops_the_attention_buffer(dense):
+    with_fa = dense.predict({'-ngl': '99', '-fa': 'on'})['devices'][0]
+    without_fa = dense.predict({'-ngl': '99', '-fa': 'off'})['devices'][0]
+    assert without_fa - with_fa == 512 * 4096 * dense.n_head * 4
+
+
+# --- malformed parameters ---
+
+@pytest.mark.parametrize('ts_value', ['3,', 'a,b', '1;2'])
+def test_malformed_tensor_split_raises_plan_error(dense, ts_value):
+    with pytest.raises(PlanError, match='Invalid tensor split'):
+        dense.predict({'-ngl': '99', '-ts': ts_value}, n_devices=2)
+
+
+def test_slash_separated_tensor_split_is_accepted(dense):
+    params = {'-ngl': '99'}
+    assert (dense.place({**params, '-ts': '3/1'}, n_devices=2)['devices'] ==
+            dense.place({**params, '-ts': '3,1'}, n_devices=2)['devices'])
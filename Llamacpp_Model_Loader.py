@@ -6,11 +6,12 @@ import tempfile
 import webbrowser
 import shlex
 import re
+import time
 from collections import defaultdict
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout,
     QComboBox, QPushButton, QLabel, QTextEdit, QFileDialog, QMessageBox,
-    QCheckBox, QSplitter, QScrollArea, QFormLayout, QLineEdit, QFrame, QStackedWidget
+    QCheckBox, QSplitter, QScrollArea, QFormLayout, QLineEdit, QFrame, QStackedWidget, QPlainTextEdit
 )
 from PyQt6.QtCore import QProcess, Qt, QTimer
 from PyQt6.QtGui import QFont, QPalette, QColor, QIcon
@@ -19,6 +20,52 @@ from PyQt6.QtGui import QFont, QPalette, QColor, QIcon
 from parameters_db import LLAMA_CPP_PARAMETERS, HELP_DOCUMENTATION
 
 
+# Lines kept in the output view; the full output of each run is also written to OUTPUT_LOG_DIR.
+OUTPUT_MAX_LINES = 5000
+OUTPUT_LOG_DIR = 'logs'
+
+
+class OutputConsole(QPlainTextEdit):
+    """Read-only output view that keeps only the last lines on screen and spills everything to a log file."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setFont(QFont('Courier', 10))
+        self.setMaximumBlockCount(OUTPUT_MAX_LINES)
+        self.log_file = None
+
+    def append(self, text):
+        bar = self.verticalScrollBar()
+        pinned = bar.value() >= bar.maximum() - 2
+        self.appendPlainText(text)
+        self.write_log(text if text.endswith('\n') else text + '\n')
+        if pinned: bar.setValue(bar.maximum())
+
+    def write_log(self, text):
+        try:
+            if self.log_file is None:
+                os.makedirs(OUTPUT_LOG_DIR, exist_ok=True)
+                log_path = os.path.join(OUTPUT_LOG_DIR, f"server-output-{time.strftime('%Y%m%d-%H%M%S')}.log")
+                self.log_file = open(log_path, 'a', encoding='utf-8')
+            self.log_file.write(text)
+            self.log_file.flush()
+        except OSError:
+            self.close_log()
+
+    def close_log(self):
+        if self.log_file:
+            try:
+                self.log_file.close()
+            except OSError:
+                pass
+        self.log_file = None
+
+    def clear(self):
+        super().clear()
+        self.close_log()
+
+
 class LlamaCppGUI(QWidget):
     def __init__(self):
         super().__init__()
@@ -112,9 +159,7 @@ class LlamaCppGUI(QWidget):
         controls_layout.addWidget(self.help_button)
         controls_layout.addWidget(self.exit_button)
         self.view_stack = QStackedWidget()
-        self.output_viewer = QTextEdit()
-        self.output_viewer.setReadOnly(True)
-        self.output_viewer.setFont(QFont('Courier', 10))
+        self.output_viewer = OutputConsole()
 
         self.parameter_browser = self.create_parameter_browser()
 
@@ -837,7 +882,6 @@ class LlamaCppGUI(QWidget):
         text_to_append = self.output_buffer;
         self.output_buffer = ""
         self.output_viewer.append(text_to_append)
-        self.output_viewer.verticalScrollBar().setValue(self.output_viewer.verticalScrollBar().maximum())
         success_phrases = ["server is listening on", "server listening at", "http server listening at"]
         if self.status_label.text() == 'Status: Loading...' and any(
                 p in text_to_append.lower() for p in success_phrases):
@@ -863,7 +907,6 @@ class LlamaCppGUI(QWidget):
     def process_finished(self):
         self.flush_output_buffer()
         self.output_viewer.append("\n" + "=" * 80 + f"\n--- Process Finished ---")
-        self.output_viewer.verticalScrollBar().setValue(self.output_viewer.verticalScrollBar().maximum())
         if self.temp_batch_file and os.path.exists(self.temp_batch_file):
             try:
                 os.remove(self.temp_batch_file);
@@ -925,6 +968,7 @@ class LlamaCppGUI(QWidget):
                 return
 
         self.unload_model()
+        self.output_viewer.close_log()
         event.accept()
 
     def get_server_address_from_command(self):